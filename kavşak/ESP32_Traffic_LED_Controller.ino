@@ -19,6 +19,7 @@
  * - POST /led/off - LED'i söndür (yeşil ışık - ambulans geçiyor)
  * - POST /ambulance/green - Ambulans yeşil ışık sinyali
  * - POST /ambulance/normal - Normal trafik durumu
+ * - POST /batch - Toplu sinyal: {"signals":[{"tls":"0","signal":"green"|"normal"}, ...]}
  * 
  * Kullanım:
  * SUMO runner.py otomatik olarak bu ESP32'ye sinyal gönderecek
@@ -177,6 +178,7 @@ void setupHTTPEndpoints() {
   // Ambulans Sinyalleri (SUMO'dan gelecek)
   server.on("/ambulance/green", HTTP_POST, handleAmbulanceGreen);   // Ambulans yeşil ışık
   server.on("/ambulance/normal", HTTP_POST, handleAmbulanceNormal); // Normal trafik
+  server.on("/batch", HTTP_POST, handleBatch);                      // Aynı adımdaki toplu sinyaller
   
   // Sistem Durumu
   server.on("/status", HTTP_GET, handleStatus);
@@ -311,6 +313,32 @@ void handleAmbulanceNormal() {
   Serial.println("📡 SUMO Signal: Normal traffic resumed");
 }
 
+void handleBatch() {
+  // SUMO'dan aynı simülasyon adımındaki sinyaller tek istekte gelir (sırayla uygulanır)
+  DynamicJsonDocument doc(1024);
+  DeserializationError error = deserializeJson(doc, server.arg("plain"));
+  if (error) {
+    server.send(400, "application/json", "{\"status\":\"error\",\"message\":\"invalid json\"}");
+    return;
+  }
+  
+  int applied = 0;
+  for (JsonObject signal : doc["signals"].as<JsonArray>()) {
+    const char* type = signal["signal"] | "";
+    if (strcmp(type, "green") == 0) {
+      setAmbulanceGreenLight();
+      applied++;
+    } else if (strcmp(type, "normal") == 0) {
+      setNormalTraffic();
+      applied++;
+    }
+  }
+  
+  String response = "{\"status\":\"ok\",\"applied\":" + String(applied) + "}";
+  server.send(200, "application/json", response);
+  Serial.printf("📡 SUMO Batch: %d sinyal uygulandı\n", applied);
+}
+
 // ================================
 // TRAFIK KONTROL FONKSİYONLARI
 // ================================
@@ -1,34 +1,410 @@
-import xml.etree.ElementTree as ET
-import math
-
-tree = ET.parse('gps-data-2.gpx')
-root = tree.getroot()
-coordinates = []
-
-for trkpt in root.findall('.//trkpt'):
-    lat = float(trkpt.get('lat'))
-    lon = float(trkpt.get('lon'))
-    coordinates.append((lat, lon))
-
-if coordinates:
-    lats = [coord[0] for coord in coordinates]
-    lons = [coord[1] for coord in coordinates]
-    
-    lat_min, lat_max = min(lats), max(lats)
-    lon_min, lon_max = min(lons), max(lons)
-    
-    print(f'GPS Koordinat Aralığı:')
-    print(f'  Latitude:  {lat_min:.8f} - {lat_max:.8f} (Fark: {lat_max-lat_min:.8f})')
-    print(f'  Longitude: {lon_min:.8f} - {lon_max:.8f} (Fark: {lon_max-lon_min:.8f})')
-    print(f'  Toplam nokta: {len(coordinates)}')
-    print(f'  İlk 10 nokta:')
-    for i, coord in enumerate(coordinates[:10]):
-        print(f'    {i+1}: Lat={coord[0]:.8f}, Lon={coord[1]:.8f}')
-        
-    # Mesafe hesaplaması (metre cinsinden)
-    lat_distance = (lat_max - lat_min) * 111000  # 1 derece ≈ 111km
-    lon_distance = (lon_max - lon_min) * 111000 * abs(math.cos(math.radians((lat_min + lat_max)/2)))
-    
-    print(f'\nGerçek mesafe aralığı:')
-    print(f'  Latitude farkı: {lat_distance:.2f} metre')
-    print(f'  Longitude farkı: {lon_distance:.2f} metre')
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GPX Analizi - SUMO GPS Ambulans Projesi
+Bu script GPX izlerinin koordinat aralığını ve kalitesini raporlar. Tek dosya
+verilirse (veya hiç argüman yoksa gps-data-2.gpx) ayrıntılı rapor basar;
+dizin, glob veya çok sayıda dosya verilirse izleri bir süreç havuzunda
+paralel analiz eder ve dosya başına + toplu istatistikleri JSON/CSV yazar:
+
+  - koordinat aralığı (enlem/boylam min-max, metre cinsinden genişlik)
+  - gerçek yol uzunluğu (ardışık noktalar arası haversine toplamı)
+  - tekrar oranı (bir öncekiyle aynı koordinattaki noktalar)
+  - örnekleme aralığı histogramı (<time> etiketi olan izlerde)
+  - tahmini konum gürültüsü (metre)
+  - hız dağılımı (histogram, p50/p90/p95, max)
+
+Dosyalar ET.iterparse ile akış halinde okunur (GPX ad alanı olsa da olmasa
+da trkpt'ler bulunur); nokta saklanmaz, bellek izin uzunluğundan bağımsızdır.
+
+Gürültü, ardışık üç noktanın ikinci farkından tahmin edilir: sabit hızlı
+harekette ikinci fark sıfırdır, σ gürültüde her eksende varyansı 6σ²'dir;
+büyüklüğünün medyanı (Rayleigh) σ·√(12 ln 2) olduğundan σ = medyan / √(12 ln 2).
+
+Kullanım:
+    python analyze_gps.py                                   # gps-data-2.gpx raporu
+    python analyze_gps.py gps-data.gpx
+    python analyze_gps.py tracks/ "kayitlar/**/*.gpx" --workers 8 --json gpx.json --csv gpx.csv
+"""
+
+import csv
+import glob
+import json
+import math
+import multiprocessing
+import optparse
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+from gps_replay import GPX_DEFAULT_INTERVAL, _parse_gpx_time
+from trajectory_stats import P2Quantile
+
+DEFAULT_GPX = 'gps-data-2.gpx'
+EARTH_RADIUS = 6371000.0      # metre
+METERS_PER_DEGREE = 111000    # 1 derece ≈ 111km (kaba aralık hesabı)
+NOISE_SCALE = math.sqrt(12 * math.log(2))
+SPEED_QUANTILES = (0.5, 0.9, 0.95)
+
+# Histogram sınırları: [a, b) aralıkları, son kova b=sonsuz
+INTERVAL_BINS = (0.0, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)     # saniye
+SPEED_BINS = (0.0, 0.5, 2.0, 5.0, 10.0, 20.0, 30.0, 50.0)       # m/s
+
+FILE_FIELDS = ['file', 'points', 'timed', 'lat_min', 'lat_max', 'lon_min', 'lon_max',
+               'lat_span_m', 'lon_span_m', 'path_length', 'duration', 'duplicates',
+               'duplicate_ratio', 'noise_m', 'mean_speed', 'p50_speed', 'p90_speed', 'p95_speed',
+               'max_speed', 'interval_histogram', 'speed_histogram', 'error']
+
+
+def bin_labels(edges):
+    """Histogram kova adları: '0-0.5', ..., '60+'"""
+    labels = [f"{a:g}-{b:g}" for a, b in zip(edges, edges[1:])]
+    return labels + [f"{edges[-1]:g}+"]
+
+
+def _bin_index(edges, value):
+    index = 0
+    while index + 1 < len(edges) and value >= edges[index + 1]:
+        index += 1
+    return index
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """İki nokta arası büyük daire mesafesi (metre)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+# ================================
+# AKIŞ ANALİZİ
+# ================================
+
+def iter_trackpoints(source):
+    """
+    GPX içindeki trkpt'leri (lat, lon, zaman veya None) olarak sırayla ver
+
+    Ad alanı yok sayılır; her eleman kapandığında temizlenip ebeveyninden
+    ayrılır. Yalnızca kökü temizlemek yetmez: ayrıştırıcı açık <trkseg>'e
+    eklemeye devam eder ve bellek nokta sayısıyla büyür.
+    """
+    parents = []
+    timestamp = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        tag = elem.tag.rsplit('}', 1)[-1]
+        if event == 'start':
+            parents.append(elem)
+            if tag == 'trkpt':  # <metadata><time> noktaya ait değil
+                timestamp = None
+            continue
+        parents.pop()
+        if tag == 'time' and elem.text:
+            timestamp = _parse_gpx_time(elem.text)
+        elif tag == 'trkpt':
+            yield float(elem.get('lat')), float(elem.get('lon')), timestamp
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+
+class TrackStats:
+    """Tek bir GPX izinin akış istatistikleri"""
+
+    def __init__(self, keep_points=0):
+        self.points = 0
+        self.timed = 0
+        self.lat_min = self.lon_min = math.inf
+        self.lat_max = self.lon_max = -math.inf
+        self.path_length = 0.0
+        self.duration = 0.0
+        self.duplicates = 0
+        self.max_speed = 0.0
+        self.interval_histogram = [0] * len(INTERVAL_BINS)
+        self.speed_histogram = [0] * len(SPEED_BINS)
+        self.speed_quantiles = {p: P2Quantile(p) for p in SPEED_QUANTILES}
+        self.noise = P2Quantile(0.5)
+        self.first_points = []       # rapor için ilk keep_points nokta
+        self._keep_points = keep_points
+        self._origin = None
+        self._prev = None            # (lat, lon, zaman)
+        self._prev_xy = None
+        self._prev_delta = None
+
+    def add(self, lat, lon, timestamp=None):
+        self.points += 1
+        if len(self.first_points) < self._keep_points:
+            self.first_points.append((lat, lon))
+        self.lat_min, self.lat_max = min(self.lat_min, lat), max(self.lat_max, lat)
+        self.lon_min, self.lon_max = min(self.lon_min, lon), max(self.lon_max, lon)
+        if timestamp is not None:
+            self.timed += 1
+
+        # Gürültü için yerel düzlem (ilk noktaya göre metre)
+        if self._origin is None:
+            self._origin = (lat, lon, math.cos(math.radians(lat)))
+        lat0, lon0, cos0 = self._origin
+        xy = ((lon - lon0) * cos0 * EARTH_RADIUS * math.pi / 180,
+              (lat - lat0) * EARTH_RADIUS * math.pi / 180)
+
+        prev = self._prev
+        self._prev = (lat, lon, timestamp)
+        if prev is None:
+            self._prev_xy = xy
+            return
+
+        if (lat, lon) == prev[:2]:
+            self.duplicates += 1
+        distance = haversine(prev[0], prev[1], lat, lon)
+        self.path_length += distance
+
+        delta = (xy[0] - self._prev_xy[0], xy[1] - self._prev_xy[1])
+        if self._prev_delta is not None:
+            self.noise.add(math.hypot(delta[0] - self._prev_delta[0], delta[1] - self._prev_delta[1]))
+        self._prev_xy, self._prev_delta = xy, delta
+
+        # Zaman etiketi yoksa runner/replay gibi GPX_DEFAULT_INTERVAL varsayılır
+        if timestamp is not None and prev[2] is not None:
+            dt = timestamp - prev[2]
+            self.interval_histogram[_bin_index(INTERVAL_BINS, dt)] += 1
+        else:
+            dt = GPX_DEFAULT_INTERVAL
+        if dt <= 0:
+            return
+        self.duration += dt
+        speed = distance / dt
+        self.max_speed = max(self.max_speed, speed)
+        self.speed_histogram[_bin_index(SPEED_BINS, speed)] += 1
+        for quantile in self.speed_quantiles.values():
+            quantile.add(speed)
+
+    def summary(self):
+        """JSON/CSV için sözlük"""
+        empty = self.points == 0
+        mid_lat = (self.lat_min + self.lat_max) / 2 if not empty else 0.0
+        summary = {
+            'points': self.points,
+            'timed': self.timed == self.points and not empty,
+            'lat_min': None if empty else self.lat_min,
+            'lat_max': None if empty else self.lat_max,
+            'lon_min': None if empty else self.lon_min,
+            'lon_max': None if empty else self.lon_max,
+            'lat_span_m': 0.0 if empty else (self.lat_max - self.lat_min) * METERS_PER_DEGREE,
+            'lon_span_m': 0.0 if empty else ((self.lon_max - self.lon_min) * METERS_PER_DEGREE *
+                                             abs(math.cos(math.radians(mid_lat)))),
+            'path_length': self.path_length,
+            'duration': self.duration,
+            'duplicates': self.duplicates,
+            'duplicate_ratio': self.duplicates / self.points if self.points else 0.0,
+            'noise_m': self.noise.value() / NOISE_SCALE,
+            'mean_speed': self.path_length / self.duration if self.duration > 0 else math.nan,
+            'max_speed': self.max_speed,
+            'interval_histogram': dict(zip(bin_labels(INTERVAL_BINS), self.interval_histogram)),
+            'speed_histogram': dict(zip(bin_labels(SPEED_BINS), self.speed_histogram)),
+        }
+        for p, quantile in self.speed_quantiles.items():
+            summary[f"p{int(p * 100)}_speed"] = quantile.value()
+        return summary
+
+
+def analyze_file(path, keep_points=0):
+    """
+    Tek bir GPX dosyasını analiz et
+
+    Returns:
+        (TrackStats, hata metni); ayrıştırma hatasında o ana kadar okunanlar döner
+    """
+    stats = TrackStats(keep_points)
+    error = ''
+    try:
+        for lat, lon, timestamp in iter_trackpoints(path):
+            stats.add(lat, lon, timestamp)
+    except (ET.ParseError, OSError, TypeError, ValueError) as e:
+        error = f"{type(e).__name__}: {e}"
+    return stats, error
+
+
+def _analyze_task(path):
+    stats, error = analyze_file(path)
+    return dict({'file': path}, **stats.summary(), error=error)
+
+
+# ================================
+# TOPLU ANALİZ
+# ================================
+
+def expand_inputs(inputs):
+    """Dosya, dizin (alt dizinler dahil *.gpx) ve glob girdilerini sıralı dosya listesine çevir"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, '**', '*.gpx'), recursive=True)
+        elif os.path.exists(item):
+            matches = [item]
+        else:
+            matches = glob.glob(item, recursive=True)
+        files.extend(sorted(m for m in matches if os.path.isfile(m)))
+    # Aynı dosya birden fazla girdiyle eşleşebilir
+    return list(dict.fromkeys(files))
+
+
+def analyze_files(files, workers=None, chunksize=16):
+    """
+    Dosyaları süreç havuzunda analiz et; özetleri bittikçe üret (sıra garanti değil)
+
+    Her işçi dosyayı akış halinde okur ve yalnızca küçük bir özet döndürür.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        for path in files:
+            yield _analyze_task(path)
+        return
+    # spawn: scenario_farm ile aynı, işçiler ana sürecin durumunu devralmasın
+    with multiprocessing.get_context("spawn").Pool(processes=workers) as pool:
+        yield from pool.imap_unordered(_analyze_task, files, chunksize=chunksize)
+
+
+def aggregate(summaries):
+    """Dosya özetlerinden toplu istatistik (histogramlar toplanır, gürültü dosya medyanı)"""
+    total = {
+        'files': 0, 'failed': 0, 'points': 0, 'path_length': 0.0, 'duration': 0.0, 'duplicates': 0,
+        'lat_min': None, 'lat_max': None, 'lon_min': None, 'lon_max': None, 'max_speed': 0.0,
+        'interval_histogram': dict.fromkeys(bin_labels(INTERVAL_BINS), 0),
+        'speed_histogram': dict.fromkeys(bin_labels(SPEED_BINS), 0),
+    }
+    noises = []
+    for summary in summaries:
+        total['files'] += 1
+        total['failed'] += bool(summary['error'])
+        for key in ('points', 'path_length', 'duration', 'duplicates'):
+            total[key] += summary[key]
+        for key, pick in (('lat_min', min), ('lon_min', min), ('lat_max', max), ('lon_max', max)):
+            if summary[key] is not None:
+                total[key] = summary[key] if total[key] is None else pick(total[key], summary[key])
+        total['max_speed'] = max(total['max_speed'], summary['max_speed'])
+        for key in ('interval_histogram', 'speed_histogram'):
+            for label, count in summary[key].items():
+                total[key][label] += count
+        if not math.isnan(summary['noise_m']):
+            noises.append(summary['noise_m'])
+
+    noises.sort()
+    total['duplicate_ratio'] = total['duplicates'] / total['points'] if total['points'] else 0.0
+    total['mean_speed'] = total['path_length'] / total['duration'] if total['duration'] > 0 else math.nan
+    total['median_noise_m'] = noises[len(noises) // 2] if noises else math.nan
+    return total
+
+
+def _json_value(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def write_json(path, summaries, total):
+    data = {'files': [{k: _json_value(v) for k, v in s.items()} for s in summaries],
+            'aggregate': {k: _json_value(v) for k, v in total.items()}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def write_csv(path, summaries):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FILE_FIELDS)
+        writer.writeheader()
+        for summary in summaries:
+            row = {k: _json_value(v) for k, v in summary.items()}
+            for key in ('interval_histogram', 'speed_histogram'):
+                row[key] = json.dumps(summary[key])
+            writer.writerow(row)
+
+
+# ================================
+# RAPOR
+# ================================
+
+def print_report(stats, error=''):
+    """Tek dosya için ayrıntılı rapor"""
+    summary = stats.summary()
+    if error:
+        print(f'❌ {error}')
+    if not stats.points:
+        print('GPS noktası bulunamadı')
+        return
+
+    print('GPS Koordinat Aralığı:')
+    print(f'  Latitude:  {stats.lat_min:.8f} - {stats.lat_max:.8f} (Fark: {stats.lat_max-stats.lat_min:.8f})')
+    print(f'  Longitude: {stats.lon_min:.8f} - {stats.lon_max:.8f} (Fark: {stats.lon_max-stats.lon_min:.8f})')
+    print(f'  Toplam nokta: {stats.points}')
+    print('  İlk 10 nokta:')
+    for i, coord in enumerate(stats.first_points[:10]):
+        print(f'    {i+1}: Lat={coord[0]:.8f}, Lon={coord[1]:.8f}')
+
+    # Mesafe hesaplaması (metre cinsinden)
+    print('\nGerçek mesafe aralığı:')
+    print(f'  Latitude farkı: {summary["lat_span_m"]:.2f} metre')
+    print(f'  Longitude farkı: {summary["lon_span_m"]:.2f} metre')
+
+    print('\nİz kalitesi:')
+    print(f'  Yol uzunluğu: {summary["path_length"]:.2f} metre')
+    print(f'  Tekrar eden nokta: {summary["duplicates"]} (%{summary["duplicate_ratio"] * 100:.1f})')
+    print(f'  Tahmini gürültü: {summary["noise_m"]:.2f} metre')
+    interval = '<time> etiketinden' if summary['timed'] else f'varsayılan {GPX_DEFAULT_INTERVAL:g} s aralıkla'
+    print(f'  Hız ({interval}): p50 {summary["p50_speed"]:.2f}, p95 {summary["p95_speed"]:.2f}, '
+          f'max {summary["max_speed"]:.2f} m/s')
+    if summary['timed']:
+        print('  Örnekleme aralığı (s): ' + ', '.join(
+            f'{label}: {count}' for label, count in summary['interval_histogram'].items() if count))
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options] [gpx_file|directory|glob ...]")
+    optParser.add_option("--workers", type="int", default=0,
+                         help="number of parallel worker processes (0 = all cores)")
+    optParser.add_option("--json", type="string", default=None,
+                         help="write per-file and aggregate statistics to this JSON file")
+    optParser.add_option("--csv", type="string", default=None,
+                         help="write per-file statistics to this CSV file")
+    options, inputs = optParser.parse_args(args=args)
+    if options.workers < 0:
+        optParser.error("--workers must be >= 0")
+    options.inputs = inputs or [DEFAULT_GPX]
+    return options
+
+
+def main(args=None):
+    options = get_options(args)
+    files = expand_inputs(options.inputs)
+    if not files:
+        print(f"❌ GPX dosyası bulunamadı: {', '.join(options.inputs)}")
+        return 1
+
+    if len(files) == 1 and not (options.json or options.csv):
+        stats, error = analyze_file(files[0], keep_points=10)
+        print_report(stats, error)
+        return 1 if error else 0
+
+    summaries = []
+    for summary in analyze_files(files, options.workers):
+        summaries.append(summary)
+        if len(summaries) % 1000 == 0:
+            print(f"   {len(summaries)}/{len(files)} dosya")
+    summaries.sort(key=lambda s: s['file'])
+    total = aggregate(summaries)
+
+    print(f"📊 {total['files']} dosya, {total['points']} nokta, "
+          f"toplam yol {total['path_length'] / 1000:.2f} km, tekrar %{total['duplicate_ratio'] * 100:.1f}, "
+          f"gürültü medyanı {total['median_noise_m']:.2f} m")
+    if total['failed']:
+        print(f"❌ {total['failed']} dosya okunamadı")
+    if options.json:
+        write_json(options.json, summaries, total)
+        print(f"💾 JSON: {options.json}")
+    if options.csv:
+        write_csv(options.csv, summaries)
+        print(f"💾 CSV: {options.csv}")
+    return 1 if total['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Uçtan Uca Simülasyon Benchmark - SUMO GPS Ambulans Projesi
+Bu script runner.py'yi başsız (sumo, GUI yok) ve sabit tohumla her senaryo
+için N kez ayrı bir süreçte çalıştırır ve şunları raporlar:
+  - duvar saati süresi ve adım/saniye
+  - TraCI çağrı sayısı
+  - tepe bellek kullanımı (runner ve SUMO süreci ayrı ayrı)
+  - ambulans seyahat süresi (ilk ve son GPS güncellemesi arası, simülasyon saniyesi)
+
+Senaryolar:
+  file             - gps-data-2.gpx, sadece ambulans
+  file_background  - gps-data-2.gpx + data/downtown.rou.xml arka plan trafiği
+
+libsumo'da SUMO runner süreci içinde çalıştığından sumo_peak_rss_mb boştur,
+SUMO belleği peak_rss_mb'ye dahildir.
+
+Her çalıştırma depoyu kirletmemek için data/ ve GPX dosyasının kopyalandığı
+geçici bir dizinde yapılır. GPS kaynağı soruları --non-interactive ile atlanır.
+
+Kullanım:
+    python bench_e2e.py                                  # her senaryo 3 kez, SUMO ile
+    python bench_e2e.py --runs 5 --output e2e.json
+    python bench_e2e.py --traci-backend fake             # SUMO olmadan (FakeTraCI)
+    python bench_e2e.py --traci-backend libsumo --baseline-backend sumo
+                                                         # libsumo ile soket TraCI'yi karşılaştır
+    python bench_e2e.py --compare e2e_eski.json          # önceki raporla karşılaştır
+"""
+
+import collections
+import json
+import optparse
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GPX_FILE = "gps-data-2.gpx"
+DEFAULT_RUNS = 3
+DEFAULT_SEED = 42
+DEFAULT_TIMEOUT = 900  # saniye, tek çalıştırma için
+DEFAULT_LED_IP = "127.0.0.1:9"  # kapalı port: LED istekleri anında başarısız olur
+
+# senaryo adı -> runner.py'ye eklenecek argümanlar
+SCENARIOS = collections.OrderedDict([
+    ('file', []),
+    ('file_background', ['--background-traffic', os.path.join('data', 'downtown.rou.xml')]),
+])
+
+# Özetlenen ölçümler
+METRICS = ('wall_time', 'steps_per_second', 'traci_calls', 'peak_rss_mb',
+           'sumo_peak_rss_mb', 'ambulance_travel_time')
+
+# Çağrıları sayılan TraCI alanları (traci.vehicle.getIDList gibi)
+TRACI_DOMAINS = ('vehicle', 'trafficlight', 'inductionloop', 'simulation',
+                 'lane', 'edge', 'route', 'person', 'poi', 'polygon', 'gui')
+
+
+# ================================
+# TRACI ÇAĞRI SAYACI
+# ================================
+
+class _CountingDomain:
+    """traci.<alan> nesnesini sarar, her fonksiyon çağrısını sayar"""
+
+    def __init__(self, counter, domain):
+        self._counter = counter
+        self._domain = domain
+        self._cache = {}
+
+    def __getattr__(self, name):
+        wrapper = self._cache.get(name)
+        if wrapper is None:
+            attr = getattr(self._domain, name)
+            if not callable(attr):
+                return attr
+            counter = self._counter
+
+            def wrapper(*args, **kwargs):
+                counter.calls += 1
+                return attr(*args, **kwargs)
+            self._cache[name] = wrapper
+        return wrapper
+
+
+class CountingTraCI:
+    """
+    TraCI bağlantısını (traci Connection veya FakeTraCI) saran sayaç
+
+    runner.main(wrap_backend=...) ile simülasyonun bağlantısına takılır;
+    davranışı değiştirmez, sadece toplam çağrı sayısını (calls) tutar.
+    """
+
+    def __init__(self, backend):
+        self._backend = backend
+        self._domains = {}
+        self.calls = 0
+
+    def __getattr__(self, name):
+        if name in TRACI_DOMAINS:
+            domain = self._domains.get(name)
+            if domain is None:
+                domain = self._domains[name] = _CountingDomain(self, getattr(self._backend, name))
+            return domain
+        attr = getattr(self._backend, name)
+        if callable(attr) and not isinstance(attr, type):
+            def wrapper(*args, **kwargs):
+                self.calls += 1
+                return attr(*args, **kwargs)
+            return wrapper
+        return attr
+
+
+# ================================
+# ÇOCUK SÜREÇ
+# ================================
+
+def peak_rss_mb(who):
+    """getrusage ile tepe RSS (MB); Linux'ta ru_maxrss KB, macOS'ta bayttır"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":
+        return rss / (1024.0 * 1024.0)
+    return rss / 1024.0
+
+
+def prepare_workdir(workdir, tracks=(GPX_FILE,)):
+    """data/ dizinini ve GPX kayıtlarını geçici çalışma dizinine kopyala"""
+    shutil.copytree(os.path.join(BASE_DIR, "data"), os.path.join(workdir, "data"))
+    for track in tracks:
+        shutil.copy(os.path.join(BASE_DIR, track), os.path.join(workdir, os.path.basename(track)))
+
+
+def runner_args(scenario, seed, backend, led_ip):
+    return (["--nogui", "--gps-source", "file", "--non-interactive",
+             "--seed", str(seed), "--traci-backend", backend, "--led-ip", led_ip]
+            + SCENARIOS[scenario])
+
+
+def run_child(scenario, seed, backend, led_ip, result_path):
+    """
+    Tek bir senaryoyu bu süreçte çalıştır ve sonucu JSON'a yaz
+
+    Çalışma dizini (cwd) çağıran tarafından hazırlanmış olmalıdır.
+    """
+    sys.path.insert(0, BASE_DIR)
+    import runner
+
+    counter = {}
+
+    def wrap(connection):
+        counter['traci'] = CountingTraCI(connection)
+        return counter['traci']
+
+    options = runner.get_options(runner_args(scenario, seed, backend, led_ip))
+    started = time.perf_counter()
+    stats = runner.main(options, wrap_backend=wrap)
+    total_time = time.perf_counter() - started
+    # libsumo kullanılamadıysa runner soket TraCI'ye düşer
+    backend = options.traci_backend
+    separate_sumo = backend == "sumo" and resource is not None
+
+    result = {
+        'scenario': scenario,
+        'seed': seed,
+        'backend': backend,
+        'steps': stats['steps'],
+        'wall_time': stats['wall_time'],
+        'total_time': total_time,
+        'steps_per_second': stats['steps'] / stats['wall_time'] if stats['wall_time'] else None,
+        'traci_calls': counter['traci'].calls,
+        'peak_rss_mb': peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        'sumo_peak_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN) if separate_sumo else None,
+        'ambulance_travel_time': stats['ambulance_travel_time'],
+    }
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+# ================================
+# ANA SÜREÇ
+# ================================
+
+def run_scenario_once(scenario, seed, backend, led_ip=DEFAULT_LED_IP, timeout=DEFAULT_TIMEOUT):
+    """Senaryoyu yeni bir Python sürecinde geçici dizinde çalıştır, sonuç sözlüğünü döndür"""
+    with tempfile.TemporaryDirectory(prefix="bench_e2e_") as workdir:
+        prepare_workdir(workdir)
+        result_path = os.path.join(workdir, "result.json")
+        log_path = os.path.join(workdir, "runner.log")
+        cmd = [sys.executable, os.path.abspath(__file__), "--child",
+               "--scenarios", scenario, "--seed", str(seed),
+               "--traci-backend", backend, "--led-ip", led_ip, "--output", result_path]
+
+        env = dict(os.environ, PYTHONIOENCODING="utf-8")
+        with open(log_path, 'w', encoding='utf-8') as log:
+            proc = subprocess.run(cmd, cwd=workdir, stdin=subprocess.DEVNULL,
+                                  stdout=log, stderr=subprocess.STDOUT,
+                                  env=env, timeout=timeout)
+
+        if proc.returncode != 0 or not os.path.exists(result_path):
+            with open(log_path, encoding='utf-8', errors='replace') as log:
+                tail = log.readlines()[-20:]
+            raise RuntimeError(f"{scenario} çalıştırması başarısız (çıkış kodu {proc.returncode}):\n"
+                               + "".join(tail))
+        with open(result_path, encoding='utf-8') as f:
+            return json.load(f)
+
+
+def summarize(runs):
+    """Her ölçüm için ortalama/min/maks/standart sapma"""
+    summary = {}
+    for metric in METRICS:
+        values = [r[metric] for r in runs if r.get(metric) is not None]
+        if not values:
+            summary[metric] = None
+            continue
+        summary[metric] = {
+            'mean': statistics.mean(values),
+            'min': min(values),
+            'max': max(values),
+            'stdev': statistics.stdev(values) if len(values) > 1 else 0.0,
+        }
+    return summary
+
+
+def run_benchmarks(scenarios, runs=DEFAULT_RUNS, seed=DEFAULT_SEED, backend="sumo",
+                   led_ip=DEFAULT_LED_IP, verbose=True):
+    """Her senaryoyu runs kez çalıştır ve {'senaryo': {'runs': [...], 'summary': {...}}} döndür"""
+    results = collections.OrderedDict()
+    for scenario in scenarios:
+        scenario_runs = []
+        for i in range(runs):
+            result = run_scenario_once(scenario, seed, backend, led_ip)
+            scenario_runs.append(result)
+            if verbose:
+                print(f"⏱️ {scenario:<16} #{i + 1}: {result['wall_time']:.2f} s, "
+                      f"{result['steps_per_second']:.0f} adım/s, "
+                      f"{result['traci_calls']} TraCI çağrısı, "
+                      f"ambulans {format_value(result['ambulance_travel_time'], 's')}")
+        results[scenario] = {'runs': scenario_runs, 'summary': summarize(scenario_runs)}
+    return results
+
+
+def format_value(value, unit=""):
+    if value is None:
+        return "-"
+    return f"{value:.1f}{unit}" if isinstance(value, float) else f"{value}{unit}"
+
+
+def build_report(results, options, backend=None):
+    return {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': backend or options.traci_backend,
+            'seed': options.seed,
+            'runs': options.runs,
+        },
+        'scenarios': results,
+    }
+
+
+def print_report(report):
+    print("\n" + "=" * 60)
+    print(f"🚑 UÇTAN UCA BENCHMARK ({report['meta']['backend']}, tohum {report['meta']['seed']})")
+    print("=" * 60)
+    for scenario, data in report['scenarios'].items():
+        print(f"\n📋 {scenario} ({len(data['runs'])} çalıştırma)")
+        for metric in METRICS:
+            stats = data['summary'][metric]
+            if stats is None:
+                print(f"   {metric:<22} -")
+                continue
+            print(f"   {metric:<22} ort {stats['mean']:>10.2f}  min {stats['min']:>10.2f}  "
+                  f"maks {stats['max']:>10.2f}")
+
+
+def compare_reports(report, previous):
+    """
+    İki raporu senaryo bazında karşılaştır
+
+    Returns:
+        [(senaryo, ölçüm, önceki ortalama, güncel ortalama, oran), ...]
+    """
+    rows = []
+    for scenario, data in report['scenarios'].items():
+        old = previous.get('scenarios', {}).get(scenario)
+        if old is None:
+            continue
+        for metric in METRICS:
+            new_stats = data['summary'].get(metric)
+            old_stats = old['summary'].get(metric)
+            if not new_stats or not old_stats:
+                continue
+            ratio = new_stats['mean'] / old_stats['mean'] if old_stats['mean'] else None
+            rows.append((scenario, metric, old_stats['mean'], new_stats['mean'], ratio))
+    return rows
+
+
+def print_comparison(title, rows):
+    print(f"\n📊 Karşılaştırma: {title}")
+    for scenario, metric, old, new, ratio in rows:
+        change = f"x{ratio:.2f}" if ratio is not None else "-"
+        print(f"   {scenario:<16} {metric:<22} {old:>10.2f} -> {new:>10.2f} ({change})")
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options]")
+    optParser.add_option("--runs", type="int", default=DEFAULT_RUNS,
+                         help="Runs per scenario (default: 3)")
+    optParser.add_option("--scenarios", type="string", default=",".join(SCENARIOS),
+                         help="Comma separated scenarios (default: %s)" % ",".join(SCENARIOS))
+    optParser.add_option("--seed", type="int", default=DEFAULT_SEED,
+                         help="Random seed passed to SUMO (default: 42)")
+    optParser.add_option("--traci-backend", type="choice", choices=["sumo", "fake"], default="sumo",
+                         help="TraCI backend for runner.py (default: sumo)")
+    optParser.add_option("--baseline-backend", type="choice", choices=["sumo", "libsumo", "fake"],
+                         default=None,
+                         help="Also run the scenarios with this backend and compare against it")
+    optParser.add_option("--led-ip", type="string", default=DEFAULT_LED_IP,
+                         help="LED controller address given to runner.py (default: closed local port)")
+    optParser.add_option("--output", type="string", default=None,
+                         help="Write the JSON report to this file")
+    optParser.add_option("--compare", type="string", default=None,
+                         help="Previous JSON report to compare against")
+    optParser.add_option("--child", action="store_true", default=False,
+                         help=optparse.SUPPRESS_HELP)
+    options, _ = optParser.parse_args(args)
+
+    unknown = [s for s in options.scenarios.split(',') if s not in SCENARIOS]
+    if unknown:
+        optParser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    return options
+
+
+def main(args=None):
+    options = get_options(args)
+    scenarios = options.scenarios.split(',')
+
+    if options.child:
+        run_child(scenarios[0], options.seed, options.traci_backend, options.led_ip, options.output)
+        return 0
+
+    baseline = None
+    if options.baseline_backend:
+        print(f"🧪 Referans arka uç: {options.baseline_backend}")
+        baseline_results = run_benchmarks(scenarios, options.runs, options.seed,
+                                          options.baseline_backend, options.led_ip)
+        baseline = build_report(baseline_results, options, options.baseline_backend)
+        print_report(baseline)
+
+    print(f"🧪 Uçtan uca benchmark - senaryolar: {scenarios}, {options.runs} çalıştırma, "
+          f"arka uç: {options.traci_backend}")
+    results = run_benchmarks(scenarios, options.runs, options.seed, options.traci_backend, options.led_ip)
+    report = build_report(results, options)
+    print_report(report)
+    if baseline is not None:
+        report['baseline'] = baseline
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Rapor kaydedildi: {options.output}")
+
+    if baseline is not None:
+        print_comparison(f"{options.baseline_backend} -> {options.traci_backend}",
+                         compare_reports(report, baseline))
+
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        print_comparison(options.compare, compare_reports(report, previous))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
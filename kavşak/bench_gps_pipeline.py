@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GPS Hattı Mikro Benchmark - SUMO GPS Ambulans Projesi
+Bu script runner.py'deki sıcak GPS fonksiyonlarını (parse_gps_data,
+filter_gps_noise, calculate_gps_distance, gps_to_sumo_coords,
+add_position_to_table, export_position_table_to_csv) depodaki GPX/CSV
+kayıtları ve 10^3-10^7 noktalık sentetik izler üzerinde ölçer.
+
+Sonuçlar JSON olarak yazılır; kayıtlı bir taban çizgisi (baseline) ile
+karşılaştırılır ve eşik aşılırsa çıkış kodu 1 olur.
+
+Kullanım:
+    python bench_gps_pipeline.py                               # 10^3-10^5, baseline ile karşılaştır
+    python bench_gps_pipeline.py --sizes 1000,10000000         # büyük izler
+    python bench_gps_pipeline.py --threshold 0.5 --output r.json
+    python bench_gps_pipeline.py --save-baseline               # baseline'ı güncelle
+    python bench_gps_pipeline.py --only add_position_to_table --save-baseline   # sadece bu satırlar
+"""
+
+import contextlib
+import csv
+import gc
+import glob
+import json
+import math
+import optparse
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import runner
+from simulation_context import new_gps_history
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "data", "bench_baseline.json")
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_THRESHOLD = 0.5  # %50'den fazla yavaşlama regresyon sayılır (makine gürültüsü payı)
+REPO_DATASET = "repo"
+MIN_SAMPLE_TIME = 0.05  # saniye
+
+# gps-data-2.gpx çevresinde sentetik iz
+TRACK_ORIGIN = (36.91973, 30.67373)
+
+
+# ================================
+# VERİ SETLERİ
+# ================================
+
+def synthetic_track(size, seed=42):
+    """1 Hz, ~1.5 m/s yürüyüş + gürültü içeren sentetik iz: [(lat, lon, t), ...]"""
+    rng = random.Random(seed)
+    lat, lon = TRACK_ORIGIN
+    track = []
+    for i in range(size):
+        lat += 1.0e-5 * rng.uniform(-0.2, 1.0) + rng.gauss(0, 2e-6)
+        lon += 1.0e-5 * rng.uniform(-0.2, 1.0) + rng.gauss(0, 2e-6)
+        track.append((lat, lon, float(i)))
+    return track
+
+
+def repo_track():
+    """Depodaki ambulance_positions_*.csv kayıtlarının birleşimi"""
+    track = []
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, "ambulance_positions_*.csv"))):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                track.append((float(row['gps_lat']), float(row['gps_lon']), float(len(track))))
+    return track
+
+
+def write_gpx(track, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<gpx version="1.1" creator="bench" xmlns="http://www.topografix.com/GPX/1/1">\n'
+                '<trk><trkseg>\n')
+        for lat, lon, _ in track:
+            f.write(f'<trkpt lat="{lat:.8f}" lon="{lon:.8f}"><ele>0</ele></trkpt>\n')
+        f.write('</trkseg></trk>\n</gpx>\n')
+
+
+# ================================
+# BENCHMARKLAR
+# ================================
+
+def _reset_filter():
+    runner.default_context.gps_history = new_gps_history()
+
+
+def bench_parse_gps_data(ctx):
+    runner.parse_gps_data(ctx['gpx_path'])
+
+
+def bench_filter_gps_noise(ctx):
+    _reset_filter()
+    filter_gps_noise = runner.filter_gps_noise
+    for lat, lon, t in ctx['track']:
+        filter_gps_noise(lat, lon, t)
+
+
+def bench_calculate_gps_distance(ctx):
+    distance = runner.calculate_gps_distance
+    track = ctx['track']
+    for (lat1, lon1, _), (lat2, lon2, _) in zip(track, track[1:]):
+        distance(lat1, lon1, lat2, lon2)
+
+
+def bench_gps_to_sumo_coords(ctx):
+    to_sumo = runner.gps_to_sumo_coords
+    for lat, lon, _ in ctx['track']:
+        to_sumo(lat, lon)
+
+
+def bench_add_position_to_table(ctx):
+    runner.default_context.trajectory.clear()
+    runner.default_context.trajectory_stats.clear()
+    add = runner.add_position_to_table
+    for step, (lat, lon, _) in enumerate(ctx['track']):
+        add("ambulance_gps_0", step, 200.0 + step * 0.01, 510.0, lat, lon)
+
+
+def setup_export(ctx):
+    runner.default_context.trajectory.clear()
+    runner.default_context.trajectory_stats.clear()
+    for step, (lat, lon, _) in enumerate(ctx['track']):
+        runner.add_position_to_table("ambulance_gps_0", step, 200.0 + step * 0.01, 510.0, lat, lon)
+
+
+def bench_export_position_table_to_csv(ctx):
+    with contextlib.ExitStack() as stack:
+        stack.callback(os.chdir, os.getcwd())
+        os.chdir(ctx['workdir'])
+        runner.export_position_table_to_csv()
+        for path in glob.glob("ambulance_positions_*.csv"):
+            os.remove(path)
+
+
+# (ad, ölçülen fonksiyon, hazırlık fonksiyonu)
+BENCHMARKS = (
+    ('parse_gps_data', bench_parse_gps_data, None),
+    ('filter_gps_noise', bench_filter_gps_noise, None),
+    ('calculate_gps_distance', bench_calculate_gps_distance, None),
+    ('gps_to_sumo_coords', bench_gps_to_sumo_coords, None),
+    ('add_position_to_table', bench_add_position_to_table, None),
+    ('export_position_table_to_csv', bench_export_position_table_to_csv, setup_export),
+)
+
+
+def time_benchmark(func, ctx, repeat, setup=None):
+    """
+    func(ctx)'i ölç (timeit gibi GC kapalı)
+
+    Kısa süren ölçümler gürültülü olduğundan her örnek en az MIN_SAMPLE_TIME
+    sürecek kadar tekrarlanır (timeit autorange). Çağrı başına saniye
+    cinsinden süreleri döndürür.
+    """
+    timings = []
+    gc_enabled = gc.isenabled()
+    number = None
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            while len(timings) < repeat:
+                elapsed = 0.0
+                gc.collect()
+                gc.disable()
+                try:
+                    for _ in range(number or 1):
+                        if setup is not None:
+                            setup(ctx)
+                        start = time.perf_counter()
+                        func(ctx)
+                        elapsed += time.perf_counter() - start
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+                if number is None:
+                    # İlk çalıştırma ısınma/kalibrasyon içindir
+                    number = max(1, math.ceil(MIN_SAMPLE_TIME / max(elapsed, 1e-9)))
+                    continue
+                timings.append(elapsed / number)
+    return timings
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=5, names=None, include_repo=True, verbose=True):
+    """Tüm benchmarkları çalıştır ve sonuç sözlüğünü döndür"""
+    results = {}
+    datasets = [(REPO_DATASET, repo_track())] if include_repo else []
+    datasets += [(str(size), None) for size in sizes]
+
+    with tempfile.TemporaryDirectory(prefix="bench_gps_") as workdir:
+        for label, track in datasets:
+            if track is None:
+                track = synthetic_track(int(label))
+            gpx_path = os.path.join(workdir, f"track_{label}.gpx")
+            write_gpx(track, gpx_path)
+            ctx = {'track': track, 'gpx_path': gpx_path, 'workdir': workdir}
+            runs = repeat if len(track) < 1000000 else 1
+
+            for name, func, setup in BENCHMARKS:
+                if names and name not in names:
+                    continue
+                timings = time_benchmark(func, ctx, runs, setup)
+                best = min(timings)
+                key = f"{name}/{label}"
+                results[key] = {
+                    'items': len(track),
+                    'repeat': runs,
+                    'seconds_min': best,
+                    'seconds_median': statistics.median(timings),
+                    'ns_per_item': best / max(len(track), 1) * 1e9,
+                }
+                if verbose:
+                    print(f"⏱️ {key:<42} {best * 1000:>10.2f} ms  {results[key]['ns_per_item']:>10.0f} ns/nokta")
+
+            runner.default_context.trajectory.clear()
+            runner.default_context.trajectory_stats.clear()
+            os.remove(gpx_path)
+    _reset_filter()
+    return results
+
+
+# ================================
+# BASELINE KARŞILAŞTIRMA
+# ================================
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Sonuçları baseline ile karşılaştır
+
+    Returns:
+        [(anahtar, baseline ns/nokta, güncel ns/nokta, oran), ...] - sadece eşiği aşanlar
+    """
+    regressions = []
+    for key, base in baseline.get('results', {}).items():
+        current = results.get(key)
+        if current is None or not base.get('ns_per_item'):
+            continue
+        ratio = current['ns_per_item'] / base['ns_per_item']
+        if ratio > 1.0 + threshold:
+            regressions.append((key, base['ns_per_item'], current['ns_per_item'], ratio))
+    return regressions
+
+
+def build_report(results):
+    return {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options]")
+    optParser.add_option("--sizes", type="string", default=",".join(str(s) for s in DEFAULT_SIZES),
+                         help="Comma separated synthetic track sizes (default: 1000,10000,100000)")
+    optParser.add_option("--repeat", type="int", default=5,
+                         help="Runs per benchmark, best is reported (default: 5, 1 for >=10^6 points)")
+    optParser.add_option("--only", type="string", default=None,
+                         help="Comma separated benchmark names to run")
+    optParser.add_option("--no-repo-data", action="store_true", default=False,
+                         help="Skip the repository GPX/CSV dataset")
+    optParser.add_option("--output", type="string", default=None,
+                         help="Write JSON results to this file")
+    optParser.add_option("--baseline", type="string", default=DEFAULT_BASELINE,
+                         help="Baseline JSON to compare against (default: data/bench_baseline.json)")
+    optParser.add_option("--threshold", type="float", default=DEFAULT_THRESHOLD,
+                         help="Allowed slowdown ratio before failing, e.g. 0.5 = 50%% (default: 0.5)")
+    optParser.add_option("--save-baseline", action="store_true", default=False,
+                         help="Write the results as the new baseline instead of comparing "
+                              "(with --only, replace just those entries)")
+    options, _ = optParser.parse_args(args)
+    return options
+
+
+def main(args=None):
+    options = get_options(args)
+    sizes = [int(float(s)) for s in options.sizes.split(',') if s.strip()]
+    names = set(options.only.split(',')) if options.only else None
+
+    print(f"🧪 GPS hattı benchmark - boyutlar: {sizes}")
+    results = run_benchmarks(sizes, options.repeat, names, not options.no_repo_data)
+    report = build_report(results)
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Sonuçlar kaydedildi: {options.output}")
+
+    if options.save_baseline:
+        if names and os.path.exists(options.baseline):
+            # Kısmi güncelleme: ölçülmeyen benchmark'ların kayıtlı değerleri korunur
+            with open(options.baseline, encoding='utf-8') as f:
+                previous = json.load(f)
+            report['results'] = dict(previous.get('results', {}), **results)
+        with open(options.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline güncellendi: {options.baseline}")
+        return 0
+
+    if not os.path.exists(options.baseline):
+        print(f"⚠️ Baseline bulunamadı: {options.baseline} (--save-baseline ile oluşturun)")
+        return 0
+
+    with open(options.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, options.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark eşiği aştı (+{options.threshold * 100:.0f}%):")
+        for key, base, current, ratio in regressions:
+            print(f"   {key}: {base:.0f} -> {current:.0f} ns/nokta (x{ratio:.2f})")
+        return 1
+    print(f"✅ Regresyon yok (eşik +{options.threshold * 100:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
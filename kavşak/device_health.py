@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cihaz Sağlık Durumu ve Devre Kesici - SUMO GPS Ambulans Projesi
+Bu modül ESP32 GPS ve LED kontrolcüleri için ortak sağlık durumunu tutar.
+Erişilemeyen bir cihaz için devre açılır; açıkken yapılan çağrılar ağa
+dokunmadan anında reddedilir, cihaz üstel geri çekilme (exponential
+backoff) ile planlanan tek bir deneme (probe) isteğiyle yoklanır.
+"""
+
+import threading
+import time
+
+CLOSED = 'closed'        # Normal çalışma, tüm istekler geçer
+OPEN = 'open'            # Cihaz çevrimdışı kabul edilir, istekler anında reddedilir
+HALF_OPEN = 'half_open'  # Tek bir deneme isteği uçuşta
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_BASE_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+DEFAULT_BACKOFF_FACTOR = 2.0
+
+
+class CircuitBreaker:
+    """
+    Kapalı / açık / yarı açık durumlu devre kesici
+
+    Art arda `failure_threshold` hata sonrası devre açılır. Açıkken
+    allow_request() hiçbir ağ işlemi yapmadan False döner. Geri çekilme süresi
+    dolunca bir deneme isteğine izin verilir (yarı açık); deneme başarılıysa
+    devre kapanır, başarısızsa geri çekilme süresi katlanarak devre yeniden
+    açılır.
+    """
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 base_backoff=DEFAULT_BASE_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR, clock=time.monotonic, verbose=True):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.backoff_factor = backoff_factor
+        self.clock = clock
+        self.verbose = verbose
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.current_backoff = base_backoff
+        self.next_probe_time = 0.0
+        self._probe_in_flight = False
+
+        # Önbelleğe alınmış sağlık bilgisi
+        self.last_success_time = None
+        self.last_failure_time = None
+        self.last_error = None
+
+        # İstatistikler
+        self.success_count = 0
+        self.failure_count = 0
+        self.rejected_count = 0
+        self.open_count = 0
+
+    def allow_request(self):
+        """İstek yapılabilir mi? Açık devrede ağa dokunmadan False döner"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and not self._probe_in_flight and self.clock() >= self.next_probe_time:
+                self.state = HALF_OPEN
+                self._probe_in_flight = True
+                return True
+            self.rejected_count += 1
+            return False
+
+    def record_success(self):
+        """Başarılı isteği kaydet"""
+        with self._lock:
+            was_open = self.state != CLOSED
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.current_backoff = self.base_backoff
+            self._probe_in_flight = False
+            self.last_success_time = self.clock()
+            self.success_count += 1
+        if was_open and self.verbose:
+            print(f"✅ {self.name}: cihaz tekrar erişilebilir - devre KAPALI")
+
+    def record_failure(self, error=None):
+        """Başarısız isteği kaydet; gerekirse devreyi aç"""
+        with self._lock:
+            now = self.clock()
+            self.consecutive_failures += 1
+            self.failure_count += 1
+            self.last_failure_time = now
+            self.last_error = str(error) if error is not None else None
+
+            if self.state == HALF_OPEN:
+                # Deneme başarısız: geri çekilmeyi katla
+                self.current_backoff = min(self.current_backoff * self.backoff_factor, self.max_backoff)
+            elif self.state == CLOSED and self.consecutive_failures < self.failure_threshold:
+                return
+            elif self.state == OPEN:
+                return
+
+            self.state = OPEN
+            self._probe_in_flight = False
+            self.next_probe_time = now + self.current_backoff
+            self.open_count += 1
+            backoff = self.current_backoff
+        if self.verbose:
+            print(f"🔌 {self.name}: cihaz erişilemez - devre AÇIK, {backoff:.1f}s sonra tekrar denenecek")
+
+    def is_available(self):
+        """Cihaz son bilinen duruma göre erişilebilir mi (deneme hakkı tüketmez)"""
+        with self._lock:
+            return self.state == CLOSED
+
+    def retry_after(self):
+        """Bir sonraki deneme isteğine kalan süre (saniye)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return 0.0
+            return max(0.0, self.next_probe_time - self.clock())
+
+    def reset(self):
+        """Devreyi kapalı duruma döndür"""
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.current_backoff = self.base_backoff
+            self._probe_in_flight = False
+
+    def get_stats(self):
+        """Sağlık durumu ve istatistikleri döndür"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'backoff': self.current_backoff,
+                'successes': self.success_count,
+                'failures': self.failure_count,
+                'rejected': self.rejected_count,
+                'opened': self.open_count,
+                'last_error': self.last_error,
+            }
+
+
+class DeviceHealthRegistry:
+    """Cihaz adına göre paylaşılan devre kesiciler"""
+
+    def __init__(self, **breaker_defaults):
+        self._lock = threading.Lock()
+        self._breakers = {}
+        self.breaker_defaults = breaker_defaults
+
+    def get(self, name, **overrides):
+        """Cihazın devre kesicisini döndür (yoksa oluştur)"""
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                options = dict(self.breaker_defaults)
+                options.update(overrides)
+                breaker = CircuitBreaker(name, **options)
+                self._breakers[name] = breaker
+            return breaker
+
+    def snapshot(self):
+        """Tüm cihazların sağlık durumunu döndür"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {b.name: b.get_stats() for b in breakers}
+
+    def clear(self):
+        with self._lock:
+            self._breakers.clear()
+
+
+# GPS client'ları ve LED sinyal yolu tarafından paylaşılan kayıt
+device_health = DeviceHealthRegistry()
@@ -0,0 +1,735 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ESP32 Cihaz Emülatörü - SUMO GPS Ambulans Projesi
+Bu modül ESP32 GPS firmware'inin HTTP API'sini (/gps, /status, /info,
+/command, /ambulance/*) ve ESP32_Traffic_LED_Controller.ino'nun LED
+endpoint'lerini localhost üzerinde taklit eder. Depodaki GPX dosyalarını ve
+kaydedilmiş ambulance_positions_*.csv dosyalarını ayarlanabilir hızda oynatır;
+gecikme, jitter, paket kaybı, geçersiz fix ve kesinti enjekte edilebilir.
+Donanım olmadan CI testi ve yük testi için kullanılır.
+"""
+
+import csv
+import json
+import math
+import optparse
+import os
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+GPX_NAMESPACE = '{http://www.topografix.com/GPX/1/1}'
+DEFAULT_FIX_INTERVAL = 1.0   # Zaman damgası olmayan kayıtlarda fix aralığı (saniye)
+DEFAULT_HANG_TIME = 30.0     # 'timeout' kesintisinde isteğin bekletileceği süre
+
+# Kesinti modları
+OUTAGE_TIMEOUT = 'timeout'   # İstek kabul edilir ama yanıt verilmez (client timeout'a düşer)
+OUTAGE_DROP = 'drop'         # Bağlantı yanıtsız kapatılır
+OUTAGE_REFUSE = 'refuse'     # Port kapatılır (connection refused)
+
+
+# ================================
+# KAYIT YÜKLEME
+# ================================
+
+def _parse_gpx_time(text):
+    """GPX <time> alanını epoch saniyeye çevir"""
+    text = text.strip().replace('Z', '+00:00')
+    return datetime.fromisoformat(text).timestamp()
+
+
+def load_gpx_track(gpx_file, interval=DEFAULT_FIX_INTERVAL):
+    """
+    GPX dosyasındaki trkpt'leri [(t, lat, lon, ele), ...] olarak oku
+
+    <time> alanı yoksa noktalar `interval` saniye aralıkla kabul edilir.
+    Namespace'li ve namespace'siz GPX dosyaları desteklenir.
+    """
+    points = []
+    t0 = None
+    for _, elem in ET.iterparse(gpx_file, events=('end',)):
+        if elem.tag not in (GPX_NAMESPACE + 'trkpt', 'trkpt'):
+            continue
+        lat = float(elem.get('lat'))
+        lon = float(elem.get('lon'))
+        ele_elem = elem.find(GPX_NAMESPACE + 'ele')
+        if ele_elem is None:
+            ele_elem = elem.find('ele')
+        time_elem = elem.find(GPX_NAMESPACE + 'time')
+        if time_elem is None:
+            time_elem = elem.find('time')
+
+        ele = float(ele_elem.text) if ele_elem is not None else 0.0
+        if time_elem is not None and time_elem.text:
+            stamp = _parse_gpx_time(time_elem.text)
+            if t0 is None:
+                t0 = stamp
+            t = stamp - t0
+        else:
+            t = len(points) * interval
+        points.append((t, lat, lon, ele))
+        elem.clear()
+    return points
+
+
+def load_position_csv(csv_file, vehicle_id=None, interval=DEFAULT_FIX_INTERVAL):
+    """ambulance_positions_*.csv kaydını [(t, lat, lon, ele), ...] olarak oku"""
+    points = []
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if vehicle_id and row['vehicle_id'] != vehicle_id:
+                continue
+            if 'sim_time' in row and row['sim_time'] not in (None, ''):
+                t = float(row['sim_time'])
+            else:
+                t = len(points) * interval
+            points.append((t, float(row['gps_lat']), float(row['gps_lon']), 0.0))
+    return points
+
+
+def load_track(path, interval=DEFAULT_FIX_INTERVAL):
+    """Dosya uzantısına göre GPX veya CSV kaydını yükle"""
+    if path.lower().endswith('.csv'):
+        return load_position_csv(path, interval=interval)
+    return load_gpx_track(path, interval=interval)
+
+
+def _distance_m(lat1, lon1, lat2, lon2):
+    """Kısa mesafeler için equirectangular yaklaşık mesafe (metre)"""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return 6371000.0 * math.hypot(x, y)
+
+
+def _bearing_deg(lat1, lon1, lat2, lon2):
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return math.degrees(math.atan2(x, y)) % 360.0
+
+
+class TrackPlayer:
+    """
+    Kayıtlı rotayı göreli zamanlamasıyla, hız çarpanı uygulayarak oynatır
+
+    speed=10 ise 10 saniyelik kayıt 1 saniyede oynatılır. loop=True iken
+    kayıt sonunda başa döner.
+    """
+
+    def __init__(self, points, speed=1.0, loop=True):
+        if not points:
+            raise ValueError("Boş GPS kaydı oynatılamaz")
+        if speed <= 0:
+            raise ValueError("Oynatma hızı pozitif olmalı")
+        self.points = points
+        self.times = [p[0] for p in points]
+        self.speed = speed
+        self.loop = loop
+
+        # Son noktadan sonra bir aralık daha bekleyip başa dön
+        if len(points) > 1:
+            self.period = self.times[-1] - self.times[0] + (self.times[-1] - self.times[-2])
+        else:
+            self.period = DEFAULT_FIX_INTERVAL
+
+    def index_at(self, elapsed):
+        """Gerçek geçen süreye (saniye) karşılık gelen kayıt indeksi"""
+        t = self.times[0] + elapsed * self.speed
+        if self.loop:
+            t = self.times[0] + (t - self.times[0]) % self.period
+        return max(0, bisect_right(self.times, t) - 1)
+
+    def fix_at(self, elapsed):
+        """(lat, lon, ele, hız km/h, yön derece) döndür"""
+        i = self.index_at(elapsed)
+        _, lat, lon, ele = self.points[i]
+        if i > 0:
+            t_prev, lat_prev, lon_prev, _ = self.points[i - 1]
+            dt = self.times[i] - t_prev
+            dist = _distance_m(lat_prev, lon_prev, lat, lon)
+            speed_kmh = dist / dt * 3.6 if dt > 0 else 0.0
+            course = _bearing_deg(lat_prev, lon_prev, lat, lon) if dist > 0 else 0.0
+        else:
+            speed_kmh = course = 0.0
+        return lat, lon, ele, speed_kmh, course
+
+
+# ================================
+# HTTP SUNUCU ALTYAPISI
+# ================================
+
+class _DeviceRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.device.handle_request(self, 'GET')
+
+    def do_POST(self):
+        self.server.device.handle_request(self, 'POST')
+
+    def log_message(self, format, *args):
+        pass  # Yük testlerinde konsolu boğmasın
+
+
+class EmulatedHTTPDevice:
+    """
+    Emüle edilen ESP32 HTTP cihazları için ortak altyapı
+
+    Her istek için gecikme + jitter uygulanır, `loss_rate` olasılıkla bağlantı
+    yanıtsız kapatılır (paket kaybı). go_offline/go_online ile testlerden
+    kesinti senaryoları yazılabilir. Alt sınıflar self.routes sözlüğüne
+    (method, path) -> handler(body) kaydı ekler; handler (status, content_type,
+    body) döndürür.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 loss_rate=0.0, seed=None, device_id="ESP32_EMU",
+                 hang_time=DEFAULT_HANG_TIME):
+        self.host = host
+        self.requested_port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.loss_rate = loss_rate
+        self.device_id = device_id
+        self.hang_time = hang_time
+        self.outage_mode = None
+        self._online_event = threading.Event()
+        self._online_event.set()
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.start_time = None
+        self.routes = {}
+
+        # İstatistikler
+        self.stats_lock = threading.Lock()
+        self.request_count = 0
+        self.dropped_count = 0
+
+    # ---- yaşam döngüsü ----
+
+    def start(self):
+        """HTTP sunucusunu arka plan thread'inde başlat"""
+        self._start_server(self.requested_port)
+        self.start_time = time.monotonic()
+        return self
+
+    def _start_server(self, port):
+        self._server = ThreadingHTTPServer((self.host, port), _DeviceRequestHandler)
+        self._server.daemon_threads = True
+        self._server.device = self
+        self.requested_port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.1}, daemon=True)
+        self._thread.start()
+
+    def _stop_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def stop(self):
+        """Sunucuyu durdur (bekletilen istekler de serbest bırakılır)"""
+        self._online_event.set()
+        self._stop_server()
+
+    def go_offline(self, mode=OUTAGE_TIMEOUT):
+        """
+        Kesinti başlat
+
+        Args:
+            mode: 'timeout' (yanıt yok, hang_time kadar bekletilir),
+                  'drop' (bağlantı kapatılır) veya 'refuse' (port kapanır)
+        """
+        if mode not in (OUTAGE_TIMEOUT, OUTAGE_DROP, OUTAGE_REFUSE):
+            raise ValueError(f"Bilinmeyen kesinti modu: {mode}")
+        self.outage_mode = mode
+        self._online_event.clear()
+        if mode == OUTAGE_REFUSE:
+            self._stop_server()
+
+    def go_online(self):
+        """Kesintiyi bitir; 'refuse' modunda sunucu aynı portta yeniden açılır"""
+        mode = self.outage_mode
+        self.outage_mode = None
+        self._online_event.set()
+        if mode == OUTAGE_REFUSE and self._server is None:
+            self._start_server(self.requested_port)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    @property
+    def port(self):
+        return self._server.server_address[1] if self._server else self.requested_port
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    def uptime_ms(self):
+        return int((time.monotonic() - self.start_time) * 1000) if self.start_time else 0
+
+    def random(self):
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _response_delay(self):
+        if self.latency <= 0 and self.jitter <= 0:
+            return 0.0
+        with self._rng_lock:
+            offset = self._rng.uniform(-self.jitter, self.jitter) if self.jitter > 0 else 0.0
+        return max(0.0, self.latency + offset)
+
+    # ---- istek işleme ----
+
+    def handle_request(self, handler, method):
+        path = urlsplit(handler.path).path
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+
+        with self.stats_lock:
+            self.request_count += 1
+
+        mode = self.outage_mode
+        if mode == OUTAGE_TIMEOUT:
+            # Kesinti bitene ya da hang_time dolana kadar yanıt verme
+            self._online_event.wait(self.hang_time)
+            handler.close_connection = True
+            with self.stats_lock:
+                self.dropped_count += 1
+            return
+        if mode == OUTAGE_DROP:
+            handler.close_connection = True
+            with self.stats_lock:
+                self.dropped_count += 1
+            return
+
+        if self.loss_rate > 0 and self.random() < self.loss_rate:
+            with self.stats_lock:
+                self.dropped_count += 1
+            handler.close_connection = True
+            return
+
+        delay = self._response_delay()
+        if delay > 0:
+            time.sleep(delay)
+
+        route = self.routes.get((method, path))
+        if route is None:
+            status, content_type, payload = 404, 'text/plain', 'Not found'
+        else:
+            status, content_type, payload = route(body)
+        self.on_request_handled(method, path, status, delay)
+
+        if not isinstance(payload, (bytes, bytearray)):
+            if content_type == 'application/json':
+                payload = json.dumps(payload)
+            payload = payload.encode('utf-8')
+
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def on_request_handled(self, method, path, status, delay):
+        """Alt sınıflar için kayıt kancası (yanıt gönderilmeden hemen önce)"""
+        pass
+
+    def get_stats(self):
+        with self.stats_lock:
+            return {
+                'device_id': self.device_id,
+                'address': self.address,
+                'requests': self.request_count,
+                'dropped': self.dropped_count,
+            }
+
+
+# ================================
+# GPS CİHAZI
+# ================================
+
+class EmulatedGPSDevice(EmulatedHTTPDevice):
+    """
+    ESP32 GPS firmware emülatörü (ESP32_GPS_Complete.ino / esp32_gps_server.ino)
+
+    Args:
+        track: [(t, lat, lon, ele), ...] kayıt noktaları (load_track ile)
+        speed (float): Oynatma hız çarpanı (1-100x)
+        invalid_rate (float): /gps yanıtlarının valid=false dönme olasılığı
+    """
+
+    def __init__(self, track, speed=1.0, invalid_rate=0.0, satellites=8, hdop=0.9,
+                 loop=True, **kwargs):
+        kwargs.setdefault('device_id', "ESP32_GPS_EMU")
+        super().__init__(**kwargs)
+        self.player = TrackPlayer(track, speed=speed, loop=loop)
+        self.invalid_rate = invalid_rate
+        self.satellites = satellites
+        self.hdop = hdop
+
+        self.ambulance_active = False
+        self.traffic_control_active = False
+        self.led_state = False
+        self.commands = []
+        self.gps_served = 0
+        self.invalid_served = 0
+
+        self.routes.update({
+            ('GET', '/'): self._handle_root,
+            ('GET', '/gps'): self._handle_gps,
+            ('GET', '/status'): self._handle_status,
+            ('GET', '/info'): self._handle_info,
+            ('POST', '/command'): self._handle_command,
+            ('GET', '/ambulance/status'): self._handle_ambulance_status,
+            ('POST', '/ambulance/activate'): self._handle_ambulance_activate,
+            ('POST', '/ambulance/deactivate'): self._handle_ambulance_deactivate,
+            ('POST', '/traffic/led'): self._handle_traffic_led,
+        })
+
+    def current_fix(self):
+        elapsed = time.monotonic() - self.start_time if self.start_time else 0.0
+        return self.player.fix_at(elapsed)
+
+    def _handle_root(self, body):
+        return 200, 'text/html', f"<html><body><h1>{self.device_id} (emulator)</h1></body></html>"
+
+    def _handle_gps(self, body):
+        lat, lon, ele, speed_kmh, course = self.current_fix()
+        valid = not (self.invalid_rate > 0 and self.random() < self.invalid_rate)
+        with self.stats_lock:
+            self.gps_served += 1
+            if not valid:
+                self.invalid_served += 1
+
+        now_ms = self.uptime_ms()
+        doc = {
+            'latitude': lat if valid else 0.0,
+            'longitude': lon if valid else 0.0,
+            'altitude': ele,
+            'speed': round(speed_kmh, 2),
+            'course': round(course, 2),
+            'satellites': self.satellites if valid else 0,
+            'hdop': self.hdop if valid else 99.99,
+            'valid': valid,
+            'timestamp': now_ms,
+            'last_update': now_ms,
+            'device_id': self.device_id,
+            'test_mode': False,
+        }
+        return 200, 'application/json', doc
+
+    def _handle_status(self, body):
+        doc = {
+            'status': 'running',
+            'device': self.device_id,
+            'device_id': self.device_id,
+            'gps_status': 'fix',
+            'wifi_signal': -55,
+            'wifi_connected': True,
+            'wifi_ip': self.host,
+            'wifi_rssi': -55,
+            'uptime': self.uptime_ms(),
+            'gps_valid': True,
+            'gps_satellites': self.satellites,
+            'free_heap': 200000,
+            'ambulance_active': self.ambulance_active,
+        }
+        return 200, 'application/json', doc
+
+    def _handle_info(self, body):
+        doc = {
+            'firmware': 'emulator-1.0',
+            'free_heap': 200000,
+            'uptime': self.uptime_ms(),
+            'wifi_ssid': 'localhost',
+            'device_id': self.device_id,
+            'replay_speed': self.player.speed,
+            'track_points': len(self.player.points),
+        }
+        return 200, 'application/json', doc
+
+    def _handle_command(self, body):
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            return 400, 'application/json', {'status': 'error', 'message': 'invalid json'}
+        command = data.get('command')
+        with self.stats_lock:
+            self.commands.append((time.time(), command, data))
+        if command == 'set_led':
+            self.led_state = bool(data.get('state'))
+        return 200, 'application/json', {'status': 'ok', 'command': command}
+
+    def _handle_ambulance_status(self, body):
+        return 200, 'application/json', {'active': self.ambulance_active,
+                                         'traffic_control': self.traffic_control_active}
+
+    def _handle_ambulance_activate(self, body):
+        self.ambulance_active = True
+        return 200, 'text/plain', "Ambulans aktif"
+
+    def _handle_ambulance_deactivate(self, body):
+        self.ambulance_active = False
+        self.traffic_control_active = False
+        return 200, 'text/plain', "Ambulans pasif"
+
+    def _handle_traffic_led(self, body):
+        command = body.decode('utf-8', 'replace').strip()
+        if command == 'ON':
+            self.traffic_control_active = True
+        elif command == 'OFF':
+            self.traffic_control_active = False
+        return 200, 'text/plain', "LED updated"
+
+    def get_stats(self):
+        stats = super().get_stats()
+        with self.stats_lock:
+            stats['gps_served'] = self.gps_served
+            stats['invalid_served'] = self.invalid_served
+        return stats
+
+
+# ================================
+# TRAFİK LED KONTROLCÜSÜ
+# ================================
+
+LEDCommand = namedtuple('LEDCommand', ['received_at', 'applied_at', 'wall_time',
+                                       'method', 'path', 'status', 'led_on'])
+
+
+class EmulatedLEDController(EmulatedHTTPDevice):
+    """
+    ESP32_Traffic_LED_Controller.ino emülatörü
+
+    Gelen her komut alınma ve uygulanma zamanı (time.monotonic) ile kaydedilir;
+    applied_at - received_at enjekte edilen gecikmeyi, istemcinin gönderme anı
+    ile applied_at farkı komut-LED gecikmesini verir.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('device_id', "ESP32_LED_EMU")
+        super().__init__(**kwargs)
+        self.traffic_light_red = True     # Kırmızı LED yanık (normal trafik)
+        self.ambulance_active = False
+        self.last_signal_time = None
+        self.commands = []
+        self._receive_times = threading.local()
+
+        self.routes.update({
+            ('GET', '/'): self._handle_root,
+            ('POST', '/led/on'): self._handle_led_on,
+            ('POST', '/led/off'): self._handle_led_off,
+            ('POST', '/ambulance/green'): self._handle_ambulance_green,
+            ('POST', '/ambulance/normal'): self._handle_ambulance_normal,
+            ('POST', '/batch'): self._handle_batch,
+            ('GET', '/status'): self._handle_status,
+        })
+
+    def handle_request(self, handler, method):
+        self._receive_times.value = time.monotonic()
+        super().handle_request(handler, method)
+
+    def on_request_handled(self, method, path, status, delay):
+        if method != 'POST':
+            return
+        now = time.monotonic()
+        command = LEDCommand(
+            received_at=getattr(self._receive_times, 'value', now),
+            applied_at=now,
+            wall_time=time.time(),
+            method=method,
+            path=path,
+            status=status,
+            led_on=self.traffic_light_red,
+        )
+        with self.stats_lock:
+            self.commands.append(command)
+
+    @property
+    def led_on(self):
+        """Kırmızı LED yanıyor mu"""
+        return self.traffic_light_red
+
+    def get_commands(self, path=None):
+        """Kaydedilen komutları (opsiyonel olarak path'e göre) döndür"""
+        with self.stats_lock:
+            commands = list(self.commands)
+        if path is not None:
+            commands = [c for c in commands if c.path == path]
+        return commands
+
+    def clear_commands(self):
+        with self.stats_lock:
+            self.commands.clear()
+
+    def _set_state(self, red, ambulance=None):
+        self.traffic_light_red = red
+        if ambulance is not None:
+            self.ambulance_active = ambulance
+        self.last_signal_time = time.monotonic()
+
+    def _handle_root(self, body):
+        state = "KIRMIZI" if self.traffic_light_red else "YEŞİL"
+        return 200, 'text/html', f"<html><body><h1>{self.device_id} (emulator): {state}</h1></body></html>"
+
+    def _handle_led_on(self, body):
+        self._set_state(True)
+        return 200, 'text/plain', "Red light activated"
+
+    def _handle_led_off(self, body):
+        self._set_state(False)
+        return 200, 'text/plain', "Green light activated"
+
+    def _handle_ambulance_green(self, body):
+        self._set_state(False, ambulance=True)
+        return 200, 'text/plain', "Ambulance green light activated"
+
+    def _handle_ambulance_normal(self, body):
+        self._set_state(True, ambulance=False)
+        return 200, 'text/plain', "Normal traffic resumed"
+
+    def _handle_batch(self, body):
+        try:
+            signals = json.loads(body or b'{}').get('signals', [])
+        except ValueError:
+            return 400, 'application/json', {'status': 'error', 'message': 'invalid json'}
+        applied = 0
+        for signal in signals:
+            if signal.get('signal') == 'green':
+                self._set_state(False, ambulance=True)
+            elif signal.get('signal') == 'normal':
+                self._set_state(True, ambulance=False)
+            else:
+                continue
+            applied += 1
+        return 200, 'application/json', {'status': 'ok', 'applied': applied}
+
+    def _handle_status(self, body):
+        last = self.last_signal_time
+        doc = {
+            'traffic_light': 'red' if self.traffic_light_red else 'green',
+            'led_state': 'on' if self.traffic_light_red else 'off',
+            'ambulance_active': self.ambulance_active,
+            'system_ready': True,
+            'ip_address': self.host,
+            'uptime': self.uptime_ms() // 1000,
+            'last_signal': int(time.monotonic() - last) if last else 0,
+        }
+        return 200, 'application/json', doc
+
+    def get_stats(self):
+        stats = super().get_stats()
+        commands = self.get_commands()
+        stats['commands'] = len(commands)
+        if commands:
+            delays = [c.applied_at - c.received_at for c in commands]
+            stats['max_command_delay'] = max(delays)
+        return stats
+
+
+# ================================
+# ÇOKLU CİHAZ
+# ================================
+
+def start_gps_devices(track_paths, count=1, base_port=0, host='127.0.0.1', seed=None, **kwargs):
+    """
+    Birden fazla sanal GPS cihazını ardışık localhost portlarında başlat
+
+    base_port=0 ise her cihaz işletim sisteminin verdiği boş portu kullanır.
+    Kayıtlar cihazlara sırayla dağıtılır.
+    """
+    tracks = [load_track(path) for path in track_paths]
+    devices = []
+    try:
+        for i in range(count):
+            port = base_port + i if base_port else 0
+            device = EmulatedGPSDevice(
+                tracks[i % len(tracks)], host=host, port=port,
+                seed=None if seed is None else seed + i,
+                device_id=f"ESP32_GPS_EMU_{i:03d}", **kwargs)
+            devices.append(device.start())
+    except Exception:
+        stop_devices(devices)
+        raise
+    return devices
+
+
+def stop_devices(devices):
+    """Tüm sanal cihazları durdur"""
+    for device in devices:
+        device.stop()
+
+
+def get_options():
+    optParser = optparse.OptionParser(usage="%prog [options] [track.gpx|positions.csv ...]")
+    optParser.add_option("--devices", type="int", default=1,
+                         help="number of virtual GPS devices (default: 1)")
+    optParser.add_option("--led-port", type="int", default=0,
+                         help="also start an LED traffic controller on this port (default: off)")
+    optParser.add_option("--host", type="string", default="127.0.0.1",
+                         help="listen address (default: 127.0.0.1)")
+    optParser.add_option("--base-port", type="int", default=8080,
+                         help="first HTTP port, devices use consecutive ports (default: 8080)")
+    optParser.add_option("--speed", type="float", default=1.0,
+                         help="replay speed factor, e.g. 1-100 (default: 1.0)")
+    optParser.add_option("--latency", type="float", default=0.0,
+                         help="response latency in seconds (default: 0)")
+    optParser.add_option("--jitter", type="float", default=0.0,
+                         help="uniform latency jitter in seconds (default: 0)")
+    optParser.add_option("--loss", type="float", default=0.0,
+                         help="probability of dropping a request (default: 0)")
+    optParser.add_option("--invalid", type="float", default=0.0,
+                         help="probability of an invalid GPS fix (default: 0)")
+    optParser.add_option("--seed", type="int", default=None,
+                         help="random seed for loss/jitter/invalid injection")
+    return optParser.parse_args()
+
+
+if __name__ == "__main__":
+    options, args = get_options()
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    track_paths = args or [os.path.join(base_dir, "gps-data-2.gpx")]
+
+    devices = start_gps_devices(
+        track_paths, count=options.devices, base_port=options.base_port, host=options.host,
+        seed=options.seed, speed=options.speed, latency=options.latency,
+        jitter=options.jitter, loss_rate=options.loss, invalid_rate=options.invalid)
+
+    print(f"🧪 {len(devices)} sanal ESP32 GPS cihazı çalışıyor ({options.speed}x hız)")
+    for device in devices:
+        print(f"   📡 {device.device_id}: http://{device.address}/gps")
+
+    if options.led_port:
+        led_controller = EmulatedLEDController(
+            host=options.host, port=options.led_port, latency=options.latency,
+            jitter=options.jitter, loss_rate=options.loss, seed=options.seed).start()
+        devices.append(led_controller)
+        print(f"   🚦 {led_controller.device_id}: http://{led_controller.address}/status")
+    print("Durdurmak için Ctrl+C basın...")
+
+    try:
+        while True:
+            time.sleep(5)
+            total = sum(d.get_stats()['requests'] for d in devices)
+            print(f"📊 Toplam istek: {total}")
+    except KeyboardInterrupt:
+        print("\n🛑 Emülatör durduruluyor")
+        stop_devices(devices)
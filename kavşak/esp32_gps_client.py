@@ -11,6 +11,8 @@ import time
 import threading
 from datetime import datetime
 
+from device_health import device_health
+
 class ESP32GPSClient:
     def __init__(self, esp32_ip="192.168.1.100", esp32_port=80):
         """
@@ -24,6 +26,9 @@ class ESP32GPSClient:
         self.esp32_port = esp32_port
         self.base_url = f"http://{esp32_ip}:{esp32_port}"
         
+        # Cihaz sağlık durumu (aynı adrese bağlanan client'lar paylaşır)
+        self.health = device_health.get(f"ESP32 GPS {esp32_ip}:{esp32_port}")
+        
         self.is_running = False
         self.gps_callback = None
         self.update_thread = None
@@ -63,9 +68,14 @@ class ESP32GPSClient:
     
     def get_gps_data(self):
         """ESP32'den anlık GPS verisi al"""
+        # Devre açıksa ağa dokunmadan hemen dön
+        if not self.health.allow_request():
+            return None
+        
         try:
             response = requests.get(f"{self.base_url}/gps", timeout=3)
             if response.status_code == 200:
+                self.health.record_success()
                 data = response.json()
                 
                 # GPS verisi geçerli mi kontrol et
@@ -85,10 +95,13 @@ class ESP32GPSClient:
                     print("⚠️ GPS sinyali geçersiz")
                     return None
             else:
+                # 500/503 veren cihaz da geri çekilmeli (sadece 200 başarı sayılır)
+                self.health.record_failure(f"HTTP {response.status_code}")
                 print(f"❌ GPS veri hatası: HTTP {response.status_code}")
                 return None
                 
         except requests.exceptions.RequestException as e:
+            self.health.record_failure(e)
             print(f"❌ GPS veri alma hatası: {e}")
             return None
     
@@ -140,6 +153,11 @@ class ESP32GPSClient:
                         print(f"🛰️ GPS: {gps_data['latitude']:.8f}, {gps_data['longitude']:.8f} "
                               f"| Uydu: {gps_data['satellites']} | HDOP: {gps_data['hdop']:.2f}")
                 
+                elif not self.health.is_available():
+                    # Cihaz çevrimdışı: devre kesici deneme zamanını planlar,
+                    # ardışık hata sayacı tekrar tekrar uyarı basmasın
+                    consecutive_errors = 0
+                
                 else:
                     consecutive_errors += 1
                     if consecutive_errors >= max_errors:
@@ -155,6 +173,10 @@ class ESP32GPSClient:
     
     def send_command_to_esp32(self, command, parameters=None):
         """ESP32'ye komut gönder (LED kontrolü, ayarlar vs.)"""
+        if not self.health.allow_request():
+            print(f"⏭️ ESP32 çevrimdışı, komut atlandı: {command}")
+            return None
+        
         try:
             data = {'command': command}
             if parameters:
@@ -167,14 +189,17 @@ class ESP32GPSClient:
             )
             
             if response.status_code == 200:
+                self.health.record_success()
                 result = response.json()
                 print(f"✅ ESP32 komutu başarılı: {command}")
                 return result
             else:
+                self.health.record_failure(f"HTTP {response.status_code}")
                 print(f"❌ ESP32 komut hatası: HTTP {response.status_code}")
                 return None
                 
         except requests.exceptions.RequestException as e:
+            self.health.record_failure(e)
             print(f"❌ ESP32 komut gönderme hatası: {e}")
             return None
     
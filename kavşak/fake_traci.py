@@ -0,0 +1,622 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bellek İçi TraCI Simülatörü - SUMO GPS Ambulans Projesi
+Bu modül runner.py'nin kullandığı TraCI API alt kümesini (vehicle,
+trafficlight, inductionloop, simulation) saf Python ile modeller. SUMO
+kurulu olmadan kontrol döngüsü (run()) çalıştırılabilir, test edilebilir ve
+döngünün kendi maliyeti SUMO'dan bağımsız ölçülebilir.
+
+Ağ (.net.xml), rota (.rou.xml) ve dedektör (.det.xml) dosyaları gerçek SUMO
+dosyalarından okunur. Araçlar rotalarının şerit şekilleri üzerinde ilerler,
+kırmızı ışıkta ve öndeki aracın arkasında durur. Fizik bilinçli olarak
+basittir (sigma/şerit değiştirme yok); amaç kontrol mantığını sürmektir.
+
+Kullanım:
+    import fake_traci
+    traci = fake_traci.FakeTraCI()
+    traci.start(["sumo", "-c", "data/cross.sumocfg"])
+"""
+
+import bisect
+import math
+import os
+import xml.etree.ElementTree as ET
+
+# runner.py'nin TraCI'den kullandığı fonksiyonlar (arka uç arayüzü)
+TRACI_API = (
+    'start', 'close', 'simulationStep',
+    'vehicle.add', 'vehicle.getIDList', 'vehicle.getPosition', 'vehicle.getSpeed',
+    'vehicle.setSpeed', 'vehicle.setSpeedMode', 'vehicle.slowDown', 'vehicle.moveToXY',
+    'trafficlight.getPhase', 'trafficlight.setPhase', 'trafficlight.setPhaseDuration',
+    'inductionloop.getLastStepVehicleNumber',
+    'simulation.getMinExpectedNumber',
+)
+
+DEFAULT_STEP_LENGTH = 1.0
+DEFAULT_VTYPE = {'maxSpeed': 55.55, 'accel': 2.6, 'decel': 4.5, 'length': 5.0, 'minGap': 2.5}
+
+
+class TraCIException(Exception):
+    """traci.exceptions.TraCIException karşılığı"""
+
+
+def _parse_shape(shape):
+    return [tuple(float(v) for v in point.split(',')[:2]) for point in shape.split()]
+
+
+def _parse_time(value, default=0.0):
+    if value in (None, '', 'now', 'triggered', 'containerTriggered'):
+        return default
+    return float(value)
+
+
+def _parse_float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class _Route:
+    """Rota geometrisi: kenar şekilleri birleştirilmiş çoklu çizgi"""
+
+    def __init__(self, edge_ids, network):
+        self.edge_ids = tuple(edge_ids)
+        self.points = []
+        self.cumulative = []
+        self.edge_spans = []   # (kenar, başlangıç mesafesi, bitiş mesafesi)
+        self.stop_lines = []   # (mesafe, tls_id, link indeksi)
+
+        distance = 0.0
+        for i, edge_id in enumerate(self.edge_ids):
+            edge = network.edges.get(edge_id)
+            if edge is None:
+                raise TraCIException(f"Unknown edge '{edge_id}'")
+            shape = edge['shape']
+            if self.points:
+                # Kavşak içi bağlantıyı düz çizgi say
+                distance += math.dist(self.points[-1], shape[0])
+            start = distance
+            self.points.append(shape[0])
+            self.cumulative.append(distance)
+            for a, b in zip(shape, shape[1:]):
+                distance += math.dist(a, b)
+                self.points.append(b)
+                self.cumulative.append(distance)
+            self.edge_spans.append((edge_id, start, distance))
+
+            if i + 1 < len(self.edge_ids):
+                link = network.connections.get((edge_id, self.edge_ids[i + 1]))
+                if link is not None:
+                    self.stop_lines.append((distance, link[0], link[1]))
+        self.length = distance
+        self._span_starts = [span[1] for span in self.edge_spans]
+
+    def position_at(self, distance):
+        """Rota üzerindeki mesafeye karşılık gelen (x, y, açı)"""
+        cumulative = self.cumulative
+        index = bisect.bisect_right(cumulative, distance) - 1
+        index = min(max(index, 0), len(cumulative) - 2)
+        (x1, y1), (x2, y2) = self.points[index], self.points[index + 1]
+        segment = cumulative[index + 1] - cumulative[index]
+        t = (distance - cumulative[index]) / segment if segment > 0 else 0.0
+        t = min(max(t, 0.0), 1.0)
+        angle = math.degrees(math.atan2(x2 - x1, y2 - y1)) % 360.0
+        return x1 + (x2 - x1) * t, y1 + (y2 - y1) * t, angle
+
+    def project(self, x, y):
+        """(x, y) noktasına en yakın rota mesafesi"""
+        best_distance, best_offset = None, 0.0
+        for i in range(len(self.points) - 1):
+            (x1, y1), (x2, y2) = self.points[i], self.points[i + 1]
+            dx, dy = x2 - x1, y2 - y1
+            length_sq = dx * dx + dy * dy
+            t = 0.0 if length_sq == 0 else min(max(((x - x1) * dx + (y - y1) * dy) / length_sq, 0.0), 1.0)
+            px, py = x1 + dx * t, y1 + dy * t
+            d = (x - px) ** 2 + (y - py) ** 2
+            if best_distance is None or d < best_distance:
+                best_distance = d
+                best_offset = self.cumulative[i] + math.sqrt(length_sq) * t
+        return best_offset
+
+    def edge_at(self, distance):
+        """(kenar, şerit pozisyonu); kavşak içindeyse kenar None"""
+        index = bisect.bisect_right(self._span_starts, distance) - 1
+        if index < 0:
+            return self.edge_spans[0][0], 0.0
+        edge_id, start, end = self.edge_spans[index]
+        if distance > end:
+            return None, distance - end
+        return edge_id, distance - start
+
+
+class _Network:
+    """SUMO .net.xml dosyasının kenar, bağlantı ve trafik ışığı bilgisi"""
+
+    def __init__(self):
+        self.edges = {}
+        self.connections = {}
+        self.tls_programs = {}
+
+    @classmethod
+    def load(cls, net_file):
+        network = cls()
+        root = ET.parse(net_file).getroot()
+        for edge in root.iter('edge'):
+            if edge.get('function') == 'internal':
+                continue
+            lane = edge.find('lane')
+            if lane is None:
+                continue
+            network.edges[edge.get('id')] = {
+                'shape': _parse_shape(lane.get('shape')),
+                'speed': _parse_float(lane.get('speed'), 13.89),
+                'length': _parse_float(lane.get('length')),
+                'to': edge.get('to'),
+            }
+        for connection in root.iter('connection'):
+            tl = connection.get('tl')
+            if tl is not None and connection.get('linkIndex') is not None:
+                key = (connection.get('from'), connection.get('to'))
+                network.connections.setdefault(key, (tl, int(connection.get('linkIndex'))))
+        for logic in root.iter('tlLogic'):
+            network.tls_programs[logic.get('id')] = [
+                (_parse_float(phase.get('duration')), phase.get('state'))
+                for phase in logic.iter('phase')
+            ]
+        return network
+
+
+class _VehicleState:
+    __slots__ = ('id', 'vtype', 'route', 'distance', 'speed', 'speed_override', 'speed_mode',
+                 'slow_down', 'free_xy', 'pending_move', 'depart')
+
+    def __init__(self, veh_id, vtype, route, depart, distance=0.0, speed=0.0):
+        self.id = veh_id
+        self.vtype = vtype
+        self.route = route
+        self.depart = depart
+        self.distance = distance
+        self.speed = speed
+        self.speed_override = None
+        self.speed_mode = 31
+        self.slow_down = None       # (hedef hız, kalan süre)
+        self.free_xy = None         # moveToXY ile rotadan bağımsız konum (x, y, açı)
+        self.pending_move = None    # Bir sonraki adımda uygulanacak moveToXY
+
+
+class _TrafficLightState:
+    __slots__ = ('program', 'phase', 'remaining')
+
+    def __init__(self, program):
+        self.program = program
+        self.phase = 0
+        self.remaining = program[0][0]
+
+    @property
+    def state(self):
+        return self.program[self.phase][1]
+
+
+class FakeTraCI:
+    """
+    traci modülü yerine geçen bellek içi simülatör
+
+    Alan (domain) nesneleri traci ile aynı adlarla sunulur:
+    vehicle, trafficlight, inductionloop, simulation. Her API çağrısı
+    call_count'a eklenir.
+    """
+
+    TraCIException = TraCIException
+
+    def __init__(self):
+        self.vehicle = _VehicleDomain(self)
+        self.trafficlight = _TrafficLightDomain(self)
+        self.inductionloop = _InductionLoopDomain(self)
+        self.simulation = _SimulationDomain(self)
+        self.call_count = 0
+        self._reset()
+
+    def _reset(self):
+        self.network = _Network()
+        self.vtypes = {'DEFAULT_VEHTYPE': dict(DEFAULT_VTYPE)}
+        self.routes = {}
+        self.time = 0.0
+        self.end_time = None
+        self.step_length = DEFAULT_STEP_LENGTH
+        self.vehicles = {}
+        self.pending = []            # Henüz kalkmamış araçlar (kalkış zamanına göre sıralı)
+        self.tls = {}
+        self.detectors = {}          # id -> (kenar, şerit pozisyonu)
+        self.detector_counts = {}
+        self.departed = []
+        self.arrived = []
+        self.loaded = False
+        self._id_list = None
+        self._pending_seq = 0
+
+    # ---- Yükleme ----
+
+    def start(self, cmd, port=None, label="default", **kwargs):
+        """SUMO komut satırındaki -c/-n/-r/-a seçeneklerine göre senaryoyu yükle"""
+        self.call_count += 1
+        self._reset()
+        options = {}
+        args = list(cmd[1:])
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg.startswith('-') and i + 1 < len(args) and not args[i + 1].startswith('-'):
+                options[arg.lstrip('-')] = args[i + 1]
+                i += 2
+            else:
+                options[arg.lstrip('-')] = True
+                i += 1
+
+        files = {'net-file': [], 'route-files': [], 'additional-files': []}
+        config = options.get('c') or options.get('configuration-file')
+        if config:
+            base = os.path.dirname(os.path.abspath(config))
+            root = ET.parse(config).getroot()
+            for key in files:
+                node = root.find(f'.//{key}')
+                if node is not None:
+                    files[key] = [os.path.join(base, f) for f in node.get('value').split(',')]
+            for key in ('begin', 'end', 'step-length'):
+                node = root.find(f'.//{key}')
+                if node is not None:
+                    options.setdefault(key, node.get('value'))
+        for short, key in (('n', 'net-file'), ('r', 'route-files'), ('a', 'additional-files')):
+            value = options.get(short) or options.get(key)
+            if isinstance(value, str):
+                files[key] = value.split(',')
+
+        if not files['net-file']:
+            raise TraCIException("No network file given (-c or -n)")
+        self.load_network(files['net-file'][0])
+        for additional in files['additional-files']:
+            self.load_additional(additional)
+        for route_file in files['route-files']:
+            self.load_routes(route_file)
+
+        self.time = _parse_float(options.get('begin'), 0.0)
+        self.step_length = _parse_float(options.get('step-length'), DEFAULT_STEP_LENGTH)
+        if options.get('end') is not None:
+            self.end_time = _parse_float(options.get('end'))
+        self.loaded = True
+        return (21, "FakeTraCI")
+
+    def load_network(self, net_file):
+        self.network = _Network.load(net_file)
+        self.tls = {tls_id: _TrafficLightState(program)
+                    for tls_id, program in self.network.tls_programs.items() if program}
+
+    def load_additional(self, additional_file):
+        for loop in ET.parse(additional_file).getroot().iter('inductionLoop'):
+            edge_id = loop.get('lane').rsplit('_', 1)[0]
+            self.detectors[loop.get('id')] = (edge_id, _parse_float(loop.get('pos')))
+            self.detector_counts[loop.get('id')] = 0
+
+    def load_routes(self, route_file):
+        for element in ET.parse(route_file).getroot():
+            if element.tag == 'vType':
+                vtype = dict(DEFAULT_VTYPE)
+                for key in vtype:
+                    if element.get(key) is not None:
+                        vtype[key] = float(element.get(key))
+                self.vtypes[element.get('id')] = vtype
+            elif element.tag == 'route':
+                self.routes[element.get('id')] = _Route(element.get('edges').split(), self.network)
+            elif element.tag in ('vehicle', 'trip'):
+                route_id = element.get('route')
+                if route_id is None:
+                    inline = element.find('route')
+                    edges = inline.get('edges').split() if inline is not None else \
+                        [element.get('from'), element.get('to')]
+                    route_id = f"!{element.get('id')}"
+                    self.routes[route_id] = _Route(edges, self.network)
+                self._schedule(element.get('id'), route_id, element.get('type', 'DEFAULT_VEHTYPE'),
+                               _parse_time(element.get('depart')),
+                               _parse_float(element.get('departPos')),
+                               _parse_float(element.get('departSpeed')))
+
+    def _schedule(self, veh_id, route_id, type_id, depart, depart_pos=0.0, depart_speed=0.0):
+        if route_id not in self.routes:
+            raise TraCIException(f"Unknown route '{route_id}'")
+        if type_id not in self.vtypes:
+            raise TraCIException(f"Unknown vehicle type '{type_id}'")
+        self._pending_seq += 1
+        entry = (depart, self._pending_seq, veh_id, route_id, type_id, depart_pos, depart_speed)
+        bisect.insort(self.pending, entry)
+
+    def close(self, wait=True):
+        self.call_count += 1
+        self.loaded = False
+
+    def getVersion(self):
+        return (21, "FakeTraCI")
+
+    # ---- Simülasyon adımı ----
+
+    def simulationStep(self, step=0.0):
+        self.call_count += 1
+        dt = self.step_length
+        self.time += dt
+        self.departed = []
+        self.arrived = []
+        for loop_id in self.detector_counts:
+            self.detector_counts[loop_id] = 0
+
+        for tls in self.tls.values():
+            tls.remaining -= dt
+            while tls.remaining <= 0:
+                tls.phase = (tls.phase + 1) % len(tls.program)
+                tls.remaining += tls.program[tls.phase][0]
+
+        self._move_vehicles(dt)
+
+        while self.pending and self.pending[0][0] <= self.time:
+            _, _, veh_id, route_id, type_id, depart_pos, depart_speed = self.pending.pop(0)
+            self.vehicles[veh_id] = _VehicleState(veh_id, self.vtypes[type_id], self.routes[route_id],
+                                                  self.time, depart_pos, depart_speed)
+            self.departed.append(veh_id)
+            self._id_list = None
+
+    def _move_vehicles(self, dt):
+        # Kenar bazında sıralı araç listesi (öndeki aracı bulmak için)
+        leaders = {}
+        by_route = {}
+        for vehicle in self.vehicles.values():
+            by_route.setdefault(id(vehicle.route), []).append(vehicle)
+        for group in by_route.values():
+            group.sort(key=lambda v: v.distance, reverse=True)
+            for ahead, behind in zip(group, group[1:]):
+                leaders[behind.id] = ahead
+
+        arrived = []
+        for vehicle in list(self.vehicles.values()):
+            if vehicle.pending_move is not None:
+                x, y, angle = vehicle.pending_move
+                vehicle.pending_move = None
+                vehicle.free_xy = (x, y, angle)
+                vehicle.distance = vehicle.route.project(x, y)
+                continue
+
+            speed = self._next_speed(vehicle, leaders.get(vehicle.id), dt)
+            vehicle.speed = speed
+            if speed <= 0:
+                continue
+            vehicle.free_xy = None
+            old = vehicle.distance
+            vehicle.distance = old + speed * dt
+            self._count_detectors(vehicle.route, old, vehicle.distance)
+            if vehicle.distance >= vehicle.route.length:
+                arrived.append(vehicle.id)
+
+        for veh_id in arrived:
+            del self.vehicles[veh_id]
+            self.arrived.append(veh_id)
+        if arrived:
+            self._id_list = None
+
+    def _next_speed(self, vehicle, leader, dt):
+        vtype = vehicle.vtype
+        edge_id, _ = vehicle.route.edge_at(vehicle.distance)
+        lane_speed = self.network.edges[edge_id]['speed'] if edge_id else vtype['maxSpeed']
+
+        if vehicle.speed_override is not None:
+            target = min(vehicle.speed_override, vtype['maxSpeed'])
+        else:
+            target = min(vtype['maxSpeed'], lane_speed)
+        if vehicle.slow_down is not None:
+            slow_target, remaining = vehicle.slow_down
+            target = min(target, slow_target)
+            remaining -= dt
+            vehicle.slow_down = (slow_target, remaining) if remaining > 0 else None
+
+        if vehicle.speed_mode == 0:
+            # Tüm güvenlik kontrolleri kapalı: istenen hız anında uygulanır
+            return max(target, 0.0)
+
+        speed = vehicle.speed
+        if target > speed:
+            speed = min(target, speed + vtype['accel'] * dt)
+        else:
+            speed = max(target, speed - vtype['decel'] * dt, 0.0)
+
+        # Kırmızı/sarı ışıkta durma çizgisini geçme
+        for stop_distance, tls_id, link_index in vehicle.route.stop_lines:
+            if stop_distance < vehicle.distance:
+                continue
+            tls = self.tls.get(tls_id)
+            if tls is not None and tls.state[link_index] in 'rRyYu':
+                speed = min(speed, max(0.0, (stop_distance - vehicle.distance) / dt))
+            break
+
+        # Öndeki araca çarpma
+        if leader is not None:
+            gap = leader.distance - leader.vtype['length'] - vtype['minGap'] - vehicle.distance
+            speed = min(speed, max(0.0, gap / dt))
+        return speed
+
+    def _count_detectors(self, route, old, new):
+        for loop_id, (edge_id, lane_pos) in self.detectors.items():
+            for span_edge, start, end in route.edge_spans:
+                if span_edge == edge_id:
+                    if old < start + lane_pos <= new:
+                        self.detector_counts[loop_id] += 1
+                    break
+
+    def _get(self, veh_id):
+        vehicle = self.vehicles.get(veh_id)
+        if vehicle is None:
+            raise TraCIException(f"Vehicle '{veh_id}' is not known")
+        return vehicle
+
+
+class _Domain:
+    def __init__(self, sim):
+        self._sim = sim
+
+
+class _VehicleDomain(_Domain):
+
+    def getIDList(self):
+        sim = self._sim
+        sim.call_count += 1
+        if sim._id_list is None:
+            sim._id_list = tuple(sim.vehicles)
+        return sim._id_list
+
+    def getIDCount(self):
+        self._sim.call_count += 1
+        return len(self._sim.vehicles)
+
+    def add(self, vehID, routeID, typeID="DEFAULT_VEHTYPE", depart="now", departLane="first",
+            departPos="base", departSpeed="0", **kwargs):
+        sim = self._sim
+        sim.call_count += 1
+        if vehID in sim.vehicles:
+            raise TraCIException(f"Vehicle '{vehID}' already exists")
+        sim._schedule(vehID, routeID, typeID, _parse_time(depart, sim.time),
+                      _parse_float(departPos), _parse_float(departSpeed))
+
+    def remove(self, vehID, reason=3):
+        sim = self._sim
+        sim.call_count += 1
+        sim._get(vehID)
+        del sim.vehicles[vehID]
+        sim._id_list = None
+
+    def getPosition(self, vehID):
+        sim = self._sim
+        sim.call_count += 1
+        vehicle = sim._get(vehID)
+        if vehicle.free_xy is not None:
+            return vehicle.free_xy[0], vehicle.free_xy[1]
+        x, y, _ = vehicle.route.position_at(vehicle.distance)
+        return x, y
+
+    def getAngle(self, vehID):
+        sim = self._sim
+        sim.call_count += 1
+        vehicle = sim._get(vehID)
+        if vehicle.free_xy is not None:
+            return vehicle.free_xy[2]
+        return vehicle.route.position_at(vehicle.distance)[2]
+
+    def getSpeed(self, vehID):
+        self._sim.call_count += 1
+        return self._sim._get(vehID).speed
+
+    def getRoadID(self, vehID):
+        self._sim.call_count += 1
+        vehicle = self._sim._get(vehID)
+        edge_id, _ = vehicle.route.edge_at(vehicle.distance)
+        return edge_id if edge_id is not None else ":internal"
+
+    def getLanePosition(self, vehID):
+        self._sim.call_count += 1
+        vehicle = self._sim._get(vehID)
+        return vehicle.route.edge_at(vehicle.distance)[1]
+
+    def getRoute(self, vehID):
+        self._sim.call_count += 1
+        return self._sim._get(vehID).route.edge_ids
+
+    def setSpeed(self, vehID, speed):
+        self._sim.call_count += 1
+        self._sim._get(vehID).speed_override = None if speed < 0 else float(speed)
+
+    def setSpeedMode(self, vehID, speedMode):
+        self._sim.call_count += 1
+        self._sim._get(vehID).speed_mode = int(speedMode)
+
+    def slowDown(self, vehID, speed, duration):
+        self._sim.call_count += 1
+        self._sim._get(vehID).slow_down = (float(speed), float(duration))
+
+    def moveToXY(self, vehID, edgeID, lane, x, y, angle=-1073741824.0, keepRoute=1, matchThreshold=100):
+        """SUMO'daki gibi konum bir sonraki simulationStep'te uygulanır"""
+        self._sim.call_count += 1
+        vehicle = self._sim._get(vehID)
+        if angle == -1073741824.0:
+            angle = vehicle.route.position_at(vehicle.distance)[2]
+        vehicle.pending_move = (float(x), float(y), float(angle))
+
+
+class _TrafficLightDomain(_Domain):
+
+    def _tls(self, tlsID):
+        self._sim.call_count += 1
+        tls = self._sim.tls.get(tlsID)
+        if tls is None:
+            raise TraCIException(f"Traffic light '{tlsID}' is not known")
+        return tls
+
+    def getIDList(self):
+        self._sim.call_count += 1
+        return tuple(self._sim.tls)
+
+    def getPhase(self, tlsID):
+        return self._tls(tlsID).phase
+
+    def setPhase(self, tlsID, index):
+        tls = self._tls(tlsID)
+        if not 0 <= index < len(tls.program):
+            raise TraCIException(f"The phase index {index} is not in the allowed range")
+        tls.phase = index
+        tls.remaining = tls.program[index][0]
+
+    def setPhaseDuration(self, tlsID, phaseDuration):
+        self._tls(tlsID).remaining = float(phaseDuration)
+
+    def getPhaseDuration(self, tlsID):
+        tls = self._tls(tlsID)
+        return tls.program[tls.phase][0]
+
+    def getRedYellowGreenState(self, tlsID):
+        return self._tls(tlsID).state
+
+    def getNextSwitch(self, tlsID):
+        return self._sim.time + self._tls(tlsID).remaining
+
+
+class _InductionLoopDomain(_Domain):
+
+    def getIDList(self):
+        self._sim.call_count += 1
+        return tuple(self._sim.detectors)
+
+    def getLastStepVehicleNumber(self, loopID):
+        self._sim.call_count += 1
+        if loopID not in self._sim.detector_counts:
+            raise TraCIException(f"Induction loop '{loopID}' is not known")
+        return self._sim.detector_counts[loopID]
+
+
+class _SimulationDomain(_Domain):
+
+    def getTime(self):
+        self._sim.call_count += 1
+        return self._sim.time
+
+    def getMinExpectedNumber(self):
+        sim = self._sim
+        sim.call_count += 1
+        if sim.end_time is not None and sim.time >= sim.end_time:
+            return 0
+        return len(sim.vehicles) + len(sim.pending)
+
+    def getDepartedIDList(self):
+        self._sim.call_count += 1
+        return tuple(self._sim.departed)
+
+    def getArrivedIDList(self):
+        self._sim.call_count += 1
+        return tuple(self._sim.arrived)
+
+    def getDeltaT(self):
+        self._sim.call_count += 1
+        return self._sim.step_length
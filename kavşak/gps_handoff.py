@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GPS Fix Aktarım Yapısı - SUMO GPS Ambulans Projesi
+Bu modül ağ/serial thread'lerinden gelen ham GPS fix'lerini TraCI döngüsüne
+güvenli şekilde aktarır. Ingestion thread'leri sadece kuyruğa ekler;
+filtreleme simülasyon thread'inde, her adımda bir kez toplu yapılır.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+
+DEFAULT_VEHICLE_ID = "ambulance_gps_0"
+DEFAULT_QUEUE_SIZE = 256
+
+GPSFix = namedtuple('GPSFix', ['vehicle_id', 'latitude', 'longitude', 'timestamp', 'seq'])
+
+
+class GPSFixHandoff:
+    """
+    Araç başına son-değer slotu ve sınırlı fix kuyruğu
+
+    Kuyruk dolduğunda en eski fix düşürülür (yeni veri her zaman önceliklidir)
+    ve düşürülen sayısı tutulur. Tüm erişimler tek kilit altında yapıldığından
+    okuyucu her zaman tutarlı bir anlık görüntü alır.
+    """
+
+    def __init__(self, max_queue_size=DEFAULT_QUEUE_SIZE):
+        self._lock = threading.Lock()
+        self._queue = deque(maxlen=max_queue_size)
+        self._latest = {}
+        self._seq = 0
+
+        self.max_queue_size = max_queue_size
+        self.enqueued_count = 0
+        self.dropped_count = 0
+        self.drained_count = 0
+
+    def put(self, latitude, longitude, vehicle_id=DEFAULT_VEHICLE_ID, timestamp=None):
+        """Ham fix'i kuyruğa ekle (ingestion thread'lerinden çağrılır)"""
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            self._seq += 1
+            fix = GPSFix(vehicle_id, latitude, longitude, timestamp, self._seq)
+            if len(self._queue) == self.max_queue_size:
+                self.dropped_count += 1
+            self._queue.append(fix)
+            self._latest[vehicle_id] = fix
+            self.enqueued_count += 1
+        return fix
+
+    def drain(self):
+        """Bekleyen tüm fix'leri geliş sırasıyla al ve kuyruğu boşalt"""
+        with self._lock:
+            if not self._queue:
+                return []
+            batch = list(self._queue)
+            self._queue.clear()
+            self.drained_count += len(batch)
+        return batch
+
+    def latest(self, vehicle_id=DEFAULT_VEHICLE_ID):
+        """Aracın en son ham fix'ini döndür (yoksa None)"""
+        with self._lock:
+            return self._latest.get(vehicle_id)
+
+    def snapshot(self):
+        """Tüm araçların son fix'lerinin tutarlı kopyasını döndür"""
+        with self._lock:
+            return dict(self._latest)
+
+    def pending(self):
+        """Kuyrukta bekleyen fix sayısı"""
+        with self._lock:
+            return len(self._queue)
+
+    def clear(self):
+        """Kuyruğu ve son-değer slotlarını sıfırla"""
+        with self._lock:
+            self._queue.clear()
+            self._latest.clear()
+
+    def get_stats(self):
+        """Aktarım istatistiklerini döndür"""
+        with self._lock:
+            return {
+                'enqueued': self.enqueued_count,
+                'drained': self.drained_count,
+                'dropped': self.dropped_count,
+                'pending': len(self._queue),
+            }
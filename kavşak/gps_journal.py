@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ham GPS Fix Günlüğü - SUMO GPS Ambulans Projesi
+Bu modül canlı kaynaklardan (ESP32, serial, socket) gelen her ham fix'i,
+noise filtresinden önce, sadece sona eklenen (append-only) ikili bir
+günlüğe yazar. Canlı oturumda yaşanan bir sorun böylece sonradan aynen
+tekrar oynatılabilir (bkz. gps_replay.py, .gpsj dosyaları).
+
+Ingestion tarafı kilit almaz: record() kaydı bir deque'ye ekler (CPython'da
+atomik). Arka plandaki yazıcı thread flush_interval aralıklarla kuyruğu
+boşaltır, kayıtları tek seferde paketleyip tamponlu dosyaya yazar.
+
+Dosya düzeni (little-endian):
+  başlık : 'GPSJ', sürüm, kayıt boyutu, kaynak sayısı, kaynak adları
+  kayıt  : alış zamanı (epoch), lat, lon, hdop, uydu, kaynak indeksi
+Kayıtlar sabit boyutludur; yarıda kalmış son kayıt okurken atlanır.
+"""
+
+import math
+import mmap
+import optparse
+import os
+import struct
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsiyonel, read_journal_array kullanılamaz
+    np = None
+
+JOURNAL_MAGIC = b'GPSJ'
+JOURNAL_VERSION = 1
+JOURNAL_EXTENSION = ".gpsj"
+DEFAULT_FLUSH_INTERVAL = 0.5  # saniye
+WRITE_BUFFER_SIZE = 1 << 16
+
+# Kaynak indeksleri dosya başlığına da yazılır
+JOURNAL_SOURCES = ('unknown', 'esp32', 'serial', 'socket')
+
+_HEADER = struct.Struct('<4sHHB')
+_RECORD = struct.Struct('<dddfBB2x')
+_NUMPY_DTYPE = [('time', '<f8'), ('latitude', '<f8'), ('longitude', '<f8'), ('hdop', '<f4'),
+                ('satellites', 'u1'), ('source', 'u1'), ('_pad', 'V2')]
+
+JournalRecord = namedtuple('JournalRecord', ['time', 'latitude', 'longitude', 'hdop',
+                                             'satellites', 'source'])
+
+
+def _encode_header():
+    parts = [_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, _RECORD.size, len(JOURNAL_SOURCES))]
+    for name in JOURNAL_SOURCES:
+        encoded = name.encode('ascii')
+        parts.append(bytes([len(encoded)]) + encoded)
+    return b''.join(parts)
+
+
+def _decode_header(data):
+    """Başlığı çöz: (kaynak adları, kayıtların başladığı ofset)"""
+    if len(data) < _HEADER.size:
+        raise ValueError("Geçersiz GPS günlüğü: başlık eksik")
+    magic, version, record_size, count = _HEADER.unpack_from(data, 0)
+    if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION or record_size != _RECORD.size:
+        raise ValueError("Geçersiz GPS günlüğü")
+    offset = _HEADER.size
+    sources = []
+    for _ in range(count):
+        length = data[offset]
+        sources.append(bytes(data[offset + 1:offset + 1 + length]).decode('ascii'))
+        offset += length + 1
+    return tuple(sources), offset
+
+
+def default_journal_path():
+    return f"gps_journal_{int(time.time())}{JOURNAL_EXTENSION}"
+
+
+class GPSJournal:
+    """
+    Ham fix'leri arka plan thread'iyle diske yazan append-only günlük
+
+    record() birden fazla ingestion thread'inden aynı anda çağrılabilir.
+    Dosya zaten varsa (aynı başlıkla) sonundaki yarım kayıt kesilip sonuna
+    eklenir. İlk yazma hatasından sonra (self.error) record() kayıt almaz.
+    """
+
+    def __init__(self, path, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.records_written = 0
+        self.error = None
+        self._pending = deque()
+        self._source_index = {name: i for i, name in enumerate(JOURNAL_SOURCES)}
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, 'r+b') as f:
+                _, offset = _decode_header(f.read(4096))
+                # Çökmeden kalan yarım kayıt atılır; yoksa eklenen tüm kayıtlar kayar
+                size = f.seek(0, os.SEEK_END)
+                f.truncate(offset + (size - offset) // _RECORD.size * _RECORD.size)
+        self._file = open(path, 'ab', buffering=WRITE_BUFFER_SIZE)
+        if not exists:
+            self._file.write(_encode_header())
+            self._file.flush()
+
+        self._stop = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="gps-journal", daemon=True)
+        self._thread.start()
+
+    def record(self, latitude, longitude, source='unknown', hdop=None, satellites=None, timestamp=None):
+        """Ham fix'i kuyruğa ekle (ingestion thread'lerinden, kilitsiz)"""
+        if self.error is not None:
+            return  # yazma durdu (disk dolu / çıkarıldı); kuyruk sınırsız büyümesin
+        self._pending.append((time.time() if timestamp is None else timestamp,
+                              latitude, longitude,
+                              math.nan if hdop is None else hdop,
+                              0 if satellites is None else min(int(satellites), 255),
+                              self._source_index.get(source, 0)))
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def _drain(self):
+        pending = self._pending
+        buffer = bytearray()
+        pack = _RECORD.pack
+        count = 0
+        try:
+            while True:
+                buffer += pack(*pending.popleft())
+                count += 1
+        except IndexError:
+            pass
+        if count:
+            self._file.write(buffer)
+            self._file.flush()
+            self.records_written += count
+
+    def _worker(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self._drain()
+            except Exception as e:
+                self.error = e
+                self._pending.clear()
+                print(f"❌ GPS günlüğü yazma hatası ({self.path}): {e} - günlük kaydı durduruldu")
+                return
+
+    def close(self):
+        """Kalan kayıtları yaz, fsync'le ve dosyayı kapat"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._thread.join()
+        try:
+            if self.error is None:
+                self._drain()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"GPSJournal({self.path!r}, {self.records_written} kayıt)"
+
+
+# ================================
+# OKUMA
+# ================================
+
+def _map_file(path):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Geçersiz GPS günlüğü: dosya boş")
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_journal(path):
+    """
+    Günlükteki kayıtları JournalRecord listesi olarak oku
+
+    source alanı kaynak adıdır ('esp32', 'serial', ...).
+    """
+    data = _map_file(path)
+    try:
+        sources, offset = _decode_header(data)
+        end = offset + (len(data) - offset) // _RECORD.size * _RECORD.size
+        records = []
+        with memoryview(data) as view:
+            for t, lat, lon, hdop, sats, source in _RECORD.iter_unpack(view[offset:end]):
+                records.append(JournalRecord(t, lat, lon, hdop, sats, sources[source]))
+        return records
+    finally:
+        data.close()
+
+
+def read_journal_array(path):
+    """
+    Günlüğü NumPy yapılı dizisi olarak oku (dosya belleğe eşlenir, kopyasız)
+
+    Returns:
+        (dizi, kaynak adları); dizi alanları: time, latitude, longitude, hdop,
+        satellites, source (kaynak adları listesindeki indeks)
+    """
+    if np is None:
+        raise ImportError("read_journal_array için numpy gerekli")
+    with open(path, 'rb') as f:
+        sources, offset = _decode_header(f.read(4096))
+    count = (os.path.getsize(path) - offset) // _RECORD.size
+    if count == 0:
+        return np.zeros(0, dtype=_NUMPY_DTYPE), sources
+    return np.memmap(path, dtype=_NUMPY_DTYPE, mode='r', offset=offset, shape=(count,)), sources
+
+
+def print_info(path):
+    """Günlük özetini yazdır"""
+    records = read_journal(path)
+    print(f"📼 {path}: {len(records)} ham fix")
+    if not records:
+        return
+    start, end = records[0].time, records[-1].time
+    print(f"   ⏱️ {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start))} - "
+          f"{time.strftime('%H:%M:%S', time.localtime(end))} ({end - start:.1f} s)")
+    counts = {}
+    for record in records:
+        counts[record.source] = counts.get(record.source, 0) + 1
+    for source, count in sorted(counts.items()):
+        print(f"   📡 {source}: {count}")
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="usage: %prog [options] JOURNAL...")
+    options, files = optParser.parse_args(args)
+    if not files:
+        optParser.error("no journal files given")
+    options.files = files
+    return options
+
+
+def main(args=None):
+    options = get_options(args)
+    for path in options.files:
+        print_info(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serial / Socket GPS Okuyucu - SUMO GPS Ambulans Projesi
+Bu modül ESP32'nin serial hattından (veya TCP socket üzerinden) ilettiği ham
+u-blox UBX çerçevelerini okur, NAV-PVT fix'lerine çözer ve SUMO'ya aktarır.
+"""
+
+import socket
+import threading
+import time
+
+from ubx_parser import UBXStreamParser
+
+# pyserial opsiyonel - sadece serial modu için gerekli
+try:
+    import serial
+    serial_available = True
+except ImportError:
+    serial_available = False
+
+# 25 Hz NAV-PVT (100 byte/çerçeve) için en az ~25 kbit/s gerekir
+DEFAULT_UBX_BAUDRATE = 115200
+READ_CHUNK_SIZE = 4096
+
+
+class GPSReader:
+    def __init__(self):
+        """Serial/Socket GPS okuyucu başlatıcısı"""
+        self.callback = None
+        self.fix_callback = None
+        self.parser = UBXStreamParser()
+
+        self.is_running = False
+        self.reader_thread = None
+        self._serial = None
+        self._server_socket = None
+
+        # Son geçerli fix (UBXFix)
+        self.last_fix = None
+        self.invalid_fix_count = 0
+
+    def set_callback(self, callback_function):
+        """Geçerli GPS fix'i geldiğinde çağrılacak callback(lat, lon) fonksiyonunu ayarla"""
+        self.callback = callback_function
+
+    def set_fix_callback(self, callback_function):
+        """Tam UBXFix kaydı ile çağrılacak callback(fix) fonksiyonunu ayarla"""
+        self.fix_callback = callback_function
+
+    def process_bytes(self, data):
+        """Ham byte'ları çözücüye ver ve geçerli fix'leri callback'lere ilet"""
+        fixes = self.parser.feed(data)
+        for fix in fixes:
+            if not fix.valid:
+                self.invalid_fix_count += 1
+                continue
+            self.last_fix = fix
+            if self.fix_callback:
+                self.fix_callback(fix)
+            if self.callback:
+                self.callback(fix.latitude, fix.longitude)
+        return len(fixes)
+
+    def start_serial_reader(self, port, baudrate=DEFAULT_UBX_BAUDRATE):
+        """Serial porttan UBX okumayı arka plan thread'inde başlat"""
+        if not serial_available:
+            raise RuntimeError("pyserial kurulu değil (pip install pyserial)")
+        if self.is_running:
+            print("⚠️ GPS okuyucu zaten çalışıyor")
+            return
+
+        self._serial = serial.Serial(port, baudrate, timeout=0.05)
+        self.is_running = True
+        self.reader_thread = threading.Thread(target=self._serial_worker, daemon=True)
+        self.reader_thread.start()
+        print(f"🔌 UBX serial okuyucu başlatıldı: {port} @ {baudrate} baud")
+
+    def start_socket_reader(self, host, port):
+        """TCP socket üzerinden gelen UBX akışını dinlemeyi başlat"""
+        if self.is_running:
+            print("⚠️ GPS okuyucu zaten çalışıyor")
+            return
+
+        self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server_socket.bind((host, port))
+        self._server_socket.listen(1)
+        self._server_socket.settimeout(0.5)
+
+        self.is_running = True
+        self.reader_thread = threading.Thread(target=self._socket_worker, daemon=True)
+        self.reader_thread.start()
+        print(f"🔌 UBX socket sunucusu dinleniyor: {host}:{port}")
+
+    def stop(self):
+        """Okuyucuyu durdur ve kaynakları kapat"""
+        self.is_running = False
+        if self.reader_thread and self.reader_thread.is_alive():
+            self.reader_thread.join(timeout=2)
+        if self._serial is not None:
+            self._serial.close()
+            self._serial = None
+        if self._server_socket is not None:
+            self._server_socket.close()
+            self._server_socket = None
+        print("🛑 GPS okuyucu durduruldu")
+
+    def _serial_worker(self):
+        """Serial porttan byte blokları okuyan worker"""
+        while self.is_running:
+            try:
+                waiting = self._serial.in_waiting
+                data = self._serial.read(waiting or 1)
+                if data:
+                    self.process_bytes(data)
+            except Exception as e:
+                print(f"❌ Serial GPS okuma hatası: {e}")
+                time.sleep(0.5)
+
+    def _socket_worker(self):
+        """TCP bağlantısını kabul edip gelen byte'ları işleyen worker"""
+        while self.is_running:
+            try:
+                conn, addr = self._server_socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            print(f"📡 GPS socket bağlantısı: {addr[0]}:{addr[1]}")
+            with conn:
+                conn.settimeout(0.5)
+                while self.is_running:
+                    try:
+                        data = conn.recv(READ_CHUNK_SIZE)
+                    except socket.timeout:
+                        continue
+                    except OSError:
+                        break
+                    if not data:
+                        break
+                    self.process_bytes(data)
+            print("🔌 GPS socket bağlantısı kapandı")
+
+    def get_stats(self):
+        """Okuyucu ve çözücü istatistiklerini döndür"""
+        stats = self.parser.get_stats()
+        stats['invalid_fixes'] = self.invalid_fix_count
+        return stats
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GPS Kayıt Tekrarı (Replay) - SUMO GPS Ambulans Projesi
+Bu modül kaydedilmiş GPS verisini (GPX izi, ambulance_positions_*.csv,
+--trajectory-out akış dosyası, .trjc, .trkc veya ham GPS günlüğü .gpsj) canlı GPS
+kaynağı gibi TraCI döngüsüne verir. Fix'ler canlı yoldaki gibi
+GPSFixHandoff kuyruğuna eklenir; noise filtresi, koordinat eşleme ve trafik
+ışığı kontrolü aynen çalışır.
+
+Tekrarın saati duvar saati değil simülasyon zamanıdır: bir fix, kayıttaki
+göreli zamanı / hız çarpanı kadar simülasyon süresi geçince verilir. Hız 0
+"olabildiğince hızlı" demektir: her simülasyon adımında bir fix. Filtreye
+kayıttaki zaman damgaları verilir; böylece sonuç hız çarpanından ve makinenin
+hızından bağımsızdır ve aynı kayıt her çalıştırmada aynı sonucu üretir.
+"""
+
+import datetime
+import math
+import os
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+import trajectory_columnar
+from gps_handoff import DEFAULT_VEHICLE_ID
+from gps_journal import JOURNAL_EXTENSION, read_journal
+from trajectory_codec import CODEC_EXTENSION, TrackReader
+
+GPX_DEFAULT_INTERVAL = 1.0  # saniye, <time> etiketi olmayan GPX noktaları için
+
+ReplayFix = namedtuple('ReplayFix', ['time', 'latitude', 'longitude'])
+
+
+def _parse_gpx_time(text):
+    """GPX <time> değerini epoch saniyeye çevir"""
+    value = datetime.datetime.fromisoformat(text.strip().replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def load_gpx_fixes(gpx_file):
+    """
+    GPX izini ReplayFix listesi olarak oku
+
+    <time> etiketi olan noktalarda kayıt zamanı, olmayanlarda
+    GPX_DEFAULT_INTERVAL aralıklı göreli zaman kullanılır.
+    """
+    root = ET.parse(gpx_file).getroot()
+    points = [el for el in root.iter() if el.tag.rsplit('}', 1)[-1] == 'trkpt']
+    fixes = []
+    for i, point in enumerate(points):
+        timestamp = i * GPX_DEFAULT_INTERVAL
+        for child in point:
+            if child.tag.rsplit('}', 1)[-1] == 'time' and child.text:
+                timestamp = _parse_gpx_time(child.text)
+                break
+        fixes.append(ReplayFix(timestamp, float(point.get('lat')), float(point.get('lon'))))
+    return fixes
+
+
+def load_trajectory_fixes(path, vehicle_id=None):
+    """
+    Pozisyon kaydından (CSV, ikili akış veya .trjc) bir aracın fix'lerini oku
+
+    vehicle_id verilmezse dosyadaki ilk araç kullanılır. Zaman olarak sim_time,
+    eski CSV'lerde (sim_time yok) adım numarası kullanılır.
+    """
+    lower = path.lower()
+    if lower.endswith(trajectory_columnar.COLUMNAR_EXTENSION):
+        with trajectory_columnar.ColumnarTrajectory(path) as table:
+            columns, vehicle_ids = table.read(['vehicle', 'step', 'time', 'lat', 'lon']), table.vehicle_ids
+    elif lower.endswith('.csv'):
+        columns, vehicle_ids = trajectory_columnar.columns_from_csv(path)
+    else:
+        columns, vehicle_ids = trajectory_columnar.columns_from_stream(path)
+
+    if not vehicle_ids:
+        return []
+    if vehicle_id is None:
+        vehicle_id = vehicle_ids[0]
+    if vehicle_id not in vehicle_ids:
+        raise ValueError(f"{path}: {vehicle_id} kaydı yok (araçlar: {', '.join(vehicle_ids)})")
+    index = vehicle_ids.index(vehicle_id)
+
+    fixes = []
+    for vehicle, step, sim_time, lat, lon in zip(columns['vehicle'], columns['step'], columns['time'],
+                                                 columns['lat'], columns['lon']):
+        if vehicle == index:
+            timestamp = float(step) if math.isnan(sim_time) else float(sim_time)
+            fixes.append(ReplayFix(timestamp, float(lat), float(lon)))
+    return fixes
+
+
+def load_replay_fixes(path, vehicle_id=None):
+    """Dosya türüne göre fix'leri oku ve zamana göre sırala"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    if path.lower().endswith('.gpx'):
+        fixes = load_gpx_fixes(path)
+    elif path.lower().endswith(JOURNAL_EXTENSION):
+        # Ham günlük: canlı oturumdaki alış zamanlarıyla, filtre öncesi fix'ler
+        fixes = [ReplayFix(r.time, r.latitude, r.longitude) for r in read_journal(path)]
+    elif path.lower().endswith(CODEC_EXTENSION):
+        fixes = [ReplayFix(*point) for point in TrackReader(path)]
+    else:
+        fixes = load_trajectory_fixes(path, vehicle_id)
+    # Kararlı sıralama: aynı zamanlı fix'ler kayıt sırasını korur
+    return sorted(fixes, key=lambda fix: fix.time)
+
+
+class GPSReplaySource:
+    """
+    Kaydedilmiş fix'leri simülasyon saatine göre GPSFixHandoff'a veren kaynak
+
+    pump() her simülasyon adımında, process_pending_gps_fixes'ten önce,
+    simülasyon thread'inden çağrılır (ayrı thread yok, zamanlama deterministik).
+    """
+
+    def __init__(self, fixes, speed=1.0, vehicle_id=DEFAULT_VEHICLE_ID, path=None):
+        if speed < 0:
+            raise ValueError("Tekrar hızı negatif olamaz")
+        self.fixes = list(fixes)
+        self.path = path
+        self.speed = speed
+        self.vehicle_id = vehicle_id
+        self.delivered_count = 0
+        self._start_time = None
+        self._origin = self.fixes[0].time if self.fixes else 0.0
+
+    @classmethod
+    def from_file(cls, path, speed=1.0, vehicle_id=None):
+        """Dosyadan kaynak oluştur (vehicle_id: kayıtta okunacak araç)"""
+        return cls(load_replay_fixes(path, vehicle_id), speed, path=path)
+
+    @property
+    def finished(self):
+        return self.delivered_count >= len(self.fixes)
+
+    @property
+    def duration(self):
+        """Kaydın göreli süresi (saniye)"""
+        return self.fixes[-1].time - self._origin if self.fixes else 0.0
+
+    def pump(self, sim_time, handoff):
+        """
+        Zamanı gelmiş fix'leri kuyruğa ekle
+
+        Args:
+            sim_time: güncel simülasyon zamanı (ilk çağrı tekrarın başlangıcıdır)
+            handoff: GPSFixHandoff
+        Returns:
+            eklenen fix sayısı
+        """
+        if self._start_time is None:
+            self._start_time = sim_time
+        if self.finished:
+            return 0
+
+        if self.speed == 0:
+            end = self.delivered_count + 1
+        else:
+            # Kayıt zamanı cinsinden geçen süre; küçük tolerans float birikimine karşı
+            due = (sim_time - self._start_time) * self.speed + 1e-9
+            end = self.delivered_count
+            while end < len(self.fixes) and self.fixes[end].time - self._origin <= due:
+                end += 1
+
+        for fix in self.fixes[self.delivered_count:end]:
+            handoff.put(fix.latitude, fix.longitude, vehicle_id=self.vehicle_id, timestamp=fix.time)
+        count = end - self.delivered_count
+        self.delivered_count = end
+        return count
+
+    def reset(self):
+        """Tekrarı baştan başlat"""
+        self.delivered_count = 0
+        self._start_time = None
+
+    def __repr__(self):
+        speed = "max" if self.speed == 0 else f"{self.speed:g}x"
+        return (f"GPSReplaySource({len(self.fixes)} fix, {self.duration:.1f} s, {speed}, "
+                f"{self.delivered_count} verildi)")
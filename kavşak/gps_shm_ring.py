@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paylaşımlı Bellek GPS Halka Tamponu - SUMO GPS Ambulans Projesi
+Bu modül ayrı bir süreçte çalışan GPS ingestion/filtreleme tarafının sabit
+boyutlu fix kayıtlarını multiprocessing.shared_memory üzerindeki halka
+tampona yazmasını ve TraCI sürecinin bunları pickle/kopya olmadan okumasını
+sağlar. Tek yazar, tek okuyucu varsayılır.
+"""
+
+import struct
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+RING_MAGIC = 0x47505352  # "GPSR"
+DEFAULT_RING_CAPACITY = 1024
+
+# Başlık: magic, kapasite, kayıt boyutu, (boşluk), son yazılan seq
+_HEADER = struct.Struct('<IIIIQ')
+_HEAD_SEQ_OFFSET = 16
+
+# Kayıt: seq, zaman, lat, lon, hdop, araç indeksi, bayraklar, uydu, seq (tekrar)
+# Baştaki ve sondaki seq eşleşmezse kayıt okuma sırasında üzerine yazılmıştır.
+_RECORD = struct.Struct('<QdddfHHH2xQ')
+_RECORD_SEQ_END_OFFSET = _RECORD.size - 8
+
+FLAG_VALID = 0x01
+FLAG_FILTERED = 0x02
+
+ShmFix = namedtuple('ShmFix', ['seq', 'timestamp', 'latitude', 'longitude', 'hdop',
+                               'vehicle_index', 'flags', 'satellites'])
+
+
+class SharedFixRing:
+    """
+    Paylaşımlı bellek üzerinde sabit kayıt boyutlu halka tampon
+
+    Yazar her kayda artan bir sıra numarası (seq) verir ve kaydı bitirdikten
+    sonra başlıktaki head seq'i günceller. Okuyucu kendi son okuduğu seq'i
+    tutar; head ile arası kapasiteyi aşarsa taşma (overrun) sayılır.
+    """
+
+    def __init__(self, shm, capacity, owner):
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+        self._buf = shm.buf
+
+        # Yazar durumu
+        self._write_seq = _HEADER.unpack_from(self._buf, 0)[4]
+
+        # Okuyucu durumu
+        self._read_seq = self._write_seq
+        self.overrun_count = 0
+        self.torn_count = 0
+
+    @classmethod
+    def create(cls, capacity=DEFAULT_RING_CAPACITY):
+        """Yeni halka tampon oluştur (simülasyon süreci)"""
+        size = _HEADER.size + capacity * _RECORD.size
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        _HEADER.pack_into(shm.buf, 0, RING_MAGIC, capacity, _RECORD.size, 0, 0)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Var olan halka tampona bağlan (ingestion süreci)"""
+        shm = shared_memory.SharedMemory(name=name)
+        magic, capacity, record_size, _, _ = _HEADER.unpack_from(shm.buf, 0)
+        if magic != RING_MAGIC or record_size != _RECORD.size:
+            shm.close()
+            raise ValueError(f"Geçersiz GPS halka tamponu: {name}")
+        return cls(shm, capacity, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, latitude, longitude, timestamp=None, vehicle_index=0,
+              flags=FLAG_VALID, satellites=0, hdop=99.99):
+        """Bir fix kaydı yaz (tek yazar)"""
+        if timestamp is None:
+            timestamp = time.time()
+        seq = self._write_seq + 1
+        offset = _HEADER.size + ((seq - 1) % self.capacity) * _RECORD.size
+        _RECORD.pack_into(self._buf, offset, seq, timestamp, latitude, longitude,
+                          hdop, vehicle_index, flags, satellites, seq)
+        struct.pack_into('<Q', self._buf, _HEAD_SEQ_OFFSET, seq)
+        self._write_seq = seq
+        return seq
+
+    def head_seq(self):
+        """Yazarın en son tamamladığı kaydın seq numarası"""
+        return struct.unpack_from('<Q', self._buf, _HEAD_SEQ_OFFSET)[0]
+
+    def read_new(self, max_records=None):
+        """Son okumadan bu yana yazılan kayıtları ShmFix listesi olarak döndür"""
+        head = self.head_seq()
+        next_seq = self._read_seq + 1
+
+        # Yazar okuyucuyu tur bindirdiyse en eski sağlam kayda atla
+        oldest = head - self.capacity + 1
+        if next_seq < oldest:
+            self.overrun_count += oldest - next_seq
+            next_seq = oldest
+
+        if max_records is not None:
+            head = min(head, next_seq + max_records - 1)
+
+        fixes = []
+        buf = self._buf
+        for seq in range(next_seq, head + 1):
+            offset = _HEADER.size + ((seq - 1) % self.capacity) * _RECORD.size
+            record = _RECORD.unpack_from(buf, offset)
+            if record[0] != seq or record[-1] != seq:
+                # Okurken üzerine yazıldı
+                self.torn_count += 1
+                self.overrun_count += 1
+                continue
+            fixes.append(ShmFix(*record[:-1]))
+
+        if head >= next_seq:
+            self._read_seq = head
+        return fixes
+
+    def close(self):
+        """Bellek görünümünü bırak; sahipse paylaşımlı belleği sil"""
+        self._buf = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self):
+        """Halka tampon istatistiklerini döndür"""
+        return {
+            'capacity': self.capacity,
+            'head_seq': self.head_seq() if self._buf is not None else self._write_seq,
+            'read_seq': self._read_seq,
+            'overruns': self.overrun_count,
+            'torn_reads': self.torn_count,
+        }
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çoklu LED Kontrolcü Dağıtımı - SUMO GPS Ambulans Projesi
+Bu modül trafik ışığı (TLS) ID'lerini bir veya daha fazla ESP32 LED
+kontrolcüsüne eşler ve bir simülasyon adımındaki LED komutlarını tüm
+kontrolcülere eşzamanlı gönderir. Aynı cihaza giden birden fazla komut tek
+bir /batch isteğinde toplanır.
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from device_health import device_health
+
+# SUMO sinyal tipi -> ESP32_Traffic_LED_Controller.ino endpoint'i
+SIGNAL_ENDPOINTS = {
+    "GREEN_LIGHT_ACTIVATED": "/ambulance/green",
+    "NORMAL_TRAFFIC_RESUMED": "/ambulance/normal",
+}
+
+# /batch gövdesindeki kısa sinyal adları
+BATCH_SIGNAL_NAMES = {
+    "GREEN_LIGHT_ACTIVATED": "green",
+    "NORMAL_TRAFFIC_RESUMED": "normal",
+}
+
+BATCH_ENDPOINT = "/batch"
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_MAX_WORKERS = 32
+LED_FAILURE_THRESHOLD = 2
+
+LEDSendResult = namedtuple('LEDSendResult', ['address', 'ok', 'status', 'elapsed', 'batched', 'error'])
+
+
+def led_health(address):
+    """LED kontrolcüsünün devre kesicisi (send_signal_to_esp32 ile ortak)"""
+    return device_health.get(f"ESP32 LED {address}", failure_threshold=LED_FAILURE_THRESHOLD)
+
+
+class LEDControllerRegistry:
+    """TLS ID -> LED kontrolcü adresleri (IP veya IP:port) eşlemesi"""
+
+    def __init__(self):
+        self._controllers = OrderedDict()
+
+    def register(self, tls_id, address):
+        """TLS'e bir LED kontrolcüsü ekle"""
+        addresses = self._controllers.setdefault(str(tls_id), [])
+        if address not in addresses:
+            addresses.append(address)
+
+    def controllers_for(self, tls_id):
+        """TLS'e bağlı kontrolcü adresleri (yoksa boş liste)"""
+        return list(self._controllers.get(str(tls_id), ()))
+
+    def tls_ids(self):
+        return list(self._controllers)
+
+    def addresses(self):
+        """Tüm benzersiz kontrolcü adresleri"""
+        seen = OrderedDict()
+        for addresses in self._controllers.values():
+            for address in addresses:
+                seen[address] = None
+        return list(seen)
+
+    def __len__(self):
+        return len(self._controllers)
+
+    @classmethod
+    def from_spec(cls, spec=None, default_address=None, default_tls="0"):
+        """
+        Komut satırı tanımından kayıt oluştur
+
+        Biçim: "0=192.168.1.107,192.168.1.108;1=192.168.1.109:8080"
+        spec boşsa default_address, default_tls'e bağlanır.
+        """
+        registry = cls()
+        if spec:
+            for entry in spec.split(';'):
+                entry = entry.strip()
+                if not entry:
+                    continue
+                if '=' not in entry:
+                    raise ValueError(f"Geçersiz LED eşlemesi: '{entry}' (beklenen: tls=ip[,ip...])")
+                tls_id, addresses = entry.split('=', 1)
+                for address in addresses.split(','):
+                    address = address.strip()
+                    if address:
+                        registry.register(tls_id.strip(), address)
+        elif default_address:
+            registry.register(default_tls, default_address)
+        return registry
+
+
+class LEDFanout:
+    """
+    LED komutlarını kontrolcülere eşzamanlı dağıtan gönderici
+
+    send() bir adımdaki tüm (tls_id, sinyal, bağlam) komutlarını alır, cihaz
+    başına gruplar ve her cihaza tek istek gönderir. İstekler thread havuzunda
+    paralel yürütüldüğünden toplam süre en yavaş cihazın süresi kadardır.
+    /batch desteklemeyen (eski firmware, HTTP 404) cihazlara son komut tekil
+    endpoint ile gönderilir.
+    """
+
+    def __init__(self, registry, timeout=DEFAULT_TIMEOUT, max_workers=DEFAULT_MAX_WORKERS, verbose=True):
+        self.registry = registry
+        self.timeout = timeout
+        self.verbose = verbose
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="led-fanout")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._batch_supported = {}
+
+        # İstatistikler
+        self.round_count = 0
+        self.device_requests = 0
+        self.batched_requests = 0
+        self.failed_requests = 0
+        self.last_round_time = 0.0
+        self.max_round_time = 0.0
+
+    def _session(self):
+        # Thread başına keep-alive oturumu (her komutta yeni TCP bağlantısı açılmaz)
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def send(self, commands):
+        """
+        Komutları gönder
+
+        Args:
+            commands: [(tls_id, signal_type, context), ...] (aynı adımdaki değişiklikler)
+
+        Returns:
+            dict: tls_id -> bool (TLS'in tüm kontrolcülerine ulaşıldıysa True)
+        """
+        per_device = OrderedDict()
+        results = {}
+        for tls_id, signal_type, context in commands:
+            tls_id = str(tls_id)
+            addresses = self.registry.controllers_for(tls_id)
+            if signal_type not in SIGNAL_ENDPOINTS or not addresses:
+                # Gönderilecek LED durumu yok (örn. AMBULANCE_PASSING) veya kontrolcü tanımsız
+                results[tls_id] = signal_type not in SIGNAL_ENDPOINTS
+                continue
+            results[tls_id] = True
+            for address in addresses:
+                per_device.setdefault(address, []).append((tls_id, signal_type, context))
+
+        if not per_device:
+            return results
+
+        start = time.monotonic()
+        futures = {address: self._executor.submit(self._send_device, address, device_commands)
+                   for address, device_commands in per_device.items()}
+        device_results = {address: future.result() for address, future in futures.items()}
+        elapsed = time.monotonic() - start
+
+        ok_count = 0
+        for address, result in device_results.items():
+            if result.ok:
+                ok_count += 1
+                continue
+            for tls_id, _, _ in per_device[address]:
+                results[tls_id] = False
+            if self.verbose and result.error != 'circuit open':
+                print(f"❌ ESP32 LED {address}: {result.error or f'HTTP {result.status}'}")
+
+        with self._lock:
+            self.round_count += 1
+            self.last_round_time = elapsed
+            self.max_round_time = max(self.max_round_time, elapsed)
+
+        if self.verbose:
+            timestamp = time.strftime("%H:%M:%S")
+            print(f"📡 ESP32 LED SİNYALİ [{timestamp}]: {len(commands)} komut -> "
+                  f"{ok_count}/{len(device_results)} kontrolcü ({elapsed * 1000:.0f} ms)")
+        return results
+
+    def _send_device(self, address, commands):
+        """Tek bir cihaza komutlarını gönder (thread havuzunda çalışır)"""
+        health = led_health(address)
+        if not health.allow_request():
+            return LEDSendResult(address, False, None, 0.0, False, 'circuit open')
+
+        use_batch = len(commands) > 1 and self._batch_supported.get(address, True)
+        start = time.monotonic()
+        try:
+            if use_batch:
+                body = {'signals': [{'tls': tls_id, 'signal': BATCH_SIGNAL_NAMES[signal_type]}
+                                    for tls_id, signal_type, _ in commands]}
+                response = self._session().post(f"http://{address}{BATCH_ENDPOINT}",
+                                                json=body, timeout=self.timeout)
+                if response.status_code == 404:
+                    # Eski firmware: tek LED'in son durumu yeterli
+                    self._batch_supported[address] = False
+                    use_batch = False
+            if not use_batch:
+                endpoint = SIGNAL_ENDPOINTS[commands[-1][1]]
+                response = self._session().post(f"http://{address}{endpoint}", timeout=self.timeout)
+        except Exception as e:
+            # RequestException dışındaki hatalar da kaydedilir; yoksa yarı açık devrenin
+            # deneme hakkı takılı kalır
+            health.record_failure(e)
+            with self._lock:
+                self.device_requests += 1
+                self.failed_requests += 1
+            return LEDSendResult(address, False, None, time.monotonic() - start, use_batch, str(e))
+
+        # Sadece 200 başarı sayılır (runner.record_led_response ile aynı kural)
+        ok = response.status_code == 200
+        if ok:
+            health.record_success()
+        else:
+            health.record_failure(f"HTTP {response.status_code}")
+        with self._lock:
+            self.device_requests += 1
+            if use_batch:
+                self.batched_requests += 1
+            if not ok:
+                self.failed_requests += 1
+        return LEDSendResult(address, ok, response.status_code, time.monotonic() - start, use_batch, None)
+
+    def close(self):
+        """Thread havuzunu kapat"""
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self):
+        """Dağıtım istatistiklerini döndür"""
+        with self._lock:
+            return {
+                'controllers': len(self.registry.addresses()),
+                'rounds': self.round_count,
+                'device_requests': self.device_requests,
+                'batched_requests': self.batched_requests,
+                'failed_requests': self.failed_requests,
+                'last_round_time': self.last_round_time,
+                'max_round_time': self.max_round_time,
+            }
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SUMO Çıktı Analizi - SUMO GPS Ambulans Projesi
+Bu script her çalıştırmanın yazdığı tripinfo.xml (--tripinfo-output) ve
+indüksiyon döngüsü çıktısını (data/cross.det.xml -> cross.out) akış halinde
+okuyup KPI'lara çevirir:
+
+  - araç sınıfı başına yolculuk süresi, kayıp süre (timeLoss), bekleme süresi
+    ortalama / p50 / p95 / max (ambulans ayrı sınıf)
+  - ambulans yolculukları tek tek (kalkış, varış, süre, kayıp, bekleme)
+  - dedektör başına toplam araç, ortalama ve tepe akış (araç/saat),
+    zaman ağırlıklı doluluk (%) ve ortalama hız
+
+Dosyalar ET.iterparse ile okunur, işlenen her eleman kökten silinir;
+bellek kullanımı yolculuk sayısından bağımsızdır (yüzdelikler
+trajectory_stats.P2Quantile ile tahmin edilir). Milyonlarca yolculuklu şehir
+ölçekli çıktılar ve çok sayıda çalıştırma bir süreç havuzunda paralel
+analiz edilebilir.
+
+Kullanım:
+    python output_analytics.py                                  # bu dizindeki son çalıştırma
+    python output_analytics.py run_a/ run_b/ run_c/ --workers 4
+    python output_analytics.py city/tripinfo.xml --detectors city/e1.out
+    python output_analytics.py runs/* --output-dir kpi/         # runs.csv, classes.csv, detectors.csv
+"""
+
+import csv
+import json
+import math
+import multiprocessing
+import optparse
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+from trajectory_stats import P2Quantile
+
+AMBULANCE_CLASS = "ambulance"
+EMERGENCY_MARKERS = ("ambulance", "emergency")
+QUANTILES = (0.5, 0.95)
+
+# tripinfo özniteliği -> KPI adı
+TRIP_METRICS = (
+    ('duration', 'travel_time'),
+    ('timeLoss', 'time_loss'),
+    ('waitingTime', 'waiting_time'),
+    ('waitingCount', 'waiting_count'),
+    ('routeLength', 'route_length'),
+)
+QUANTILE_METRICS = ('travel_time', 'time_loss', 'waiting_time')
+
+# Çalıştırma dizininde aranan dosyalar (runner.py cwd'ye, SUMO dedektör
+# çıktısını .det.xml dosyasının yanına yazar)
+TRIPINFO_NAMES = ("tripinfo.xml",)
+DETECTOR_NAMES = ("cross.out", os.path.join("data", "cross.out"))
+
+RUN_FIELDS = ['run', 'trips', 'ambulance_trips', 'ambulance_travel_time', 'ambulance_time_loss',
+              'ambulance_waiting_time', 'mean_travel_time', 'mean_time_loss', 'mean_waiting_time',
+              'detector_vehicles', 'detector_flow', 'detector_occupancy', 'error']
+CLASS_FIELDS = ['run', 'vehicle_class', 'trips'] + [
+    f"{stat}_{metric}" for metric in QUANTILE_METRICS for stat in ('mean', 'p50', 'p95', 'max')
+] + ['mean_waiting_count', 'mean_route_length']
+DETECTOR_FIELDS = ['run', 'detector', 'intervals', 'period', 'vehicles', 'flow', 'peak_flow',
+                   'occupancy', 'speed']
+
+
+# ================================
+# AKIŞ OKUYUCU
+# ================================
+
+def iter_elements(source, tag):
+    """
+    source içindeki <tag> elemanlarını sırayla ver (sabit bellek)
+
+    Her eleman verildikten sonra kökten silinir; çağıran elemanı bir sonraki
+    adıma kadar kullanmalı, saklamamalıdır.
+    """
+    root = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if root is None:
+            root = elem
+        elif event == 'end' and elem.tag == tag:
+            yield elem
+            root.clear()
+
+
+def classify_trip(trip_id, vtype):
+    """Yolculuğun araç sınıfı: ambulans/acil araçlar tek sınıf, diğerleri vType"""
+    text = f"{trip_id} {vtype}".lower()
+    if any(marker in text for marker in EMERGENCY_MARKERS):
+        return AMBULANCE_CLASS
+    return vtype or "DEFAULT_VEHTYPE"
+
+
+def _float(elem, name, default=math.nan):
+    value = elem.get(name)
+    return float(value) if value is not None else default
+
+
+# ================================
+# TRIPINFO
+# ================================
+
+class ClassStats:
+    """Bir araç sınıfının akış istatistikleri (toplam, max, P² yüzdelikleri)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.sums = {metric: 0.0 for _, metric in TRIP_METRICS}
+        self.maxima = {metric: 0.0 for _, metric in TRIP_METRICS}
+        self.quantiles = {metric: {p: P2Quantile(p) for p in QUANTILES} for metric in QUANTILE_METRICS}
+
+    def add(self, values):
+        self.count += 1
+        for metric, value in values.items():
+            self.sums[metric] += value
+            if value > self.maxima[metric]:
+                self.maxima[metric] = value
+        for metric, estimators in self.quantiles.items():
+            for estimator in estimators.values():
+                estimator.add(values[metric])
+
+    def mean(self, metric):
+        return self.sums[metric] / self.count if self.count else math.nan
+
+    def summary(self):
+        summary = {'vehicle_class': self.name, 'trips': self.count}
+        for metric in QUANTILE_METRICS:
+            summary[f"mean_{metric}"] = self.mean(metric)
+            for p, estimator in self.quantiles[metric].items():
+                summary[f"p{int(p * 100)}_{metric}"] = estimator.value()
+            summary[f"max_{metric}"] = self.maxima[metric] if self.count else math.nan
+        summary['mean_waiting_count'] = self.mean('waiting_count')
+        summary['mean_route_length'] = self.mean('route_length')
+        return summary
+
+
+def analyze_tripinfo(source):
+    """
+    tripinfo.xml'i tek geçişte özetle
+
+    Returns:
+        {'trips', 'classes': {sınıf: özet}, 'all': tüm yolculukların özeti,
+         'ambulances': [ambulans yolculukları], 'error'}
+        Yarıda kesilmiş (kapanmamış) dosyada o ana kadar okunanlar döner,
+        'error' ayrıştırma hatasını içerir.
+    """
+    classes = {}
+    overall = ClassStats("all")
+    ambulances = []
+    error = ''
+    try:
+        for trip in iter_elements(source, 'tripinfo'):
+            values = {metric: _float(trip, attr, 0.0) for attr, metric in TRIP_METRICS}
+            trip_id = trip.get('id', '')
+            vehicle_class = classify_trip(trip_id, trip.get('vType', ''))
+            stats = classes.get(vehicle_class)
+            if stats is None:
+                stats = classes[vehicle_class] = ClassStats(vehicle_class)
+            stats.add(values)
+            overall.add(values)
+            if vehicle_class == AMBULANCE_CLASS:
+                ambulances.append(dict(values, id=trip_id, depart=_float(trip, 'depart'),
+                                       arrival=_float(trip, 'arrival')))
+    except (ET.ParseError, OSError) as e:  # OSError: dosya yok / okunamıyor
+        error = f"tripinfo: {e}"
+    return {
+        'trips': overall.count,
+        'classes': {name: stats.summary() for name, stats in sorted(classes.items())},
+        'all': overall.summary(),
+        'ambulances': ambulances,
+        'error': error,
+    }
+
+
+# ================================
+# DEDEKTÖR (E1) ÇIKTISI
+# ================================
+
+def analyze_detectors(source):
+    """
+    İndüksiyon döngüsü <interval> kayıtlarını dedektör başına özetle
+
+    flow: toplam araç / toplam süre (araç/saat), peak_flow: en yüksek aralık akışı,
+    occupancy: aralık süresiyle ağırlıklı ortalama (%), speed: araç sayısıyla
+    ağırlıklı ortalama (m/s, araç geçmeyen aralıklar -1 olduğundan atlanır).
+
+    Returns:
+        ({dedektör_id: özet}, hata metni)
+    """
+    totals = {}
+    error = ''
+    try:
+        for interval in iter_elements(source, 'interval'):
+            det = totals.setdefault(interval.get('id'), {
+                'intervals': 0, 'period': 0.0, 'vehicles': 0, 'peak_flow': 0.0,
+                'occupancy_time': 0.0, 'speed_sum': 0.0, 'speed_vehicles': 0})
+            period = _float(interval, 'end', 0.0) - _float(interval, 'begin', 0.0)
+            vehicles = int(_float(interval, 'nVehContrib', 0.0))
+            speed = _float(interval, 'speed', -1.0)
+            det['intervals'] += 1
+            det['period'] += period
+            det['vehicles'] += vehicles
+            det['peak_flow'] = max(det['peak_flow'], _float(interval, 'flow', 0.0))
+            det['occupancy_time'] += _float(interval, 'occupancy', 0.0) * period
+            if speed >= 0 and vehicles:
+                det['speed_sum'] += speed * vehicles
+                det['speed_vehicles'] += vehicles
+    except (ET.ParseError, OSError) as e:  # OSError: dosya yok / okunamıyor
+        error = f"detector: {e}"
+
+    detectors = {}
+    for det_id, det in sorted(totals.items()):
+        period = det['period']
+        detectors[det_id] = {
+            'intervals': det['intervals'],
+            'period': period,
+            'vehicles': det['vehicles'],
+            'flow': det['vehicles'] * 3600.0 / period if period > 0 else math.nan,
+            'peak_flow': det['peak_flow'],
+            'occupancy': det['occupancy_time'] / period if period > 0 else math.nan,
+            'speed': det['speed_sum'] / det['speed_vehicles'] if det['speed_vehicles'] else math.nan,
+        }
+    return detectors, error
+
+
+# ================================
+# ÇALIŞTIRMA
+# ================================
+
+def find_run_outputs(path):
+    """
+    Çalıştırma dizininde (veya tripinfo dosyasının yanında) çıktıları bul
+
+    Returns:
+        (tripinfo yolu veya None, dedektör çıktısı yolu veya None)
+    """
+    if os.path.isfile(path):
+        tripinfo, base = path, os.path.dirname(path)
+    else:
+        base = path
+        tripinfo = next((os.path.join(base, name) for name in TRIPINFO_NAMES
+                         if os.path.isfile(os.path.join(base, name))), None)
+    detectors = next((os.path.join(base, name) for name in DETECTOR_NAMES
+                      if os.path.isfile(os.path.join(base, name))), None)
+    return tripinfo, detectors
+
+
+def analyze_run(tripinfo=None, detectors=None, run=None):
+    """
+    Bir çalıştırmanın KPI'ları
+
+    Returns:
+        {'run', 'tripinfo': analyze_tripinfo sonucu veya None,
+         'detectors': {dedektör_id: özet}, 'error'}
+    """
+    errors = []
+    trips = None
+    if tripinfo:
+        trips = analyze_tripinfo(tripinfo)
+        errors.append(trips['error'])
+    detector_summary = {}
+    if detectors:
+        detector_summary, error = analyze_detectors(detectors)
+        errors.append(error)
+    return {
+        'run': run if run is not None else (tripinfo or detectors),
+        'tripinfo': trips,
+        'detectors': detector_summary,
+        'error': "; ".join(e for e in errors if e),
+    }
+
+
+def run_kpis(result):
+    """analyze_run sonucunu tek bir runs.csv satırına indir"""
+    row = {field: None for field in RUN_FIELDS}
+    row['run'] = result['run']
+    row['error'] = result['error']
+    trips = result['tripinfo']
+    if trips is not None:
+        row['trips'] = trips['trips']
+        ambulance = trips['classes'].get(AMBULANCE_CLASS)
+        if ambulance:
+            row['ambulance_trips'] = ambulance['trips']
+            for metric in QUANTILE_METRICS:
+                row[f"ambulance_{metric}"] = ambulance[f"mean_{metric}"]
+        if trips['trips']:
+            for metric in QUANTILE_METRICS:
+                row[f"mean_{metric}"] = trips['all'][f"mean_{metric}"]
+    detectors = result['detectors'].values()
+    if detectors:
+        period = sum(d['period'] for d in detectors)
+        row['detector_vehicles'] = sum(d['vehicles'] for d in detectors)
+        row['detector_flow'] = sum(d['flow'] for d in detectors if not math.isnan(d['flow']))
+        row['detector_occupancy'] = (sum(d['occupancy'] * d['period'] for d in detectors if d['period'] > 0)
+                                     / period if period > 0 else math.nan)
+    return row
+
+
+def _analyze_path(task):
+    path, detectors = task
+    tripinfo, found = find_run_outputs(path)
+    if tripinfo is None and found is None and detectors is None:
+        return dict(analyze_run(run=path), error="tripinfo/dedektör çıktısı bulunamadı")
+    return analyze_run(tripinfo, detectors or found, run=path)
+
+
+def analyze_runs(paths, workers=1, detectors=None):
+    """
+    Çalıştırmaları (dizin veya tripinfo dosyası) analiz et, sonuçları sırayla üret
+
+    workers > 1 ise dosyalar bir süreç havuzunda paralel ayrıştırılır; her
+    işçi tek bir dosyayı akış halinde okuduğundan bellek işçi sayısıyla sınırlıdır.
+    """
+    tasks = [(path, detectors) for path in paths]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        for task in tasks:
+            yield _analyze_path(task)
+        return
+    # spawn: scenario_farm ile aynı, işçiler ana sürecin durumunu devralmasın
+    with multiprocessing.get_context("spawn").Pool(processes=workers) as pool:
+        yield from pool.imap(_analyze_path, tasks)
+
+
+# ================================
+# RAPOR
+# ================================
+
+def _round(value, digits=3):
+    if isinstance(value, float):
+        return '' if math.isnan(value) else round(value, digits)
+    return value
+
+
+def class_rows(result):
+    if result['tripinfo'] is None:
+        return []
+    return [{field: _round(value) for field, value in dict(summary, run=result['run']).items()}
+            for summary in result['tripinfo']['classes'].values()]
+
+
+def detector_rows(result):
+    return [{'run': result['run'], 'detector': det_id, **{k: _round(v) for k, v in summary.items()}}
+            for det_id, summary in result['detectors'].items()]
+
+
+def format_result(result):
+    """Tek çalıştırmanın rapor satırları"""
+    lines = [f"📊 {result['run']}"]
+    trips = result['tripinfo']
+    if trips is None:
+        lines.append("   ⚠️ tripinfo çıktısı yok")
+    else:
+        lines.append(f"   🚗 {trips['trips']} yolculuk")
+        for name, summary in trips['classes'].items():
+            icon = "🚑" if name == AMBULANCE_CLASS else "  "
+            lines.append(f"   {icon} {name}: {summary['trips']} yolculuk, süre ort. "
+                         f"{summary['mean_travel_time']:.1f} s (p95 {summary['p95_travel_time']:.1f}), "
+                         f"kayıp {summary['mean_time_loss']:.1f} s, bekleme {summary['mean_waiting_time']:.1f} s")
+        for trip in trips['ambulances']:
+            lines.append(f"      🚑 {trip['id']}: {trip['depart']:.1f} -> {trip['arrival']:.1f} s, "
+                         f"süre {trip['travel_time']:.1f} s, kayıp {trip['time_loss']:.1f} s, "
+                         f"bekleme {trip['waiting_time']:.1f} s ({int(trip['waiting_count'])} duruş)")
+    for det_id, det in result['detectors'].items():
+        lines.append(f"   🔍 Dedektör {det_id}: {det['vehicles']} araç / {det['period']:.0f} s, "
+                     f"akış {det['flow']:.1f} araç/h (tepe {det['peak_flow']:.1f}), "
+                     f"doluluk %{det['occupancy']:.2f}, hız {det['speed']:.2f} m/s")
+    if result['error']:
+        lines.append(f"   ❌ {result['error']}")
+    return lines
+
+
+def write_reports(results, output_dir):
+    """runs.csv, classes.csv ve detectors.csv yaz (sonuçlar geldikçe)"""
+    os.makedirs(output_dir, exist_ok=True)
+    files = {name: open(os.path.join(output_dir, name), 'w', newline='', encoding='utf-8')
+             for name in ("runs.csv", "classes.csv", "detectors.csv")}
+    try:
+        writers = {
+            'runs.csv': csv.DictWriter(files['runs.csv'], fieldnames=RUN_FIELDS),
+            'classes.csv': csv.DictWriter(files['classes.csv'], fieldnames=CLASS_FIELDS),
+            'detectors.csv': csv.DictWriter(files['detectors.csv'], fieldnames=DETECTOR_FIELDS),
+        }
+        for writer in writers.values():
+            writer.writeheader()
+        for result in results:
+            writers['runs.csv'].writerow({k: _round(v) for k, v in run_kpis(result).items()})
+            writers['classes.csv'].writerows(class_rows(result))
+            writers['detectors.csv'].writerows(detector_rows(result))
+            yield result
+    finally:
+        for f in files.values():
+            f.close()
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options] [run_dir|tripinfo.xml ...]")
+    optParser.add_option("--detectors", type="string", default=None,
+                         help="induction loop output to use for every run (default: cross.out or data/cross.out next to the tripinfo)")
+    optParser.add_option("--workers", type="int", default=1,
+                         help="number of parallel worker processes (0 = all cores)")
+    optParser.add_option("--output-dir", type="string", default=None,
+                         help="write runs.csv, classes.csv and detectors.csv to this directory")
+    optParser.add_option("--json", action="store_true", default=False,
+                         help="print one JSON result per run instead of the report")
+    options, paths = optParser.parse_args(args=args)
+    if options.workers < 0:
+        optParser.error("--workers must be >= 0")
+    options.paths = paths or ["."]
+    return options
+
+
+def main(args=None):
+    options = get_options(args)
+    results = analyze_runs(options.paths, options.workers, options.detectors)
+    if options.output_dir:
+        results = write_reports(results, options.output_dir)
+
+    failed = 0
+    for result in results:
+        failed += bool(result['error'])
+        if options.json:
+            print(json.dumps(result, default=str))
+        else:
+            print("\n".join(format_result(result)))
+    if options.output_dir:
+        print(f"💾 KPI'lar kaydedildi -> {options.output_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -47,7 +47,7 @@ def run_simulation_direct():
     
     # Start SUMO
     try:
-        traci.start([sumoBinary, "-c", config_file, "--tripinfo-output", "tripinfo.xml"])
+        default_context.connect(traci, [sumoBinary, "-c", config_file, "--tripinfo-output", "tripinfo.xml"])
         print("✅ SUMO started successfully")
         
         # Run simulation
@@ -29,6 +29,21 @@ import xml.etree.ElementTree as ET
 import time
 import threading
 import math
+import multiprocessing
+import functools
+
+from gps_shm_ring import SharedFixRing, FLAG_VALID, FLAG_FILTERED
+from gps_replay import GPSReplaySource
+from gps_journal import GPSJournal, default_journal_path
+from signal_bus import SignalBus
+from device_health import device_health
+from led_controllers import LEDControllerRegistry, LEDFanout, led_health
+from step_profiler import StepProfiler
+from simulation_context import SimulationContext
+from trajectory_recorder import TrajectoryRecorder
+from trajectory_writer import open_trajectory_writer, csv_rows, CSV_FIELDS
+from trajectory_columnar import export_recorder, COLUMNAR_EXTENSION
+from trajectory_stats import format_summary, network_tls_positions
 
 # ESP32 GPS Client'ı import et
 try:
@@ -38,13 +53,14 @@ except ImportError:
     print("⚠️ esp32_gps_client.py bulunamadı, ESP32 WiFi modu kullanılamayacak")
     esp32_client_available = False
 
-# Global GPS değişkenleri
-gps_coordinates = []
-gps_index = 0
-real_time_gps = None  # Gerçek zamanlı GPS verisi
-use_real_time = False  # Gerçek zamanlı mod kontrolü
-current_network_type = "cross"  # Varsayılan ağ tipi
-esp32_gps_client = None  # ESP32 GPS client instance
+# Simülasyon durumu (GPS izi, filtre geçmişi, pozisyon tablosu, ambulans kontrolü,
+# GPS istemcileri) SimulationContext'te tutulur; fonksiyonlar ctx verilmezse
+# default_context'i kullanır. Buradakiler cihaz/yapılandırma düzeyindedir.
+esp32_led_address = "192.168.1.107"  # Trafik LED kontrolcüsü (IP veya IP:port)
+led_fanout = None  # TLS -> LED kontrolcüleri eşzamanlı dağıtımı (--led-map)
+position_export_format = "csv"  # Çalıştırma sonu pozisyon dışa aktarımı (--export-format)
+gps_journal_enabled = True  # Canlı kaynaklarda ham fix günlüğü (--no-gps-journal ile kapatılır)
+gps_journal_file = None     # None: gps_journal_<epoch>.gpsj (--gps-journal)
 
 # GPS Noise Filtreleme parametreleri
 GPS_NOISE_FILTER = {
@@ -56,86 +72,56 @@ GPS_NOISE_FILTER = {
     'noise_suppression_factor': 0.7     # Noise bastırma faktörü
 }
 
-# GPS Geçmiş veriler (filtreleme için)
-gps_history = {
-    'positions': [],                    # Son GPS pozisyonları [(lat, lon, timestamp), ...]
-    'last_significant_position': None,  # Son önemli pozisyon
-    'last_movement_time': 0,           # Son hareket zamanı
-    'is_stationary': False,            # Durağan durum kontrolü
-    'filtered_position': None,         # Filtrelenmiş pozisyon
-    'total_updates': 0,                # Toplam GPS güncelleme sayısı
-    'filtered_count': 0,               # Filtrelenen (noise) sayısı
-}
 
-# Global ambulans pozisyon tablosu ve sayaçlar
-ambulance_position_table = {}  # {vehicle_id: [(step, x, y, lat, lon), ...]}
-position_step_counter = 0
+def _context(ctx):
+    """ctx verilmemişse varsayılan simülasyon bağlamını döndür"""
+    return default_context if ctx is None else ctx
 
-def add_position_to_table(vehicle_id, step, sumo_x, sumo_y, gps_lat, gps_lon):
-    """Ambulansın pozisyonunu tabloya kaydet"""
-    global ambulance_position_table
-    
-    if vehicle_id not in ambulance_position_table:
-        ambulance_position_table[vehicle_id] = []
+def add_position_to_table(vehicle_id, step, sumo_x, sumo_y, gps_lat, gps_lon,
+                          sim_time=None, speed=None, filtered=False, ctx=None):
+    """
+    Ambulansın pozisyonunu yörünge kaydına (ctx.trajectory) ekle ve sürüş
+    istatistiklerini (ctx.trajectory_stats) güncelle
+
+    sim_time verilmezse bağlantıdan okunur (bağlantı yoksa adım kullanılır);
+    speed verilmezse kaydedici önceki kayıttan hesaplar.
+    """
+    ctx = _context(ctx)
     
-    ambulance_position_table[vehicle_id].append({
-        'step': step,
-        'sumo_x': round(sumo_x, 2),
-        'sumo_y': round(sumo_y, 2),
-        'gps_lat': round(gps_lat, 6),
-        'gps_lon': round(gps_lon, 6)
-    })
+    if sim_time is None:
+        sim_time = ctx.traci.simulation.getTime() if ctx.traci is not None else step
+    ctx.trajectory.append(vehicle_id, step, sim_time, sumo_x, sumo_y, gps_lat, gps_lon,
+                          speed, filtered)
+    ctx.trajectory_stats.update(vehicle_id, sim_time, sumo_x, sumo_y, filtered)
 
-def print_ambulance_position_table():
-    """Ambulans pozisyon tablosunu güzel formatta yazdır"""
-    global ambulance_position_table
+def print_ambulance_position_table(ctx=None):
+    """Araç başına sürüş özetini ve GPS filtre istatistiklerini yazdır"""
+    ctx = _context(ctx)
     
-    if not ambulance_position_table:
+    if not ctx.trajectory_stats:
         print("❌ Ambulans pozisyon verisi bulunamadı!")
         return
     
     print("\n" + "="*80)
-    print("🚑 AMBULANS POZISYON TABLOSU - SUMO KOORDİNATLARI")
+    print("🚑 AMBULANS SÜRÜŞ ÖZETİ - SUMO KOORDİNATLARI")
     print("="*80)
     
-    for vehicle_id, positions in ambulance_position_table.items():
-        if not positions:
-            continue
-            
-        print(f"\n📍 {vehicle_id.upper()}:")
-        print("-" * 70)
-        print(f"{'Adım':<6} {'SUMO X':<10} {'SUMO Y':<10} {'GPS Lat':<12} {'GPS Lon':<12}")
-        print("-" * 70)
-        
-        for pos in positions:
-            print(f"{pos['step']:<6} {pos['sumo_x']:<10} {pos['sumo_y']:<10} {pos['gps_lat']:<12} {pos['gps_lon']:<12}")
-        
-        print(f"\n📊 Toplam {len(positions)} adım kaydedildi")
-        
-        # İlk ve son pozisyonları özetle
-        if len(positions) > 1:
-            first_pos = positions[0]
-            last_pos = positions[-1]
-            
-            # Toplam mesafe hesapla
-            total_distance = math.sqrt(
-                (last_pos['sumo_x'] - first_pos['sumo_x'])**2 + 
-                (last_pos['sumo_y'] - first_pos['sumo_y'])**2
-            )
-            
-            print(f"🎯 Başlangıç: ({first_pos['sumo_x']}, {first_pos['sumo_y']})")
-            print(f"🏁 Bitiş: ({last_pos['sumo_x']}, {last_pos['sumo_y']})")
-            print(f"📏 Toplam mesafe: {total_distance:.2f} metre (Geniş hareket alanı: 200→800)")
+    # Özet kayıt sırasında çevrimiçi tutulur (ctx.trajectory_stats); satırlar
+    # tek tek dolaşılmaz, tüm kayıtlar dışa aktarılan dosyadadır
+    for summary in ctx.trajectory_stats.summaries():
+        print()
+        for line in format_summary(summary):
+            print(line)
     
     # GPS Filtreleme istatistikleri
     print("\n" + "="*80)
     print("🔧 GPS NOISE FILTER İSTATİSTİKLERİ")
     print("="*80)
-    print(get_gps_filter_status())
+    print(get_gps_filter_status(ctx))
     
-    if gps_history['total_updates'] > 0:
-        total_updates = gps_history['total_updates']
-        filtered_count = gps_history['filtered_count']
+    if ctx.gps_history['total_updates'] > 0:
+        total_updates = ctx.gps_history['total_updates']
+        filtered_count = ctx.gps_history['filtered_count']
         accepted_count = total_updates - filtered_count
         filter_ratio = (filtered_count / total_updates) * 100
         
@@ -144,6 +130,10 @@ def print_ambulance_position_table():
         print(f"✅ Kabul edilen (geçerli): {accepted_count}")
         print(f"📊 Filtreleme oranı: {filter_ratio:.1f}%")
         
+        handoff_stats = ctx.gps_fix_handoff.get_stats()
+        if handoff_stats['dropped'] > 0:
+            print(f"⚠️ Kuyruk taşması: {handoff_stats['dropped']} GPS fix'i düşürüldü")
+        
         if filter_ratio > 80:
             print("⚠️ YÜKSEK NOISE ORANI! GPS modülünü kontrol edin.")
         elif filter_ratio > 50:
@@ -156,11 +146,16 @@ def print_ambulance_position_table():
         print(f"   {key}: {value}")
     print("="*80)
 
-def export_position_table_to_csv():
+def export_position_table_to_csv(ctx=None):
     """Ambulans pozisyon tablosunu CSV dosyasına aktar"""
-    global ambulance_position_table
+    ctx = _context(ctx)
     
-    if not ambulance_position_table:
+    # --trajectory-out: kayıtlar simülasyon boyunca zaten diske yazıldı
+    if ctx.trajectory.sink is not None:
+        print(f"✅ Pozisyon verileri simülasyon boyunca yazıldı: {ctx.trajectory.sink.path}")
+        return ctx.trajectory.sink.path
+    
+    if not ctx.trajectory:
         print("❌ CSV için veri bulunamadı!")
         return
     
@@ -168,44 +163,91 @@ def export_position_table_to_csv():
         import csv
         csv_filename = f"ambulance_positions_{int(time.time())}.csv"
         
+        # Satır nesnesi kurmadan doğrudan sütun parçalarından yaz (--trajectory-out CSV ile aynı biçim)
         with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['vehicle_id', 'step', 'sumo_x', 'sumo_y', 'gps_lat', 'gps_lon']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for vehicle_id, positions in ambulance_position_table.items():
-                for pos in positions:
-                    writer.writerow({
-                        'vehicle_id': vehicle_id,
-                        'step': pos['step'],
-                        'sumo_x': pos['sumo_x'],
-                        'sumo_y': pos['sumo_y'],
-                        'gps_lat': pos['gps_lat'],
-                        'gps_lon': pos['gps_lon']
-                    })
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_FIELDS)
+            for columns in ctx.trajectory.chunks():
+                writer.writerows(csv_rows(ctx.trajectory.vehicle_ids, columns))
         
         print(f"✅ Pozisyon verileri CSV'ye aktarıldı: {csv_filename}")
+        return csv_filename
         
     except Exception as e:
         print(f"❌ CSV aktarım hatası: {e}")
 
+def export_position_table_columnar(ctx=None):
+    """Ambulans pozisyon tablosunu sütunlu (.trjc) dosyaya aktar"""
+    ctx = _context(ctx)
+    
+    if ctx.trajectory.sink is not None:
+        print(f"✅ Pozisyon verileri simülasyon boyunca yazıldı: {ctx.trajectory.sink.path}")
+        return ctx.trajectory.sink.path
+    
+    if not ctx.trajectory:
+        print("❌ Dışa aktarım için veri bulunamadı!")
+        return
+    
+    try:
+        filename = f"ambulance_positions_{int(time.time())}{COLUMNAR_EXTENSION}"
+        export_recorder(ctx.trajectory, filename, {'label': ctx.label, 'network': ctx.network_type})
+        print(f"✅ Pozisyon verileri sütunlu dosyaya aktarıldı: {filename}")
+        return filename
+        
+    except Exception as e:
+        print(f"❌ Sütunlu aktarım hatası: {e}")
+
 # we need to import python modules from the $SUMO_HOME/tools directory
 if 'SUMO_HOME' in os.environ:
     tools = os.path.join(os.environ['SUMO_HOME'], 'tools')
     sys.path.append(tools)
-else:
-    sys.exit("please declare environment variable 'SUMO_HOME'")
 
-from sumolib import checkBinary  # noqa
-import traci  # noqa
+# SUMO yoksa modül yine import edilebilsin (testler, FakeTraCI arka ucu);
+# gerçek SUMO ile başlatılırken hata verilir
+try:
+    from sumolib import checkBinary  # noqa
+    import traci  # noqa
+except ImportError:
+    checkBinary = None
+    traci = None
+
+# libsumo: SUMO'yu bu süreç içinde çalıştırır (soket/IPC yok, GUI yok)
+try:
+    import libsumo  # noqa
+except ImportError:
+    libsumo = None
 
+TRACI_BACKENDS = ["sumo", "libsumo", "fake"]
+TRACI_BACKEND_ENV = "SUMO_TRACI_BACKEND"  # --traci-backend varsayılanı
 
-def generate_routefile():
-    """GPS verilerini kullanarak ambulans rotası ile birlikte route dosyası oluştur"""
-    global gps_coordinates, current_network_type
+
+def load_background_vehicles(route_file):
+    """
+    Arka plan trafiği için route dosyasındaki <vehicle> satırlarını oku
+
+    Returns:
+        [(kalkış zamanı, xml satırı), ...] - vType/route tanımları cross.rou.xml ile aynı olmalı
+    """
+    vehicles = []
+    for vehicle in ET.parse(route_file).getroot().iter('vehicle'):
+        vehicle.tail = None
+        line = "    " + ET.tostring(vehicle, encoding="unicode").strip()
+        vehicles.append((float(vehicle.get('depart', 0)), line))
+    return vehicles
+
+
+def generate_routefile(background_routes=None, gps_file="gps-data-2.gpx", ctx=None):
+    """
+    GPS verilerini (gps_file) kullanarak ambulans rotası ile birlikte route dosyası oluştur
+
+    background_routes verilirse (örn. data/downtown.rou.xml) oradaki araçlar da
+    eklenir ve ayrı bir dosyaya (data/cross_background.rou.xml) yazılır.
+    Oluşturulan route dosyasının yolunu döndürür.
+    """
+    ctx = _context(ctx)
     
-    # Ağ tipini tespit et
-    network_type = detect_network_type()
+    # Ağ tipi main() içinde (--network veya detect_network_type ile) belirlenir
+    network_type = ctx.network_type
     
     if network_type == "berlin":
         # Berlin ağı için routes oluştur
@@ -216,12 +258,12 @@ def generate_routefile():
     N = 5000  # number of time steps                simülasyon süresini belirtir
     
     # GPS verilerini oku
-    gps_coordinates = parse_gps_data("gps-data-2.gpx")
-    if gps_coordinates:
-        print(f"GPS verisi başarıyla okundu: {len(gps_coordinates)} koordinat")
+    ctx.gps_coordinates = parse_gps_data(gps_file)
+    if ctx.gps_coordinates:
+        print(f"GPS verisi başarıyla okundu: {len(ctx.gps_coordinates)} koordinat")
         # İlk ve son koordinatları göster
-        print(f"İlk koordinat: {gps_coordinates[0]}")
-        print(f"Son koordinat: {gps_coordinates[-1]}")
+        print(f"İlk koordinat: {ctx.gps_coordinates[0]}")
+        print(f"Son koordinat: {ctx.gps_coordinates[-1]}")
     else:
         print("GPS verisi okunamadı, varsayılan rotalar kullanılacak")
     
@@ -230,7 +272,13 @@ def generate_routefile():
     pEW = 1. / 11
     pNS = 1. / 30
     
-    with open("data/cross.rou.xml", "w") as routes: # burada trafik modeli olan xml dosyasını kopyalar
+    route_file = "data/cross.rou.xml"
+    background = load_background_vehicles(background_routes) if background_routes else []
+    if background:
+        route_file = "data/cross_background.rou.xml"
+    vehicles = []
+    
+    with open(route_file, "w") as routes: # burada trafik modeli olan xml dosyasını kopyalar
         print("""<routes>
         <vType id="typeWE" accel="0.8" decel="4.5" sigma="0.5" length="5" minGap="2.5" maxSpeed="16.67" \
 guiShape="passenger"/>
@@ -245,11 +293,11 @@ guiShape="passenger"/>
         vehNr = 0
         
         # GPS ile kontrol edilecek ambulansları ekle - ERKEN BAŞLATMA
-        if gps_coordinates:
+        if ctx.gps_coordinates:
             ambulans_sayisi = 1  # Sadece bir ambulans (ambulance_gps_0)
             for amb_id in range(ambulans_sayisi):
                 depart_time = 10 + (amb_id * 5)  # 10 saniye sonra başlat (normal araçlarla aynı anda)
-                print(f'    <vehicle id="ambulance_gps_{amb_id}" type="ambulance" route="ambulance_route" depart="{depart_time}" color="1,0,0" departSpeed="0" departPos="0"/>', file=routes)
+                vehicles.append((depart_time, f'    <vehicle id="ambulance_gps_{amb_id}" type="ambulance" route="ambulance_route" depart="{depart_time}" color="1,0,0" departSpeed="0" departPos="0"/>'))
                 vehNr += 1
             print(f"🚑 GPS ambulans {ambulans_sayisi} adet eklendi - {depart_time}s sonra başlayacak (normal araçlarla birlikte)")
         else:
@@ -270,8 +318,17 @@ guiShape="passenger"/>
         #             vehNr, i), file=routes)
         #         vehNr += 1
         
-        print("🚫 Normal trafik araçları DEVRE DIŞI - Sadece ambulans aktif olacak")
+        # Arka plan trafiği (--background-traffic): SUMO kalkış sırasına göre sıralı ister
+        for _, line in sorted(vehicles + background, key=lambda v: v[0]):
+            print(line, file=routes)
+        
+        if background:
+            print(f"🚗 Arka plan trafiği eklendi: {len(background)} araç ({background_routes})")
+        else:
+            print("🚫 Normal trafik araçları DEVRE DIŞI - Sadece ambulans aktif olacak")
         print("</routes>", file=routes)   # xml dosyasının sonunu belirtir
+    
+    return route_file
 
 # The program looks like this
 #    <tlLogic id="0" type="static" programID="0" offset="0">
@@ -283,19 +340,32 @@ guiShape="passenger"/>
 #    </tlLogic>
 
 
-def run():
-    """execute the TraCI control loop"""
-    global gps_index, current_network_type
+def run(ctx=None):
+    """
+    execute the TraCI control loop
+
+    Returns:
+        {'steps', 'wall_time', 'gps_first_step', 'gps_last_step', 'ambulance_travel_time'}
+        - ambulans süresi dosya modunda ilk ve son GPS güncellemesi arasındaki simülasyon süresidir
+    """
+    ctx = _context(ctx)
     step = 0
     gps_vehicles_added = False
+    gps_first_step = None
+    gps_last_step = None
     
     # Trafik ışığı kontrolü sadece cross ağı için - TÜM IŞIKLAR KIRMIZI
-    if current_network_type == "cross":
+    if ctx.network_type == "cross":
         # Tüm ışıkları kırmızı yap - Phase 0: "rrrr" (tüm yönler kırmızı)
-        traci.trafficlight.setPhase("0", 0)                   # Tüm ışıklar kırmızı
+        ctx.signal_bus.request_tls_phase("0", 0)                  # Tüm ışıklar kırmızı
+        ctx.signal_bus.flush()
         print("🔴 Başlangıç: TÜM IŞIKLAR KIRMIZI - Sadece ambulans için yeşil yapılacak")
     
-    print(f"🚗 Simülasyon başlatıldı - Ağ tipi: {current_network_type}")
+    print(f"🚗 Simülasyon başlatıldı - Ağ tipi: {ctx.network_type}")
+    
+    # Sürüş özetindeki "TLS çevresinde geçen süre" için kavşak konumları
+    if not ctx.trajectory_stats.tls_positions:
+        ctx.trajectory_stats.tls_positions = network_tls_positions(ctx.network_type)
     
     # GPS Filtreleme durumunu göster
     if GPS_NOISE_FILTER['enabled']:
@@ -307,121 +377,258 @@ def run():
     else:
         print("🔧 GPS Noise Filtreleme PASİF - Tüm GPS verileri kabul edilecek")
     
-    while step < 3600:  # 1 saat simülasyon
-        traci.simulationStep()                                  # simülasyon adımı gerçekleştirilir
-        
-        # Berlin ağı için GPS vehicles'ı dinamik olarak ekle
-        if current_network_type == "berlin" and not gps_vehicles_added and step > 10:
-            gps_vehicles_added = add_gps_vehicles_to_simulation()
-        
-        # Cross ağı için ambulanslar zaten route dosyasında tanımlı, sadece işaretle
-        if current_network_type == "cross" and not gps_vehicles_added and step > 10:
-            gps_vehicles_added = True  # Cross ağında ambulanslar route file'da tanımlı
+    profiler = ctx.profiler.start()
+    loop_start = time.perf_counter()
+    
+    # Döngü hata/Ctrl+C ile kesilse de stdout profil sarmalayıcısından kurtarılır
+    try:
+        while step < 3600:  # 1 saat simülasyon
+            profiler.begin_step(step)
+            ctx.traci.simulationStep()                                  # simülasyon adımı gerçekleştirilir
+            profiler.mark("simulation_step")
+        
+            # Ingestion thread'lerinden gelen fix'leri bu adımda toplu filtrele
+            if ctx.use_real_time:
+                # Kayıt tekrarı: zamanı gelen fix'ler simülasyon saatine göre kuyruğa eklenir
+                if ctx.gps_replay is not None:
+                    ctx.gps_replay.pump(ctx.traci.simulation.getTime(), ctx.gps_fix_handoff)
+                process_pending_gps_fixes(ctx)
+            profiler.mark("gps_ingest")
+        
+            # Berlin ağı için GPS vehicles'ı dinamik olarak ekle
+            if ctx.network_type == "berlin" and not gps_vehicles_added and step > 10:
+                gps_vehicles_added = add_gps_vehicles_to_simulation(ctx)
+        
+            # Cross ağı için ambulanslar zaten route dosyasında tanımlı, sadece işaretle
+            if ctx.network_type == "cross" and not gps_vehicles_added and step > 10:
+                gps_vehicles_added = True  # Cross ağında ambulanslar route file'da tanımlı
             
-            # Ambulansları başlangıçta durdur (sadece ambulance_gps_0)
-            for amb_id in range(1):  # Sadece ambulance_gps_0
-                vehicle_id = f"ambulance_gps_{amb_id}"
-                if vehicle_id in traci.vehicle.getIDList():
-                    traci.vehicle.setSpeed(vehicle_id, 0)
-                    traci.vehicle.setSpeedMode(vehicle_id, 0)
-                    print(f"⏸️ {vehicle_id} durduruldu - Sadece GPS ile kontrol edilecek")
-        
-        # Ambulansları sürekli durdurmaya devam et (kendi kendine hareket etmesinler)
-        if gps_vehicles_added and current_network_type == "cross":
-            for amb_id in range(1):  # Sadece ambulance_gps_0
-                vehicle_id = f"ambulance_gps_{amb_id}"
-                if vehicle_id in traci.vehicle.getIDList():
-                    # Sürekli hızı sıfırla
-                    current_speed = traci.vehicle.getSpeed(vehicle_id)
-                    if current_speed > 0:
-                        traci.vehicle.setSpeed(vehicle_id, 0)
-                        traci.vehicle.slowDown(vehicle_id, 0, 0.1)
-        
-        # Ambulansların GPS verilerine göre konumunu güncelle (Daha az sıklıkta - daha stabil)
-        if (gps_coordinates or use_real_time) and gps_vehicles_added:
-            # Gerçek zamanlı modda sürekli güncelle, dosya modunda her 15 adımda (daha az sık)
-            update_frequency = 1 if use_real_time else 15
+                # Ambulansları başlangıçta durdur (sadece ambulance_gps_0)
+                for amb_id in range(1):  # Sadece ambulance_gps_0
+                    vehicle_id = f"ambulance_gps_{amb_id}"
+                    if vehicle_id in ctx.traci.vehicle.getIDList():
+                        ctx.traci.vehicle.setSpeed(vehicle_id, 0)
+                        ctx.traci.vehicle.setSpeedMode(vehicle_id, 0)
+                        print(f"⏸️ {vehicle_id} durduruldu - Sadece GPS ile kontrol edilecek")
+        
+            # Ambulansları sürekli durdurmaya devam et (kendi kendine hareket etmesinler)
+            if gps_vehicles_added and ctx.network_type == "cross":
+                for amb_id in range(1):  # Sadece ambulance_gps_0
+                    vehicle_id = f"ambulance_gps_{amb_id}"
+                    if vehicle_id in ctx.traci.vehicle.getIDList():
+                        # Sürekli hızı sıfırla
+                        current_speed = ctx.traci.vehicle.getSpeed(vehicle_id)
+                        if current_speed > 0:
+                            ctx.traci.vehicle.setSpeed(vehicle_id, 0)
+                            ctx.traci.vehicle.slowDown(vehicle_id, 0, 0.1)
+            profiler.mark("vehicle_control")
+        
+            # Ambulansların GPS verilerine göre konumunu güncelle (Daha az sıklıkta - daha stabil)
+            if (ctx.gps_coordinates or ctx.use_real_time) and gps_vehicles_added:
+                # Gerçek zamanlı modda sürekli güncelle, dosya modunda her 15 adımda (daha az sık)
+                update_frequency = 1 if ctx.use_real_time else 15
             
-            if step % update_frequency == 0:
-                if not use_real_time and gps_index < len(gps_coordinates):
-                    print(f"\n🗺️ GPS Güncelleme - Adım {step}, GPS indeks: {gps_index}/{len(gps_coordinates)}")
-                    update_gps_vehicles()
-                    gps_index += 1
-                elif use_real_time:
-                    update_gps_vehicles()
-        
-        # Ambulans trafik ışığı kontrolü - her adımda çalışacak
-        if current_network_type == "cross":
-            monitor_all_ambulances_for_traffic_control()
-        
-        # Normal trafik ışığı kontrolü DEVRE DIŞI - Sadece ambulans kontrolü aktif
-        # Normal araç olmadığı için trafik ışığı kontrolü gerekmiyor
-        # Tüm ışıklar kırmızı kalacak, sadece ambulans yaklaştığında yeşil olacak
-        if current_network_type == "cross":
-            # Cross ağında simülasyon bitiş kontrolü
-            if traci.simulation.getMinExpectedNumber() <= 0:
-                break
+                if step % update_frequency == 0:
+                    if not ctx.use_real_time and ctx.gps_index < len(ctx.gps_coordinates):
+                        print(f"\n🗺️ GPS Güncelleme - Adım {step}, GPS indeks: {ctx.gps_index}/{len(ctx.gps_coordinates)}")
+                        update_gps_vehicles(ctx)
+                        ctx.gps_index += 1
+                        if gps_first_step is None:
+                            gps_first_step = step
+                        gps_last_step = step
+                    elif ctx.use_real_time:
+                        update_gps_vehicles(ctx)
+            profiler.mark("gps_update")
+        
+            # Ambulans trafik ışığı kontrolü - her adımda çalışacak
+            if ctx.network_type == "cross":
+                monitor_all_ambulances_for_traffic_control(ctx)
+            profiler.mark("traffic_control")
+        
+            # Normal trafik ışığı kontrolü DEVRE DIŞI - Sadece ambulans kontrolü aktif
+            # Normal araç olmadığı için trafik ışığı kontrolü gerekmiyor
+            # Tüm ışıklar kırmızı kalacak, sadece ambulans yaklaştığında yeşil olacak
+            if ctx.network_type == "cross":
+                # Cross ağında simülasyon bitiş kontrolü
+                if ctx.traci.simulation.getMinExpectedNumber() <= 0:
+                    profiler.end_step()
+                    break
                 
-            # Normal trafik akışı DEVRE DIŞI (normal araç yok)
-            # if not is_ambulance_traffic_control_active():
-            #     if traci.trafficlight.getPhase("0") == 2:
-            #         # we are not already switching
-            #         if traci.inductionloop.getLastStepVehicleNumber("0") > 0:         #burada kuzeyden gelen bir araç var mı diye bakılıyor
-            #             # there is a vehicle from the north, switch
-            #             traci.trafficlight.setPhase("0", 3)                 # tarafik ışığı fazı 3 olarak değiştirilir  doğu ve batı kısımlarında kırmızı yanmaya başlar
-            #         else:                                                # araba gelmiyosa yeşil yakmaya devam eder
-            #             # otherwise try to keep green for EW
-            #             traci.trafficlight.setPhase("0", 2)
-            
-            # Ambulans aktif değilse ışıkları kırmızıda tut
-            if not is_ambulance_traffic_control_active():
-                traci.trafficlight.setPhase("0", 0)  # Tüm ışıklar kırmızı
-        
-        step += 1                                              # adım sayısı bir arttırılır
-        
-        # Berlin için progress gösterimi
-        if current_network_type == "berlin" and step % 300 == 0:
-            active_vehicles = len(traci.vehicle.getIDList())
-            print(f"📊 Berlin simülasyon - Adım: {step}, Aktif araçlar: {active_vehicles}")
+                # Normal trafik akışı DEVRE DIŞI (normal araç yok)
+                # if not is_ambulance_traffic_control_active(ctx):
+                #     if ctx.traci.trafficlight.getPhase("0") == 2:
+                #         # we are not already switching
+                #         if ctx.traci.inductionloop.getLastStepVehicleNumber("0") > 0:         #burada kuzeyden gelen bir araç var mı diye bakılıyor
+                #             # there is a vehicle from the north, switch
+                #             ctx.traci.trafficlight.setPhase("0", 3)                 # tarafik ışığı fazı 3 olarak değiştirilir  doğu ve batı kısımlarında kırmızı yanmaya başlar
+                #         else:                                                # araba gelmiyosa yeşil yakmaya devam eder
+                #             # otherwise try to keep green for EW
+                #             ctx.traci.trafficlight.setPhase("0", 2)
             
+                # Ambulans aktif değilse ışıkları kırmızıda tut
+                if not is_ambulance_traffic_control_active(ctx):
+                    ctx.signal_bus.request_tls_phase("0", 0)  # Tüm ışıklar kırmızı
+            profiler.mark("traffic_control")
+        
+            # Bu adımdaki TLS/LED isteklerini birleştir, sadece değişenleri gönder
+            ctx.signal_bus.flush()
+            profiler.mark("signal_flush")
+        
+            # Yörünge kayıtlarını periyodik olarak diske aktar (--trajectory-out)
+            ctx.trajectory.maybe_flush()
+        
+            step += 1                                              # adım sayısı bir arttırılır
+        
+            # Berlin için progress gösterimi
+            if ctx.network_type == "berlin" and step % 300 == 0:
+                active_vehicles = len(ctx.traci.vehicle.getIDList())
+                print(f"📊 Berlin simülasyon - Adım: {step}, Aktif araçlar: {active_vehicles}")
+            profiler.mark("progress")
+            profiler.end_step()
+    finally:
+        profiler.stop()
+    wall_time = time.perf_counter() - loop_start
     print(f"✅ Simülasyon tamamlandı - Toplam adım: {step}")
+    print_signal_bus_stats(ctx)
+    
+    if profiler.enabled:
+        profiler.print_summary()
+        summary_path, trace_path = profiler.export()
+        print(f"✅ Adım profili kaydedildi: {summary_path}, {trace_path}")
+    
+    # Akışlı yörünge yazıcısının son grubunu yaz ve dosyayı kapat
+    ctx.trajectory.close()
     
     # Ambulans pozisyon tablosunu yazdır
-    print_ambulance_position_table()
+    print_ambulance_position_table(ctx)
     
-    # CSV'ye aktar (opsiyonel)
-    export_position_table_to_csv()
+    # Dosyaya aktar (--export-format)
+    if position_export_format == "columnar":
+        export_position_table_columnar(ctx)
+    else:
+        export_position_table_to_csv(ctx)
     
     # ESP32 GPS client'ı kapat
-    cleanup_gps_clients()
+    cleanup_gps_clients(ctx)
     
-    traci.close()
+    travel_time = None
+    if gps_first_step is not None:
+        travel_time = (gps_last_step - gps_first_step) * ctx.traci.simulation.getDeltaT()
+    ctx.close()
     sys.stdout.flush()
+    
+    return {
+        'steps': step,
+        'wall_time': wall_time,
+        'gps_first_step': gps_first_step,
+        'gps_last_step': gps_last_step,
+        'ambulance_travel_time': travel_time,
+    }
 
-def cleanup_gps_clients():
+def cleanup_gps_clients(ctx=None):
     """GPS client'larını temizle"""
-    global esp32_gps_client
+    ctx = _context(ctx)
     
-    if esp32_gps_client:
+    if ctx.gps_replay is not None:
+        print(f"⏯️ GPS kayıt tekrarı: {ctx.gps_replay.delivered_count}/{len(ctx.gps_replay.fixes)} fix verildi")
+        ctx.gps_replay = None
+    
+    if ctx.esp32_gps_client:
         try:
-            esp32_gps_client.stop_gps_updates()
+            ctx.esp32_gps_client.stop_gps_updates()
             print("✅ ESP32 GPS client durduruldu")
         except Exception as e:
             print(f"⚠️ ESP32 GPS client durdurulamadı: {e}")
-        esp32_gps_client = None
-
-
-def get_options():
+        ctx.esp32_gps_client = None
+    
+    # Ayrı GPS ingestion sürecini durdur
+    if ctx.gps_ingest_process is not None:
+        ctx.gps_ingest_stop_event.set()
+        ctx.gps_ingest_process.join(timeout=5)
+        if ctx.gps_ingest_process.is_alive():
+            print("⚠️ GPS ingestion süreci yanıt vermedi, sonlandırılıyor")
+            ctx.gps_ingest_process.terminate()
+            ctx.gps_ingest_process.join(timeout=2)
+        print("✅ GPS ingestion süreci durduruldu")
+        ctx.gps_ingest_process = None
+        ctx.gps_ingest_stop_event = None
+    
+    # Ham GPS günlüğünü kapat (ingestion durduktan sonra, son kayıtlar kaybolmasın)
+    if ctx.gps_journal is not None:
+        ctx.gps_journal.close()
+        print(f"📼 Ham GPS günlüğü kapatıldı: {ctx.gps_journal.path} ({ctx.gps_journal.records_written} fix)")
+        ctx.gps_journal = None
+    
+    if ctx.gps_shm_ring is not None:
+        stats = ctx.gps_shm_ring.get_stats()
+        if stats['overruns'] > 0:
+            print(f"⚠️ GPS halka tamponu taşması: {stats['overruns']} kayıt kaçırıldı")
+        ctx.gps_shm_ring.close()
+        ctx.gps_shm_ring = None
+
+
+def get_options(args=None):
     optParser = optparse.OptionParser() # analiz için kullanılan bişeymiş
     optParser.add_option("--nogui", action="store_true",
                          default=False, help="run the commandline version of sumo")
     optParser.add_option("--gps-source", type="choice", 
-                         choices=["file", "esp32", "serial", "socket"],
-                         default="file", help="GPS data source: file, esp32, serial, socket")
+                         choices=["file", "esp32", "serial", "socket", "replay"],
+                         default="file", help="GPS data source: file, esp32, serial, socket, replay "
+                                              "(recorded fixes through the real-time path, see --replay-file)")
     optParser.add_option("--esp32-ip", type="string", default="192.168.1.100",
                          help="ESP32 IP address for WiFi GPS (default: 192.168.1.100)")
     optParser.add_option("--esp32-port", type="int", default=80,
                          help="ESP32 HTTP port (default: 80)")
+    optParser.add_option("--led-ip", type="string", default="192.168.1.107",
+                         help="ESP32 traffic LED controller address, IP or IP:port (default: 192.168.1.107)")
+    optParser.add_option("--led-map", type="string", default=None,
+                         help="Map traffic lights to LED controllers, e.g. "
+                              "'0=192.168.1.107,192.168.1.108;1=192.168.1.109' (default: TLS 0 -> --led-ip)")
+    optParser.add_option("--traci-backend", type="choice", choices=TRACI_BACKENDS,
+                         default=os.environ.get(TRACI_BACKEND_ENV, "sumo"),
+                         help="TraCI backend: 'sumo' (SUMO process over a socket), 'libsumo' "
+                              "(SUMO inside this process, headless only, falls back to 'sumo') or "
+                              "'fake' (in-memory simulator, no SUMO needed) "
+                              "(default: $%s or sumo)" % TRACI_BACKEND_ENV)
+    optParser.add_option("--non-interactive", action="store_true", default=False,
+                         help="Do not prompt for the GPS source, use --gps-source as given")
+    optParser.add_option("--background-traffic", type="string", default=None, metavar="ROUTE_FILE",
+                         help="Add the vehicles of this route file (e.g. data/downtown.rou.xml) "
+                              "as background traffic")
+    optParser.add_option("--seed", type="int", default=None,
+                         help="Random seed passed to SUMO")
+    optParser.add_option("--gps-file", type="string", default="gps-data-2.gpx",
+                         help="GPX track replayed in file mode (default: gps-data-2.gpx)")
+    optParser.add_option("--replay-file", type="string", default=None, metavar="FILE",
+                         help="Recording replayed with --gps-source replay: a GPX track, "
+                              "ambulance_positions_*.csv, a --trajectory-out file, a .trjc export, a "
+                              ".trkc track or a raw .gpsj journal (default: --gps-file)")
+    optParser.add_option("--replay-speed", type="float", default=1.0,
+                         help="Replay speed factor in simulation time; 0 delivers one fix per "
+                              "simulation step, as fast as possible (default: 1.0)")
+    optParser.add_option("--replay-vehicle", type="string", default=None,
+                         help="Vehicle to replay from a position recording (default: the first one)")
+    optParser.add_option("--network", type="choice", choices=["cross", "berlin"], default=None,
+                         help="Network to simulate (default: detect from data/)")
+    optParser.add_option("--sumo-port", type="int", default=None,
+                         help="TraCI port for the SUMO instance (default: a free port)")
+    optParser.add_option("--profile", action="store_true", default=False,
+                         help="Time each phase of every simulation step and export a summary "
+                              "(step_profile_*.json) and per-step trace (step_profile_*_trace.csv)")
+    optParser.add_option("--export-format", type="choice", choices=["csv", "columnar"], default="csv",
+                         help="Format of the end-of-run position export: 'csv' or 'columnar' "
+                              "(compressed column chunks, see trajectory_columnar.py) (default: csv)")
+    optParser.add_option("--trajectory-out", type="string", default=None, metavar="FILE",
+                         help="Stream ambulance positions to FILE during the run "
+                              "(.csv for CSV, anything else for the binary format)")
+    optParser.add_option("--gps-journal", type="string", default=None, metavar="FILE",
+                         help="Append every raw fix of a live GPS source (esp32, serial, socket) "
+                              "to this binary journal (default: gps_journal_<epoch>.gpsj)")
+    optParser.add_option("--no-gps-journal", action="store_true", default=False,
+                         help="Do not record live GPS sessions to a raw fix journal")
+    optParser.add_option("--gps-process", action="store_true", default=False,
+                         help="Run ESP32 GPS ingestion and filtering in a separate process "
+                              "(shared memory ring buffer)")
     
     # GPS Noise Filtreleme parametreleri
     optParser.add_option("--gps-filter", action="store_true",
@@ -435,7 +642,22 @@ def get_options():
     optParser.add_option("--gps-window-size", type="int", default=3,
                          help="Moving average window size (default: 3)")
     
-    options, args = optParser.parse_args()
+    options, args = optParser.parse_args(args)
+    if options.traci_backend not in TRACI_BACKENDS:
+        optParser.error(f"{TRACI_BACKEND_ENV}={options.traci_backend}: "
+                        f"expected one of {', '.join(TRACI_BACKENDS)}")
+    if options.replay_speed < 0:
+        optParser.error("--replay-speed must be >= 0")
+    
+    global esp32_led_address, position_export_format, gps_journal_enabled, gps_journal_file
+    esp32_led_address = options.led_ip
+    position_export_format = options.export_format
+    gps_journal_enabled = not options.no_gps_journal
+    gps_journal_file = options.gps_journal
+    configure_led_controllers(options)
+    
+    if options.profile:
+        default_context.profiler = StepProfiler()
     
     # GPS filtre ayarlarını uygula
     if options.no_gps_filter:
@@ -504,7 +726,7 @@ def parse_gps_data(gpx_file):
         return []
 
 
-def gps_to_sumo_coords(lat, lon, network_type="cross"):
+def gps_to_sumo_coords(lat, lon, network_type="cross", ctx=None):
     """
     GPS koordinatlarını SUMO koordinatlarına dönüştür - Ultra hassas mikro hareket destekli
     
@@ -512,6 +734,7 @@ def gps_to_sumo_coords(lat, lon, network_type="cross"):
     GPS Aralığı: Lat(37.066913-37.066950), Lon(30.209252-30.209310)
     SUMO Hedef: x(200-800), y(500-620) = 600x120 birim alan - GENİŞLETİLMİŞ HAREKET ALANI
     """
+    ctx = _context(ctx)
     
     if network_type == "berlin":
         # Berlin ağı için doğru UTM Zone 36N koordinatları
@@ -575,14 +798,11 @@ def gps_to_sumo_coords(lat, lon, network_type="cross"):
         sumo_y = max(505.0, min(515.0, sumo_y))  # Yol genişliği sınırları
         
         # Debug bilgisi (daha az sıklıkta - her 10 koordinatta bir)
-        if hasattr(gps_to_sumo_coords, 'debug_counter'):
-            gps_to_sumo_coords.debug_counter += 1
-        else:
-            gps_to_sumo_coords.debug_counter = 1
+        ctx.mapping_debug_counter += 1
             
         # Her 10 koordinatta bir debug yazdır (daha az log karmaşası)
-        if gps_to_sumo_coords.debug_counter % 10 == 1:
-            print(f"🎯 GPS Mapping Debug #{gps_to_sumo_coords.debug_counter}:")
+        if ctx.mapping_debug_counter % 10 == 1:
+            print(f"🎯 GPS Mapping Debug #{ctx.mapping_debug_counter}:")
             print(f"   📍 GPS Giriş: ({lat:.8f}, {lon:.8f})")
             print(f"   🎯 SUMO Çıkış: ({sumo_x:.2f}, {sumo_y:.2f})")
             print(f"   📏 GPS Range: lat=({gps_lat_min:.8f} - {gps_lat_max:.8f}), lon=({gps_lon_min:.8f} - {gps_lon_max:.8f})")
@@ -682,19 +902,19 @@ def is_position_on_intersection_roads(x, y):
     return False
 
 
-def safe_move_vehicle(vehicle_id, lat, lon, retry_count=3, network_type="cross"):
+def safe_move_vehicle(vehicle_id, lat, lon, retry_count=3, network_type="cross", ctx=None):
     """Aracı hassas GPS koordinatlarına ışınla - Ultra hassas mikro hareket destekli"""
-    global position_step_counter
+    ctx = _context(ctx)
     
     # Hassas koordinat dönüşümü
-    sumo_x, sumo_y = gps_to_sumo_coords(lat, lon, network_type)
+    sumo_x, sumo_y = gps_to_sumo_coords(lat, lon, network_type, ctx=ctx)
     
     # Teleportasyon için en uygun pozisyonu bul
     for attempt in range(retry_count):
         try:
             # Aracı tamamen durdur
-            traci.vehicle.setSpeed(vehicle_id, 0)
-            traci.vehicle.setSpeedMode(vehicle_id, 0)  # Tüm güvenlik kontrollerini devre dışı bırak
+            ctx.traci.vehicle.setSpeed(vehicle_id, 0)
+            ctx.traci.vehicle.setSpeedMode(vehicle_id, 0)  # Tüm güvenlik kontrollerini devre dışı bırak
             
             # Ultra hassas teleportasyon
             # Cross ağında yolları hassas şekilde belirle
@@ -709,7 +929,7 @@ def safe_move_vehicle(vehicle_id, lat, lon, retry_count=3, network_type="cross")
                 angle = 90  # Varsayılan: Doğu yönü (0=Kuzey, 90=Doğu, 180=Güney, 270=Batı)
                 
                 # moveToXY ile hassas yerleştirme
-                traci.vehicle.moveToXY(
+                ctx.traci.vehicle.moveToXY(
                     vehicle_id,
                     target_edge,     # "" = otomatik edge bulma
                     target_lane,     # Lane index
@@ -720,46 +940,43 @@ def safe_move_vehicle(vehicle_id, lat, lon, retry_count=3, network_type="cross")
                 )
             else:
                 # Berlin ağı için
-                traci.vehicle.moveToXY(
+                ctx.traci.vehicle.moveToXY(
                     vehicle_id, "", 0, sumo_x, sumo_y, angle=0, keepRoute=0
                 )
             
             # Hareket etmemesi için hızı kilitle
-            traci.vehicle.setSpeed(vehicle_id, 0)
-            traci.vehicle.slowDown(vehicle_id, 0, 0.1)  # Anında dur
+            ctx.traci.vehicle.setSpeed(vehicle_id, 0)
+            ctx.traci.vehicle.slowDown(vehicle_id, 0, 0.1)  # Anında dur
             
             # Başarılı teleportasyon sonrası gerçek pozisyonu al
-            actual_pos = traci.vehicle.getPosition(vehicle_id)
+            actual_pos = ctx.traci.vehicle.getPosition(vehicle_id)
             
             # AYRRINTILI Ambulans koordinat logu - Hareket analizi
             print(f"📍 {vehicle_id} | GPS: ({lat:.8f}, {lon:.8f}) | SUMO: ({actual_pos[0]:.2f}, {actual_pos[1]:.2f})")
             
             # Pozisyon değişikliği hesapla (önceki pozisyonla karşılaştır)
-            if hasattr(safe_move_vehicle, 'prev_positions'):
-                if vehicle_id in safe_move_vehicle.prev_positions:
-                    prev_pos = safe_move_vehicle.prev_positions[vehicle_id]
-                    distance_moved = math.sqrt(
-                        (actual_pos[0] - prev_pos[0])**2 + 
-                        (actual_pos[1] - prev_pos[1])**2
-                    )
-                    print(f"📏 {vehicle_id} hareket mesafesi: {distance_moved:.2f} metre")
-                else:
-                    safe_move_vehicle.prev_positions = {}
-                safe_move_vehicle.prev_positions[vehicle_id] = actual_pos
-            else:
-                safe_move_vehicle.prev_positions = {vehicle_id: actual_pos}
+            if vehicle_id in ctx.prev_positions:
+                prev_pos = ctx.prev_positions[vehicle_id]
+                distance_moved = math.sqrt(
+                    (actual_pos[0] - prev_pos[0])**2 + 
+                    (actual_pos[1] - prev_pos[1])**2
+                )
+                print(f"📏 {vehicle_id} hareket mesafesi: {distance_moved:.2f} metre")
+            ctx.prev_positions[vehicle_id] = actual_pos
             
             # Pozisyonu tabloya kaydet  
-            position_step_counter += 1
+            ctx.position_step_counter += 1
             add_position_to_table(
                 vehicle_id, 
-                position_step_counter, 
+                ctx.position_step_counter, 
                 actual_pos[0], actual_pos[1], 
-                lat, lon
+                lat, lon,
+                filtered=ctx.use_real_time and ctx.gps_fix_filtered,
+                ctx=ctx
             )
             
             # Hassas hareket logging - daha ayrıntılı
-            print(f"🎯 {vehicle_id} - Adım {position_step_counter}:")
+            print(f"🎯 {vehicle_id} - Adım {ctx.position_step_counter}:")
             print(f"   📍 GPS: ({lat:.8f}, {lon:.8f})")
             print(f"   🎯 Target SUMO: ({sumo_x:.2f}, {sumo_y:.2f})")
             print(f"   ✅ Actual SUMO: ({actual_pos[0]:.2f}, {actual_pos[1]:.2f}) [LOCKED]")
@@ -806,37 +1023,37 @@ def calculate_gps_distance(lat1, lon1, lat2, lon2):
     
     return distance
 
-def filter_gps_noise(lat, lon):
-    """GPS noise filtreleme algoritması"""
-    global gps_history, GPS_NOISE_FILTER
+def filter_gps_noise(lat, lon, timestamp=None, ctx=None):
+    """GPS noise filtreleme algoritması (timestamp: fix'in alındığı an, yoksa şimdi)"""
+    ctx = _context(ctx)
     
-    current_time = time.time()
+    current_time = timestamp if timestamp is not None else time.time()
     
     # Toplam güncelleme sayısını artır
-    gps_history['total_updates'] += 1
+    ctx.gps_history['total_updates'] += 1
     
     # Filtreleme devre dışıysa orijinal veriyi döndür
     if not GPS_NOISE_FILTER['enabled']:
         return lat, lon, False
     
     # Geçmiş pozisyonları sakla
-    gps_history['positions'].append((lat, lon, current_time))
+    ctx.gps_history['positions'].append((lat, lon, current_time))
     
     # Pencere boyutunu aş olanları temizle
     window_size = GPS_NOISE_FILTER['moving_average_window']
-    if len(gps_history['positions']) > window_size:
-        gps_history['positions'] = gps_history['positions'][-window_size:]
+    if len(ctx.gps_history['positions']) > window_size:
+        ctx.gps_history['positions'] = ctx.gps_history['positions'][-window_size:]
     
     # İlk veri ise direkt kabul et
-    if len(gps_history['positions']) == 1:
-        gps_history['last_significant_position'] = (lat, lon, current_time)
-        gps_history['last_movement_time'] = current_time
-        gps_history['filtered_position'] = (lat, lon)
+    if len(ctx.gps_history['positions']) == 1:
+        ctx.gps_history['last_significant_position'] = (lat, lon, current_time)
+        ctx.gps_history['last_movement_time'] = current_time
+        ctx.gps_history['filtered_position'] = (lat, lon)
         print(f"🟢 GPS Filter: İlk pozisyon kaydedildi ({lat:.8f}, {lon:.8f})")
         return lat, lon, False
     
     # Son önemli pozisyonla mesafe hesapla
-    last_lat, last_lon, last_time = gps_history['last_significant_position']
+    last_lat, last_lon, last_time = ctx.gps_history['last_significant_position']
     distance = calculate_gps_distance(last_lat, last_lon, lat, lon)
     time_diff = current_time - last_time
     
@@ -870,31 +1087,31 @@ def filter_gps_noise(lat, lon):
     
     # 3. Durağan durum kontrolü
     stationary_timeout = GPS_NOISE_FILTER['stationary_timeout']
-    time_since_last_movement = current_time - gps_history['last_movement_time']
+    time_since_last_movement = current_time - ctx.gps_history['last_movement_time']
     
     if time_since_last_movement > stationary_timeout:
-        gps_history['is_stationary'] = True
+        ctx.gps_history['is_stationary'] = True
         if distance < 2.0:  # 2 metre içinde hareket = noise
             is_noise = True
             noise_reasons.append("durağan_gürültü")
     
     # Filtreleme kararı
     if is_noise:
-        gps_history['filtered_count'] += 1  # Filtrelenen sayısını artır
+        ctx.gps_history['filtered_count'] += 1  # Filtrelenen sayısını artır
         print(f"🔴 GPS NOISE TESPİT EDİLDİ: {', '.join(noise_reasons)}")
         print(f"   🚫 Pozisyon güncellenmeyecek")
         
         # Moving average hesapla (gürültü bastırma)
-        if len(gps_history['positions']) >= 2:
-            avg_lat = sum(p[0] for p in gps_history['positions']) / len(gps_history['positions'])
-            avg_lon = sum(p[1] for p in gps_history['positions']) / len(gps_history['positions'])
+        if len(ctx.gps_history['positions']) >= 2:
+            avg_lat = sum(p[0] for p in ctx.gps_history['positions']) / len(ctx.gps_history['positions'])
+            avg_lon = sum(p[1] for p in ctx.gps_history['positions']) / len(ctx.gps_history['positions'])
             
             # Noise suppression factor uygula
             factor = GPS_NOISE_FILTER['noise_suppression_factor']
             filtered_lat = last_lat * factor + avg_lat * (1 - factor)
             filtered_lon = last_lon * factor + avg_lon * (1 - factor)
             
-            gps_history['filtered_position'] = (filtered_lat, filtered_lon)
+            ctx.gps_history['filtered_position'] = (filtered_lat, filtered_lon)
             
         # Son önemli pozisyonu döndür (hareket yok)
         return last_lat, last_lon, True
@@ -905,29 +1122,29 @@ def filter_gps_noise(lat, lon):
         print(f"   📏 Hareket mesafesi: {distance:.2f}m")
         
         # Önemli pozisyonu güncelle
-        gps_history['last_significant_position'] = (lat, lon, current_time)
-        gps_history['last_movement_time'] = current_time
-        gps_history['is_stationary'] = False
-        gps_history['filtered_position'] = (lat, lon)
+        ctx.gps_history['last_significant_position'] = (lat, lon, current_time)
+        ctx.gps_history['last_movement_time'] = current_time
+        ctx.gps_history['is_stationary'] = False
+        ctx.gps_history['filtered_position'] = (lat, lon)
         
         return lat, lon, False
 
-def get_gps_filter_status():
+def get_gps_filter_status(ctx=None):
     """GPS filtre durumunu döndür"""
-    global gps_history
+    ctx = _context(ctx)
     
-    if not gps_history['last_significant_position']:
+    if not ctx.gps_history['last_significant_position']:
         return "GPS filtreleme henüz başlamadı"
     
     current_time = time.time()
-    last_time = gps_history['last_significant_position'][2]
+    last_time = ctx.gps_history['last_significant_position'][2]
     time_since_last = current_time - last_time
     
     status = f"GPS Filter Durumu:\n"
-    status += f"📍 Son önemli pozisyon: {gps_history['last_significant_position'][0]:.6f}, {gps_history['last_significant_position'][1]:.6f}\n"
+    status += f"📍 Son önemli pozisyon: {ctx.gps_history['last_significant_position'][0]:.6f}, {ctx.gps_history['last_significant_position'][1]:.6f}\n"
     status += f"⏱️ Son güncelleme: {time_since_last:.1f} saniye önce\n"
-    status += f"🏃 Durağan: {'Evet' if gps_history['is_stationary'] else 'Hayır'}\n"
-    status += f"📊 Geçmiş veri sayısı: {len(gps_history['positions'])}\n"
+    status += f"🏃 Durağan: {'Evet' if ctx.gps_history['is_stationary'] else 'Hayır'}\n"
+    status += f"📊 Geçmiş veri sayısı: {len(ctx.gps_history['positions'])}\n"
     
     return status
 
@@ -1005,17 +1222,17 @@ def snap_to_nearest_edge(x, y, network_type="cross"):
             return center_x, y
 
 
-def update_gps_vehicles():
+def update_gps_vehicles(ctx=None):
     """Tüm GPS araçlarını güncelle - Sadece ışınlama, hareket yok"""
-    global gps_index, real_time_gps, current_network_type
+    ctx = _context(ctx)
     
     # Gerçek zamanlı GPS verisi varsa onu kullan
-    if use_real_time and real_time_gps:
-        lat, lon = real_time_gps
+    if ctx.use_real_time and ctx.real_time_gps:
+        lat, lon = ctx.real_time_gps
         print(f"🔴 REAL-TIME GPS: {lat:.6f}, {lon:.6f}")
-    elif gps_coordinates and gps_index < len(gps_coordinates):
+    elif ctx.gps_coordinates and ctx.gps_index < len(ctx.gps_coordinates):
         # Dosyadan GPS verisi kullan
-        lat, lon = gps_coordinates[gps_index]
+        lat, lon = ctx.gps_coordinates[ctx.gps_index]
         print(f"📁 FILE GPS: {lat:.6f}, {lon:.6f}")
     else:
         return  # GPS verisi yok
@@ -1024,16 +1241,16 @@ def update_gps_vehicles():
     successful_teleports = 0
     for amb_id in range(1):  # Sadece ambulance_gps_0
         vehicle_id = f"ambulance_gps_{amb_id}"
-        if vehicle_id in traci.vehicle.getIDList():
+        if vehicle_id in ctx.traci.vehicle.getIDList():
             # Ambulansı GPS koordinatına ışınla (hareket etmesin)
-            success = safe_move_vehicle(vehicle_id, lat, lon, network_type=current_network_type)
+            success = safe_move_vehicle(vehicle_id, lat, lon, network_type=ctx.network_type, ctx=ctx)
             
             if success:
                 successful_teleports += 1
                 
                 # Ambulans başarıyla ışınlandıysa, trafik ışığı kontrolü yap
-                if current_network_type == "cross":
-                    check_ambulance_traffic_light_control(vehicle_id)
+                if ctx.network_type == "cross":
+                    check_ambulance_traffic_light_control(vehicle_id, ctx=ctx)
     
     if successful_teleports > 0:
         print(f"✅ {successful_teleports}/1 ambulans başarıyla ışınlandı ve durduruldu")
@@ -1044,9 +1261,9 @@ def add_real_time_gps_reader():
     # Bu fonksiyon ESP32'den gelen verileri okumak için kullanılabilir
     pass
 
-def detect_network_type():
+def detect_network_type(ctx=None):
     """Kullanılan ağ tipini otomatik tespit et ve konfigürasyonu ayarla"""
-    global current_network_type
+    ctx = _context(ctx)
     
     try:
         # Komut satırı argümanlarından kontrol et
@@ -1054,63 +1271,169 @@ def detect_network_type():
         for arg in sys.argv:
             if "berli" in arg or "berlin" in arg:
                 print("🗺️ Berlin ağı (komut satırından) tespit edildi")
-                current_network_type = "berlin"
+                ctx.network_type = "berlin"
                 return "berlin"
             elif "cross" in arg:
                 print("🗺️ Cross ağı (komut satırından) tespit edildi")
-                current_network_type = "cross"
+                ctx.network_type = "cross"
                 return "cross"
         
         # Cross ağını öncelik ver - GPS ambulans projesi için
         if os.path.exists("data/cross.net.xml"):
             print("🗺️ Cross ağı kullanılacak (GPS ambulans projesi)")
-            current_network_type = "cross"
+            ctx.network_type = "cross"
             return "cross"
         elif os.path.exists("data/berli.net.xml"):
             print("🗺️ Berlin ağı dosyası mevcut")
-            current_network_type = "berlin"
+            ctx.network_type = "berlin"
             return "berlin"
         else:
             print("⚠️ Bilinmeyen ağ tipi, cross varsayılan olarak kullanılacak")
-            current_network_type = "cross"
+            ctx.network_type = "cross"
             return "cross"
             
     except Exception as e:
         print(f"⚠️ Ağ tipi tespit hatası: {e}")
-        current_network_type = "cross"
+        ctx.network_type = "cross"
         return "cross"
 
-def on_real_time_gps_update(lat, lon):
-    """Gerçek zamanlı GPS verisi geldiğinde çağrılan callback - Noise filtreleme ile"""
-    global real_time_gps
+def on_real_time_gps_update(lat, lon, ctx=None, source="unknown", hdop=None, satellites=None):
+    """
+    Gerçek zamanlı GPS verisi geldiğinde çağrılan callback
+    
+    Ingestion thread'inde çalışır: sadece fix'i ham GPS günlüğüne ve kuyruğa
+    ekler. Filtreleme ve real_time_gps güncellemesi simülasyon thread'inde
+    process_pending_gps_fixes ile yapılır.
+    """
+    ctx = _context(ctx)
+    if ctx.gps_journal is not None:
+        ctx.gps_journal.record(lat, lon, source, hdop, satellites)
+    ctx.gps_fix_handoff.put(lat, lon)
+
+
+def on_esp32_gps_update(lat, lon, ctx=None):
+    """ESP32 client callback'i: uydu/HDOP bilgisini client'ın son okumasından ekle"""
+    ctx = _context(ctx)
+    last_gps = ctx.esp32_gps_client.last_gps if ctx.esp32_gps_client else {}
+    on_real_time_gps_update(lat, lon, ctx, "esp32", last_gps.get('hdop'), last_gps.get('satellites'))
+
+
+def on_ubx_fix(fix, ctx=None, source="serial"):
+    """GPSReader fix callback'i (UBX NAV-PVT'de HDOP yok, günlüğe PDOP yazılır)"""
+    on_real_time_gps_update(fix.latitude, fix.longitude, ctx, source, fix.pdop, fix.satellites)
+
+
+def gps_journal_target():
+    """Canlı oturum için ham fix günlüğünün yolu (kapalıysa None)"""
+    if not gps_journal_enabled:
+        return None
+    return gps_journal_file or default_journal_path()
+
+
+def open_gps_journal(ctx=None):
+    """Canlı GPS kaynağı başlamadan önce ham fix günlüğünü aç"""
+    ctx = _context(ctx)
+    path = gps_journal_target()
+    if path is None or ctx.gps_journal is not None:
+        return ctx.gps_journal
+    try:
+        ctx.gps_journal = GPSJournal(path)
+        print(f"📼 Ham GPS günlüğü: {path}")
+    except Exception as e:
+        print(f"⚠️ Ham GPS günlüğü açılamadı ({path}): {e}")
+    return ctx.gps_journal
+
+
+def process_pending_gps_fixes(ctx=None):
+    """Kuyruktaki fix'leri simülasyon thread'inde filtrele ve real_time_gps'i güncelle"""
+    ctx = _context(ctx)
     
-    # GPS noise filtreleme uygula
-    filtered_lat, filtered_lon, was_filtered = filter_gps_noise(lat, lon)
+    # Ayrı süreç modunda fix'ler zaten filtrelenmiş olarak halka tampondan gelir
+    if ctx.gps_shm_ring is not None:
+        return process_shared_ring_fixes(ctx)
     
-    # Filtreleme sonucunu logla
-    if was_filtered:
-        print(f"🔴 GPS NOISE FILTERED: {lat:.8f}, {lon:.8f} -> Konum değişmedi")
-        # Eski pozisyonu koru (güncelleme yok)
-    else:
-        print(f"✅ GPS ACCEPTED: {lat:.8f}, {lon:.8f} -> {filtered_lat:.8f}, {filtered_lon:.8f}")
-        # Gerçek zamanlı GPS verisini güncelle
-        real_time_gps = (filtered_lat, filtered_lon)
-    
-    # ESP32'den gelen veri için detaylı log
-    if esp32_gps_client:
-        status = "🔴 FILTERED" if was_filtered else "✅ ACCEPTED"
-        print(f"📡 ESP32 GPS {status}: {lat:.6f}, {lon:.6f}")
-    else:
-        print(f"🔄 Gerçek zamanlı GPS: {filtered_lat:.6f}, {filtered_lon:.6f}")
+    batch = ctx.gps_fix_handoff.drain()
+    for fix in batch:
+        lat, lon = fix.latitude, fix.longitude
+        
+        # GPS noise filtreleme uygula (fix'in geliş zamanı ile)
+        filtered_lat, filtered_lon, was_filtered = filter_gps_noise(lat, lon, fix.timestamp, ctx=ctx)
+        ctx.gps_fix_filtered = was_filtered
+        
+        # Filtreleme sonucunu logla
+        if was_filtered:
+            print(f"🔴 GPS NOISE FILTERED: {lat:.8f}, {lon:.8f} -> Konum değişmedi")
+            # Eski pozisyonu koru (güncelleme yok)
+        else:
+            print(f"✅ GPS ACCEPTED: {lat:.8f}, {lon:.8f} -> {filtered_lat:.8f}, {filtered_lon:.8f}")
+            # Gerçek zamanlı GPS verisini güncelle
+            ctx.real_time_gps = (filtered_lat, filtered_lon)
+        
+        # ESP32'den gelen veri için detaylı log
+        if ctx.esp32_gps_client:
+            status = "🔴 FILTERED" if was_filtered else "✅ ACCEPTED"
+            print(f"📡 ESP32 GPS {status}: {lat:.6f}, {lon:.6f}")
+        else:
+            print(f"🔄 Gerçek zamanlı GPS: {filtered_lat:.6f}, {filtered_lon:.6f}")
+    
+    return len(batch)
+
+def process_shared_ring_fixes(ctx=None):
+    """Ingestion sürecinin halka tampona yazdığı filtrelenmiş fix'leri uygula"""
+    ctx = _context(ctx)
+    
+    fixes = ctx.gps_shm_ring.read_new()
+    for fix in fixes:
+        ctx.gps_history['total_updates'] += 1
+        ctx.gps_fix_filtered = bool(fix.flags & FLAG_FILTERED)
+        if fix.flags & FLAG_FILTERED:
+            ctx.gps_history['filtered_count'] += 1
+        elif fix.flags & FLAG_VALID:
+            ctx.real_time_gps = (fix.latitude, fix.longitude)
+            ctx.gps_history['last_significant_position'] = (fix.latitude, fix.longitude, fix.timestamp)
+    
+    return len(fixes)
+
+
+def _gps_ingest_process_main(ring_name, esp32_ip, esp32_port, filter_config, stop_event,
+                             journal_path=None):
+    """Ayrı süreçte ESP32 GPS okuma ve noise filtreleme; sonuçları halka tampona yaz"""
+    GPS_NOISE_FILTER.update(filter_config)
+    ring = SharedFixRing.attach(ring_name)
+    client = ESP32GPSClient(esp32_ip, esp32_port)
+    journal = GPSJournal(journal_path) if journal_path else None
+    
+    def on_fix(lat, lon):
+        last_gps = client.last_gps
+        if journal is not None:
+            journal.record(lat, lon, "esp32", last_gps.get('hdop'), last_gps.get('satellites'))
+        filtered_lat, filtered_lon, was_filtered = filter_gps_noise(lat, lon)
+        flags = FLAG_VALID | (FLAG_FILTERED if was_filtered else 0)
+        ring.write(filtered_lat, filtered_lon, flags=flags,
+                   satellites=int(last_gps.get('satellites', 0)),
+                   hdop=float(last_gps.get('hdop', 99.99)))
+    
+    client.set_gps_callback(on_fix)
+    client.start_gps_updates()
+    try:
+        stop_event.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.stop_continuous_updates()
+        ring.close()
+        if journal is not None:
+            journal.close()
+
 
-def start_real_time_gps(options=None):
+def start_real_time_gps(options=None, ctx=None):
     """Gerçek zamanlı GPS okuyucuyu başlat"""
-    global use_real_time, esp32_gps_client
+    ctx = _context(ctx)
     
     # Cross ağı için dosyadan okuma yeterli, ama ESP32 için seçenek sun
-    if current_network_type == "cross":
+    if ctx.network_type == "cross":
         # Eğer command line'dan GPS source verilmişse, onu kullan
-        if options and options.gps_source != "file":
+        if options and (options.gps_source != "file" or options.non_interactive):
             gps_source = options.gps_source
         else:
             # Cross ağı için kullanıcıya seçenek sun
@@ -1119,8 +1442,9 @@ def start_real_time_gps(options=None):
             print("2. ESP32 WiFi/HTTP")
             print("3. Serial (ESP32)")
             print("4. Socket (WiFi)")
+            print("5. Kayıttan tekrar oynat (replay)")
             
-            choice = input("Seçiminiz (1-4) [1]: ").strip() or "1"
+            choice = input("Seçiminiz (1-5) [1]: ").strip() or "1"
             
             if choice == "1":
                 gps_source = "file"
@@ -1130,30 +1454,64 @@ def start_real_time_gps(options=None):
                 gps_source = "serial"
             elif choice == "4":
                 gps_source = "socket"
+            elif choice == "5":
+                gps_source = "replay"
             else:
                 gps_source = "file"
                 
         # GPS source'a göre başlatma
-        if gps_source == "esp32":
-            start_esp32_gps(options)
+        if gps_source == "esp32" and options and options.gps_process:
+            start_esp32_gps_process(options, ctx=ctx)
+        elif gps_source == "esp32":
+            start_esp32_gps(options, ctx=ctx)
         elif gps_source == "serial":
-            start_serial_gps()
+            start_serial_gps(ctx)
         elif gps_source == "socket":
-            start_socket_gps()
+            start_socket_gps(ctx)
+        elif gps_source == "replay":
+            start_replay_gps(options, ctx=ctx)
         else:
-            print("📁 Dosyadan GPS verisi kullanılacak (gps-data-2.gpx)")
-            use_real_time = False
+            gps_file = options.gps_file if options else "gps-data-2.gpx"
+            print(f"📁 Dosyadan GPS verisi kullanılacak ({gps_file})")
+            ctx.use_real_time = False
+    elif options and options.gps_source == "replay":
+        start_replay_gps(options, ctx=ctx)
     else:
         # Berlin ağı için eski davranış
-        start_legacy_real_time_gps()
+        start_legacy_real_time_gps(ctx)
 
-def start_esp32_gps(options=None):
+def start_replay_gps(options=None, ctx=None):
+    """Kaydedilmiş GPS verisini gerçek zamanlı yoldan tekrar oynat"""
+    ctx = _context(ctx)
+    
+    replay_file = (options.replay_file or options.gps_file) if options else "gps-data-2.gpx"
+    speed = options.replay_speed if options else 1.0
+    vehicle_id = options.replay_vehicle if options else None
+    
+    try:
+        ctx.gps_replay = GPSReplaySource.from_file(replay_file, speed, vehicle_id)
+    except Exception as e:
+        print(f"❌ GPS kaydı okunamadı ({replay_file}): {e}")
+        print("📁 Dosyadan GPS okuma moduna geçiliyor")
+        ctx.use_real_time = False
+        return
+    
+    if not ctx.gps_replay.fixes:
+        print(f"❌ GPS kaydı boş ({replay_file}), dosyadan okuma moduna geçiliyor")
+        ctx.gps_replay = None
+        ctx.use_real_time = False
+        return
+    
+    ctx.use_real_time = True
+    print(f"⏯️ GPS kaydı tekrar oynatılacak: {replay_file} - {ctx.gps_replay}")
+
+def start_esp32_gps(options=None, ctx=None):
     """ESP32 WiFi/HTTP GPS modunu başlat"""
-    global use_real_time, esp32_gps_client
+    ctx = _context(ctx)
     
     if not esp32_client_available:
         print("❌ ESP32 GPS Client kullanılamıyor, dosyadan okuma moduna geçiliyor")
-        use_real_time = False
+        ctx.use_real_time = False
         return
     
     # IP ve port ayarlarını al
@@ -1169,29 +1527,60 @@ def start_esp32_gps(options=None):
     
     try:
         print(f"🔗 ESP32'ye bağlanılıyor: {esp32_ip}:{esp32_port}")
-        esp32_gps_client = ESP32GPSClient(esp32_ip, esp32_port)
+        ctx.esp32_gps_client = ESP32GPSClient(esp32_ip, esp32_port)
         
         # Test bağlantısı
-        if esp32_gps_client.test_connection():
+        if ctx.esp32_gps_client.test_connection():
             # Callback'i ayarla
-            esp32_gps_client.set_gps_callback(on_real_time_gps_update)
+            ctx.esp32_gps_client.set_gps_callback(functools.partial(on_esp32_gps_update, ctx=ctx))
             
             # GPS okumayı başlat
-            esp32_gps_client.start_gps_updates()
-            use_real_time = True
+            open_gps_journal(ctx)
+            ctx.esp32_gps_client.start_gps_updates()
+            ctx.use_real_time = True
             print(f"✅ ESP32 WiFi GPS okuyucu başlatıldı: {esp32_ip}:{esp32_port}")
         else:
             print("❌ ESP32'ye bağlanılamadı, dosyadan okuma moduna geçiliyor")
-            use_real_time = False
+            ctx.use_real_time = False
             
     except Exception as e:
         print(f"❌ ESP32 GPS başlatılamadı: {e}")
         print("📁 Dosyadan GPS okuma moduna geçiliyor")
-        use_real_time = False
+        ctx.use_real_time = False
 
-def start_serial_gps():
+def start_esp32_gps_process(options, ctx=None):
+    """ESP32 GPS ingestion ve filtrelemeyi ayrı süreçte başlat (paylaşımlı bellek)"""
+    ctx = _context(ctx)
+    
+    if not esp32_client_available:
+        print("❌ ESP32 GPS Client kullanılamıyor, dosyadan okuma moduna geçiliyor")
+        ctx.use_real_time = False
+        return
+    
+    try:
+        ctx.gps_shm_ring = SharedFixRing.create()
+        ctx.gps_ingest_stop_event = multiprocessing.Event()
+        ctx.gps_ingest_process = multiprocessing.Process(
+            target=_gps_ingest_process_main,
+            args=(ctx.gps_shm_ring.name, options.esp32_ip, options.esp32_port,
+                  dict(GPS_NOISE_FILTER), ctx.gps_ingest_stop_event, gps_journal_target()),
+            daemon=True
+        )
+        ctx.gps_ingest_process.start()
+        ctx.use_real_time = True
+        print(f"✅ ESP32 GPS ingestion süreci başlatıldı (PID {ctx.gps_ingest_process.pid}): "
+              f"{options.esp32_ip}:{options.esp32_port}")
+        print(f"   🧠 Paylaşımlı bellek halka tamponu: {ctx.gps_shm_ring.name} ({ctx.gps_shm_ring.capacity} kayıt)")
+    except Exception as e:
+        print(f"❌ GPS ingestion süreci başlatılamadı: {e}")
+        print("📁 Dosyadan GPS okuma moduna geçiliyor")
+        cleanup_gps_clients(ctx)
+        ctx.use_real_time = False
+
+
+def start_serial_gps(ctx=None):
     """Serial GPS modunu başlat (eski GPS reader ile)"""
-    global use_real_time
+    ctx = _context(ctx)
     
     try:
         # GPS okuyucu modülünü import et (eğer mevcutsa)
@@ -1205,22 +1594,23 @@ def start_serial_gps():
         if gps_reader_available:
             port = input("Serial port [COM3]: ").strip() or "COM3"
             gps_reader = GPSReader()
-            gps_reader.set_callback(on_real_time_gps_update)
-            gps_reader.start_serial_reader(port, 9600)
-            use_real_time = True
+            gps_reader.set_fix_callback(functools.partial(on_ubx_fix, ctx=ctx, source="serial"))
+            open_gps_journal(ctx)
+            gps_reader.start_serial_reader(port)
+            ctx.use_real_time = True
             print(f"✅ Serial GPS okuyucu başlatıldı: {port}")
         else:
             print("📁 GPS Reader bulunamadı, dosyadan okuma moduna geçiliyor")
-            use_real_time = False
+            ctx.use_real_time = False
             
     except Exception as e:
         print(f"❌ Serial GPS başlatılamadı: {e}")
         print("📁 Dosyadan GPS okuma moduna geçiliyor")
-        use_real_time = False
+        ctx.use_real_time = False
 
-def start_socket_gps():
+def start_socket_gps(ctx=None):
     """Socket GPS modunu başlat (eski GPS reader ile)"""
-    global use_real_time
+    ctx = _context(ctx)
     
     try:
         # GPS okuyucu modülünü import et (eğer mevcutsa)
@@ -1234,22 +1624,23 @@ def start_socket_gps():
         if gps_reader_available:
             port = int(input("Socket port [8888]: ").strip() or "8888")
             gps_reader = GPSReader()
-            gps_reader.set_callback(on_real_time_gps_update)
+            gps_reader.set_fix_callback(functools.partial(on_ubx_fix, ctx=ctx, source="socket"))
+            open_gps_journal(ctx)
             gps_reader.start_socket_reader("0.0.0.0", port)
-            use_real_time = True
+            ctx.use_real_time = True
             print(f"✅ Socket GPS sunucu başlatıldı: port {port}")
         else:
             print("📁 GPS Reader bulunamadı, dosyadan okuma moduna geçiliyor")
-            use_real_time = False
+            ctx.use_real_time = False
             
     except Exception as e:
         print(f"❌ Socket GPS başlatılamadı: {e}")
         print("📁 Dosyadan GPS okuma moduna geçiliyor")
-        use_real_time = False
+        ctx.use_real_time = False
 
-def start_legacy_real_time_gps():
+def start_legacy_real_time_gps(ctx=None):
     """Berlin ağı için eski gerçek zamanlı GPS başlatma davranışı"""
-    global use_real_time
+    ctx = _context(ctx)
     
     try:
         # GPS okuyucu modülünü import et (eğer mevcutsa)
@@ -1262,7 +1653,6 @@ def start_legacy_real_time_gps():
         
         if gps_reader_available:
             gps_reader = GPSReader()
-            gps_reader.set_callback(on_real_time_gps_update)
         
         # Kullanıcıya seçenek sun
         print("\n📡 Gerçek zamanlı GPS modu:")
@@ -1274,13 +1664,17 @@ def start_legacy_real_time_gps():
         
         if choice == "1" and gps_reader_available:
             port = input("Serial port [COM3]: ").strip() or "COM3"
-            gps_reader.start_serial_reader(port, 9600)
-            use_real_time = True
+            gps_reader.set_fix_callback(functools.partial(on_ubx_fix, ctx=ctx, source="serial"))
+            open_gps_journal(ctx)
+            gps_reader.start_serial_reader(port)
+            ctx.use_real_time = True
             print(f"✅ Serial GPS okuyucu başlatıldı: {port}")
         elif choice == "2" and gps_reader_available:
             port = int(input("Socket port [8888]: ").strip() or "8888")
+            gps_reader.set_fix_callback(functools.partial(on_ubx_fix, ctx=ctx, source="socket"))
+            open_gps_journal(ctx)
             gps_reader.start_socket_reader("0.0.0.0", port)
-            use_real_time = True
+            ctx.use_real_time = True
             print(f"✅ Socket GPS sunucu başlatıldı: port {port}")
         else:
             print("📁 Dosyadan GPS verisi kullanılacak")
@@ -1347,8 +1741,9 @@ def generate_berlin_routes():
     return route_file
 
 
-def add_gps_vehicles_to_simulation():
+def add_gps_vehicles_to_simulation(ctx=None):
     """GPS kontrollü ambulansları simülasyona dinamik olarak ekle"""
+    ctx = _context(ctx)
     try:
         # Ambulans sayısı (sadece 1 - ambulance_gps_0)
         num_ambulances = 1
@@ -1361,7 +1756,7 @@ def add_gps_vehicles_to_simulation():
             start_y = 5000.0 + (amb_id * 100)
             
             # Ambulansı simülasyona ekle
-            traci.vehicle.add(
+            ctx.traci.vehicle.add(
                 vehID=vehicle_id,
                 routeID="",  # Boş route - GPS ile kontrol edilecek
                 typeID="ambulance",
@@ -1369,7 +1764,7 @@ def add_gps_vehicles_to_simulation():
             )
             
             # Başlangıç pozisyonunu ayarla
-            traci.vehicle.moveToXY(
+            ctx.traci.vehicle.moveToXY(
                 vehicle_id,
                 "",  # Edge ID
                 0,   # Lane index
@@ -1395,13 +1790,15 @@ def calculate_distance(pos1, pos2):
     return math.sqrt((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2)
 
 
-def check_ambulance_traffic_light_control(vehicle_id):
+def check_ambulance_traffic_light_control(vehicle_id, ctx=None):
     """
     Ambulansın kavşağa yaklaştığını kontrol et ve gerekirse trafik ışığını yeşile çevir
     """
+    ctx = _context(ctx)
+    
     try:
         # Ambulansın mevcut pozisyonunu al
-        ambulance_pos = traci.vehicle.getPosition(vehicle_id)
+        ambulance_pos = ctx.traci.vehicle.getPosition(vehicle_id)
         
         # Kavşak merkezini tanımla (cross ağı için)
         intersection_center = (510, 510)
@@ -1418,41 +1815,43 @@ def check_ambulance_traffic_light_control(vehicle_id):
             # Trafik ışığı logları geçici olarak devre dışı
             # print(f"⚠️ {vehicle_id} kavşağa yaklaştı! Trafik ışığı kontrolü başlatılıyor...")
             
-            # Mevcut trafik ışığı durumunu kontrol et
-            current_phase = traci.trafficlight.getPhase("0")
-            traffic_state = traci.trafficlight.getRedYellowGreenState("0")
+            # Mevcut trafik ışığı durumunu kontrol et (komut yolunun bildiği faz)
+            current_phase = ctx.signal_bus.get_tls_phase("0")
+            if current_phase is None:
+                current_phase = ctx.traci.trafficlight.getPhase("0")
             
             # Trafik ışığı logları geçici olarak devre dışı
-            # print(f"🚦 Mevcut trafik ışığı durumu - Faz: {current_phase}, Durum: {traffic_state}")
+            # print(f"🚦 Mevcut trafik ışığı durumu - Faz: {current_phase}")
             
             # Eğer trafik ışığı yeşil değilse, yeşile çevir
             if current_phase != 2:  # Faz 2 = Doğu-Batı yeşil
                 # Trafik ışığı logları geçici olarak devre dışı
                 # print("🟢 Ambulans için trafik ışığı yeşile çevriliyor...")
-                traci.trafficlight.setPhase("0", 2)
+                ctx.signal_bus.request_tls_phase("0", 2)
                 
-                # ESP32'ye sinyal gönder (mock)
-                send_signal_to_esp32("GREEN_LIGHT_ACTIVATED", vehicle_id)
+                # ESP32'ye sinyal gönder (adım sonunda, sadece değişiklikse)
+                ctx.signal_bus.request_led("0", "GREEN_LIGHT_ACTIVATED", vehicle_id)
                 
                 # Kontrol aktif durumunu işaretle
-                mark_ambulance_control_active(vehicle_id)
+                if not ctx.ambulance_control_status.get(vehicle_id):
+                    mark_ambulance_control_active(vehicle_id, ctx)
             else:
                 # Trafik ışığı logları geçici olarak devre dışı
                 # print("✅ Trafik ışığı zaten yeşil - Ambulans geçiş yapabilir")
                 
-                # ESP32'ye ambulans geçiş sinyali gönder
-                send_signal_to_esp32("AMBULANCE_PASSING", vehicle_id)
+                # Ambulans geçiyor: LED zaten söndürülmüş, istenen durum değişmez
+                # (komut yolu bunu bastırır, ağa bir şey gönderilmez)
+                ctx.signal_bus.request_led("0", "GREEN_LIGHT_ACTIVATED", vehicle_id)
         
         # Ambulans kavşaktan uzaklaştığında normal trafik akışına dön
         elif distance_to_intersection > intersection_radius * 2.0:  # 150m dışında reset
-            reset_normal_traffic_flow(vehicle_id)
+            reset_normal_traffic_flow(vehicle_id, ctx)
         
         # ZORLA RESET: Çok uzaktaki ambulanslar için (200m+)
         elif distance_to_intersection > 200.0:
             # Çok uzakta ise zorla kontrol durumunu sıfırla
-            global ambulance_control_status
-            if vehicle_id in ambulance_control_status:
-                ambulance_control_status[vehicle_id] = False
+            if vehicle_id in ctx.ambulance_control_status:
+                ctx.ambulance_control_status[vehicle_id] = False
             
     except Exception as e:
         print(f"❌ Trafik ışığı kontrolü hatası {vehicle_id}: {e}")
@@ -1468,84 +1867,175 @@ def send_signal_to_esp32(signal_type, vehicle_id):
     
     timestamp = time.strftime("%H:%M:%S")
     
-    # ESP32 LED Controller IP adresi (otomatik tespit edilecek)
-    esp32_led_ip = "192.168.1.107"  # İkinci ESP32'nizin IP'sini buraya yazın
+    # ESP32 LED Controller adresi (--led-ip ile ayarlanır)
+    esp32_led_ip = esp32_led_address
+    
+    # Çevrimdışı kontrolcü için ağa dokunmadan hemen dön (devre kesici açık)
+    health = led_health(esp32_led_ip)
+    if signal_type != "AMBULANCE_PASSING" and not health.allow_request():
+        return False
     
     try:
         if signal_type == "GREEN_LIGHT_ACTIVATED":
             # Ambulans için yeşil ışık - Kırmızı LED'i söndür
             response = requests.post(f"http://{esp32_led_ip}/ambulance/green", timeout=2)
+            record_led_response(health, response)
             print(f"📡 ESP32 LED SİGNALİ [{timestamp}]: KIRMIZI LED SÖNDÜRÜLDÜ - Ambulans yeşil ışık")
             print(f"    └── Ambulans ID: {vehicle_id}")
             print(f"    └── ESP32 Response: {response.status_code}")
+            return response.status_code == 200
             
         elif signal_type == "AMBULANCE_PASSING":
             # Ambulans geçiş yapıyor (ek sinyal gerekmez, LED zaten söndürülmüş)
             print(f"📡 ESP32 SİGNALİ [{timestamp}]: Ambulans geçiş yapıyor (LED söndürülmüş durumda)")
             print(f"    └── Ambulans ID: {vehicle_id}")
+            return True
             
         elif signal_type == "NORMAL_TRAFFIC_RESUMED":
             # Normal trafik - Kırmızı LED'i yak
             response = requests.post(f"http://{esp32_led_ip}/ambulance/normal", timeout=2)
+            record_led_response(health, response)
             print(f"📡 ESP32 LED SİGNALİ [{timestamp}]: KIRMIZI LED YAKILDI - Normal trafik")
             print(f"    └── ESP32 Response: {response.status_code}")
+            return response.status_code == 200
             
     except requests.exceptions.RequestException as e:
+        health.record_failure(e)
         print(f"❌ ESP32 LED bağlantı hatası [{timestamp}]: {e}")
         print(f"    └── Offline mode: {signal_type} sinyali gönderilmedi")
     except Exception as e:
+        # Yarı açık devrede deneme hakkı bu istekteydi; kaydedilmezse devre takılı kalır
+        health.record_failure(e)
         print(f"❌ ESP32 LED genel hatası [{timestamp}]: {e}")
+    return False
+
+
+def record_led_response(health, response):
+    """LED kontrolcüsü yanıtını devre kesiciye bildir (sadece 200 başarılı sayılır)"""
+    if response.status_code == 200:
+        health.record_success()
+    else:
+        health.record_failure(f"HTTP {response.status_code}")
+
+
+# Trafik ışığı programı setPhase sonrası fazı kendi kendine ilerletmesin diye
+# uygulanan fazın kalan süresi bu değere çekilir (tek seferlik yazma yeterli olur)
+TLS_PHASE_HOLD_DURATION = 1e6
+
+
+def apply_tls_phase(tls_id, phase, ctx=None):
+    """Komut yolundan gelen TLS faz değişikliğini SUMO'ya uygula ve fazı sabitle"""
+    ctx = _context(ctx)
+    ctx.traci.trafficlight.setPhase(tls_id, phase)
+    ctx.traci.trafficlight.setPhaseDuration(tls_id, TLS_PHASE_HOLD_DURATION)
+
+
+def send_led_signal(controller_id, signal_type, vehicle_id):
+    """Komut yolundan gelen LED durum değişikliğini ESP32'ye gönder"""
+    return send_signal_to_esp32(signal_type, vehicle_id)
+
+
+def send_led_signals_batch(changes):
+    """Bir adımdaki tüm LED değişikliklerini kontrolcülere eşzamanlı gönder"""
+    return led_fanout.send(changes)
+
 
+def configure_led_controllers(options):
+    """TLS -> LED kontrolcü kaydını oluştur ve komut yolunu eşzamanlı dağıtıma bağla"""
+    global led_fanout
+    registry = LEDControllerRegistry.from_spec(options.led_map, default_address=options.led_ip)
+    if led_fanout is not None:
+        led_fanout.close()
+    led_fanout = LEDFanout(registry)
+    default_context.signal_bus.send_led_batch = send_led_signals_batch
+    for tls_id in registry.tls_ids():
+        print(f"🚦 TLS {tls_id} -> LED kontrolcüleri: {', '.join(registry.controllers_for(tls_id))}")
 
-# Global ambulans kontrol durumu
-ambulance_control_status = {}
 
+def new_simulation_context(label="default", network_type="cross"):
+    """
+    Yeni bir simülasyon bağlamı oluştur
 
-def mark_ambulance_control_active(vehicle_id):
+    Bağlamın TLS/LED komut yolu (sadece gerçek durum değişiklikleri gönderilir)
+    TLS fazlarını bu bağlamın TraCI bağlantısına uygular.
+    """
+    ctx = SimulationContext(label, network_type)
+    ctx.signal_bus = SignalBus(
+        apply_tls=functools.partial(apply_tls_phase, ctx=ctx),
+        send_led=send_led_signal,
+        send_led_batch=send_led_signals_batch if led_fanout is not None else None,
+    )
+    return ctx
+
+
+# Tek simülasyonlu kullanım (komut satırı, testler) için varsayılan bağlam
+default_context = new_simulation_context()
+
+
+def print_signal_bus_stats(ctx=None):
+    """Komut yolu istatistiklerini yazdır"""
+    ctx = _context(ctx)
+    stats = ctx.signal_bus.get_stats()
+    print("📡 Sinyal komut yolu:")
+    for kind, label in (("tls", "TLS fazı"), ("led", "LED")):
+        s = stats[kind]
+        print(f"   {label}: {s['emitted']} gönderildi | {s['suppressed']} bastırıldı | "
+              f"{s['coalesced']} birleştirildi | {s['failed']} başarısız")
+    if led_fanout is not None:
+        f = led_fanout.get_stats()
+        print(f"   LED dağıtımı: {f['controllers']} kontrolcü | {f['device_requests']} istek "
+              f"({f['batched_requests']} toplu) | en uzun tur {f['max_round_time'] * 1000:.0f} ms")
+    for name, health in device_health.snapshot().items():
+        print(f"   {name}: {health['state']} | {health['failures']} hata | "
+              f"{health['rejected']} çağrı ağa gitmeden reddedildi")
+
+
+def mark_ambulance_control_active(vehicle_id, ctx=None):
     """Ambulansın trafik kontrolünü aktif olarak işaretle"""
-    global ambulance_control_status
-    ambulance_control_status[vehicle_id] = True
+    ctx = _context(ctx)
+    ctx.ambulance_control_status[vehicle_id] = True
     print(f"🎛️ {vehicle_id} trafik kontrolü aktif edildi")
 
 
-def reset_normal_traffic_flow(vehicle_id):
+def reset_normal_traffic_flow(vehicle_id, ctx=None):
     """
     Ambulans kavşaktan uzaklaştığında normal trafik akışına dön
     """
-    global ambulance_control_status
+    ctx = _context(ctx)
     
     # Bu ambulans için kontrol aktifse
-    if vehicle_id in ambulance_control_status and ambulance_control_status[vehicle_id]:
+    if vehicle_id in ctx.ambulance_control_status and ctx.ambulance_control_status[vehicle_id]:
         print(f"� {vehicle_id} kavşaktan uzaklaştı - Normal trafik akışı başlatılıyor")
         
-        # ESP32'ye normal duruma dönüş sinyali gönder
-        send_signal_to_esp32("NORMAL_TRAFFIC_RESUMED", vehicle_id)
+        # ESP32'ye normal duruma dönüş sinyali gönder (adım sonunda)
+        ctx.signal_bus.request_led("0", "NORMAL_TRAFFIC_RESUMED", vehicle_id)
         
         # Bu ambulans için kontrol durumunu kaldır
-        ambulance_control_status[vehicle_id] = False
+        ctx.ambulance_control_status[vehicle_id] = False
 
 
-def is_ambulance_traffic_control_active():
+def is_ambulance_traffic_control_active(ctx=None):
     """
     Herhangi bir ambulansın trafik ışığı kontrolü aktif mi kontrol et
     """
-    global ambulance_control_status
-    return any(ambulance_control_status.values()) if ambulance_control_status else False
+    ctx = _context(ctx)
+    return any(ctx.ambulance_control_status.values()) if ctx.ambulance_control_status else False
 
 
-def monitor_all_ambulances_for_traffic_control():
+def monitor_all_ambulances_for_traffic_control(ctx=None):
     """
     Tüm ambulansları izle ve trafik ışığı kontrolü yap
     Bu fonksiyon ana simülasyon döngüsünden çağrılacak
     """
-    if current_network_type != "cross":
+    ctx = _context(ctx)
+    if ctx.network_type != "cross":
         return  # Sadece cross ağında çalış
     
-    ambulance_vehicles = [vid for vid in traci.vehicle.getIDList() if "ambulance" in vid]
+    ambulance_vehicles = [vid for vid in ctx.traci.vehicle.getIDList() if "ambulance" in vid]
     
     for vehicle_id in ambulance_vehicles:
         try:
-            check_ambulance_traffic_light_control(vehicle_id)
+            check_ambulance_traffic_light_control(vehicle_id, ctx)
         except Exception as e:
             print(f"❌ Ambulans monitoring hatası {vehicle_id}: {e}")
 
@@ -1597,31 +2087,102 @@ def sumo_to_gps_coords(x, y, network_type="cross"):
         return lat, lon
 
 
+def run_concurrent(contexts):
+    """
+    Birden fazla simülasyonu aynı süreçte eşzamanlı çalıştır
+
+    Her bağlam kendi TraCI etiketine bağlı olmalıdır (SimulationContext.connect).
+    run() her bağlam için ayrı bir thread'de çalışır; TraCI soket beklemeleri
+    GIL'i bıraktığından SUMO örnekleri adımlarını paralel hesaplar. libsumo
+    süreç başına tek simülasyon desteklediği için burada kullanılamaz.
+
+    Returns:
+        {label: run() istatistikleri veya hata}
+    """
+    results = {}
+    
+    def worker(ctx):
+        try:
+            results[ctx.label] = run(ctx)
+        except Exception as e:
+            print(f"❌ Simülasyon hatası [{ctx.label}]: {e}")
+            results[ctx.label] = e
+    
+    threads = [threading.Thread(target=worker, args=(ctx,), name=f"sim-{ctx.label}") for ctx in contexts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
 # this is the main entry point of this script
-if __name__ == "__main__":
-    options = get_options()
+def select_traci_backend(options):
+    """
+    Seçilen TraCI arka ucunu ve SUMO binary adını döndür
+
+    libsumo sumo-gui'yi süremez ve kurulu olmayabilir; bu durumlarda soket
+    tabanlı traci'ye düşülür ve options.traci_backend "sumo" yapılır.
+    libsumo süreç başına tek simülasyon çalıştırır (run_concurrent ile kullanılamaz).
+    """
+    if options.traci_backend == "fake":
+        from fake_traci import FakeTraCI
+        print("🧪 Bellek içi TraCI simülatörü kullanılıyor (SUMO başlatılmayacak)")
+        return FakeTraCI(), "sumo"
+    if options.traci_backend == "libsumo":
+        if libsumo is None:
+            print("⚠️ libsumo bulunamadı, TraCI (soket) kullanılacak")
+        elif not options.nogui:
+            print("⚠️ libsumo sumo-gui ile çalışmaz, TraCI (soket) kullanılacak (başsız için --nogui)")
+        elif checkBinary is None:
+            sys.exit("please declare environment variable 'SUMO_HOME'")
+        else:
+            print("⚡ libsumo kullanılıyor: SUMO bu süreçte çalışacak (IPC yok)")
+            return libsumo, checkBinary('sumo')
+        options.traci_backend = "sumo"
+    if traci is None:
+        sys.exit("please declare environment variable 'SUMO_HOME'")
+    if options.nogui:
+        return traci, checkBinary('sumo')
+    return traci, checkBinary('sumo-gui')
 
-    # Ağ tipini tespit et
-    network_type = detect_network_type()
+
+def main(options=None, wrap_backend=None, ctx=None):
+    """
+    Rota dosyasını üret, GPS kaynağını başlat, SUMO'yu başlat ve döngüyü çalıştır
+
+    wrap_backend verilirse simülasyonun TraCI bağlantısı bununla sarmalanır
+    (örn. bench_e2e.py'deki çağrı sayacı). run() istatistiklerini döndürür.
+    """
+    ctx = _context(ctx)
+    if options is None:
+        options = get_options()
+    
+    if options.trajectory_out:
+        ctx.trajectory = TrajectoryRecorder(sink=open_trajectory_writer(options.trajectory_out),
+                                            retain=False)
+        print(f"💾 Yörünge akışı: {options.trajectory_out}")
+
+    # Ağ tipini tespit et (--network verilmişse onu kullan)
+    if options.network:
+        ctx.network_type = options.network
+    network_type = ctx.network_type if options.network else detect_network_type(ctx)
     print(f"🎯 Kullanılacak ağ: {network_type}")
 
     # this script has been called from the command line. It will start sumo as a
     # server, then connect and run
-    if options.nogui:
-        sumoBinary = checkBinary('sumo')
-    else:
-        sumoBinary = checkBinary('sumo-gui')
+    backend, sumoBinary = select_traci_backend(options)
 
     # first, generate the route file for this simulation
-    generate_routefile() #rota dosyasını oluştur
+    route_file = generate_routefile(options.background_traffic, options.gps_file, ctx=ctx) #rota dosyasını oluştur
     
     # Cross ağı için gerçek zamanlı GPS sistemini başlatma
     if network_type == "cross":
         print("📁 Cross ağı - GPS veri kaynağı seçilebilir")
-        start_real_time_gps(options)
+        start_real_time_gps(options, ctx=ctx)
     else:
         # Gerçek zamanlı GPS sistemini başlat (sadece Berlin için)
-        start_real_time_gps(options)
+        start_real_time_gps(options, ctx=ctx)
 
     # Ağ tipine göre uygun konfigürasyon dosyasını seç
     if network_type == "berlin":
@@ -1635,8 +2196,23 @@ if __name__ == "__main__":
 
     print(f"🚗 SUMO başlatılıyor: {config_file}")
     
+    sumo_cmd = [sumoBinary, "-c", config_file, "--tripinfo-output", "tripinfo.xml"]
+    if network_type == "cross" and route_file and route_file != "data/cross.rou.xml":
+        sumo_cmd += ["--route-files", route_file]
+    if options.seed is not None:
+        sumo_cmd += ["--seed", str(options.seed)]
+    
     # this is the normal way of using traci. sumo is started as a
     # subprocess and then the python script connects and runs
-    traci.start([sumoBinary, "-c", config_file,
-                             "--tripinfo-output", "tripinfo.xml"])
-    run()
+    ctx.connect(backend, sumo_cmd, port=options.sumo_port)
+    if wrap_backend is not None:
+        ctx.traci = wrap_backend(ctx.traci)
+    try:
+        return run(ctx)
+    finally:
+        # SUMO çökmesi veya Ctrl+C: yazılmamış yörünge kayıtlarını kaybetme
+        ctx.trajectory.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Senaryo Çiftliği - SUMO GPS Ambulans Projesi
+Bu script bir senaryo matrisini (ağ, GPX izi, GPS filtre parametreleri,
+trafik talebi, tohum) bir süreç havuzunda paralel çalıştırır. Her işçi
+süreç kendi geçici dizininde runner.py'yi ve ona ait SUMO örneğini farklı
+bir TraCI portunda çalıştırır; sonuçlar tek bir veri setinde birleştirilir:
+
+  <çıktı dizini>/matrix.json     - çalıştırılan senaryolar
+  <çıktı dizini>/runs.csv        - çalıştırma başına özet (adım, süre, ambulans süresi,
+                                   tripinfo/dedektör KPI'ları, hata)
+  <çıktı dizini>/positions.csv   - tüm ambulans pozisyonları, run_id ile
+
+Satırlar çalıştırmalar bittikçe yazılır; gece boyu süren bir tarama yarıda
+kesilse bile biten sonuçlar kaybolmaz.
+
+Kullanım:
+    python scenario_farm.py --seeds 1-20                                  # tüm çekirdekler
+    python scenario_farm.py --tracks gps-data-2.gpx,gps-data-2-reversed.gpx \\
+        --min-movement 0.000005,0.00001 --window-size 3,5 --demand none,downtown
+    python scenario_farm.py --matrix sweep.json --workers 8 --output-dir sweep_01
+    python scenario_farm.py --traci-backend fake --dry-run                # sadece matrisi göster
+"""
+
+import contextlib
+import csv
+import itertools
+import json
+import multiprocessing
+import optparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+from bench_e2e import DEFAULT_LED_IP, prepare_workdir
+from output_analytics import analyze_run, find_run_outputs, run_kpis
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASE_PORT = 45000
+
+# Trafik talebi adı -> arka plan route dosyası
+DEMANDS = {
+    'none': None,
+    'downtown': os.path.join('data', 'downtown.rou.xml'),
+}
+
+# Matris eksenleri ve varsayılan değerleri (runner.py varsayılanları)
+MATRIX_AXES = (
+    ('network', ['cross']),
+    ('track', ['gps-data-2.gpx']),
+    ('filter', ['on']),
+    ('min_movement', [0.000005]),
+    ('max_speed', [50.0]),
+    ('window_size', [3]),
+    ('demand', ['none']),
+    ('seed', [42]),
+)
+
+RUN_FIELDS = ['run_id'] + [axis for axis, _ in MATRIX_AXES] + [
+    'status', 'steps', 'wall_time', 'elapsed', 'gps_first_step', 'gps_last_step',
+    'ambulance_travel_time', 'ambulance_time_loss', 'ambulance_waiting_time', 'trips',
+    'mean_time_loss', 'detector_flow', 'detector_occupancy', 'positions', 'port', 'error']
+# output_analytics.run_kpis alanlarından runs.csv'ye alınanlar
+OUTPUT_KPIS = ('ambulance_time_loss', 'ambulance_waiting_time', 'trips', 'mean_time_loss',
+               'detector_flow', 'detector_occupancy')
+POSITION_FIELDS = ['run_id', 'vehicle_id', 'step', 'sumo_x', 'sumo_y', 'gps_lat', 'gps_lon']
+
+
+# ================================
+# MATRİS
+# ================================
+
+def parse_seeds(spec):
+    """'1,2,5' veya '1-20' biçimindeki tohum listesini çöz"""
+    seeds = []
+    for part in str(spec).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part[1:]:
+            start, end = part.split('-', 1)
+            seeds.extend(range(int(start), int(end) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+
+def build_matrix(axes):
+    """
+    Eksen değerlerinin kartezyen çarpımından senaryo listesi oluştur
+
+    Filtre kapalıyken eşik parametreleri etkisiz olduğundan bu kombinasyonlar
+    tekilleştirilir. Her senaryoya sıralı bir run_id verilir.
+    """
+    names = [axis for axis, _ in MATRIX_AXES]
+    values = [list(axes.get(axis) or default) for axis, default in MATRIX_AXES]
+    scenarios = []
+    seen = set()
+    for combo in itertools.product(*values):
+        scenario = dict(zip(names, combo))
+        if scenario['filter'] == 'off':
+            for axis in ('min_movement', 'max_speed', 'window_size'):
+                scenario[axis] = values[names.index(axis)][0]
+        key = tuple(scenario[name] for name in names)
+        if key in seen:
+            continue
+        seen.add(key)
+        scenario['run_id'] = len(scenarios)
+        scenarios.append(scenario)
+    return scenarios
+
+
+def scenario_args(scenario, backend="sumo", led_ip=DEFAULT_LED_IP, port=None):
+    """Senaryoyu runner.py komut satırı argümanlarına çevir"""
+    args = ["--nogui", "--gps-source", "file", "--non-interactive",
+            "--network", scenario['network'],
+            "--gps-file", os.path.basename(scenario['track']),
+            "--seed", str(scenario['seed']),
+            "--gps-min-movement", str(scenario['min_movement']),
+            "--gps-max-speed", str(scenario['max_speed']),
+            "--gps-window-size", str(scenario['window_size']),
+            "--traci-backend", backend, "--led-ip", led_ip]
+    if scenario['filter'] == 'off':
+        args.append("--no-gps-filter")
+    if DEMANDS[scenario['demand']]:
+        args += ["--background-traffic", DEMANDS[scenario['demand']]]
+    if port is not None:
+        args += ["--sumo-port", str(port)]
+    return args
+
+
+# ================================
+# İŞÇİ SÜREÇ
+# ================================
+
+def run_scenario(task):
+    """
+    Tek bir senaryoyu bu işçi süreçte çalıştır
+
+    Havuz maxtasksperchild=1 ile kurulur: runner.py modül düzeyinde durum
+    tuttuğundan her senaryo temiz bir süreçte (ve kendi SUMO örneğiyle) çalışır.
+    """
+    scenario = task['scenario']
+    result = {field: scenario.get(field) for field in RUN_FIELDS}
+    result.update(status='ok', port=task['port'], positions=0, error='')
+    rows = []
+    started = time.perf_counter()
+    workdir = tempfile.mkdtemp(prefix=f"farm_{scenario['run_id']}_")
+    log_path = os.path.join(workdir, "runner.log")
+    cwd = os.getcwd()
+    try:
+        prepare_workdir(workdir, tracks=(scenario['track'],))
+        os.chdir(workdir)
+        with open(log_path, 'w', encoding='utf-8') as log, \
+                contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            sys.path.insert(0, BASE_DIR)
+            import runner
+            options = runner.get_options(scenario_args(scenario, task['backend'],
+                                                       task['led_ip'], task['port']))
+            stats = runner.main(options)
+
+        for key in ('steps', 'wall_time', 'gps_first_step', 'gps_last_step', 'ambulance_travel_time'):
+            result[key] = stats[key]
+        for pos in runner.default_context.trajectory.rows():
+            rows.append({
+                'run_id': scenario['run_id'],
+                'vehicle_id': pos.vehicle_id,
+                'step': pos.step,
+                'sumo_x': round(pos.x, 2),
+                'sumo_y': round(pos.y, 2),
+                'gps_lat': round(pos.lat, 6),
+                'gps_lon': round(pos.lon, 6),
+            })
+        result['positions'] = len(rows)
+
+        # SUMO çıktıları çalışma dizini silinmeden özetlenir (fake backend tripinfo yazmaz;
+        # o durumda data/ ile kopyalanan eski dedektör çıktısı da okunmaz)
+        tripinfo, detectors = find_run_outputs(workdir)
+        if tripinfo:
+            kpis = run_kpis(analyze_run(tripinfo, detectors))
+            for key in OUTPUT_KPIS:
+                result[key] = kpis[key]
+    except BaseException as e:  # sys.exit dahil: tek bir çalıştırma taramayı durdurmamalı
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+        traceback.print_exc(file=sys.stderr)
+    finally:
+        os.chdir(cwd)
+        if task.get('log_dir'):
+            with contextlib.suppress(OSError):
+                shutil.copy(log_path, os.path.join(task['log_dir'], f"run_{scenario['run_id']}.log"))
+        shutil.rmtree(workdir, ignore_errors=True)
+    result['elapsed'] = time.perf_counter() - started
+    return result, rows
+
+
+# ================================
+# ÇİFTLİK
+# ================================
+
+def run_farm(scenarios, output_dir, workers=None, backend="sumo", led_ip=DEFAULT_LED_IP,
+             base_port=DEFAULT_BASE_PORT, keep_logs=False, verbose=True):
+    """
+    Senaryoları süreç havuzunda çalıştır ve birleşik veri setini output_dir'e yaz
+
+    Returns:
+        runs.csv satırları (run_id sırasına göre)
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    log_dir = None
+    if keep_logs:
+        log_dir = os.path.join(output_dir, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, "matrix.json"), 'w', encoding='utf-8') as f:
+        json.dump(scenarios, f, indent=2)
+
+    tasks = [{'scenario': scenario, 'backend': backend, 'led_ip': led_ip,
+              'port': base_port + scenario['run_id'] if backend == "sumo" else None,
+              'log_dir': log_dir}
+             for scenario in scenarios]
+
+    if verbose:
+        print(f"🚜 {len(tasks)} senaryo, {workers} işçi süreç ({backend})")
+    results = []
+    started = time.perf_counter()
+    with open(os.path.join(output_dir, "runs.csv"), 'w', newline='', encoding='utf-8') as runs_file, \
+            open(os.path.join(output_dir, "positions.csv"), 'w', newline='', encoding='utf-8') as pos_file:
+        runs_writer = csv.DictWriter(runs_file, fieldnames=RUN_FIELDS)
+        pos_writer = csv.DictWriter(pos_file, fieldnames=POSITION_FIELDS)
+        runs_writer.writeheader()
+        pos_writer.writeheader()
+
+        # spawn: işçiler ana sürecin (örn. zaten import edilmiş runner) durumunu devralmasın
+        context = multiprocessing.get_context("spawn")
+        pool = context.Pool(processes=min(workers, len(tasks)) or 1, maxtasksperchild=1)
+        try:
+            for result, rows in pool.imap_unordered(run_scenario, tasks):
+                runs_writer.writerow(result)
+                pos_writer.writerows(rows)
+                runs_file.flush()
+                pos_file.flush()
+                results.append(result)
+                if verbose:
+                    status = "✅" if result['status'] == 'ok' else f"❌ {result['error']}"
+                    print(f"   [{len(results)}/{len(tasks)}] run {result['run_id']}: {status} "
+                          f"({result['elapsed']:.1f} s)")
+            pool.close()
+        except KeyboardInterrupt:
+            print("⚠️ Tarama kesildi, biten sonuçlar kaydedildi")
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    if verbose:
+        failed = sum(1 for r in results if r['status'] != 'ok')
+        print(f"✅ {len(results) - failed}/{len(results)} çalıştırma başarılı, "
+              f"toplam {time.perf_counter() - started:.1f} s -> {output_dir}")
+    return sorted(results, key=lambda r: r['run_id'])
+
+
+def _split(value, cast=str):
+    return [cast(v.strip()) for v in value.split(',') if v.strip()] if value else None
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options]")
+    optParser.add_option("--matrix", type="string", default=None,
+                         help="JSON file with axis lists, e.g. {\"seed\": [1, 2], \"demand\": [\"none\"]}")
+    optParser.add_option("--networks", type="string", default=None,
+                         help="Comma separated networks (default: cross)")
+    optParser.add_option("--tracks", type="string", default=None,
+                         help="Comma separated GPX tracks (default: gps-data-2.gpx)")
+    optParser.add_option("--filters", type="string", default=None,
+                         help="GPS noise filter on/off, e.g. on,off (default: on)")
+    optParser.add_option("--min-movement", type="string", default=None,
+                         help="Comma separated --gps-min-movement values")
+    optParser.add_option("--max-speed", type="string", default=None,
+                         help="Comma separated --gps-max-speed values")
+    optParser.add_option("--window-size", type="string", default=None,
+                         help="Comma separated --gps-window-size values")
+    optParser.add_option("--demand", type="string", default=None,
+                         help="Comma separated traffic demand: %s (default: none)" % ",".join(DEMANDS))
+    optParser.add_option("--seeds", type="string", default=None,
+                         help="Seeds, e.g. 1,2,3 or 1-20 (default: 42)")
+    optParser.add_option("--workers", type="int", default=None,
+                         help="Worker processes (default: all cores)")
+    optParser.add_option("--base-port", type="int", default=DEFAULT_BASE_PORT,
+                         help="TraCI port of run 0, run N uses base+N (default: 45000)")
+    optParser.add_option("--traci-backend", type="choice", choices=["sumo", "libsumo", "fake"], default="sumo",
+                         help="TraCI backend for runner.py (default: sumo)")
+    optParser.add_option("--led-ip", type="string", default=DEFAULT_LED_IP,
+                         help="LED controller address given to runner.py (default: closed local port)")
+    optParser.add_option("--output-dir", type="string", default=None,
+                         help="Directory for the consolidated dataset (default: farm_<timestamp>)")
+    optParser.add_option("--keep-logs", action="store_true", default=False,
+                         help="Keep runner.py output of every run under <output-dir>/logs")
+    optParser.add_option("--dry-run", action="store_true", default=False,
+                         help="Only print the scenario matrix")
+    options, _ = optParser.parse_args(args)
+    return options
+
+
+def matrix_from_options(options):
+    """Komut satırı ve --matrix JSON dosyasından eksen listelerini topla"""
+    axes = {}
+    if options.matrix:
+        with open(options.matrix, encoding='utf-8') as f:
+            axes.update(json.load(f))
+    cli = {
+        'network': _split(options.networks),
+        'track': _split(options.tracks),
+        'filter': _split(options.filters),
+        'min_movement': _split(options.min_movement, float),
+        'max_speed': _split(options.max_speed, float),
+        'window_size': _split(options.window_size, int),
+        'demand': _split(options.demand),
+        'seed': parse_seeds(options.seeds) if options.seeds else None,
+    }
+    axes.update({axis: values for axis, values in cli.items() if values})
+
+    unknown = set(axes) - {axis for axis, _ in MATRIX_AXES}
+    if unknown:
+        raise ValueError(f"Bilinmeyen matris ekseni: {', '.join(sorted(unknown))}")
+    for value in axes.get('demand', []):
+        if value not in DEMANDS:
+            raise ValueError(f"Bilinmeyen trafik talebi: {value}")
+    for value in axes.get('filter', []):
+        if value not in ('on', 'off'):
+            raise ValueError(f"Filtre değeri on/off olmalı: {value}")
+    return axes
+
+
+def main(args=None):
+    options = get_options(args)
+    try:
+        scenarios = build_matrix(matrix_from_options(options))
+    except (OSError, ValueError) as e:
+        print(f"❌ Matris hatası: {e}")
+        return 2
+
+    if options.dry_run:
+        for scenario in scenarios:
+            print(json.dumps(scenario))
+        print(f"📋 {len(scenarios)} senaryo")
+        return 0
+
+    output_dir = options.output_dir or f"farm_{int(time.time())}"
+    results = run_farm(scenarios, output_dir, options.workers, options.traci_backend,
+                       options.led_ip, options.base_port, options.keep_logs)
+    return 0 if all(r['status'] == 'ok' for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
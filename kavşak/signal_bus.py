@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sinyal Komut Yolu - SUMO GPS Ambulans Projesi
+Bu modül trafik ışığı (TLS) fazı ve ESP32 LED kontrolcüsü için istenen
+durumu tutar. Bir adım içindeki tüm istekler birleştirilir ve adım sonunda
+sadece gerçek durum değişiklikleri TraCI'ye / HTTP'ye gönderilir.
+"""
+
+TLS = 'tls'
+LED = 'led'
+
+
+class SignalBus:
+    """
+    Kenar tetiklemeli (edge-triggered) sinyal komut yolu
+
+    request_* çağrıları sadece istenen durumu kaydeder (aynı adımda son istek
+    geçerlidir). flush() her simülasyon adımı sonunda bir kez çağrılır ve
+    uygulanmış durumdan farklı olanları gönderir. Değişiklik getirmeyen
+    istekler bastırılmış (suppressed) olarak sayılır. Gönderimi başarısız olan
+    bir durum uygulanmış sayılmaz; yeni bir istekle geçersiz kılınmadıkça
+    sonraki flush()'larda yeniden denenir. Erişilemeyen bir LED kontrolcüsü
+    için yeniden denemeleri cihazın devre kesicisi seyreltir (açık devrede
+    gönderim ağa dokunmadan başarısız olur).
+
+    Args:
+        apply_tls: apply_tls(tls_id, phase) - TLS fazını uygular
+        send_led: send_led(controller_id, state, context) - LED komutunu gönderir
+        send_led_batch: send_led_batch([(controller_id, state, context), ...]) -
+            adımdaki tüm LED değişikliklerini tek çağrıda gönderir ve
+            {controller_id: bool} döndürür (verilirse send_led yerine kullanılır)
+    """
+
+    def __init__(self, apply_tls=None, send_led=None, send_led_batch=None):
+        self.apply_tls = apply_tls
+        self.send_led = send_led
+        self.send_led_batch = send_led_batch
+
+        self._applied = {TLS: {}, LED: {}}
+        self._pending = {TLS: {}, LED: {}}
+        self._retry = {TLS: {}, LED: {}}    # başarısız, yeniden denenecek gönderimler
+
+        # İstatistikler
+        self.requested = {TLS: 0, LED: 0}
+        self.emitted = {TLS: 0, LED: 0}
+        self.suppressed = {TLS: 0, LED: 0}
+        self.coalesced = {TLS: 0, LED: 0}
+        self.failed = {TLS: 0, LED: 0}
+
+    def _request(self, kind, target_id, state, context=None):
+        self.requested[kind] += 1
+        pending = self._pending[kind]
+        if target_id in pending:
+            self.coalesced[kind] += 1
+        pending[target_id] = (state, context)
+
+    def request_tls_phase(self, tls_id, phase):
+        """TLS için istenen fazı kaydet"""
+        self._request(TLS, tls_id, phase)
+
+    def request_led(self, controller_id, state, context=None):
+        """LED kontrolcüsü için istenen durumu kaydet (context: örn. ambulans ID)"""
+        self._request(LED, controller_id, state, context)
+
+    def get_tls_phase(self, tls_id):
+        """Bu adımda istenen, yoksa en son uygulanan TLS fazını döndür"""
+        pending = self._pending[TLS].get(tls_id)
+        if pending is not None:
+            return pending[0]
+        return self._applied[TLS].get(tls_id)
+
+    def get_led_state(self, controller_id):
+        """Bu adımda istenen, yoksa en son uygulanan LED durumunu döndür"""
+        pending = self._pending[LED].get(controller_id)
+        if pending is not None:
+            return pending[0]
+        return self._applied[LED].get(controller_id)
+
+    def invalidate(self, kind=None, target_id=None):
+        """
+        Uygulanmış durum bilgisini unut (dış etken durumu değiştirdiyse)
+
+        Bir sonraki istek, önceki değerle aynı olsa bile gönderilir.
+        """
+        kinds = (kind,) if kind else (TLS, LED)
+        for k in kinds:
+            if target_id is None:
+                self._applied[k].clear()
+            else:
+                self._applied[k].pop(target_id, None)
+
+    def flush(self):
+        """Bekleyen istekleri değerlendir ve sadece değişenleri gönder"""
+        emitted = 0
+        for kind, sender in ((TLS, self._emit_tls), (LED, self._emit_led)):
+            pending = self._pending[kind]
+            retry = self._retry[kind]
+            # Bu adımda yeni istek gelmeyen hedeflerin başarısız gönderimi tekrar denenir
+            for target_id, request in retry.items():
+                pending.setdefault(target_id, request)
+            retry.clear()
+            if not pending:
+                continue
+            applied = self._applied[kind]
+            changes = []
+            for target_id, (state, context) in pending.items():
+                if target_id in applied and applied[target_id] == state:
+                    self.suppressed[kind] += 1
+                    continue
+                changes.append((target_id, state, context))
+            pending.clear()
+
+            if kind == LED and self.send_led_batch is not None and changes:
+                results = self._emit_led_batch(changes)
+            else:
+                results = {target_id: sender(target_id, state, context)
+                           for target_id, state, context in changes}
+            for target_id, state, context in changes:
+                if results.get(target_id):
+                    applied[target_id] = state
+                    self.emitted[kind] += 1
+                    emitted += 1
+                else:
+                    retry[target_id] = (state, context)
+                    self.failed[kind] += 1
+        return emitted
+
+    def _emit_tls(self, tls_id, phase, context):
+        if self.apply_tls is None:
+            return True
+        try:
+            self.apply_tls(tls_id, phase)
+        except Exception as e:
+            print(f"❌ TLS faz komutu başarısız {tls_id} -> {phase}: {e}")
+            return False
+        return True
+
+    def _emit_led(self, controller_id, state, context):
+        if self.send_led is None:
+            return True
+        try:
+            return self.send_led(controller_id, state, context) is not False
+        except Exception as e:
+            print(f"❌ LED komutu başarısız {controller_id} -> {state}: {e}")
+            return False
+
+    def _emit_led_batch(self, changes):
+        try:
+            return self.send_led_batch(changes) or {}
+        except Exception as e:
+            print(f"❌ LED toplu komutu başarısız ({len(changes)} kontrolcü): {e}")
+            return {}
+
+    def get_stats(self):
+        """Komut yolu istatistiklerini döndür"""
+        return {
+            kind: {
+                'requested': self.requested[kind],
+                'emitted': self.emitted[kind],
+                'suppressed': self.suppressed[kind],
+                'coalesced': self.coalesced[kind],
+                'failed': self.failed[kind],
+            }
+            for kind in (TLS, LED)
+        }
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simülasyon Bağlamı - SUMO GPS Ambulans Projesi
+runner.py'de bir simülasyona ait tüm durumu (GPS izi ve indeksi, noise
+filtresi geçmişi, ambulans yörüngesi, trafik ışığı kontrol durumu,
+gerçek zamanlı GPS istemcileri) ve o simülasyonun TraCI bağlantısını tek bir
+nesnede toplar.
+
+Her bağlam kendi TraCI etiketini (label) kullanır; böylece tek bir süreç
+birden fazla SUMO örneğini aynı anda sürebilir (bkz. runner.run_concurrent).
+"""
+
+from gps_handoff import GPSFixHandoff
+from step_profiler import NullProfiler
+from trajectory_recorder import TrajectoryRecorder
+from trajectory_stats import TrajectoryStats
+
+
+def new_gps_history():
+    """GPS noise filtresi için boş geçmiş sözlüğü"""
+    return {
+        'positions': [],                    # Son GPS pozisyonları [(lat, lon, timestamp), ...]
+        'last_significant_position': None,  # Son önemli pozisyon
+        'last_movement_time': 0,           # Son hareket zamanı
+        'is_stationary': False,            # Durağan durum kontrolü
+        'filtered_position': None,         # Filtrelenmiş pozisyon
+        'total_updates': 0,                # Toplam GPS güncelleme sayısı
+        'filtered_count': 0,               # Filtrelenen (noise) sayısı
+    }
+
+
+class SimulationContext:
+    """
+    Tek bir simülasyonun durumu ve TraCI bağlantısı
+
+    traci alanı bu simülasyonun bağlantısıdır: gerçek SUMO için
+    traci.getConnection(label), FakeTraCI için simülatörün kendisi.
+    signal_bus runner.new_simulation_context() tarafından bu bağlantıya
+    bağlanarak oluşturulur.
+    """
+
+    def __init__(self, label="default", network_type="cross"):
+        self.label = label
+        self.traci = None
+        self.network_type = network_type
+
+        # GPS verisi
+        self.gps_coordinates = []
+        self.gps_index = 0
+        self.real_time_gps = None           # Gerçek zamanlı GPS verisi
+        self.use_real_time = False          # Gerçek zamanlı mod kontrolü
+        self.gps_history = new_gps_history()
+        self.gps_fix_handoff = GPSFixHandoff()  # Ingestion thread'leri -> TraCI döngüsü fix kuyruğu
+        self.gps_fix_filtered = False       # Son gerçek zamanlı fix noise filtresine takıldı mı
+
+        # Gerçek zamanlı GPS istemcileri
+        self.esp32_gps_client = None
+        self.gps_shm_ring = None            # Ayrı süreç modunda paylaşımlı bellek fix halka tamponu
+        self.gps_ingest_process = None
+        self.gps_ingest_stop_event = None
+        self.gps_replay = None              # --gps-source replay: kayıttan fix kaynağı (gps_replay.py)
+        self.gps_journal = None             # Canlı kaynakların ham fix günlüğü (gps_journal.py)
+
+        # Ambulans yörüngesi ve kontrol durumu
+        self.trajectory = TrajectoryRecorder()  # Sütunlu pozisyon kaydı (add_position_to_table)
+        self.trajectory_stats = TrajectoryStats()  # Araç başına çevrimiçi sürüş istatistikleri
+        self.position_step_counter = 0
+        self.ambulance_control_status = {}  # {vehicle_id: trafik ışığı kontrolü aktif mi}
+        self.prev_positions = {}            # safe_move_vehicle: son SUMO pozisyonları
+        self.mapping_debug_counter = 0      # gps_to_sumo_coords debug log sayacı
+
+        self.signal_bus = None
+        self.profiler = NullProfiler()      # --profile ile StepProfiler olur
+
+    def connect(self, backend, cmd, port=None):
+        """
+        SUMO'yu bu bağlamın etiketiyle başlat ve bağlantıyı sakla
+
+        backend traci modülü (etiketli bağlantılar), libsumo veya tek bir
+        simülasyonu temsil eden FakeTraCI olabilir. port verilmezse arka ucun
+        varsayılanı kullanılır (libsumo port kullanmaz).
+        """
+        kwargs = {'label': self.label}
+        if port is not None:
+            kwargs['port'] = port
+        backend.start(cmd, **kwargs)
+        get_connection = getattr(backend, 'getConnection', None)
+        self.traci = get_connection(self.label) if get_connection is not None else backend
+        return self.traci
+
+    def close(self):
+        """TraCI bağlantısını kapat"""
+        if self.traci is not None:
+            self.traci.close()
+            self.traci = None
+
+    def __repr__(self):
+        return f"SimulationContext(label={self.label!r}, network_type={self.network_type!r})"
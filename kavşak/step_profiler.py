@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simülasyon Adımı Profilleyici - SUMO GPS Ambulans Projesi
+Bu modül run() döngüsündeki her adımın fazlarını (simulationStep, GPS
+güncelleme, trafik kontrolü, LED/TLS gönderimi, ekrana yazdırma) monoton
+saatle ölçer. Faz başına logaritmik histogram tutulur; p50/p95/p99/max
+değerleri bellek büyümeden çıkarılır. Çalışma sonunda özet (JSON) ve adım
+bazlı iz (CSV) dosyaları yazılır.
+"""
+
+import csv
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Histogram kovaları: 1 µs'den başlayarak %5 büyüyen sınırlar (~%2.5 göreli hata)
+HISTOGRAM_MIN_NS = 1000
+HISTOGRAM_GROWTH = 1.05
+HISTOGRAM_BUCKETS = 500  # 1 µs * 1.05^500 ≈ 40 saat
+_INV_LOG_GROWTH = 1.0 / math.log(HISTOGRAM_GROWTH)
+
+PRINT_PHASE = "print"
+TOTAL_PHASE = "total"
+
+
+class PhaseHistogram:
+    """Tek bir fazın süre dağılımı (nanosaniye, logaritmik kovalar)"""
+
+    def __init__(self):
+        self.counts = [0] * (HISTOGRAM_BUCKETS + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def record(self, ns):
+        if ns < HISTOGRAM_MIN_NS:
+            index = 0
+        else:
+            index = min(int(math.log(ns / HISTOGRAM_MIN_NS) * _INV_LOG_GROWTH) + 1, HISTOGRAM_BUCKETS)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        if self.min_ns is None or ns < self.min_ns:
+            self.min_ns = ns
+
+    @staticmethod
+    def bucket_upper_ns(index):
+        """Kovanın üst sınırı (ns)"""
+        return HISTOGRAM_MIN_NS * HISTOGRAM_GROWTH ** index
+
+    def percentile(self, q):
+        """q (0-100) yüzdelik değeri (ns, kova üst sınırı; max ile sınırlı)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100.0))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.bucket_upper_ns(index), float(self.max_ns))
+        return float(self.max_ns)
+
+    def summary(self):
+        """Milisaniye cinsinden özet"""
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'total_ms': self.total_ns / 1e6,
+            'mean_ms': self.total_ns / self.count / 1e6,
+            'min_ms': self.min_ns / 1e6,
+            'p50_ms': self.percentile(50) / 1e6,
+            'p95_ms': self.percentile(95) / 1e6,
+            'p99_ms': self.percentile(99) / 1e6,
+            'max_ms': self.max_ns / 1e6,
+        }
+
+    def nonzero_buckets(self):
+        """Dışa aktarım için boş olmayan kovalar: [(üst sınır µs, adet), ...]"""
+        return [(self.bucket_upper_ns(i) / 1e3, c) for i, c in enumerate(self.counts) if c]
+
+
+class _TimedStream:
+    """
+    sys.stdout sarmalayıcı: yazma süresini yazan thread'in profilleyicisine ekler
+
+    Süreçte tek örnek kurulur (run_concurrent ile birden fazla profilleyici
+    aynı anda çalışabilir); kullanan profilleyici sayısı sıfıra inince eski
+    stdout geri yüklenir.
+    """
+
+    _lock = threading.Lock()
+    _installed = None
+    _users = 0
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    @classmethod
+    def attach(cls, profiler):
+        with cls._lock:
+            if cls._installed is None:
+                cls._installed = cls(sys.stdout)
+                sys.stdout = cls._installed
+            cls._users += 1
+            cls._installed._local.profiler = profiler
+            return cls._installed
+
+    @classmethod
+    def detach(cls, profiler):
+        with cls._lock:
+            stream = cls._installed
+            if getattr(stream._local, 'profiler', None) is profiler:
+                stream._local.profiler = None
+            cls._users -= 1
+            if cls._users == 0:
+                sys.stdout = stream._stream
+                cls._installed = None
+
+    def write(self, data):
+        profiler = getattr(self._local, 'profiler', None)
+        if profiler is None:
+            return self._stream.write(data)
+        start = time.perf_counter_ns()
+        result = self._stream.write(data)
+        profiler._print_ns += time.perf_counter_ns() - start
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class StepProfiler:
+    """
+    Adım fazı profilleyicisi
+
+    Kullanım (run() döngüsünde):
+        profiler.begin_step(step)
+        traci.simulationStep(); profiler.mark("simulation_step")
+        ...
+        profiler.end_step()
+
+    mark() bir önceki işaretten bu yana geçen süreyi verilen faza yazar.
+    Ekrana yazdırma süresi ayrıca "print" fazında toplanır (diğer fazların
+    içinde de sayılır, üst üste biner).
+    """
+
+    enabled = True
+
+    def __init__(self, keep_trace=True, time_print=True):
+        self.keep_trace = keep_trace
+        self.time_print = time_print
+        self.phases = OrderedDict()
+        self.trace = []
+        self._clock = time.perf_counter_ns
+        self._step = None
+        self._step_start = 0
+        self._last = 0
+        self._current = {}
+        self._print_ns = 0
+        self._timing_print = False
+
+    def _histogram(self, phase):
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = PhaseHistogram()
+        return histogram
+
+    def start(self):
+        """
+        Ekrana yazdırma süresini ölçmek için stdout'u sarmala
+
+        Sadece start() çağıran thread'in yazdırmaları bu profilleyiciye sayılır.
+        """
+        if self.time_print and not self._timing_print:
+            _TimedStream.attach(self)
+            self._timing_print = True
+        return self
+
+    def stop(self):
+        """stdout'u eski haline getir (son kullanıcı durunca)"""
+        if self._timing_print:
+            _TimedStream.detach(self)
+            self._timing_print = False
+
+    def begin_step(self, step):
+        self._step = step
+        self._current = {}
+        self._print_ns = 0
+        self._step_start = self._last = self._clock()
+
+    def mark(self, phase):
+        now = self._clock()
+        elapsed = now - self._last
+        self._last = now
+        self._current[phase] = self._current.get(phase, 0) + elapsed
+
+    def end_step(self):
+        if self._step is None:
+            return
+        total = self._clock() - self._step_start
+        current = self._current
+        for phase, ns in current.items():
+            self._histogram(phase).record(ns)
+        if self._timing_print:
+            current[PRINT_PHASE] = self._print_ns
+            self._histogram(PRINT_PHASE).record(self._print_ns)
+        current[TOTAL_PHASE] = total
+        self._histogram(TOTAL_PHASE).record(total)
+        if self.keep_trace:
+            self.trace.append((self._step, current))
+        self._step = None
+
+    def summary(self):
+        """Faz başına özet (ms)"""
+        return OrderedDict((phase, h.summary()) for phase, h in self.phases.items())
+
+    def print_summary(self):
+        """Faz özet tablosunu yazdır"""
+        print("⏱️ Adım fazı profili (ms):")
+        print(f"   {'Faz':<20} {'adet':>7} {'ort':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'toplam':>10}")
+        for phase, s in self.summary().items():
+            if not s['count']:
+                continue
+            print(f"   {phase:<20} {s['count']:>7} {s['mean_ms']:>8.3f} {s['p50_ms']:>8.3f} "
+                  f"{s['p95_ms']:>8.3f} {s['p99_ms']:>8.3f} {s['max_ms']:>8.3f} {s['total_ms']:>10.1f}")
+
+    def export(self, prefix=None):
+        """
+        Özet (JSON, histogramlar dahil) ve adım izi (CSV) dosyalarını yaz
+
+        Returns:
+            (summary_path, trace_path) - iz tutulmuyorsa trace_path None
+        """
+        if prefix is None:
+            prefix = f"step_profile_{int(time.time())}"
+        summary_path = f"{prefix}.json"
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'phases': self.summary(),
+                'histograms_us': {phase: h.nonzero_buckets() for phase, h in self.phases.items()},
+            }, f, indent=2)
+
+        trace_path = None
+        if self.keep_trace:
+            trace_path = f"{prefix}_trace.csv"
+            phases = list(self.phases)
+            with open(trace_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['step'] + [f"{phase}_us" for phase in phases])
+                for step, values in self.trace:
+                    writer.writerow([step] + [round(values.get(phase, 0) / 1e3, 1) for phase in phases])
+        return summary_path, trace_path
+
+
+class NullProfiler:
+    """Profilleme kapalıyken kullanılan boş nesne"""
+
+    enabled = False
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def begin_step(self, step):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_step(self):
+        pass
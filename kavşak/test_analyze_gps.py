@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GPX Analizi Testi
+Ad alanlı GPX izlerinin okunduğunu, yol uzunluğu / tekrar oranı / örnekleme
+aralığı / gürültü tahminlerini, büyük izlerde belleğin sabit kaldığını ve
+dizin + glob girdileriyle paralel toplu analizin JSON/CSV çıktısını test eder.
+"""
+
+import csv
+import datetime
+import json
+import math
+import os
+import random
+import tracemalloc
+
+import analyze_gps
+from gps_replay import load_gpx_fixes
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GPX_FILE = os.path.join(BASE_DIR, "gps-data-2.gpx")
+
+
+def _write_gpx(path, points):
+    start = datetime.datetime(2025, 6, 28, 19, 12, 25, tzinfo=datetime.timezone.utc)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">'
+                f'<metadata><time>{start.isoformat()}</time></metadata><trk><trkseg>\n')
+        for t, lat, lon in points:
+            stamp = (start + datetime.timedelta(seconds=t)).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+            f.write(f'<trkpt lat="{lat:.8f}" lon="{lon:.8f}"><time>{stamp}</time></trkpt>\n')
+        f.write('</trkseg></trk></gpx>\n')
+
+
+def test_namespaced_repo_track():
+    stats, error = analyze_gps.analyze_file(GPX_FILE, keep_points=10)
+    fixes = load_gpx_fixes(GPX_FILE)
+    assert error == '' and stats.points == len(fixes) == 21
+    assert stats.first_points[0] == (fixes[0].latitude, fixes[0].longitude)
+    assert stats.lat_min == min(f.latitude for f in fixes)
+
+    summary = stats.summary()
+    assert not summary['timed'] and summary['duration'] == 20.0
+    assert summary['duplicates'] == sum(1 for a, b in zip(fixes, fixes[1:]) if a[1:] == b[1:])
+    assert 0 < summary['path_length'] < 50
+
+
+def test_noise_interval_and_speed_estimates(tmp_path):
+    # Doğuya 10 m/s, σ = 2 m gürültü, aralıklar 1 s (bir kısmı 5 s)
+    rng = random.Random(5)
+    lat0, lon0 = 36.9, 30.7
+    m_lat, m_lon = 1 / 111195.0, 1 / (111195.0 * math.cos(math.radians(lat0)))
+    points, t = [], 0.0
+    for i in range(5000):
+        t += 5.0 if i % 100 == 99 else 1.0
+        points.append((t, lat0 + rng.gauss(0, 2.0) * m_lat, lon0 + (10.0 * t + rng.gauss(0, 2.0)) * m_lon))
+    path = str(tmp_path / "noisy.gpx")
+    _write_gpx(path, points)
+
+    summary = analyze_gps.analyze_file(path)[0].summary()
+    assert summary['timed'] and summary['points'] == 5000
+    assert abs(summary['noise_m'] - 2.0) < 0.2
+    assert abs(summary['p50_speed'] - 10.0) < 1.0
+    assert summary['interval_histogram']['1-2'] == 4949 and summary['interval_histogram']['5-10'] == 50
+
+
+def test_batch_directory_and_glob(tmp_path):
+    tracks = tmp_path / "tracks" / "day1"
+    tracks.mkdir(parents=True)
+    for i in range(4):
+        _write_gpx(str(tracks / f"track_{i}.gpx"), [(t, 36.9 + t * 1e-5, 30.7) for t in range(50 + i)])
+    (tmp_path / "broken.gpx").write_text('<gpx><trk><trkseg><trkpt lat="36.9" lon="30.7"/><trkpt', encoding='utf-8')
+
+    files = analyze_gps.expand_inputs([str(tmp_path / "tracks"), str(tmp_path / "tracks" / "*" / "*.gpx"),
+                                       str(tmp_path / "*.gpx")])
+    assert len(files) == 5
+
+    json_path, csv_path = str(tmp_path / "gpx.json"), str(tmp_path / "gpx.csv")
+    assert analyze_gps.main([str(tmp_path), "--workers", "2", "--json", json_path, "--csv", csv_path]) == 1
+    with open(json_path, encoding='utf-8') as f:
+        data = json.load(f)
+    total = data['aggregate']
+    assert total['files'] == 5 and total['failed'] == 1
+    assert total['points'] == 50 + 51 + 52 + 53 + 1
+    assert total['interval_histogram']['1-2'] == 49 + 50 + 51 + 52
+    assert [s['file'] for s in data['files']] == sorted(files)
+    with open(csv_path, encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [int(r['points']) for r in rows] == [1, 50, 51, 52, 53]
+    assert rows[0]['error'].startswith("ParseError")
+
+
+def _peak_memory(path):
+    tracemalloc.start()
+    try:
+        points = sum(1 for _ in analyze_gps.iter_trackpoints(path))
+        return points, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_trackpoint_stream_memory_is_flat(tmp_path):
+    small, large = str(tmp_path / "small.gpx"), str(tmp_path / "large.gpx")
+    _write_gpx(small, [(t, 36.9 + t * 1e-7, 30.7) for t in range(5000)])
+    _write_gpx(large, [(t, 36.9 + t * 1e-7, 30.7) for t in range(50000)])
+    small_points, small_peak = _peak_memory(small)
+    large_points, large_peak = _peak_memory(large)
+    assert (small_points, large_points) == (5000, 50000)
+    # 10 kat nokta; trkseg altında birikme olsaydı tepe de ~10 kat büyürdü
+    assert large_peak < 2 * small_peak + 256 * 1024
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Uçtan Uca Benchmark Testi
+Arka plan trafiğinin route dosyasına kalkış sırasıyla eklendiğini, TraCI
+çağrı sayacını ve bir senaryonun FakeTraCI ile etkileşimsiz çalıştığını
+test eder.
+"""
+
+import json
+import os
+import shutil
+import xml.etree.ElementTree as ET
+
+import bench_e2e
+import runner
+from fake_traci import FakeTraCI
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_background_traffic_route_file(tmp_path, monkeypatch):
+    shutil.copytree(os.path.join(BASE_DIR, "data"), tmp_path / "data")
+    shutil.copy(os.path.join(BASE_DIR, "gps-data-2.gpx"), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    ctx = runner.new_simulation_context()
+
+    route_file = runner.generate_routefile("data/downtown.rou.xml", ctx=ctx)
+
+    assert route_file == "data/cross_background.rou.xml"
+    vehicles = list(ET.parse(route_file).getroot().iter('vehicle'))
+    departs = [float(v.get('depart')) for v in vehicles]
+    assert departs == sorted(departs)
+    assert "ambulance_gps_0" in [v.get('id') for v in vehicles]
+    assert len(vehicles) == 1 + len(runner.load_background_vehicles("data/downtown.rou.xml"))
+
+
+def test_counting_traci():
+    sim = FakeTraCI()
+    counting = bench_e2e.CountingTraCI(sim)
+    counting.start(["sumo", "-c", os.path.join(BASE_DIR, "data", "cross.sumocfg")])
+    for _ in range(3):
+        counting.simulationStep()
+        counting.vehicle.getIDList()
+    assert counting.calls == 7
+    assert counting.time == sim.time == 3.0
+
+
+def test_fake_backend_scenario(tmp_path):
+    output = tmp_path / "e2e.json"
+    assert bench_e2e.main(["--traci-backend", "fake", "--runs", "1",
+                           "--scenarios", "file", "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text(encoding='utf-8'))
+    run = report['scenarios']['file']['runs'][0]
+    assert run['steps'] > 0
+    assert run['traci_calls'] > run['steps']
+    assert run['ambulance_travel_time'] > 0
+    assert report['scenarios']['file']['summary']['wall_time']['min'] > 0
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GPS Hattı Benchmark Testi
+Benchmark'ların küçük izlerde çalıştığını, sonuç biçimini ve baseline
+karşılaştırmasının regresyonu yakaladığını test eder.
+"""
+
+import json
+
+import bench_gps_pipeline as bench
+
+
+def test_benchmarks_produce_results():
+    results = bench.run_benchmarks(sizes=[200], repeat=1, verbose=False)
+    names = {name for name, _, _ in bench.BENCHMARKS}
+    assert {key.split('/')[0] for key in results} == names
+    assert {key.split('/')[1] for key in results} == {"repo", "200"}
+    assert results["filter_gps_noise/200"]['items'] == 200
+    assert results["filter_gps_noise/200"]['ns_per_item'] > 0
+
+
+def test_baseline_comparison():
+    baseline = {'results': {'a/1000': {'ns_per_item': 100.0}, 'b/1000': {'ns_per_item': 100.0}}}
+    results = {'a/1000': {'ns_per_item': 120.0}, 'b/1000': {'ns_per_item': 160.0}}
+    regressions = bench.compare_to_baseline(results, baseline, threshold=0.25)
+    assert [r[0] for r in regressions] == ['b/1000']
+
+
+def test_main_fails_on_regression(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "results.json"
+    args = ["--sizes", "100", "--repeat", "1", "--only", "calculate_gps_distance",
+            "--no-repo-data", "--baseline", str(baseline), "--output", str(output)]
+
+    assert bench.main(args + ["--save-baseline"]) == 0
+    data = json.loads(baseline.read_text())
+    data['results']['calculate_gps_distance/100']['ns_per_item'] /= 100.0
+    baseline.write_text(json.dumps(data))
+
+    assert bench.main(args) == 1
+    assert "calculate_gps_distance/100" in json.loads(output.read_text())['results']
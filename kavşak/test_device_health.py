@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cihaz Sağlık Durumu Testi
+Devre kesicinin durum geçişlerini, üstel geri çekilmeyi, çevrimdışı
+ESP32 için ağa dokunmadan hızlı reddetmeyi ve HTTP hata yanıtlarının
+başarısızlık sayılmasını test eder.
+"""
+
+import os
+import time
+
+import requests
+
+import runner
+from device_health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, device_health
+from esp32_emulator import OUTAGE_REFUSE, EmulatedGPSDevice, load_track
+from esp32_gps_client import ESP32GPSClient
+
+GPX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gps-data-2.gpx")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_threshold():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=3, clock=clock, verbose=False)
+
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure("timeout")
+    assert breaker.state == CLOSED
+
+    breaker.record_failure("timeout")
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.get_stats()['rejected'] == 1
+    assert breaker.get_stats()['last_error'] == "timeout"
+
+
+def test_half_open_probe_and_backoff():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, base_backoff=1.0,
+                             max_backoff=4.0, clock=clock, verbose=False)
+    breaker.record_failure()
+    assert breaker.retry_after() == 1.0
+
+    clock.now += 1.0
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()         # Tek deneme isteği uçuşta
+
+    # Başarısız denemeler geri çekilmeyi katlar (üst sınıra kadar)
+    for expected in (2.0, 4.0, 4.0):
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.retry_after() == expected
+        clock.now += expected
+        assert breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.current_backoff == 1.0
+
+
+def test_offline_device_fails_fast():
+    clock = FakeClock()
+    with EmulatedGPSDevice(load_track(GPX_FILE)) as device:
+        # Client kayıttaki devre kesiciyi kullanır; saat önceden enjekte edilir
+        device_health.get(f"ESP32 GPS 127.0.0.1:{device.port}", clock=clock)
+        client = ESP32GPSClient("127.0.0.1", device.port)
+        assert client.get_gps_data() is not None
+
+        device.go_offline(OUTAGE_REFUSE)
+        for _ in range(client.health.failure_threshold):
+            assert client.get_gps_data() is None
+        assert client.health.state == OPEN
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            assert client.get_gps_data() is None
+        per_call = (time.perf_counter() - start) / 1000
+        assert per_call < 0.001
+
+        # Deneme zamanı geldiğinde cihaz tekrar yoklanır
+        device.go_online()
+        assert client.get_gps_data() is None
+        clock.now += client.health.retry_after()
+        assert client.get_gps_data() is not None
+        assert client.health.state == CLOSED
+
+
+def test_gps_error_status_counts_as_failure():
+    clock = FakeClock()
+    with EmulatedGPSDevice(load_track(GPX_FILE)) as device:
+        device_health.get(f"ESP32 GPS 127.0.0.1:{device.port}", clock=clock, verbose=False)
+        client = ESP32GPSClient("127.0.0.1", device.port)
+        gps_route = device.routes[('GET', '/gps')]
+        device.routes[('GET', '/gps')] = lambda body: (503, 'text/plain', 'busy')
+
+        # Yanıt veren ama 503 dönen cihaz da geri çekilmeli
+        for _ in range(client.health.failure_threshold):
+            assert client.get_gps_data() is None
+        assert client.health.state == OPEN and client.health.last_error == "HTTP 503"
+
+        device.routes[('GET', '/gps')] = gps_route
+        device.routes[('POST', '/command')] = lambda body: (500, 'text/plain', 'error')
+        clock.now += client.health.retry_after()
+        assert client.send_command_to_esp32('set_led', {'state': True}) is None
+        assert client.health.state == OPEN and client.health.last_error == "HTTP 500"
+
+        clock.now += client.health.retry_after()
+        assert client.get_gps_data() is not None
+        assert client.health.state == CLOSED
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def test_led_signal_failures_reach_breaker(monkeypatch):
+    clock = FakeClock()
+    address = "10.0.0.99"
+    health = device_health.get(f"ESP32 LED {address}", clock=clock, failure_threshold=1, verbose=False)
+    monkeypatch.setattr(runner, "esp32_led_address", address)
+
+    # HTTP 500 başarı sayılmaz
+    monkeypatch.setattr(requests, "post", lambda url, timeout: FakeResponse(500))
+    assert runner.send_signal_to_esp32("GREEN_LIGHT_ACTIVATED", "ambulance_gps_0") is False
+    assert health.state == OPEN and health.last_error == "HTTP 500"
+
+    # Yarı açık denemede beklenmeyen hata: devre takılı kalmaz, tekrar açılır
+    def broken(url, timeout):
+        raise ValueError("bozuk yanıt")
+    monkeypatch.setattr(requests, "post", broken)
+    clock.now += health.retry_after()
+    assert runner.send_signal_to_esp32("NORMAL_TRAFFIC_RESUMED", "ambulance_gps_0") is False
+    assert health.state == OPEN
+
+    monkeypatch.setattr(requests, "post", lambda url, timeout: FakeResponse(200))
+    clock.now += health.retry_after()
+    assert runner.send_signal_to_esp32("NORMAL_TRAFFIC_RESUMED", "ambulance_gps_0") is True
+    assert health.state == CLOSED
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ESP32 Emülatör Testi
+ESP32GPSClient'ın donanım yerine localhost emülatörüne karşı çalışmasını,
+kayıt oynatma hızını ve hata enjeksiyonunu test eder.
+"""
+
+import os
+import time
+
+from esp32_emulator import (EmulatedGPSDevice, TrackPlayer, load_track,
+                            start_gps_devices, stop_devices)
+from esp32_gps_client import ESP32GPSClient
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GPX_FILE = os.path.join(BASE_DIR, "gps-data-2.gpx")
+CSV_FILE = os.path.join(BASE_DIR, "ambulance_positions_1751209150.csv")
+
+
+def test_load_recordings():
+    gpx = load_track(GPX_FILE)
+    assert len(gpx) == 21
+    assert gpx[0][1:3] == (36.91979667, 30.67375)
+    assert gpx[1][0] - gpx[0][0] == 1.0
+
+    csv_track = load_track(CSV_FILE)
+    assert len(csv_track) == 21
+    assert csv_track[0][1:3] == (36.919797, 30.67375)
+
+
+def test_track_player_speed_and_loop():
+    points = [(float(i), 36.9 + i * 1e-5, 30.6, 0.0) for i in range(10)]
+    player = TrackPlayer(points, speed=10.0)
+    assert player.index_at(0.0) == 0
+    assert player.index_at(0.55) == 5          # 0.55 s * 10x = 5.5 s
+    assert player.index_at(1.05) == 0          # 10 s periyot sonrası başa döner
+
+    lat, lon, ele, speed_kmh, course = player.fix_at(0.35)
+    assert abs(speed_kmh - 4.0) < 0.1          # ~1.11 m/s kuzeye
+    assert abs(course) < 1e-6 or abs(course - 360.0) < 1e-6
+
+
+def test_client_against_emulator():
+    with EmulatedGPSDevice(load_track(GPX_FILE), speed=50.0) as device:
+        client = ESP32GPSClient("127.0.0.1", device.port)
+        assert client.test_connection()
+        assert client.get_system_info()['firmware'] == 'emulator-1.0'
+
+        gps = client.get_gps_data()
+        assert gps['valid']
+        assert 36.9197 < gps['latitude'] < 36.9198
+
+        assert client.set_led_status(True)['status'] == 'ok'
+        assert device.led_state is True
+
+
+def test_fault_injection():
+    track = load_track(GPX_FILE)
+    with EmulatedGPSDevice(track, invalid_rate=1.0) as device:
+        client = ESP32GPSClient("127.0.0.1", device.port)
+        assert client.get_gps_data() is None
+        assert device.get_stats()['invalid_served'] == 1
+
+    with EmulatedGPSDevice(track, loss_rate=1.0) as device:
+        client = ESP32GPSClient("127.0.0.1", device.port)
+        assert client.get_gps_data() is None
+        assert device.get_stats()['dropped'] == 1
+
+    with EmulatedGPSDevice(track, latency=0.2) as device:
+        client = ESP32GPSClient("127.0.0.1", device.port)
+        start = time.perf_counter()
+        assert client.get_gps_data() is not None
+        assert time.perf_counter() - start >= 0.2
+
+
+def test_many_devices():
+    devices = start_gps_devices([GPX_FILE, CSV_FILE], count=8, speed=10.0, seed=1)
+    try:
+        ports = {d.port for d in devices}
+        assert len(ports) == 8
+        for device in devices:
+            assert ESP32GPSClient("127.0.0.1", device.port).get_gps_data()['valid']
+    finally:
+        stop_devices(devices)
+
+
+def test_led_controller_records_commands():
+    import requests
+    from esp32_emulator import EmulatedLEDController
+
+    with EmulatedLEDController(latency=0.05) as controller:
+        base = f"http://{controller.address}"
+        assert controller.led_on
+        assert requests.post(f"{base}/ambulance/green", timeout=2).status_code == 200
+        assert not controller.led_on
+        assert requests.post(f"{base}/ambulance/normal", timeout=2).status_code == 200
+        assert requests.get(f"{base}/status", timeout=2).json()['traffic_light'] == 'red'
+
+        commands = controller.get_commands()
+        assert [c.path for c in commands] == ['/ambulance/green', '/ambulance/normal']
+        assert [c.led_on for c in commands] == [False, True]
+        assert all(c.applied_at - c.received_at >= 0.05 for c in commands)
+
+
+def test_led_controller_outages():
+    import requests
+    from esp32_emulator import EmulatedLEDController
+
+    with EmulatedLEDController(hang_time=5.0) as controller:
+        base = f"http://{controller.address}"
+
+        controller.go_offline('timeout')
+        start = time.perf_counter()
+        try:
+            requests.post(f"{base}/ambulance/green", timeout=0.3)
+            raise AssertionError("Kesintide yanıt alındı")
+        except requests.exceptions.Timeout:
+            pass
+        assert time.perf_counter() - start < 2.0
+
+        controller.go_offline('refuse')
+        try:
+            requests.post(f"{base}/ambulance/green", timeout=0.3)
+            raise AssertionError("Kapalı port yanıt verdi")
+        except requests.exceptions.ConnectionError:
+            pass
+
+        controller.go_online()
+        assert requests.post(f"{base}/ambulance/green", timeout=2).status_code == 200
+        assert not controller.led_on
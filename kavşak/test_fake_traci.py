@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bellek İçi TraCI Testi
+FakeTraCI'nin cross ağını yükleyip araç, trafik ışığı ve dedektörleri
+modellediğini ve runner.run() kontrol döngüsünü SUMO olmadan sürdüğünü
+test eder.
+"""
+
+import os
+
+import runner
+from fake_traci import FakeTraCI
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CROSS_CFG = os.path.join(BASE_DIR, "data", "cross.sumocfg")
+CROSS_NET = os.path.join(BASE_DIR, "data", "cross.net.xml")
+CROSS_DET = os.path.join(BASE_DIR, "data", "cross.det.xml")
+DOWNTOWN_ROUTES = os.path.join(BASE_DIR, "data", "downtown.rou.xml")
+GPX_FILE = os.path.join(BASE_DIR, "gps-data-2.gpx")
+
+
+def test_vehicles_stop_at_red_and_trigger_loop():
+    sim = FakeTraCI()
+    sim.start(["sumo", "-n", CROSS_NET, "-a", CROSS_DET, "-r", DOWNTOWN_ROUTES])
+    assert sim.trafficlight.getPhase("0") == 0
+
+    # Faz 0 (GrGr) kuzey-güney yeşil: doğu-batı araçları durma çizgisinde bekler
+    sim.trafficlight.setPhase("0", 0)
+    sim.trafficlight.setPhaseDuration("0", 1e6)
+    loop_hits = 0
+    for _ in range(200):
+        sim.simulationStep()
+        loop_hits += sim.inductionloop.getLastStepVehicleNumber("0")
+    assert loop_hits > 0
+
+    waiting = [v for v in sim.vehicle.getIDList()
+               if sim.vehicle.getRoadID(v) == "1i" and sim.vehicle.getSpeed(v) == 0]
+    assert waiting
+    x, _ = sim.vehicle.getPosition(waiting[0])
+    assert x <= 502.8
+
+
+def test_move_to_xy_applies_on_next_step():
+    sim = FakeTraCI()
+    sim.start(["sumo", "-c", CROSS_CFG])
+    while "ambulance_gps_0" not in sim.vehicle.getIDList():
+        sim.simulationStep()
+
+    sim.vehicle.setSpeedMode("ambulance_gps_0", 0)
+    sim.vehicle.setSpeed("ambulance_gps_0", 0)
+    sim.vehicle.moveToXY("ambulance_gps_0", "", 0, 300.0, 509.0, 90, keepRoute=0)
+    assert sim.vehicle.getPosition("ambulance_gps_0") != (300.0, 509.0)
+    sim.simulationStep()
+    assert sim.vehicle.getPosition("ambulance_gps_0") == (300.0, 509.0)
+    sim.simulationStep()
+    assert sim.vehicle.getPosition("ambulance_gps_0") == (300.0, 509.0)
+
+
+def test_run_loop_without_sumo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ctx = runner.new_simulation_context("fake")
+    sim = ctx.connect(FakeTraCI(), ["sumo", "-c", CROSS_CFG])
+
+    led_commands = []
+    ctx.signal_bus.send_led = lambda cid, state, c: led_commands.append(state) or True
+    ctx.signal_bus.send_led_batch = None
+    ctx.gps_coordinates = runner.parse_gps_data(GPX_FILE)
+
+    runner.run(ctx)
+
+    assert sim.time == 3600.0
+    assert ctx.trajectory.count("ambulance_gps_0") == 21
+    assert led_commands == ["GREEN_LIGHT_ACTIVATED"]
+    assert sim.trafficlight.getPhase("0") == 2
+
+
+def test_libsumo_backend_selection(monkeypatch):
+    sumo_traci, in_process = object(), object()
+    monkeypatch.setattr(runner, "traci", sumo_traci)
+    monkeypatch.setattr(runner, "libsumo", in_process)
+    monkeypatch.setattr(runner, "checkBinary", lambda name: name)
+
+    monkeypatch.setenv(runner.TRACI_BACKEND_ENV, "libsumo")
+    options = runner.get_options(["--nogui"])
+    assert runner.select_traci_backend(options) == (in_process, "sumo")
+    assert options.traci_backend == "libsumo"
+
+    # sumo-gui veya libsumo yoksa soket TraCI'ye düşülür
+    options = runner.get_options([])
+    assert runner.select_traci_backend(options) == (sumo_traci, "sumo-gui")
+    assert options.traci_backend == "sumo"
+
+    monkeypatch.setattr(runner, "libsumo", None)
+    options = runner.get_options(["--nogui"])
+    assert runner.select_traci_backend(options) == (sumo_traci, "sumo")
+    assert options.traci_backend == "sumo"
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ham GPS Günlüğü Testi
+Birden fazla ingestion thread'inden gelen fix'lerin günlüğe eksiksiz
+yazıldığını, yarıda kalmış son kaydın atlandığını, mevcut günlüğe ekleme
+yapıldığını, yazma hatasından sonra kuyruğun büyümediğini ve runner'ın canlı
+callback'inin günlüğe yazdığını test eder.
+"""
+
+import errno
+import math
+import threading
+import time
+
+import runner
+from gps_journal import GPSJournal, read_journal, read_journal_array
+from gps_replay import load_replay_fixes
+
+
+def test_concurrent_writers_and_readers(tmp_path):
+    path = str(tmp_path / "session.gpsj")
+    journal = GPSJournal(path, flush_interval=0.01)
+
+    def ingest(source):
+        for i in range(1000):
+            journal.record(36.9 + i * 1e-6, 30.6, source, hdop=0.9, satellites=11, timestamp=float(i))
+
+    threads = [threading.Thread(target=ingest, args=(source,)) for source in ("esp32", "serial")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    records = read_journal(path)
+    assert len(records) == journal.records_written == 2000
+    assert sum(1 for r in records if r.source == "esp32") == 1000
+    assert records[0].satellites == 11 and abs(records[0].hdop - 0.9) < 1e-6
+
+    array, sources = read_journal_array(path)
+    assert len(array) == 2000
+    assert [sources[i] for i in array['source'][:1]] == [records[0].source]
+    assert array['latitude'][5] == records[5].latitude
+
+
+def test_truncated_tail_and_append(tmp_path):
+    path = str(tmp_path / "session.gpsj")
+    with GPSJournal(path) as journal:
+        journal.record(36.9, 30.6, "socket")
+        journal.record(36.8, 30.5)
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * 7)  # çökme: yarım kayıt
+    assert [r.source for r in read_journal(path)] == ["socket", "unknown"]
+    assert math.isnan(read_journal(path)[1].hdop)
+
+    # Yarım kayıt kesilir, eklenen kayıt hizalı okunur
+    with GPSJournal(path) as journal:
+        journal.record(36.7, 30.4, "esp32")
+    records = read_journal(path)
+    assert [(r.latitude, r.longitude, r.source) for r in records] == [
+        (36.9, 30.6, "socket"), (36.8, 30.5, "unknown"), (36.7, 30.4, "esp32")]
+
+
+class FullDiskFile:
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, data):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def test_write_error_stops_recording(tmp_path, capsys):
+    journal = GPSJournal(str(tmp_path / "session.gpsj"), flush_interval=0.01)
+    journal._file = FullDiskFile(journal._file)
+    journal.record(36.9, 30.6, "esp32")
+    deadline = time.monotonic() + 5
+    while journal.error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert isinstance(journal.error, OSError)
+
+    # Canlı oturum sürerken fix'ler gelmeye devam eder; bellekte birikmemeli
+    for i in range(10000):
+        journal.record(36.9, 30.6, "esp32", timestamp=float(i))
+    assert journal.pending == 0
+    journal.close()
+    assert capsys.readouterr().out.count("GPS günlüğü yazma hatası") == 1
+
+
+def test_live_callback_records_raw_fixes(tmp_path):
+    path = str(tmp_path / "live.gpsj")
+    ctx = runner.new_simulation_context("journal")
+    ctx.gps_journal = GPSJournal(path)
+
+    runner.on_real_time_gps_update(36.91, 30.67, ctx, "serial", 1.2, 9)
+    runner.on_real_time_gps_update(36.92, 30.68, ctx, "serial", 1.1, 10)
+    assert ctx.gps_fix_handoff.pending() == 2
+    runner.cleanup_gps_clients(ctx)
+    assert ctx.gps_journal is None
+
+    records = read_journal(path)
+    assert [(r.latitude, r.source, r.satellites) for r in records] == [(36.91, "serial", 9),
+                                                                      (36.92, "serial", 10)]
+    # Günlük kayıt tekrarı kaynağı olarak da okunur
+    fixes = load_replay_fixes(path)
+    assert [(f.latitude, f.longitude) for f in fixes] == [(36.91, 30.67), (36.92, 30.68)]
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GPS Kayıt Tekrarı Testi
+Kaydedilmiş fix'lerin simülasyon saatine ve hız çarpanına göre kuyruğa
+verildiğini, kayıt dosyalarının okunduğunu ve FakeTraCI ile tekrarın
+gerçek zamanlı yoldan geçip her çalıştırmada aynı sonucu ürettiğini test eder.
+"""
+
+import os
+
+import runner
+from fake_traci import FakeTraCI
+from gps_handoff import GPSFixHandoff
+from gps_replay import GPSReplaySource, ReplayFix, load_replay_fixes
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CROSS_CFG = os.path.join(BASE_DIR, "data", "cross.sumocfg")
+GPX_FILE = os.path.join(BASE_DIR, "gps-data-2.gpx")
+
+
+def _fixes(times):
+    return [ReplayFix(t, 36.9 + t * 1e-5, 30.6) for t in times]
+
+
+def test_pump_follows_simulation_clock():
+    handoff = GPSFixHandoff()
+    source = GPSReplaySource(_fixes([100.0, 101.0, 103.0, 110.0]), speed=2.0)
+
+    assert source.pump(5.0, handoff) == 1      # başlangıç: ilk fix hemen
+    assert source.pump(6.0, handoff) == 1      # 1 s simülasyon = 2 s kayıt
+    assert source.pump(7.0, handoff) == 1
+    assert source.pump(9.0, handoff) == 0
+    assert source.pump(10.0, handoff) == 1
+    assert source.finished
+    assert source.pump(11.0, handoff) == 0
+
+    # Filtreye kayıttaki zaman damgaları gider
+    assert [fix.timestamp for fix in handoff.drain()] == [100.0, 101.0, 103.0, 110.0]
+
+
+def test_pump_max_speed_one_fix_per_step():
+    handoff = GPSFixHandoff()
+    source = GPSReplaySource(_fixes([0.0, 30.0, 60.0]), speed=0)
+    assert [source.pump(t, handoff) for t in (1.0, 2.0, 3.0, 4.0)] == [1, 1, 1, 0]
+    source.reset()
+    assert source.pump(9.0, handoff) == 1
+
+
+def test_load_recordings(tmp_path):
+    fixes = load_replay_fixes(GPX_FILE)
+    assert len(fixes) == 21
+    assert fixes[1].time - fixes[0].time == 1.0
+
+    gpx = tmp_path / "timed.gpx"
+    gpx.write_text('<gpx xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg>'
+                   '<trkpt lat="36.9" lon="30.6"><time>2025-06-28T19:12:25Z</time></trkpt>'
+                   '<trkpt lat="36.8" lon="30.5"><time>2025-06-28T19:12:30Z</time></trkpt>'
+                   '</trkseg></trk></gpx>')
+    timed = load_replay_fixes(str(gpx))
+    assert timed[1].time - timed[0].time == 5.0
+
+    # Eski CSV: sim_time yok, adım numarası kullanılır
+    csv_path = tmp_path / "ambulance_positions_1.csv"
+    csv_path.write_text("vehicle_id,step,sumo_x,sumo_y,gps_lat,gps_lon\n"
+                        "ambulance_gps_0,1,1.0,508.4,36.91,30.67\n"
+                        "other,1,2.0,508.4,36.00,30.00\n"
+                        "ambulance_gps_0,16,2.0,508.4,36.92,30.68\n")
+    assert load_replay_fixes(str(csv_path)) == [ReplayFix(1.0, 36.91, 30.67), ReplayFix(16.0, 36.92, 30.68)]
+    assert load_replay_fixes(str(csv_path), "other") == [ReplayFix(1.0, 36.0, 30.0)]
+
+
+def _replay_run(tmp_path, speed):
+    ctx = runner.new_simulation_context("replay")
+    ctx.connect(FakeTraCI(), ["sumo", "-c", CROSS_CFG])
+    ctx.signal_bus.send_led = lambda cid, state, c: True
+    ctx.signal_bus.send_led_batch = None
+    ctx.gps_replay = GPSReplaySource.from_file(GPX_FILE, speed)
+    ctx.use_real_time = True
+    runner.run(ctx)
+    return ctx, [repr(row) for row in ctx.trajectory.rows("ambulance_gps_0")]  # repr: NaN hızlar eşit sayılsın
+
+
+def test_replay_run_is_reproducible(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ctx, first = _replay_run(tmp_path, speed=0)
+    _, second = _replay_run(tmp_path, speed=0)
+
+    assert ctx.gps_history['total_updates'] == 21
+    assert first and first == second
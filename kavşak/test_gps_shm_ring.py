@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paylaşımlı Bellek GPS Halka Tamponu Testi
+Ayrı bir süreçte yazılan fix kayıtlarının simülasyon sürecinden sırayla
+okunmasını ve taşma (overrun) tespitini test eder.
+"""
+
+import multiprocessing
+
+from gps_shm_ring import SharedFixRing, FLAG_VALID, FLAG_FILTERED
+
+
+def _writer_process(ring_name, count):
+    ring = SharedFixRing.attach(ring_name)
+    for i in range(count):
+        flags = FLAG_VALID | (FLAG_FILTERED if i % 10 == 0 else 0)
+        ring.write(36.9 + i * 1e-7, 30.6 + i * 1e-7, timestamp=1000.0 + i,
+                   flags=flags, satellites=9, hdop=0.9)
+    ring.close()
+
+
+def test_cross_process_records():
+    ring = SharedFixRing.create(capacity=512)
+    try:
+        proc = multiprocessing.Process(target=_writer_process, args=(ring.name, 300))
+        proc.start()
+        proc.join(timeout=10)
+        assert proc.exitcode == 0
+
+        fixes = ring.read_new()
+        assert [f.seq for f in fixes] == list(range(1, 301))
+        assert fixes[5].timestamp == 1005.0
+        assert abs(fixes[5].latitude - (36.9 + 5e-7)) < 1e-12
+        assert fixes[5].satellites == 9
+        assert sum(1 for f in fixes if f.flags & FLAG_FILTERED) == 30
+        assert ring.read_new() == []
+    finally:
+        ring.close()
+
+
+def test_overrun_detection():
+    ring = SharedFixRing.create(capacity=16)
+    try:
+        for i in range(40):
+            ring.write(float(i), float(i))
+
+        fixes = ring.read_new()
+        # Sadece son 16 kayıt kurtarılabilir, 24 tanesi kaçırılmış sayılır
+        assert [f.seq for f in fixes] == list(range(25, 41))
+        assert ring.get_stats()['overruns'] == 24
+
+        ring.write(99.0, 99.0)
+        assert [f.latitude for f in ring.read_new()] == [99.0]
+    finally:
+        ring.close()
+
+
+def test_attach_rejects_foreign_memory():
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(create=True, size=256)
+    try:
+        try:
+            SharedFixRing.attach(shm.name)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Geçersiz tampon kabul edildi")
+    finally:
+        shm.close()
+        shm.unlink()
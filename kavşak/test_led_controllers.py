@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çoklu LED Kontrolcü Testi
+TLS -> kontrolcü eşlemesini, komutların eşzamanlı gönderilmesini, aynı
+cihaza giden komutların tek /batch isteğinde toplanmasını ve hata yanıtlarının
+devre kesiciye başarısızlık olarak bildirilmesini test eder.
+"""
+
+import time
+
+import requests
+
+from device_health import CLOSED, OPEN
+from esp32_emulator import EmulatedLEDController
+from led_controllers import LEDControllerRegistry, LEDFanout, led_health
+from signal_bus import SignalBus
+
+
+def test_registry_from_spec():
+    registry = LEDControllerRegistry.from_spec("0=10.0.0.1,10.0.0.2; 1=10.0.0.3:8080")
+    assert registry.controllers_for("0") == ["10.0.0.1", "10.0.0.2"]
+    assert registry.controllers_for(1) == ["10.0.0.3:8080"]
+    assert registry.controllers_for("9") == []
+
+    default = LEDControllerRegistry.from_spec(None, default_address="192.168.1.107")
+    assert default.tls_ids() == ["0"]
+
+
+def test_fanout_is_concurrent():
+    """20 kavşaklık ön alma olayı tek gecikme süresinde tamamlanmalı"""
+    devices = [EmulatedLEDController(latency=0.2).start() for _ in range(20)]
+    try:
+        registry = LEDControllerRegistry()
+        for i, device in enumerate(devices):
+            registry.register(str(i), device.address)
+        fanout = LEDFanout(registry, verbose=False)
+
+        start = time.monotonic()
+        results = fanout.send([(str(i), "GREEN_LIGHT_ACTIVATED", "amb") for i in range(20)])
+        elapsed = time.monotonic() - start
+
+        assert all(results.values()) and len(results) == 20
+        assert all(not device.led_on for device in devices)
+        assert elapsed < 1.0                      # sıralı gönderimde >= 4 s
+        fanout.close()
+    finally:
+        for device in devices:
+            device.stop()
+
+
+def test_commands_for_same_device_are_batched():
+    with EmulatedLEDController() as device:
+        registry = LEDControllerRegistry.from_spec(f"0={device.address};1={device.address}")
+        fanout = LEDFanout(registry, verbose=False)
+        results = fanout.send([("0", "GREEN_LIGHT_ACTIVATED", None),
+                               ("1", "NORMAL_TRAFFIC_RESUMED", None)])
+        assert results == {"0": True, "1": True}
+        assert [c.path for c in device.get_commands()] == ["/batch"]
+        assert device.led_on
+
+        # /batch bilmeyen eski firmware: son durum tekil endpoint ile gönderilir
+        del device.routes[('POST', '/batch')]
+        device.clear_commands()
+        fanout.send([("0", "NORMAL_TRAFFIC_RESUMED", None),
+                     ("1", "GREEN_LIGHT_ACTIVATED", None)])
+        assert [c.path for c in device.get_commands()] == ["/batch", "/ambulance/green"]
+        assert not device.led_on
+        assert fanout.get_stats()['batched_requests'] == 1
+        fanout.close()
+
+
+def test_signal_bus_batches_led_changes():
+    batches = []
+
+    def send_batch(changes):
+        batches.append(changes)
+        return {cid: True for cid, _, _ in changes}
+
+    bus = SignalBus(send_led_batch=send_batch)
+    for tls_id in ("0", "1", "2"):
+        bus.request_led(tls_id, "GREEN_LIGHT_ACTIVATED")
+    bus.flush()
+    bus.request_led("0", "GREEN_LIGHT_ACTIVATED")
+    bus.flush()
+
+    assert len(batches) == 1 and len(batches[0]) == 3
+    assert bus.get_stats()['led']['emitted'] == 3
+    assert bus.get_stats()['led']['suppressed'] == 1
+
+
+def test_error_responses_open_the_breaker(monkeypatch):
+    with EmulatedLEDController() as device:
+        registry = LEDControllerRegistry.from_spec(f"0={device.address}")
+        fanout = LEDFanout(registry, verbose=False)
+        health = led_health(device.address)
+        try:
+            # HTTP 500 (ve tekil endpoint'ten 404) başarı sayılmaz
+            device.routes[('POST', '/ambulance/green')] = lambda body: (500, 'text/plain', 'error')
+            for _ in range(health.failure_threshold):
+                assert fanout.send([("0", "GREEN_LIGHT_ACTIVATED", None)]) == {"0": False}
+            assert health.state == OPEN and health.last_error == "HTTP 500"
+
+            # Yarı açık denemede beklenmeyen hata: future.result() ile kaçmaz, devre tekrar açılır
+            def broken(*args, **kwargs):
+                raise ValueError("bozuk yanıt")
+            health.next_probe_time = 0.0
+            monkeypatch.setattr(requests.Session, "post", broken)
+            assert fanout.send([("0", "NORMAL_TRAFFIC_RESUMED", None)]) == {"0": False}
+            assert health.state == OPEN and health.last_error == "bozuk yanıt"
+            monkeypatch.undo()
+
+            health.next_probe_time = 0.0
+            assert fanout.send([("0", "NORMAL_TRAFFIC_RESUMED", None)]) == {"0": True}
+            assert health.state == CLOSED
+        finally:
+            fanout.close()
+            health.reset()
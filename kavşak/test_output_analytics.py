@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SUMO Çıktı Analizi Testi
+Sentetik tripinfo / dedektör çıktılarından sınıf başına KPI'ların, dedektör
+akış ve doluluğunun doğru hesaplandığını, yarıda kesilmiş dosyaların kısmi
+okunduğunu, eksik dosyaların hata olarak raporlandığını ve paralel modun
+seri modla aynı sonucu verdiğini test eder.
+"""
+
+import csv
+import math
+import os
+
+import output_analytics as oa
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _write_tripinfo(path, trips, close=True):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<tripinfos>\n')
+        for trip_id, vtype, duration, time_loss, waiting in trips:
+            f.write(f'    <tripinfo id="{trip_id}" depart="10.00" arrival="{10 + duration:.2f}" '
+                    f'duration="{duration:.2f}" routeLength="500.00" waitingTime="{waiting:.2f}" '
+                    f'waitingCount="{int(waiting > 0)}" stopTime="0.00" timeLoss="{time_loss:.2f}" '
+                    f'vType="{vtype}">\n        <emissions CO2_abs="0.0"/>\n    </tripinfo>\n')
+        if close:
+            f.write('</tripinfos>\n')
+
+
+def _write_detector(path, intervals):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<detector>\n')
+        for begin, vehicles, occupancy, speed in intervals:
+            f.write(f'    <interval begin="{begin:.2f}" end="{begin + 30:.2f}" id="0" '
+                    f'nVehContrib="{vehicles}" flow="{vehicles * 120:.2f}" occupancy="{occupancy:.2f}" '
+                    f'speed="{speed:.2f}" harmonicMeanSpeed="-1.00" length="-1.00" nVehEntered="{vehicles}"/>\n')
+        f.write('</detector>\n')
+
+
+def _run_dir(tmp_path, name, ambulance_loss):
+    run_dir = tmp_path / name
+    (run_dir / "data").mkdir(parents=True)
+    trips = [(f"we_{i}", "typeWE", 40.0 + i, float(i), 0.0) for i in range(100)]
+    trips += [(f"ns_{i}", "typeNS", 60.0, 10.0, 5.0) for i in range(20)]
+    trips.append(("ambulance_gps_0", "ambulance", 35.0, ambulance_loss, 2.0))
+    _write_tripinfo(run_dir / "tripinfo.xml", trips)
+    _write_detector(run_dir / "data" / "cross.out", [(0, 3, 10.0, 12.0), (30, 0, 0.0, -1.0), (60, 1, 2.0, 8.0)])
+    return str(run_dir)
+
+
+def test_class_kpis_and_detectors(tmp_path):
+    result = oa.analyze_run(*oa.find_run_outputs(_run_dir(tmp_path, "run", 4.0)))
+    trips = result['tripinfo']
+    assert trips['trips'] == 121 and result['error'] == ''
+    assert set(trips['classes']) == {"ambulance", "typeNS", "typeWE"}
+    we = trips['classes']["typeWE"]
+    assert we['mean_travel_time'] == sum(40.0 + i for i in range(100)) / 100
+    assert we['max_time_loss'] == 99.0
+    assert abs(we['p50_travel_time'] - 89.5) < 2
+    assert trips['ambulances'][0]['id'] == "ambulance_gps_0"
+    assert trips['ambulances'][0]['arrival'] == 45.0
+
+    detector = result['detectors']["0"]
+    assert detector['vehicles'] == 4 and detector['period'] == 90.0
+    assert detector['flow'] == 4 * 3600 / 90
+    assert detector['peak_flow'] == 360.0
+    assert abs(detector['occupancy'] - 4.0) < 1e-9
+    assert detector['speed'] == (3 * 12.0 + 8.0) / 4
+
+    row = oa.run_kpis(result)
+    assert row['ambulance_trips'] == 1 and row['ambulance_time_loss'] == 4.0
+    assert row['ambulance_waiting_time'] == 2.0
+    assert row['detector_vehicles'] == 4
+
+
+def test_truncated_tripinfo_and_repo_outputs(tmp_path):
+    path = str(tmp_path / "tripinfo.xml")
+    _write_tripinfo(path, [("a", "typeWE", 10.0, 1.0, 0.0), ("b", "typeWE", 20.0, 1.0, 0.0)], close=False)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('    <tripinfo id="c" dura')  # çökme: yarım satır
+    trips = oa.analyze_tripinfo(path)
+    assert trips['trips'] == 2 and trips['error'].startswith("tripinfo:")
+
+    # Okunamayan dosyalar traceback yerine çalıştırmanın hata alanına yazılır
+    missing = str(tmp_path / "missing.xml")
+    assert oa.analyze_tripinfo(missing)['error'].startswith("tripinfo:")
+    assert oa.analyze_detectors(missing)[1].startswith("detector:")
+    assert oa.main([_run_dir(tmp_path, "run", 1.0), "--detectors", missing]) == 1
+
+    # Repodaki boş çalıştırma çıktıları
+    result = oa.analyze_run(os.path.join(BASE_DIR, "tripinfo.xml"), os.path.join(BASE_DIR, "data", "cross.out"))
+    assert result['tripinfo']['trips'] == 0
+    assert result['detectors']["0"]['intervals'] == 12 and math.isnan(result['detectors']["0"]['speed'])
+
+
+def test_parallel_runs_and_reports(tmp_path):
+    paths = [_run_dir(tmp_path, f"run_{i}", float(i)) for i in range(3)]
+    missing = str(tmp_path / "missing")
+    serial = list(oa.analyze_runs(paths + [missing], workers=1))
+    parallel = list(oa.analyze_runs(paths + [missing], workers=3))
+    assert [oa.run_kpis(r) for r in serial] == [oa.run_kpis(r) for r in parallel]
+    assert [r['run'] for r in parallel] == paths + [missing]
+    assert parallel[-1]['error']
+
+    output_dir = str(tmp_path / "kpi")
+    assert oa.main(paths + ["--workers", "2", "--output-dir", output_dir]) == 0
+    with open(os.path.join(output_dir, "runs.csv"), encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [float(r['ambulance_time_loss']) for r in rows] == [0.0, 1.0, 2.0]
+    with open(os.path.join(output_dir, "classes.csv"), encoding='utf-8') as f:
+        assert len(list(csv.DictReader(f))) == 9
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Senaryo Çiftliği Testi
+Senaryo matrisinin doğru açıldığını ve çalıştırmaların süreç havuzunda
+FakeTraCI ile tamamlanıp tek bir veri setinde toplandığını test eder.
+"""
+
+import csv
+
+import scenario_farm
+
+
+def test_build_matrix():
+    assert scenario_farm.parse_seeds("1-3,7") == [1, 2, 3, 7]
+
+    scenarios = scenario_farm.build_matrix({
+        'filter': ['on', 'off'],
+        'window_size': [3, 5],
+        'seed': [1, 2],
+    })
+    # filtre açık: 2 pencere x 2 tohum, filtre kapalı: pencere etkisiz -> 2 tohum
+    assert len(scenarios) == 6
+    assert [s['run_id'] for s in scenarios] == list(range(6))
+    off = [s for s in scenarios if s['filter'] == 'off']
+    assert {s['window_size'] for s in off} == {3}
+
+    args = scenario_farm.scenario_args(off[0], backend="fake", port=45001)
+    assert "--no-gps-filter" in args
+    assert args[args.index("--sumo-port") + 1] == "45001"
+
+
+def test_farm_consolidates_runs(tmp_path):
+    scenarios = scenario_farm.build_matrix({
+        'track': ['gps-data-2.gpx', 'gps-data-2-reversed.gpx'],
+    })
+    results = scenario_farm.run_farm(scenarios, str(tmp_path), workers=2,
+                                     backend="fake", verbose=False)
+
+    assert [r['status'] for r in results] == ['ok', 'ok']
+    with open(tmp_path / "runs.csv", newline='', encoding='utf-8') as f:
+        runs = list(csv.DictReader(f))
+    with open(tmp_path / "positions.csv", newline='', encoding='utf-8') as f:
+        positions = list(csv.DictReader(f))
+    assert sorted(r['track'] for r in runs) == ['gps-data-2-reversed.gpx', 'gps-data-2.gpx']
+    assert {p['run_id'] for p in positions} == {'0', '1'}
+    assert len(positions) == sum(r['positions'] for r in results)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sinyal Komut Yolu Testi
+Trafik ışığı ve LED komutlarının sadece gerçek durum değişikliklerinde
+gönderildiğini ve adım içi isteklerin birleştirildiğini test eder.
+"""
+
+from device_health import CircuitBreaker
+from signal_bus import SignalBus
+
+
+def make_bus():
+    sent = {'tls': [], 'led': []}
+    bus = SignalBus(apply_tls=lambda tls_id, phase: sent['tls'].append((tls_id, phase)),
+                    send_led=lambda cid, state, ctx: sent['led'].append((cid, state, ctx)))
+    return bus, sent
+
+
+def test_only_transitions_are_emitted():
+    bus, sent = make_bus()
+    for _ in range(100):
+        bus.request_tls_phase("0", 0)
+        bus.flush()
+
+    assert sent['tls'] == [("0", 0)]
+    assert bus.get_stats()['tls']['suppressed'] == 99
+
+
+def test_requests_within_step_are_coalesced():
+    bus, sent = make_bus()
+    bus.request_tls_phase("0", 0)
+    bus.request_tls_phase("0", 2)
+    bus.request_led("0", "GREEN_LIGHT_ACTIVATED", "ambulance_gps_0")
+    bus.request_led("0", "GREEN_LIGHT_ACTIVATED", "ambulance_gps_0")
+    assert bus.get_tls_phase("0") == 2
+    bus.flush()
+
+    assert sent['tls'] == [("0", 2)]
+    assert sent['led'] == [("0", "GREEN_LIGHT_ACTIVATED", "ambulance_gps_0")]
+    assert bus.get_stats()['tls']['coalesced'] == 1
+
+
+def test_simulated_hour_command_volume():
+    """Bir saatlik simülasyonda 3 ambulans geçişi birkaç komutla sonuçlanmalı"""
+    bus, sent = make_bus()
+    for step in range(3600):
+        near = any(start <= step < start + 60 for start in (600, 1800, 3000))
+        if near:
+            bus.request_tls_phase("0", 2)
+            bus.request_led("0", "GREEN_LIGHT_ACTIVATED", "ambulance_gps_0")
+        else:
+            bus.request_tls_phase("0", 0)
+            if step in (660, 1860, 3060):
+                bus.request_led("0", "NORMAL_TRAFFIC_RESUMED", "ambulance_gps_0")
+        bus.flush()
+
+    assert len(sent['tls']) == 7    # başlangıç + 3 x (yeşil, kırmızı)
+    assert len(sent['led']) == 6
+    assert bus.get_stats()['tls']['suppressed'] == 3600 - 7
+
+
+def test_failed_tls_phase_is_resent_next_step():
+    calls = []
+
+    def flaky(tls_id, phase):
+        calls.append(phase)
+        if len(calls) == 1:
+            raise RuntimeError("setPhase")
+
+    bus = SignalBus(apply_tls=flaky)
+    bus.request_tls_phase("0", 2)
+    bus.flush()
+    assert bus.get_tls_phase("0") is None      # başarısız faz uygulanmış sayılmaz
+
+    bus.flush()                                # yeni istek olmasa da tekrar denenir
+    assert calls == [2, 2]
+    assert bus.get_tls_phase("0") == 2
+    bus.request_tls_phase("0", 2)
+    bus.flush()
+    assert calls == [2, 2]
+    assert bus.get_stats()['tls']['failed'] == 1
+
+
+def test_failed_led_retries_are_throttled_by_breaker():
+    clock = [0.0]
+    breaker = CircuitBreaker("led", failure_threshold=3, base_backoff=10.0, clock=lambda: clock[0],
+                             verbose=False)
+    device = {'online': False, 'calls': []}
+
+    def send(cid, state, ctx):
+        if not breaker.allow_request():
+            return False
+        device['calls'].append(state)
+        if not device['online']:
+            breaker.record_failure("timeout")
+            return False
+        breaker.record_success()
+        return True
+
+    bus = SignalBus(send_led=send)
+    bus.request_led("0", "NORMAL_TRAFFIC_RESUMED")   # tek seferlik istek
+    for step in range(100):
+        clock[0] = float(step)
+        if step == 50:
+            device['online'] = True
+        bus.flush()
+
+    # 3 hata ile devre açılır, 10 s aralıklı denemeler; cihaz dönünce komut teslim edilir
+    assert device['calls'] == ["NORMAL_TRAFFIC_RESUMED"] * 6
+    assert bus.get_led_state("0") == "NORMAL_TRAFFIC_RESUMED"
+    assert bus.get_stats()['led']['emitted'] == 1
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simülasyon Bağlamı Testi
+İki simülasyonun aynı süreçte ayrı bağlamlarla eşzamanlı çalıştığını ve
+durumlarının (GPS indeksi, pozisyon tablosu, trafik ışığı) birbirine ve
+varsayılan bağlama karışmadığını test eder.
+"""
+
+import os
+
+import runner
+from fake_traci import FakeTraCI
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CROSS_CFG = os.path.join(BASE_DIR, "data", "cross.sumocfg")
+
+
+def make_context(label, gpx_file, led_commands):
+    ctx = runner.new_simulation_context(label)
+    ctx.connect(FakeTraCI(), ["sumo", "-c", CROSS_CFG])
+    ctx.signal_bus.send_led = lambda cid, state, c: led_commands.append((label, state)) or True
+    ctx.signal_bus.send_led_batch = None
+    ctx.gps_coordinates = runner.parse_gps_data(os.path.join(BASE_DIR, gpx_file))
+    return ctx
+
+
+def test_contexts_run_concurrently(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    led_commands = []
+    first = make_context("first", "gps-data-2.gpx", led_commands)
+    second = make_context("second", "gps-data-2.gpx", led_commands)
+    sims = {ctx.label: ctx.traci for ctx in (first, second)}
+
+    results = runner.run_concurrent([first, second])
+
+    assert results["first"]["steps"] == results["second"]["steps"] == 3600
+    assert sims["first"].time == sims["second"].time == 3600.0
+    for ctx in (first, second):
+        assert ctx.traci is None
+        assert ctx.gps_index == len(ctx.gps_coordinates)
+        assert ctx.trajectory.count("ambulance_gps_0") == len(ctx.gps_coordinates)
+
+    # Aynı iz aynı sonucu vermeli: eşzamanlı çalışma durumları karıştırmamalı
+    first_xy = [(p.x, p.y) for p in first.trajectory.rows("ambulance_gps_0")]
+    second_xy = [(p.x, p.y) for p in second.trajectory.rows("ambulance_gps_0")]
+    assert first_xy == second_xy
+    assert {label for label, _ in led_commands} == {"first", "second"}
+
+    assert len(runner.default_context.trajectory) == 0
+    assert runner.default_context.gps_index == 0
+
+
+def test_context_state_is_isolated():
+    a = runner.new_simulation_context("a")
+    b = runner.new_simulation_context("b")
+    runner.filter_gps_noise(36.91973, 30.67373, 0.0, ctx=a)
+    runner.add_position_to_table("ambulance_gps_0", 1, 200.0, 510.0, 36.91973, 30.67373, ctx=a)
+
+    assert a.gps_history['total_updates'] == 1
+    assert b.gps_history['total_updates'] == 0
+    assert len(b.trajectory) == 0
+    assert a.signal_bus is not b.signal_bus
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adım Profilleyici Testi
+Faz sürelerinin doğru fazlara yazıldığını, yüzdeliklerin histogramdan
+makul hatayla çıktığını, özet/iz dosyalarının yazıldığını ve eşzamanlı
+profilleyicilerin stdout'u bozmadığını test eder.
+"""
+
+import csv
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+import runner
+from fake_traci import FakeTraCI
+from step_profiler import PhaseHistogram, StepProfiler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_histogram_percentiles():
+    histogram = PhaseHistogram()
+    for us in range(1, 1001):                  # 1 µs .. 1 ms eşit dağılım
+        histogram.record(us * 1000)
+
+    assert histogram.count == 1000
+    assert histogram.max_ns == 1_000_000
+    for q, expected in ((50, 500_000), (95, 950_000), (99, 990_000)):
+        assert abs(histogram.percentile(q) - expected) / expected < 0.06
+    assert histogram.percentile(100) == 1_000_000
+
+
+def test_phases_are_attributed(tmp_path):
+    clock = FakeClock()
+    profiler = StepProfiler(time_print=False)
+    profiler._clock = clock
+
+    for step in range(10):
+        profiler.begin_step(step)
+        clock.now += 5_000_000                 # simulationStep 5 ms
+        profiler.mark("simulation_step")
+        clock.now += 200_000                   # GPS 0.2 ms
+        profiler.mark("gps_update")
+        clock.now += 100_000 if step != 9 else 30_000_000
+        profiler.mark("signal_flush")
+        profiler.end_step()
+
+    summary = profiler.summary()
+    assert summary["simulation_step"]["count"] == 10
+    assert abs(summary["simulation_step"]["p50_ms"] - 5.0) < 0.25
+    assert summary["signal_flush"]["max_ms"] == 30.0
+    assert summary["total"]["max_ms"] == 35.2
+
+    summary_path, trace_path = profiler.export(str(tmp_path / "profile"))
+    with open(summary_path, encoding='utf-8') as f:
+        data = json.load(f)
+    assert set(data["phases"]) == {"simulation_step", "gps_update", "signal_flush", "total"}
+    with open(trace_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 10
+    assert float(rows[9]["signal_flush_us"]) == 30000.0
+
+
+def test_print_time_is_measured(capsys):
+    profiler = StepProfiler().start()
+    try:
+        profiler.begin_step(0)
+        print("x" * 100)
+        profiler.mark("output")
+        profiler.end_step()
+    finally:
+        profiler.stop()
+    assert profiler.summary()["print"]["count"] == 1
+    assert profiler.trace[0][1]["print"] > 0
+
+
+def test_stdout_restored_when_run_fails():
+    class CrashingTraCI(FakeTraCI):
+        def simulationStep(self, *args):
+            raise RuntimeError("SUMO bağlantısı koptu")
+
+    ctx = runner.new_simulation_context("crash")
+    cfg = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cross.sumocfg")
+    ctx.connect(CrashingTraCI(), ["sumo", "-c", cfg])
+    ctx.profiler = StepProfiler()
+    stdout = sys.stdout
+    with pytest.raises(RuntimeError):
+        runner.run(ctx)
+    assert sys.stdout is stdout
+
+
+def test_concurrent_profilers_share_stdout():
+    """run_concurrent sırası: A başlar, B başlar, A durur, B durur"""
+    stdout = sys.stdout
+    first, second = StepProfiler(), StepProfiler()
+    first.start()
+    first.begin_step(0)
+
+    def other_thread():
+        second.start()
+        second.begin_step(0)
+        print("y" * 100)
+        second.end_step()
+
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    thread.join()
+    first.end_step()
+
+    first.stop()
+    assert sys.stdout is not stdout       # B hâlâ ölçüyor
+    second.stop()
+    assert sys.stdout is stdout
+    assert second.trace[0][1]["print"] > 0
+    assert first.trace[0][1]["print"] == 0  # diğer thread'in yazdırması sayılmaz
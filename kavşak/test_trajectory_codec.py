@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yörünge Kodlayıcı Testi
+Delta/varint kodlamanın 1e-8 derece hassasiyetle kayıpsız olduğunu, durağan
+dönemleri tek kayda indirdiğini, blok indeksiyle rastgele erişimi ve
+kapanmamış dosyaların okunmasını test eder.
+"""
+
+import os
+import random
+
+import trajectory_codec as codec
+from gps_replay import load_replay_fixes
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GPX_FILE = os.path.join(BASE_DIR, "gps-data-2.gpx")
+
+
+def _random_track(size, seed=7):
+    rng = random.Random(seed)
+    t, lat, lon = 1751209150.0, 36.91973, 30.67373
+    track = []
+    for _ in range(size):
+        if rng.random() < 0.7:  # hareket; yoksa durağan
+            lat = round(lat + rng.gauss(0, 2e-5), 8)
+            lon = round(lon + rng.gauss(0, 2e-5), 8)
+        t += rng.choice((1.0, 1.0, 1.0, 0.5, 2.25))
+        track.append((t, lat, lon))
+    return track
+
+
+def test_round_trip_is_lossless():
+    track = _random_track(10000)
+    data = codec.encode_track(track, block_points=1000)
+    assert codec.decode_track(data) == track
+    assert len(data) < len(track) * 24 / 3  # ham float64 üçlüsüne göre
+
+
+def test_stationary_runs_are_elided():
+    fixes = load_replay_fixes(GPX_FILE)
+    data = codec.encode_track(fixes)
+    assert codec.decode_track(data) == [tuple(f) for f in fixes]
+
+    stationary = [(float(i), 36.91978833, 30.67373167) for i in range(100000)]
+    assert len(codec.encode_track(stationary)) < 1000  # 25 blok: başlık + bir tekrar kaydı
+
+
+def test_random_access_and_unclosed_file(tmp_path):
+    track = _random_track(5000, seed=3)
+    path = str(tmp_path / "track.trkc")
+    with codec.TrackEncoder(path, block_points=512) as encoder:
+        encoder.extend(track)
+
+    reader = codec.TrackReader(path)
+    assert len(reader) == 5000 and len(reader.blocks) == 10
+    assert reader.point(4321) == track[4321]
+    assert reader.point(-1) == track[-1]
+    start, end = track[1000][0], track[1100][0]
+    assert reader.time_range(start, end) == [p for p in track if start <= p[0] <= end]
+
+    # Çökme: indeks ve son bloğun bir kısmı yazılmadı
+    with open(path, 'rb') as f:
+        data = f.read()
+    truncated = data[:reader.blocks[-1].offset + 10]
+    partial = codec.TrackReader(truncated)
+    assert len(partial) == 9 * 512
+    assert list(partial) == track[:9 * 512]
+
+
+def test_cli_encode_and_decode(tmp_path):
+    assert codec.main(["--output-dir", str(tmp_path), GPX_FILE]) == 0
+    encoded = tmp_path / "gps-data-2.trkc"
+    assert encoded.stat().st_size * 10 < os.path.getsize(GPX_FILE)
+    assert load_replay_fixes(str(encoded)) == load_replay_fixes(GPX_FILE)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sütunlu Yörünge Dosyası Testi
+Kaydedici ve eski CSV çıktılarının sütunlu dosyaya yazıldığını, mmap
+okuyucusunun sütun seçimi ve zaman aralığı ile doğru satırları döndürdüğünü
+ve birden fazla çalıştırmanın tek tabloda birleştirildiğini test eder.
+"""
+
+import os
+
+import trajectory_columnar
+from trajectory_recorder import TrajectoryRecorder
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OLD_CSV = os.path.join(BASE_DIR, "ambulance_positions_1751209150.csv")
+
+
+def make_recorder(rows, vehicle="ambulance_gps_0"):
+    recorder = TrajectoryRecorder()
+    for step in range(rows):
+        recorder.append(vehicle, step, float(step), 200.0 + step, 510.0, 36.919 + step * 1e-6, 30.673)
+    return recorder
+
+
+def test_projection_and_time_range(tmp_path):
+    path = str(tmp_path / "run.trjc")
+    recorder = make_recorder(1000)
+    columns = {name: recorder.column(name) for name in trajectory_columnar.COLUMN_NAMES}
+    trajectory_columnar.write_columnar(path, columns, recorder.vehicle_ids,
+                                       {'label': 'test'}, row_group_rows=100)
+
+    with trajectory_columnar.ColumnarTrajectory(path) as table:
+        assert table.rows == 1000
+        assert len(table.row_groups) == 10
+        assert table.metadata == {'label': 'test'}
+
+        data = table.read(['step', 'lat'])
+        assert set(data) == {'step', 'lat'}
+        assert list(data['step']) == list(range(1000))
+        assert data['lat'][999] == 36.919 + 999e-6
+
+        # 250-349 aralığı sadece 3. ve 4. satır gruplarını okur
+        data = table.read(['time'], time_range=(250.0, 349.0))
+        assert list(data['time']) == [float(t) for t in range(200, 400)]
+
+
+def test_convert_old_csv_and_read_runs(tmp_path):
+    converted = trajectory_columnar.convert_file(OLD_CSV, str(tmp_path))
+    assert converted.endswith("ambulance_positions_1751209150.trjc")
+    with open(OLD_CSV, encoding='utf-8') as f:
+        csv_rows = sum(1 for _ in f) - 1
+
+    other = str(tmp_path / "other.trjc")
+    trajectory_columnar.export_recorder(make_recorder(5, "ambulance_gps_1"), other)
+
+    data, vehicle_ids, paths = trajectory_columnar.read_runs([converted, other], ['vehicle', 'x'])
+    assert vehicle_ids == ["ambulance_gps_0", "ambulance_gps_1"]
+    assert len(data['x']) == csv_rows + 5
+    assert list(data['run'][-5:]) == [1] * 5
+    assert list(data['vehicle'][-5:]) == [1] * 5
+    assert list(data['x'][-5:]) == [200.0, 201.0, 202.0, 203.0, 204.0]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yörünge Kaydedici Testi
+TrajectoryRecorder'ın kayıtları parçalar arasında doğru sırayla tuttuğunu,
+araç kimliklerini tamsayıya çevirdiğini, hızı önceki kayıttan hesapladığını
+ve uzun kayıtlarda belleğin satır başına sabit kaldığını test eder.
+"""
+
+import array
+import math
+
+from trajectory_recorder import TrajectoryRecorder, COLUMNS
+
+
+def test_rows_span_chunks():
+    recorder = TrajectoryRecorder(chunk_rows=4)
+    for step in range(10):
+        recorder.append("ambulance_gps_0", step, float(step), 200.0 + step * 10, 510.0,
+                        36.919 + step * 1e-6, 30.673, filtered=(step == 3))
+        if step % 2:
+            recorder.append("ambulance_gps_1", step, float(step), 500.0, 200.0 + step, 36.92, 30.67)
+
+    assert len(recorder) == 15
+    assert recorder.vehicle_ids == ["ambulance_gps_0", "ambulance_gps_1"]
+    assert recorder.count("ambulance_gps_0") == 10
+    assert recorder.count("ambulance_gps_1") == 5
+    assert recorder.count("yok") == 0
+
+    rows = list(recorder.rows("ambulance_gps_0"))
+    assert [r.step for r in rows] == list(range(10))
+    assert [r.filtered for r in rows].index(True) == 3
+    assert rows[9].x == 290.0
+    assert rows[9].lat == 36.919 + 9e-6  # lat/lon float64: hassasiyet kaybı yok
+    assert math.isnan(rows[0].speed)
+    assert rows[1].speed == 10.0
+
+    assert list(recorder.column('step', "ambulance_gps_1")) == [1, 3, 5, 7, 9]
+    assert len(recorder.column('x')) == 15
+
+    recorder.clear()
+    assert not recorder
+    assert recorder.vehicle_ids == []
+
+
+def test_memory_per_row():
+    recorder = TrajectoryRecorder()
+    rows = 24 * 3600  # 24 saat, 1 Hz
+    for step in range(rows):
+        recorder.append("ambulance_gps_0", step, float(step), 200.0, 510.0, 36.919, 30.673, speed=0.0)
+
+    row_size = sum(array.array(typecode).itemsize for _, _, typecode in COLUMNS)
+    assert row_size == 43
+    assert recorder.nbytes < rows * row_size + recorder.chunk_rows * row_size
+    assert recorder.nbytes < 4 * 1024 * 1024
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çevrimiçi Yörünge İstatistikleri Testi
+P² yüzdelik tahmininin doğruluğunu, yol uzunluğu / duruş / TLS süresi
+hesaplarını ve runner'ın kayıt sırasında istatistikleri güncellediğini
+test eder.
+"""
+
+import math
+import os
+import random
+
+import runner
+from fake_traci import FakeTraCI
+from trajectory_stats import P2Quantile, QuantileHistogram, TrajectoryStats, format_summary, network_tls_positions
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CROSS_CFG = os.path.join(BASE_DIR, "data", "cross.sumocfg")
+GPX_FILE = os.path.join(BASE_DIR, "gps-data-2.gpx")
+
+
+def test_p2_quantile_tracks_exact_percentiles():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(2.0, 0.6) for _ in range(20000)]
+    ordered = sorted(values)
+    for p in (0.5, 0.9, 0.95):
+        estimator = P2Quantile(p)
+        for value in values:
+            estimator.add(value)
+        exact = ordered[int(p * (len(ordered) - 1))]
+        assert abs(estimator.value() - exact) / exact < 0.03
+
+    few = P2Quantile(0.5)
+    for value in (3.0, 1.0, 2.0):
+        few.add(value)
+    assert few.value() == 2.0
+
+
+
+def test_quantile_histogram_tracks_exact_percentiles():
+    rng = random.Random(2)
+    values = [rng.lognormvariate(2.0, 0.6) for _ in range(20000)]
+    ordered = sorted(values)
+    histogram = QuantileHistogram(0.05, 400)
+    for value in values:
+        histogram.add(value)
+    for p in (0.5, 0.9, 0.95):
+        exact = ordered[int(p * (len(ordered) - 1))]
+        assert abs(histogram.value(p) - exact) / exact < 0.025
+    assert histogram.value(1.0) == max(values)
+
+    stationary = QuantileHistogram(0.05, 400)
+    for _ in range(10):
+        stationary.add(0.0)
+    assert stationary.value(0.5) == 0.0
+
+
+def test_path_length_stops_and_tls_time():
+    stats = TrajectoryStats(tls_positions={"0": (510.0, 510.0)}, tls_radius=75.0)
+    # Doğuya 10 m/s, kavşakta 3 s bekle, sonra kuzeye; bir de geri dönüş
+    track = [(0, 400, 510), (1, 410, 510), (2, 420, 510), (10, 500, 510), (11, 510, 510),
+             (12, 510, 510), (13, 510, 510), (14, 510, 510), (15, 510, 520), (16, 510, 530),
+             (26, 510, 630), (36, 510, 530)]
+    for t, x, y in track:
+        stats.update("ambulance_gps_0", float(t), float(x), float(y))
+
+    summary = stats.vehicles["ambulance_gps_0"].summary()
+    assert summary['fixes'] == 12
+    assert summary['path_length'] == 330.0
+    assert round(summary['straight_line_distance'], 6) == round(math.hypot(110, 20), 6)
+    assert summary['stop_count'] == 1
+    assert summary['stopped_time'] == 3.0
+    assert summary['max_speed'] == 10.0
+    # Önceki fix 75 m içindeyse aradaki süre sayılır: 500 (1 s), 510,510 (4 s), 510,520 (1 s), 510,530 (10 s)
+    assert summary['tls_time'] == {"0": 1 + 4 + 1 + 10}
+    assert any("Yol uzunluğu: 330.00" in line for line in format_summary(summary))
+
+
+def test_network_tls_positions():
+    assert network_tls_positions("cross") == {"0": (510.0, 510.0)}
+    assert network_tls_positions("missing") == {}
+
+
+def test_run_updates_stats_online(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ctx = runner.new_simulation_context("stats")
+    ctx.connect(FakeTraCI(), ["sumo", "-c", CROSS_CFG])
+    ctx.signal_bus.send_led = lambda cid, state, c: True
+    ctx.signal_bus.send_led_batch = None
+    ctx.gps_coordinates = runner.parse_gps_data(GPX_FILE)
+
+    runner.run(ctx)
+
+    summary = ctx.trajectory_stats.vehicles["ambulance_gps_0"].summary()
+    assert summary['fixes'] == ctx.trajectory.count("ambulance_gps_0") == 21
+    assert summary['path_length'] >= summary['straight_line_distance'] > 0
+    assert summary['tls_time'].get("0", 0) > 0
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yörünge Deposu Testi
+Çalıştırma çıktılarının SQLite deposuna artımlı eklendiğini ve çalıştırma,
+araç, zaman aralığı ve konum (bbox / kavşak yarıçapı) sorgularının doğru
+satırları döndürdüğünü test eder.
+"""
+
+import os
+
+import trajectory_columnar
+from trajectory_recorder import TrajectoryRecorder
+from trajectory_store import TrajectoryStore, junction_position, main
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OLD_CSV = os.path.join(BASE_DIR, "ambulance_positions_1751209150.csv")
+CROSS_NET = os.path.join(BASE_DIR, "data", "cross.net.xml")
+
+
+def make_run(path, vehicle_id, y):
+    recorder = TrajectoryRecorder()
+    for step in range(101):
+        recorder.append(vehicle_id, step, float(step), 10.0 * step, y, 36.919, 30.673)
+    trajectory_columnar.export_recorder(recorder, path)
+    return path
+
+
+def test_ingest_and_query(tmp_path):
+    run_a = make_run(str(tmp_path / "ambulance_positions_1750000000.trjc"), "ambulance_gps_0", 510.0)
+    run_b = make_run(str(tmp_path / "ambulance_positions_1760000000.trjc"), "ambulance_gps_1", 500.0)
+
+    with TrajectoryStore(str(tmp_path / "runs.db")) as store:
+        assert store.ingest(run_a) == 101
+        assert store.ingest(run_b) == 101
+        assert store.ingest(OLD_CSV) == 21
+        assert store.ingest(run_a) == 0  # değişmemiş dosya tekrar eklenmez
+        assert [run[3] for run in store.runs()] == [101, 21, 101]  # başlangıç zamanı sırası
+
+        assert len(store.query(vehicle_id="ambulance_gps_0")) == 101 + 21
+        assert len(store.query(vehicle_id="yok")) == 0
+
+        # sim_time sütunu olmayan eski CSV: zaman adım numarasından doldurulur
+        old = store.query(vehicle_id="ambulance_gps_0", time_range=(0, 10 ** 6))
+        assert {pos.run_id for pos in old} == {1, 3}
+        assert all(pos.time == float(pos.step) for pos in old if pos.run_id == 3)
+
+        window = store.query(vehicle_id="ambulance_gps_1", time_range=(10, 19))
+        assert [pos.step for pos in window] == list(range(10, 20))
+
+        boxed = store.query(bbox=(400.0, 505.0, 600.0, 515.0))
+        assert {pos.vehicle_id for pos in boxed} == {"ambulance_gps_0"}
+        assert [pos.x for pos in boxed if pos.run_id == 1] == [10.0 * s for s in range(40, 61)]
+
+        junction = junction_position("0", CROSS_NET)
+        assert junction == (510.0, 510.0)
+        near = store.query(near=(*junction, 100.0), runs_since=1755000000)
+        assert {pos.vehicle_id for pos in near} == {"ambulance_gps_1"}
+        assert all((pos.x - 510.0) ** 2 + (pos.y - 510.0) ** 2 <= 100.0 ** 2 for pos in near)
+        assert len(near) == 19  # x = 420..600, y = 500
+
+
+def test_cli_ingest_and_query_old_csvs(tmp_path, capsys):
+    db = str(tmp_path / "runs.db")
+    pattern = os.path.join(BASE_DIR, "ambulance_positions_*.csv")
+    assert main(["--db", db, "--ingest", pattern]) == 0
+    assert main(["--db", db, "--vehicle", "ambulance_gps_0", "--time", "0,5", "--limit", "0"]) == 0
+    output = capsys.readouterr().out
+    count = int(output.split("🔎 ", 1)[1].split()[0])
+    assert count > 0 and output.count("ambulance_gps_0") == count
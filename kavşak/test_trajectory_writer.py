@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Akışlı Yörünge Yazıcısı Testi
+Kayıtların simülasyon sürerken CSV ve ikili biçimde diske aktarıldığını,
+bellekte sadece son parçanın kaldığını ve kapanmadan kesilen ikili dosyanın
+son grup dışında okunabildiğini test eder.
+"""
+
+import csv
+import shutil
+import time
+
+from trajectory_recorder import TrajectoryRecorder
+from trajectory_writer import (open_trajectory_writer, read_binary_index,
+                               read_binary_trajectory)
+
+
+def record(recorder, rows, start=0):
+    for step in range(start, start + rows):
+        recorder.append(f"ambulance_gps_{step % 2}", step, float(step), 200.0 + step, 510.0,
+                        36.919 + step * 1e-6, 30.673, filtered=(step % 7 == 0))
+
+
+def wait_for_rows(writer, rows, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while writer.rows_written < rows and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.rows_written == rows
+
+
+def test_binary_stream_round_trip(tmp_path):
+    path = str(tmp_path / "trajectory.trj")
+    recorder = TrajectoryRecorder(chunk_rows=16, sink=open_trajectory_writer(path), retain=False)
+    record(recorder, 100)
+    assert len(recorder._chunks) == 1  # yazılan parçalar bellekten atıldı
+    recorder.close()
+
+    rows = list(read_binary_trajectory(path))
+    assert [r.step for r in rows] == list(range(100))
+    assert rows[3].vehicle_id == "ambulance_gps_1"
+    assert rows[7].filtered and not rows[8].filtered
+    assert rows[99].lat == 36.919 + 99e-6
+
+    index = read_binary_index(path)
+    assert sum(entry[1] for entry in index) == 100
+    assert index[0][2:] == (0.0, 15.0)
+
+
+def test_killed_run_keeps_flushed_batches(tmp_path):
+    path = str(tmp_path / "trajectory.trj")
+    writer = open_trajectory_writer(path)
+    recorder = TrajectoryRecorder(sink=writer, retain=False)
+    record(recorder, 30)
+    recorder.flush()
+    record(recorder, 30, start=30)
+    recorder.flush()
+    wait_for_rows(writer, 60)
+
+    # Süreç son grubu yazarken öldürülmüş gibi: kapanış yok, son blok yarım
+    killed = str(tmp_path / "killed.trj")
+    shutil.copy(path, killed)
+    with open(killed, 'r+b') as f:
+        f.truncate(f.seek(0, 2) - 10)
+    recorder.close()
+
+    assert read_binary_index(killed) is None
+    assert [r.step for r in read_binary_trajectory(killed)] == list(range(30))
+
+
+def test_csv_stream(tmp_path):
+    path = str(tmp_path / "trajectory.csv")
+    recorder = TrajectoryRecorder(chunk_rows=8, sink=open_trajectory_writer(path), retain=False)
+    record(recorder, 20)
+    recorder.close()
+
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 20
+    assert rows[0]['speed'] == ''
+    assert rows[2] == {'vehicle_id': 'ambulance_gps_0', 'step': '2', 'sumo_x': '202.0',
+                       'sumo_y': '510.0', 'gps_lat': '36.919002', 'gps_lon': '30.673',
+                       'sim_time': '2.0', 'speed': '1.0', 'filtered': '0'}
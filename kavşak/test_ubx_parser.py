@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UBX NAV-PVT Çözücü Testi
+Bu test data/ubx_nav_pvt_25hz.ubx kaydını (gps-data-2.gpx rotası, 25 Hz,
+araya NMEA satırları, bir bozuk çerçeve, bir NAV-STATUS ve bir fix'siz
+NAV-PVT eklenmiş) farklı parça boyutlarında çözücüden geçirir.
+"""
+
+import os
+import time
+
+from ubx_parser import UBXStreamParser, encode_nav_pvt, decode_nav_pvt, UBX_SYNC
+from gps_reader import GPSReader
+
+RECORDING = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "data", "ubx_nav_pvt_25hz.ubx")
+
+
+def load_recording():
+    with open(RECORDING, "rb") as f:
+        return f.read()
+
+
+def parse_in_chunks(data, chunk_size):
+    parser = UBXStreamParser()
+    fixes = []
+    for i in range(0, len(data), chunk_size):
+        fixes.extend(parser.feed(data[i:i + chunk_size]))
+    return parser, fixes
+
+
+def test_recorded_stream():
+    """Kayıttaki tüm geçerli çerçeveler çözülmeli, bozuk çerçeve atlanmalı"""
+    parser, fixes = parse_in_chunks(load_recording(), 4096)
+
+    assert parser.nav_pvt_count == 250      # 249 sağlam + 1 fix'siz
+    assert parser.other_frames == 1         # NAV-STATUS
+    assert parser.checksum_errors >= 1      # Bozuk çerçeve
+    assert parser.pending_bytes() == 0
+
+    valid = [f for f in fixes if f.valid]
+    assert len(valid) == 249
+
+    first = valid[0]
+    assert abs(first.latitude - 36.91979667) < 1e-7
+    assert abs(first.longitude - 30.67375) < 1e-7
+    assert first.satellites == 9
+    assert abs(first.ground_speed - 1.25) < 1e-3
+    assert abs(first.heading - 88.5) < 1e-5
+    assert abs(first.h_acc - 1.8) < 1e-3
+    assert abs(first.utc_time - 1751128023.0) < 1e-6
+
+    # 25 Hz zaman damgaları (40 ms aralık, bozuk çerçeve hariç)
+    assert abs(valid[1].utc_time - valid[0].utc_time - 0.04) < 1e-6
+
+
+def test_chunk_boundaries_do_not_matter():
+    """Byte byte veya büyük bloklarla beslemek aynı sonucu vermeli"""
+    data = load_recording()
+    _, reference = parse_in_chunks(data, len(data))
+    for chunk_size in (1, 7, 100, 1500):
+        _, fixes = parse_in_chunks(data, chunk_size)
+        assert fixes == reference
+
+
+def test_garbage_and_false_sync():
+    """Rastgele 0xB5 0x62 ve çöp byte'lar fix üretmemeli"""
+    frame = encode_nav_pvt(36.9197, 30.6737, utc_time=1751128023.5)
+    stream = b"\x00\xff" + UBX_SYNC + b"\xff\xff" + b"$GPRMC,,V*00\r\n" + frame + b"\xb5"
+    parser = UBXStreamParser()
+    fixes = parser.feed(stream)
+
+    assert len(fixes) == 1
+    assert fixes[0].valid
+    assert parser.pending_bytes() == 1      # Yarım sync byte'ı bekletilir
+
+
+def test_decode_roundtrip_precision():
+    """NAV-PVT 1e-7 derece çözünürlüğü korunmalı"""
+    frame = encode_nav_pvt(36.91978833, 30.67373167, utc_time=1751128023.125,
+                           ground_speed=13.889, heading=271.25)
+    fix = decode_nav_pvt(frame, 6)
+    assert abs(fix.latitude - 36.91978833) < 1e-7
+    assert abs(fix.longitude - 30.67373167) < 1e-7
+    assert abs(fix.utc_time - 1751128023.125) < 1e-6
+    assert abs(fix.ground_speed - 13.889) < 1e-3
+
+
+def test_gps_reader_callback():
+    """GPSReader geçerli fix'leri (lat, lon) callback'ine iletmeli"""
+    received = []
+    reader = GPSReader()
+    reader.set_callback(lambda lat, lon: received.append((lat, lon)))
+    reader.process_bytes(load_recording())
+
+    assert len(received) == 249
+    assert reader.invalid_fix_count == 1
+
+
+def test_throughput_25hz():
+    """Tek çekirdekte 25 Hz akışın çok üzerinde çözüm hızı olmalı"""
+    data = load_recording() * 24   # ~4 dakikalık 25 Hz akış
+    start = time.perf_counter()
+    parser, _ = parse_in_chunks(data, 512)
+    elapsed = time.perf_counter() - start
+
+    assert parser.nav_pvt_count == 250 * 24
+    # 6000 çerçeve gerçek zamanda 240 s sürer; çözücü bunu 1 s altında bitirmeli
+    assert elapsed < 1.0
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yörünge Kodlayıcı (Delta/Varint) - SUMO GPS Ambulans Projesi
+Bu modül (zaman, lat, lon) izlerini kayıpsız ve küçük saklar:
+  - lat/lon 1e-8 derece, zaman 1 ms çözünürlüklü tamsayıya çevrilir
+  - her nokta bir öncekine göre fark (delta) olarak, zamanda ise farkın
+    farkı (1 Hz kayıtta 0) olarak yazılır
+  - farklar zigzag + varint ile kodlanır (küçük farklar 1 bayt)
+  - durağan dönemler (aynı konum, aynı zaman adımı) tek bir tekrar sayısı
+    kaydına indirgenir; gps-data-2.gpx'teki ardışık aynı fix'ler gibi
+
+Noktalar BLOCK_POINTS'lik bloklara bölünür; her blok mutlak değerlerle
+başlar ve kendi başına çözülebilir. Dosya sonundaki blok indeksi
+(ofset, ilk nokta, nokta sayısı, ilk/son zaman) ile istenen nokta veya zaman
+aralığı sadece ilgili bloklar çözülerek okunur.
+
+Dosya düzeni:
+  başlık : 'TRKC', sürüm (varint)
+  blok   : nokta sayısı, t, lat, lon (mutlak, zigzag varint) + kayıtlar
+  kayıt  : H = varint; H tekse H >> 1 noktalık durağan tekrar,
+           çiftse zigzag(dt - önceki dt) = H >> 1, ardından zigzag(dlat), zigzag(dlon)
+  indeks : blok sayısı + her blok için ofset, ilk nokta, nokta sayısı, t_ilk, t_son
+  bitiş  : indeks ofseti (8 bayt, little-endian) + 'TKIX'
+
+Kullanım:
+    python trajectory_codec.py gps-data-2.gpx ambulance_positions_*.csv   # .trkc yaz
+    python trajectory_codec.py --info track.trkc
+    python trajectory_codec.py --decode track.trkc                        # CSV'ye aç
+"""
+
+import csv
+import glob
+import io
+import optparse
+import os
+import struct
+import sys
+from collections import namedtuple
+
+CODEC_MAGIC = b'TRKC'
+CODEC_VERSION = 1
+CODEC_EXTENSION = ".trkc"
+COORD_SCALE = 10 ** 8    # 1e-8 derece
+TIME_SCALE = 1000        # 1 ms
+BLOCK_POINTS = 4096
+
+_TRAILER = struct.Struct('<Q4s')
+_TRAILER_MAGIC = b'TKIX'
+
+TrackPoint = namedtuple('TrackPoint', ['time', 'latitude', 'longitude'])
+BlockInfo = namedtuple('BlockInfo', ['offset', 'first_point', 'points', 'start_time', 'end_time'])
+
+
+# ================================
+# VARINT
+# ================================
+
+def _put_varint(buffer, value):
+    """İşaretsiz tamsayıyı varint olarak ekle"""
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _put_signed(buffer, value):
+    """İşaretli tamsayıyı zigzag + varint olarak ekle"""
+    _put_varint(buffer, (value << 1) if value >= 0 else ((-value << 1) - 1))
+
+
+def _get_varint(data, pos):
+    """(değer, yeni konum)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _unzigzag(value):
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+
+
+def _get_signed(data, pos):
+    value, pos = _get_varint(data, pos)
+    return _unzigzag(value), pos
+
+
+def to_fixed(time_s, latitude, longitude):
+    """Noktayı sabit noktalı tamsayılara çevir"""
+    return (round(time_s * TIME_SCALE), round(latitude * COORD_SCALE),
+            round(longitude * COORD_SCALE))
+
+
+def _from_fixed(t, lat, lon):
+    return TrackPoint(t / TIME_SCALE, lat / COORD_SCALE, lon / COORD_SCALE)
+
+
+# ================================
+# KODLAMA
+# ================================
+
+def encode_block(points):
+    """
+    Sabit noktalı (t, lat, lon) noktalarını tek blok olarak kodla
+
+    Returns:
+        bytes (nokta sayısı ve mutlak ilk nokta dahil)
+    """
+    buffer = bytearray()
+    _put_varint(buffer, len(points))
+    if not points:
+        return bytes(buffer)
+    prev_t, prev_lat, prev_lon = points[0]
+    _put_signed(buffer, prev_t)
+    _put_signed(buffer, prev_lat)
+    _put_signed(buffer, prev_lon)
+    prev_dt = 0
+    run = 0
+    for t, lat, lon in points[1:]:
+        dt = t - prev_t
+        if lat == prev_lat and lon == prev_lon and dt == prev_dt:
+            run += 1
+        else:
+            if run:
+                _put_varint(buffer, (run << 1) | 1)
+                run = 0
+            ddt = dt - prev_dt
+            _put_varint(buffer, ((ddt << 1) if ddt >= 0 else ((-ddt << 1) - 1)) << 1)
+            _put_signed(buffer, lat - prev_lat)
+            _put_signed(buffer, lon - prev_lon)
+            prev_lat, prev_lon, prev_dt = lat, lon, dt
+        prev_t = t
+    if run:
+        _put_varint(buffer, (run << 1) | 1)
+    return bytes(buffer)
+
+
+def decode_block(data, pos=0):
+    """
+    encode_block çıktısını çöz
+
+    Returns:
+        ([(t, lat, lon) sabit noktalı], bloğun bittiği konum)
+    """
+    count, pos = _get_varint(data, pos)
+    if count == 0:
+        return [], pos
+    t, pos = _get_signed(data, pos)
+    lat, pos = _get_signed(data, pos)
+    lon, pos = _get_signed(data, pos)
+    points = [(t, lat, lon)]
+    append = points.append
+    dt = 0
+    while len(points) < count:
+        header, pos = _get_varint(data, pos)
+        if header & 1:
+            for _ in range(header >> 1):
+                t += dt
+                append((t, lat, lon))
+            continue
+        dt += _unzigzag(header >> 1)
+        dlat, pos = _get_signed(data, pos)
+        dlon, pos = _get_signed(data, pos)
+        t += dt
+        lat += dlat
+        lon += dlon
+        append((t, lat, lon))
+    return points, pos
+
+
+class TrackEncoder:
+    """
+    Akışlı .trkc yazıcı
+
+    add() noktaları biriktirir; BLOCK_POINTS dolunca blok dosyaya yazılır.
+    close() kalan bloğu ve blok indeksini yazar. Kapanmamış dosyalar da
+    iter_track() ile baştan sırayla okunabilir.
+    """
+
+    def __init__(self, path_or_file, block_points=BLOCK_POINTS):
+        if hasattr(path_or_file, 'write'):
+            self._file, self._owns_file = path_or_file, False
+        else:
+            self._file, self._owns_file = open(path_or_file, 'wb'), True
+        self.block_points = block_points
+        self.points_written = 0
+        self.blocks = []
+        self._pending = []
+        self._closed = False
+        header = bytearray(CODEC_MAGIC)
+        _put_varint(header, CODEC_VERSION)
+        self._file.write(header)
+        self._offset = len(header)
+
+    def add(self, time_s, latitude, longitude):
+        self._pending.append(to_fixed(time_s, latitude, longitude))
+        if len(self._pending) >= self.block_points:
+            self._write_block()
+
+    def extend(self, points):
+        for point in points:
+            self.add(*point)
+
+    def _write_block(self):
+        if not self._pending:
+            return
+        data = encode_block(self._pending)
+        self.blocks.append(BlockInfo(self._offset, self.points_written, len(self._pending),
+                                     self._pending[0][0], self._pending[-1][0]))
+        self._file.write(data)
+        self._offset += len(data)
+        self.points_written += len(self._pending)
+        self._pending = []
+
+    def close(self):
+        """Kalan noktaları ve blok indeksini yaz"""
+        if self._closed:
+            return
+        self._closed = True
+        self._write_block()
+        index = bytearray()
+        _put_varint(index, len(self.blocks))
+        for block in self.blocks:
+            _put_varint(index, block.offset)
+            _put_varint(index, block.first_point)
+            _put_varint(index, block.points)
+            _put_signed(index, block.start_time)
+            _put_signed(index, block.end_time)
+        # Bitiş kaydı ile blok akışını ayırmak için sıfır nokta sayılı boş blok
+        self._file.write(b'\x00' + bytes(index) + _TRAILER.pack(self._offset + 1, _TRAILER_MAGIC))
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def encode_track(points, block_points=BLOCK_POINTS):
+    """[(zaman, lat, lon), ...] izini .trkc baytlarına kodla"""
+    buffer = io.BytesIO()
+    encoder = TrackEncoder(buffer, block_points)
+    encoder.extend(points)
+    encoder.close()
+    return buffer.getvalue()
+
+
+# ================================
+# ÇÖZME
+# ================================
+
+def _check_header(data):
+    if bytes(data[:4]) != CODEC_MAGIC:
+        raise ValueError("Geçersiz .trkc verisi")
+    version, pos = _get_varint(data, 4)
+    if version != CODEC_VERSION:
+        raise ValueError(f"Desteklenmeyen .trkc sürümü: {version}")
+    return pos
+
+
+def iter_track(data):
+    """
+    Bloklar baştan sırayla çözülerek TrackPoint'leri dolaş (indeks gerekmez)
+
+    Yarıda kalmış son blokta durulur.
+    """
+    pos = _check_header(data)
+    while pos < len(data):
+        try:
+            points, pos = decode_block(data, pos)
+        except IndexError:
+            return
+        if not points:
+            return  # indeks öncesi boş blok
+        for point in points:
+            yield _from_fixed(*point)
+
+
+def decode_track(data):
+    """.trkc baytlarını TrackPoint listesine çöz"""
+    return list(iter_track(data))
+
+
+def _read_index(data):
+    if len(data) < _TRAILER.size:
+        return None
+    index_offset, magic = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+    if magic != _TRAILER_MAGIC or index_offset >= len(data):
+        return None
+    count, pos = _get_varint(data, index_offset)
+    blocks = []
+    for _ in range(count):
+        offset, pos = _get_varint(data, pos)
+        first, pos = _get_varint(data, pos)
+        points, pos = _get_varint(data, pos)
+        start, pos = _get_signed(data, pos)
+        end, pos = _get_signed(data, pos)
+        blocks.append(BlockInfo(offset, first, points, start, end))
+    return blocks
+
+
+class TrackReader:
+    """
+    .trkc dosyası için rastgele erişim (blok indeksi ile)
+
+    İndeks yoksa (dosya kapanmamış) bloklar bir kez taranarak oluşturulur.
+    """
+
+    def __init__(self, path_or_bytes):
+        if isinstance(path_or_bytes, (bytes, bytearray, memoryview)):
+            self.path, self.data = None, bytes(path_or_bytes)
+        else:
+            self.path = path_or_bytes
+            with open(path_or_bytes, 'rb') as f:
+                self.data = f.read()
+        _check_header(self.data)
+        self.blocks = _read_index(self.data)
+        if self.blocks is None:
+            self.blocks = self._scan_blocks()
+        self._cache = (None, None)
+
+    def _scan_blocks(self):
+        blocks = []
+        pos = _check_header(self.data)
+        first = 0
+        while pos < len(self.data):
+            try:
+                points, end = decode_block(self.data, pos)
+            except IndexError:
+                break
+            if not points:
+                break
+            blocks.append(BlockInfo(pos, first, len(points), points[0][0], points[-1][0]))
+            first += len(points)
+            pos = end
+        return blocks
+
+    def __len__(self):
+        return sum(block.points for block in self.blocks)
+
+    def _block(self, number):
+        cached_number, points = self._cache
+        if cached_number != number:
+            points, _ = decode_block(self.data, self.blocks[number].offset)
+            self._cache = (number, points)
+        return points
+
+    def point(self, index):
+        """index numaralı noktayı döndür (sadece bloğu çözülür)"""
+        if index < 0:
+            index += len(self)
+        for number, block in enumerate(self.blocks):
+            if block.first_point <= index < block.first_point + block.points:
+                return _from_fixed(*self._block(number)[index - block.first_point])
+        raise IndexError(index)
+
+    def time_range(self, start, end):
+        """start <= zaman <= end aralığındaki noktalar (kesişen bloklar çözülür)"""
+        start_fixed, end_fixed = round(start * TIME_SCALE), round(end * TIME_SCALE)
+        result = []
+        for number, block in enumerate(self.blocks):
+            if block.end_time < start_fixed or block.start_time > end_fixed:
+                continue
+            result.extend(_from_fixed(*p) for p in self._block(number)
+                          if start_fixed <= p[0] <= end_fixed)
+        return result
+
+    def __iter__(self):
+        for number in range(len(self.blocks)):
+            for point in self._block(number):
+                yield _from_fixed(*point)
+
+
+# ================================
+# KOMUT SATIRI
+# ================================
+
+def encode_file(source, output_dir=None, vehicle_id=None):
+    """
+    GPX / pozisyon kaydı / ham günlüğü .trkc'ye çevir
+
+    Returns:
+        (çıktı yolu, nokta sayısı)
+    """
+    from gps_replay import load_replay_fixes  # gps_replay .trkc okumak için bu modülü kullanır
+    fixes = load_replay_fixes(source, vehicle_id)
+    target = os.path.splitext(source)[0] + CODEC_EXTENSION
+    if output_dir:
+        target = os.path.join(output_dir, os.path.basename(target))
+    with TrackEncoder(target) as encoder:
+        encoder.extend(fixes)
+    return target, len(fixes)
+
+
+def decode_file(path, output=None):
+    """.trkc dosyasını time,latitude,longitude CSV'sine aç"""
+    output = output or os.path.splitext(path)[0] + "_decoded.csv"
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(TrackPoint._fields)
+        for point in TrackReader(path):
+            writer.writerow((repr(point.time), f"{point.latitude:.8f}", f"{point.longitude:.8f}"))
+    return output
+
+
+def print_info(path):
+    reader = TrackReader(path)
+    size = len(reader.data)
+    print(f"📦 {path}: {len(reader)} nokta, {len(reader.blocks)} blok, {size} bayt "
+          f"({size / max(len(reader), 1):.2f} bayt/nokta)")
+    if reader.blocks:
+        print(f"   ⏱️ {reader.blocks[0].start_time / TIME_SCALE} - {reader.blocks[-1].end_time / TIME_SCALE} s")
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="usage: %prog [options] FILE_OR_GLOB...")
+    optParser.add_option("--output-dir", type="string", default=None,
+                         help="Directory for the output files (default: next to each input)")
+    optParser.add_option("--vehicle", type="string", default=None,
+                         help="Vehicle to encode from a multi-vehicle position recording "
+                              "(default: the first one)")
+    optParser.add_option("--info", action="store_true", default=False,
+                         help="Print a summary of the given .trkc files")
+    optParser.add_option("--decode", action="store_true", default=False,
+                         help="Decode the given .trkc files to time,latitude,longitude CSV")
+    options, patterns = optParser.parse_args(args)
+    options.files = sorted({path for pattern in patterns for path in (glob.glob(pattern) or [pattern])})
+    if not options.files:
+        optParser.error("no input files given")
+    return options
+
+
+def main(args=None):
+    options = get_options(args)
+    for path in options.files:
+        if options.info:
+            print_info(path)
+        elif options.decode:
+            print(f"✅ {path} -> {decode_file(path)}")
+        else:
+            target, count = encode_file(path, options.output_dir, options.vehicle)
+            before, after = os.path.getsize(path), os.path.getsize(target)
+            print(f"✅ {path} -> {target}: {count} nokta, {before} -> {after} bayt "
+                  f"({before / max(after, 1):.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
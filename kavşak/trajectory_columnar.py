@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sütunlu Yörünge Dosyası - SUMO GPS Ambulans Projesi
+Bu modül çalıştırma çıktılarını (ambulans pozisyonları) Parquet benzeri
+sütunlu bir dosyada saklar: satırlar satır gruplarına bölünür, her grubun
+her sütunu tipli ham değerler olarak ayrı ayrı zlib ile sıkıştırılır.
+Okuyucu dosyayı mmap ile açar ve sadece istenen sütunların (ve zaman
+aralığına düşen satır gruplarının) parçalarını açar; metin ayrıştırma yoktur.
+
+Dosya düzeni:
+  'TRJC' + sürüm
+  sütun parçaları (zlib)
+  footer (JSON): şema, araç kimlikleri, üst veri, satır grupları ve her
+                 parçanın ofset/uzunluk/min/maks bilgisi
+  bitiş: footer ofseti, footer uzunluğu, 'TRJC'
+
+Kullanım:
+    python trajectory_columnar.py ambulance_positions_*.csv     # .trjc'ye dönüştür
+    python trajectory_columnar.py --output-dir runs/ kayit.trj   # akış dosyasını dönüştür
+    python trajectory_columnar.py --info runs/*.trjc             # özet bilgi
+"""
+
+import array
+import csv
+import glob
+import json
+import mmap
+import optparse
+import os
+import struct
+import sys
+import zlib
+
+from trajectory_recorder import COLUMNS, COLUMN_NAMES
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsiyonel, okuyucu array.array döndürür
+    np = None
+
+COLUMNAR_MAGIC = b'TRJC'
+COLUMNAR_VERSION = 1
+COLUMNAR_EXTENSION = ".trjc"
+DEFAULT_ROW_GROUP_ROWS = 65536
+COMPRESSION_LEVEL = 6
+
+_FILE_HEADER = struct.Struct('<4sI')
+_TRAILER = struct.Struct('<QQ4s')
+
+_DTYPES = {name: dtype for name, dtype, _ in COLUMNS}
+_TYPECODES = {name: typecode for name, _, typecode in COLUMNS}
+
+
+def _column_bytes(values):
+    """array.array veya numpy dizisini little-endian baytlara çevir"""
+    if hasattr(values, 'dtype'):  # numpy
+        return values.astype(values.dtype.newbyteorder('<'), copy=False).tobytes()
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _value_range(values):
+    if len(values) == 0:
+        return None, None
+    if hasattr(values, 'dtype'):
+        return values.min().item(), values.max().item()
+    return min(values), max(values)
+
+
+# ================================
+# YAZMA
+# ================================
+
+def write_columnar(path, columns, vehicle_ids, metadata=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+    """
+    Sütunları sıkıştırılmış satır grupları halinde yaz
+
+    columns: {sütun adı: array.array veya numpy dizisi}, COLUMNS'daki tüm sütunlar
+    vehicle_ids: 'vehicle' sütunundaki indekslerin karşılığı olan kimlikler
+    """
+    rows = len(columns['vehicle'])
+    row_groups = []
+    with open(path, 'wb') as f:
+        f.write(_FILE_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION))
+        for start in range(0, rows, row_group_rows):
+            end = min(start + row_group_rows, rows)
+            chunks = {}
+            for name in COLUMN_NAMES:
+                part = columns[name][start:end]
+                data = zlib.compress(_column_bytes(part), COMPRESSION_LEVEL)
+                low, high = _value_range(part)
+                chunks[name] = {'offset': f.tell(), 'length': len(data), 'min': low, 'max': high}
+                f.write(data)
+            row_groups.append({'rows': end - start, 'columns': chunks})
+
+        footer = json.dumps({
+            'schema': [[name, dtype, typecode] for name, dtype, typecode in COLUMNS],
+            'rows': rows,
+            'vehicle_ids': list(vehicle_ids),
+            'metadata': metadata or {},
+            'row_groups': row_groups,
+        }, allow_nan=True).encode('utf-8')
+        footer_offset = f.tell()
+        f.write(footer)
+        f.write(_TRAILER.pack(footer_offset, len(footer), COLUMNAR_MAGIC))
+    return path
+
+
+def export_recorder(recorder, path, metadata=None):
+    """TrajectoryRecorder'da tutulan kayıtları sütunlu dosyaya yaz"""
+    columns = {name: recorder.column(name) for name in COLUMN_NAMES}
+    return write_columnar(path, columns, recorder.vehicle_ids, metadata)
+
+
+def _empty_columns():
+    return {name: array.array(typecode) for name, _, typecode in COLUMNS}
+
+
+def _float_or_nan(value):
+    return float(value) if value not in (None, '') else float('nan')
+
+
+def columns_from_csv(csv_path):
+    """
+    ambulance_positions_*.csv dosyasını sütunlara çevir
+
+    Eski dosyalarda olmayan sim_time/speed NaN, filtered 0 olur.
+    Returns:
+        (sütunlar, araç kimlikleri)
+    """
+    columns = _empty_columns()
+    vehicle_ids = []
+    index_of = {}
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            vehicle_id = row['vehicle_id']
+            index = index_of.get(vehicle_id)
+            if index is None:
+                index = index_of[vehicle_id] = len(vehicle_ids)
+                vehicle_ids.append(vehicle_id)
+            columns['vehicle'].append(index)
+            columns['step'].append(int(row['step']))
+            columns['time'].append(_float_or_nan(row.get('sim_time')))
+            columns['x'].append(float(row['sumo_x']))
+            columns['y'].append(float(row['sumo_y']))
+            columns['lat'].append(float(row['gps_lat']))
+            columns['lon'].append(float(row['gps_lon']))
+            columns['speed'].append(_float_or_nan(row.get('speed')))
+            columns['filtered'].append(int(row.get('filtered') or 0))
+    return columns, vehicle_ids
+
+
+def columns_from_stream(trj_path):
+    """Akışlı ikili yörünge dosyasını (--trajectory-out) sütunlara çevir"""
+    from trajectory_writer import read_binary_trajectory
+
+    columns = _empty_columns()
+    vehicle_ids = []
+    index_of = {}
+    for row in read_binary_trajectory(trj_path):
+        index = index_of.get(row.vehicle_id)
+        if index is None:
+            index = index_of[row.vehicle_id] = len(vehicle_ids)
+            vehicle_ids.append(row.vehicle_id)
+        columns['vehicle'].append(index)
+        for name, value in zip(COLUMN_NAMES[1:], row[1:]):
+            columns[name].append(value)
+    return columns, vehicle_ids
+
+
+def convert_file(source, output_dir=None):
+    """CSV veya akış dosyasını yanına (veya output_dir'e) .trjc olarak dönüştür"""
+    if source.lower().endswith('.csv'):
+        columns, vehicle_ids = columns_from_csv(source)
+    else:
+        columns, vehicle_ids = columns_from_stream(source)
+    base = os.path.splitext(os.path.basename(source))[0] + COLUMNAR_EXTENSION
+    target = os.path.join(output_dir or os.path.dirname(source), base)
+    return write_columnar(target, columns, vehicle_ids, {'source': os.path.basename(source)})
+
+
+# ================================
+# OKUMA (mmap)
+# ================================
+
+class ColumnarTrajectory:
+    """
+    mmap ile açılan sütunlu yörünge dosyası
+
+    Footer açılışta okunur; read() sadece istenen sütunların parçalarını
+    mmap'ten doğrudan açar. Zaman aralığı verilirse 'time' sütununun min/maks
+    istatistiği ile aralık dışındaki satır grupları hiç okunmaz.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _FILE_HEADER.unpack_from(self._mmap, 0)
+        footer_offset, footer_length, end_magic = _TRAILER.unpack_from(
+            self._mmap, len(self._mmap) - _TRAILER.size)
+        if magic != COLUMNAR_MAGIC or end_magic != COLUMNAR_MAGIC or version != COLUMNAR_VERSION:
+            self.close()
+            raise ValueError(f"Geçersiz sütunlu yörünge dosyası: {path}")
+        footer = json.loads(self._mmap[footer_offset:footer_offset + footer_length])
+        self.rows = footer['rows']
+        self.vehicle_ids = footer['vehicle_ids']
+        self.metadata = footer['metadata']
+        self.row_groups = footer['row_groups']
+        self.columns = [name for name, _, _ in footer['schema']]
+        self._types = {name: (dtype, typecode) for name, dtype, typecode in footer['schema']}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def _decode(self, name, chunk):
+        data = zlib.decompress(memoryview(self._mmap)[chunk['offset']:chunk['offset'] + chunk['length']])
+        dtype, typecode = self._types[name]
+        if np is not None:
+            return np.frombuffer(data, dtype=np.dtype(dtype).newbyteorder('<'))
+        values = array.array(typecode)
+        values.frombytes(data)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def read(self, columns=None, time_range=None):
+        """
+        Seçilen sütunları oku
+
+        columns: sütun adları (varsayılan: hepsi)
+        time_range: (t_başlangıç, t_bitiş) - sadece bu aralıkla kesişen satır grupları
+        Returns:
+            {sütun adı: numpy dizisi (veya numpy yoksa array.array)}
+        """
+        columns = list(columns or self.columns)
+        parts = {name: [] for name in columns}
+        for group in self.row_groups:
+            if time_range is not None:
+                stats = group['columns']['time']
+                if stats['max'] is not None and (stats['max'] < time_range[0] or stats['min'] > time_range[1]):
+                    continue
+            for name in columns:
+                parts[name].append(self._decode(name, group['columns'][name]))
+
+        result = {}
+        for name in columns:
+            dtype, typecode = self._types[name]
+            if np is not None:
+                result[name] = np.concatenate(parts[name]) if parts[name] else np.zeros(0, dtype=dtype)
+            else:
+                values = array.array(typecode)
+                for part in parts[name]:
+                    values.extend(part)
+                result[name] = values
+        return result
+
+
+def read_runs(paths, columns=None, time_range=None):
+    """
+    Birden fazla çalıştırma dosyasını tek tabloda birleştir
+
+    Her dosyanın araç indeksleri ortak bir kimlik listesine çevrilir ve
+    satırın hangi dosyadan geldiği 'run' sütununda tutulur.
+    Returns:
+        ({sütun adı: dizi, 'run': dizi}, araç kimlikleri, dosya yolları)
+    """
+    columns = list(columns or COLUMN_NAMES)
+    read_columns = columns if 'vehicle' in columns else columns + ['vehicle']
+    vehicle_ids = []
+    index_of = {}
+    parts = {name: [] for name in columns + ['run']}
+    for run, path in enumerate(paths):
+        with ColumnarTrajectory(path) as table:
+            data = table.read(read_columns, time_range)
+            remap = []
+            for vehicle_id in table.vehicle_ids:
+                if vehicle_id not in index_of:
+                    index_of[vehicle_id] = len(vehicle_ids)
+                    vehicle_ids.append(vehicle_id)
+                remap.append(index_of[vehicle_id])
+            rows = len(data['vehicle'])
+            if np is not None:
+                if 'vehicle' in columns:
+                    data['vehicle'] = np.asarray(remap, dtype=_DTYPES['vehicle'])[data['vehicle']]
+                parts['run'].append(np.full(rows, run, dtype='uint32'))
+            else:
+                if 'vehicle' in columns:
+                    data['vehicle'] = array.array(_TYPECODES['vehicle'], (remap[i] for i in data['vehicle']))
+                parts['run'].append(array.array('I', [run]) * rows)
+            for name in columns:
+                parts[name].append(data[name])
+
+    result = {}
+    for name, pieces in parts.items():
+        if np is not None:
+            dtype = 'uint32' if name == 'run' else _DTYPES[name]
+            result[name] = np.concatenate(pieces) if pieces else np.zeros(0, dtype=dtype)
+        else:
+            values = array.array('I' if name == 'run' else _TYPECODES[name])
+            for piece in pieces:
+                values.extend(piece)
+            result[name] = values
+    return result, vehicle_ids, list(paths)
+
+
+# ================================
+# KOMUT SATIRI
+# ================================
+
+def print_info(path):
+    with ColumnarTrajectory(path) as table:
+        compressed = sum(chunk['length'] for group in table.row_groups
+                         for chunk in group['columns'].values())
+        raw = table.rows * sum(array.array(typecode).itemsize for _, typecode in table._types.values())
+        print(f"📦 {path}: {table.rows} satır, {len(table.row_groups)} satır grubu, "
+              f"araçlar: {', '.join(table.vehicle_ids)}")
+        print(f"   {raw / 1024:.1f} KB ham -> {compressed / 1024:.1f} KB sıkıştırılmış, "
+              f"üst veri: {table.metadata}")
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options] FILE...")
+    optParser.add_option("--output-dir", type="string", default=None,
+                         help="Write converted .trjc files here (default: next to the source)")
+    optParser.add_option("--info", action="store_true", default=False,
+                         help="Print a summary of the given .trjc files instead of converting")
+    options, paths = optParser.parse_args(args)
+    if not paths:
+        optParser.error("no input files")
+    return options, paths
+
+
+def main(args=None):
+    options, patterns = get_options(args)
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+
+    if options.info:
+        for path in paths:
+            print_info(path)
+        return 0
+
+    if options.output_dir:
+        os.makedirs(options.output_dir, exist_ok=True)
+    for path in paths:
+        target = convert_file(path, options.output_dir)
+        print(f"✅ {path} -> {target} ({os.path.getsize(path) / 1024:.1f} KB -> "
+              f"{os.path.getsize(target) / 1024:.1f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
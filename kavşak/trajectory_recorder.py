@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sütunlu Yörünge Kaydedici - SUMO GPS Ambulans Projesi
+Bu modül ambulans pozisyonlarını satır başına sözlük yerine tipli sütunlarda
+(araç indeksi, adım, simülasyon zamanı, x, y, lat, lon, hız, filtre bayrağı)
+tutar. Sütunlar sabit boyutlu parçalar (chunk) halinde önceden ayrılır;
+parça dolunca yenisi eklenir, mevcut veri kopyalanmaz. Araç kimlikleri küçük
+tamsayılara çevrilir (intern).
+
+Parçalar tipli array.array'lerdir (tek eleman yazımı numpy skaler
+atamasından hızlıdır); NumPy kuruluysa column() bunları kopyasız numpy
+görünümleri üzerinden birleştirir. Satır başına 43 bayt: 24 saatlik 1 Hz
+kayıt ~3.7 MB tutar.
+
+Bir yazıcı (sink, bkz. trajectory_writer.py) verilirse kayıtlar simülasyon
+sürerken gruplar halinde ona aktarılır; retain=False ile yazılmış parçalar
+bellekten atılır ve bellek kullanımı sabit kalır.
+"""
+
+import array
+import math
+import time
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsiyonel, column() array.array döndürür
+    np = None
+
+DEFAULT_CHUNK_ROWS = 4096
+DEFAULT_FLUSH_INTERVAL = 1.0  # saniye, maybe_flush() için
+
+# sütun adı -> (numpy dtype, array.array tip kodu)
+COLUMNS = (
+    ('vehicle', 'uint16', 'H'),
+    ('step', 'uint32', 'I'),
+    ('time', 'float64', 'd'),
+    ('x', 'float32', 'f'),
+    ('y', 'float32', 'f'),
+    ('lat', 'float64', 'd'),   # float32 enlemde ~4e-6 derece çözünürlük verir, yetersiz
+    ('lon', 'float64', 'd'),
+    ('speed', 'float32', 'f'),
+    ('filtered', 'uint8', 'B'),
+)
+COLUMN_NAMES = tuple(name for name, _, _ in COLUMNS)
+
+TrajectoryRow = namedtuple('TrajectoryRow', ['vehicle_id', 'step', 'time', 'x', 'y',
+                                             'lat', 'lon', 'speed', 'filtered'])
+
+
+def _new_column(typecode, rows):
+    return array.array(typecode, bytes(array.array(typecode).itemsize * rows))
+
+
+class TrajectoryRecorder:
+    """
+    Parçalı, büyüyebilen sütunlu yörünge tablosu
+
+    append() amortize O(1)'dir ve satır başına Python nesnesi ayırmaz; değerler
+    doğrudan mevcut parçanın sütunlarına yazılır. Okuma tarafı (rows(),
+    column()) dışa aktarım ve raporlama içindir; retain=False iken sadece
+    bellekte kalan (henüz atılmamış) parçaları görür.
+
+    sink: write_batch(vehicle_ids, columns) ve close() sunan yazıcı. Parça
+    dolduğunda ve flush() çağrıldığında yazılmamış satırlar ona aktarılır.
+    """
+
+    def __init__(self, chunk_rows=DEFAULT_CHUNK_ROWS, sink=None, retain=True,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.chunk_rows = chunk_rows
+        self.sink = sink
+        self.retain = retain
+        self.flush_interval = flush_interval
+        self.vehicle_ids = []        # indeks -> araç kimliği
+        self._vehicle_index = {}     # araç kimliği -> indeks
+        self._vehicle_counts = []    # indeks -> satır sayısı
+        # indeks -> aracın son kaydı, hız hesabı için
+        self._last_x = []
+        self._last_y = []
+        self._last_time = []
+        self._chunks = []
+        self._columns = None         # mevcut parçanın sütunları (COLUMNS sırasıyla)
+        self._fill = chunk_rows      # mevcut parçadaki dolu satır sayısı
+        self._flushed = chunk_rows   # mevcut parçada sink'e aktarılmış satır sayısı
+        self._last_flush = time.monotonic()
+        self._rows = 0
+
+    def __len__(self):
+        return self._rows
+
+    def __bool__(self):
+        return self._rows > 0
+
+    def intern(self, vehicle_id):
+        """Araç kimliğinin küçük tamsayı indeksini döndür (yoksa ekle)"""
+        index = self._vehicle_index.get(vehicle_id)
+        if index is None:
+            index = self._vehicle_index[vehicle_id] = len(self.vehicle_ids)
+            self.vehicle_ids.append(vehicle_id)
+            self._vehicle_counts.append(0)
+            self._last_x.append(0.0)
+            self._last_y.append(0.0)
+            self._last_time.append(None)
+        return index
+
+    def _grow(self):
+        self.flush()
+        if not self.retain:
+            self._chunks = []
+        self._columns = [_new_column(typecode, self.chunk_rows) for _, _, typecode in COLUMNS]
+        self._chunks.append(self._columns)
+        self._fill = 0
+        self._flushed = 0
+
+    def flush(self):
+        """Yazılmamış satırları sink'e aktar (sink yoksa bir şey yapmaz)"""
+        self._last_flush = time.monotonic()
+        if self.sink is None or self._fill <= self._flushed:
+            return
+        start, end = self._flushed, self._fill
+        self.sink.write_batch(list(self.vehicle_ids), [column[start:end] for column in self._columns])
+        self._flushed = end
+
+    def maybe_flush(self):
+        """Son aktarımdan bu yana flush_interval geçtiyse flush() (döngüde her adım çağrılabilir)"""
+        if self.sink is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def close(self):
+        """Kalan satırları aktar ve sink'i kapat"""
+        if self.sink is not None:
+            self.flush()
+            self.sink.close()
+
+    def append(self, vehicle_id, step, sim_time, x, y, lat, lon, speed=None, filtered=False):
+        """
+        Bir pozisyon kaydı ekle
+
+        speed verilmezse aynı aracın önceki kaydına olan mesafe / zaman farkından
+        hesaplanır (ilk kayıtta ve zaman ilerlemediyse NaN).
+        """
+        index = self.intern(vehicle_id)
+        if self._fill == self.chunk_rows:
+            self._grow()
+
+        if speed is None:
+            last_time = self._last_time[index]
+            if last_time is not None and sim_time > last_time:
+                speed = math.hypot(x - self._last_x[index], y - self._last_y[index]) / (sim_time - last_time)
+            else:
+                speed = math.nan
+        self._last_x[index] = x
+        self._last_y[index] = y
+        self._last_time[index] = sim_time
+
+        row = self._fill
+        vehicle, steps, times, xs, ys, lats, lons, speeds, flags = self._columns
+        vehicle[row] = index
+        steps[row] = step
+        times[row] = sim_time
+        xs[row] = x
+        ys[row] = y
+        lats[row] = lat
+        lons[row] = lon
+        speeds[row] = speed
+        flags[row] = 1 if filtered else 0
+
+        self._fill += 1
+        self._rows += 1
+        self._vehicle_counts[index] += 1
+
+    def count(self, vehicle_id=None):
+        """Toplam veya tek bir aracın kayıt sayısı"""
+        if vehicle_id is None:
+            return self._rows
+        index = self._vehicle_index.get(vehicle_id)
+        return 0 if index is None else self._vehicle_counts[index]
+
+    @property
+    def nbytes(self):
+        """Sütun parçalarının kapladığı bellek (bayt)"""
+        row_size = sum(array.array(typecode).itemsize for _, _, typecode in COLUMNS)
+        return len(self._chunks) * self.chunk_rows * row_size
+
+    def _filled_chunks(self):
+        for i, columns in enumerate(self._chunks):
+            rows = self._fill if i == len(self._chunks) - 1 else self.chunk_rows
+            yield columns, rows
+
+    def column(self, name, vehicle_id=None):
+        """
+        Bir sütunun dolu kısmını tek dizi olarak döndür (numpy veya array.array)
+
+        vehicle_id verilirse sadece o aracın satırları döner.
+        """
+        col = COLUMN_NAMES.index(name)
+        _, dtype, typecode = COLUMNS[col]
+        if np is not None:
+            parts = [np.frombuffer(columns[col], dtype=dtype, count=rows)
+                     for columns, rows in self._filled_chunks()]
+            values = np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+            if vehicle_id is not None:
+                values = values[self.column('vehicle') == self._vehicle_index.get(vehicle_id, -1)]
+            return values
+        values = array.array(typecode)
+        for columns, rows in self._filled_chunks():
+            values.extend(columns[col][:rows])
+        if vehicle_id is not None:
+            index = self._vehicle_index.get(vehicle_id, -1)
+            vehicles = self.column('vehicle')
+            values = array.array(values.typecode, (v for v, i in zip(values, vehicles) if i == index))
+        return values
+
+    def chunks(self):
+        """
+        Dolu parçaları ekleme sırasıyla COLUMNS sırasındaki array.array dilimleri olarak dolaş
+
+        Toplu dışa aktarım için: satır nesnesi ve numpy skaleri oluşturmaz.
+        """
+        for columns, rows in self._filled_chunks():
+            yield [column[:rows] for column in columns]
+
+    def rows(self, vehicle_id=None):
+        """Kayıtları ekleme sırasıyla TrajectoryRow olarak dolaş"""
+        only = None if vehicle_id is None else self._vehicle_index.get(vehicle_id, -1)
+        vehicle_ids = self.vehicle_ids
+        for columns in self.chunks():
+            for index, *values, flag in zip(*columns):
+                if only is not None and index != only:
+                    continue
+                yield TrajectoryRow(vehicle_ids[index], *values, bool(flag))
+
+    def clear(self):
+        """Tüm kayıtları ve araç indekslerini sil (sink korunur)"""
+        self.__init__(self.chunk_rows, self.sink, self.retain, self.flush_interval)
+
+    def __repr__(self):
+        return (f"TrajectoryRecorder({self._rows} kayıt, {len(self.vehicle_ids)} araç, "
+                f"{self.nbytes / 1024:.0f} KB)")
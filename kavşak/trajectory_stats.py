@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çevrimiçi Yörünge İstatistikleri - SUMO GPS Ambulans Projesi
+Bu modül her ambulans pozisyonu geldiğinde araç başına özet istatistikleri
+O(1) işlemle günceller: gerçek yol uzunluğu (ardışık noktalar arası
+mesafelerin toplamı), hız ve sarsıntı (jerk) yüzdelikleri, duruş sayısı ve
+durağan süre, her trafik ışığı (TLS) çevresinde geçen süre.
+
+Hız ve sarsıntı yüzdelikleri step_profiler.PhaseHistogram gibi logaritmik
+kovalı bir histogramdan çıkarılır (%1 göreli hata): kayıt başına tek bir kova
+artırımı yapılır, veri saklanmaz. Çalıştırma sonu raporu bu yüzden
+çalıştırmanın uzunluğundan bağımsız, sabit sürede hazırlanır. P2Quantile
+(Jain & Chlamtac, 1985) kova aralığı önceden bilinmeyen akışlar için
+(output_analytics, analyze_gps) burada tutulur.
+"""
+
+import math
+import os
+from bisect import bisect_right
+import xml.etree.ElementTree as ET
+
+STOP_SPEED = 0.5    # m/s, bu hızın altı durağan sayılır
+TLS_RADIUS = 75.0   # metre, runner.check_ambulance_traffic_light_control ile aynı
+SPEED_QUANTILES = (0.5, 0.9, 0.95)
+JERK_QUANTILES = (0.5, 0.95)
+
+# Yüzdelik histogramı: en küçük değerden %2 büyüyen kova sınırları (~%1 göreli hata)
+HISTOGRAM_GROWTH = 1.02
+SPEED_HISTOGRAM_MIN = 0.05   # m/s, 0.05 * 1.02^400 ≈ 137 m/s
+SPEED_HISTOGRAM_BUCKETS = 400
+JERK_HISTOGRAM_MIN = 0.01    # m/s³, 0.01 * 1.02^800 ≈ 7.6e4 m/s³
+JERK_HISTOGRAM_BUCKETS = 800
+
+
+def load_tls_positions(net_file):
+    """SUMO ağ dosyasındaki trafik ışıklı kavşakların konumları: {tls_id: (x, y)}"""
+    positions = {}
+    for _, elem in ET.iterparse(net_file):
+        if elem.tag == 'junction' and elem.get('type') == 'traffic_light':
+            positions[elem.get('id')] = (float(elem.get('x')), float(elem.get('y')))
+        elem.clear()
+    return positions
+
+
+def network_tls_positions(network_type, base_dir=None):
+    """Ağ tipinin (cross, berlin) data/<ağ>.net.xml dosyasından TLS konumları (dosya yoksa boş)"""
+    base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
+    net_file = os.path.join(base_dir, "data", f"{network_type}.net.xml")
+    if not os.path.exists(net_file):
+        return {}
+    return load_tls_positions(net_file)
+
+
+class P2Quantile:
+    """
+    Tek bir yüzdelik için P² akış tahmincisi
+
+    İlk 5 değer doğrudan saklanır; sonrasında 5 işaretçinin yükseklikleri
+    parabolik (gerekirse doğrusal) enterpolasyonla güncellenir.
+    """
+
+    __slots__ = ('p', 'count', '_heights', '_positions', '_desired', '_increments')
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        q = self._heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self._positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self._desired
+        for i in range(5):
+            desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # Parabolik tahmin, komşu işaretçilerin arasında kalmazsa doğrusal
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def value(self):
+        """Güncel tahmin (veri yoksa NaN)"""
+        if self.count == 0:
+            return math.nan
+        if self.count <= 5:
+            # Az veri: en yakın sıra
+            return self._heights[min(len(self._heights) - 1, int(round(self.p * (len(self._heights) - 1))))]
+        return self._heights[2]
+
+
+class QuantileHistogram:
+    """
+    Logaritmik kovalı yüzdelik tahmincisi
+
+    add() tek bir kova artırımıdır (P2Quantile'ın yüzdelik başına beş işaretçi
+    güncellemesi yerine, kova C'de bisect ile bulunur); value(p) kovanın üst
+    sınırını döndürür, gözlenen en büyük değerle sınırlanır. min_value altı
+    değerler ilk kovaya düşer.
+    """
+
+    __slots__ = ('edges', 'counts', 'count', 'max_value')
+
+    def __init__(self, min_value, buckets, growth=HISTOGRAM_GROWTH):
+        self.edges = [min_value * growth ** i for i in range(buckets)]
+        self.counts = [0] * (buckets + 1)
+        self.count = 0
+        self.max_value = 0.0
+
+    def add(self, x):
+        self.count += 1
+        if x > self.max_value:
+            self.max_value = x
+        self.counts[bisect_right(self.edges, x)] += 1
+
+    def value(self, p):
+        """p (0-1) yüzdeliği (veri yoksa NaN)"""
+        if not self.count:
+            return math.nan
+        rank = max(1, math.ceil(self.count * p))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.edges[index], self.max_value) if index < len(self.edges) else self.max_value
+        return self.max_value
+
+
+class VehicleStats:
+    """Tek bir aracın akış istatistikleri"""
+
+    __slots__ = ('vehicle_id', 'fixes', 'filtered_fixes', 'first', 'last', 'path_length',
+                 'stop_count', 'stopped_time', 'tls_time', 'speeds', 'jerks',
+                 '_speed', '_accel', '_moving', '_near_tls')
+
+    def __init__(self, vehicle_id):
+        self.vehicle_id = vehicle_id
+        self.fixes = 0
+        self.filtered_fixes = 0
+        self.first = None            # (zaman, x, y)
+        self.last = None
+        self.path_length = 0.0
+        self.stop_count = 0
+        self.stopped_time = 0.0
+        self.tls_time = {}           # tls_id -> saniye
+        self.speeds = QuantileHistogram(SPEED_HISTOGRAM_MIN, SPEED_HISTOGRAM_BUCKETS)
+        self.jerks = QuantileHistogram(JERK_HISTOGRAM_MIN, JERK_HISTOGRAM_BUCKETS)
+        self._speed = None
+        self._accel = None
+        self._moving = False
+        self._near_tls = ()
+
+    def update(self, sim_time, x, y, tls_points, tls_radius_sq, filtered=False):
+        """tls_points: ((tls_id, x, y), ...), tls_radius_sq: yarıçapın karesi"""
+        self.fixes += 1
+        if filtered:
+            self.filtered_fixes += 1
+        last = self.last
+        self.last = (sim_time, x, y)
+        if last is None:
+            self.first = self.last
+            self._near_tls = _tls_near(x, y, tls_points, tls_radius_sq)
+            return
+
+        dt = sim_time - last[0]
+        distance = math.hypot(x - last[1], y - last[2])
+        self.path_length += distance
+        if dt <= 0:
+            return
+
+        # Önceki fix'ten bu yana geçen süre önceki konumda geçmiş sayılır
+        if self._near_tls:
+            tls_time = self.tls_time
+            for tls_id in self._near_tls:
+                tls_time[tls_id] = tls_time.get(tls_id, 0.0) + dt
+        if tls_points:
+            self._near_tls = _tls_near(x, y, tls_points, tls_radius_sq)
+
+        speed = distance / dt
+        self.speeds.add(speed)
+
+        if speed < STOP_SPEED:
+            self.stopped_time += dt
+            if self._moving:
+                self.stop_count += 1
+            self._moving = False
+        else:
+            self._moving = True
+
+        if self._speed is not None:
+            accel = (speed - self._speed) / dt
+            if self._accel is not None:
+                self.jerks.add(abs(accel - self._accel) / dt)
+            self._accel = accel
+        self._speed = speed
+
+    @property
+    def duration(self):
+        return self.last[0] - self.first[0] if self.first else 0.0
+
+    def summary(self):
+        """Rapor için sözlük (sabit süre)"""
+        straight = math.hypot(self.last[1] - self.first[1], self.last[2] - self.first[2]) if self.first else 0.0
+        return {
+            'vehicle_id': self.vehicle_id,
+            'fixes': self.fixes,
+            'filtered_fixes': self.filtered_fixes,
+            'duration': self.duration,
+            'start': self.first[1:] if self.first else None,
+            'end': self.last[1:] if self.last else None,
+            'path_length': self.path_length,
+            'straight_line_distance': straight,
+            'mean_speed': self.path_length / self.duration if self.duration > 0 else math.nan,
+            'max_speed': self.speeds.max_value,
+            'speed_percentiles': {p: self.speeds.value(p) for p in SPEED_QUANTILES},
+            'jerk_percentiles': {p: self.jerks.value(p) for p in JERK_QUANTILES},
+            'stop_count': self.stop_count,
+            'stopped_time': self.stopped_time,
+            'tls_time': dict(self.tls_time),
+        }
+
+
+def _tls_near(x, y, tls_points, radius_sq):
+    near = ()
+    for tls_id, tx, ty in tls_points:
+        dx, dy = x - tx, y - ty
+        if dx * dx + dy * dy <= radius_sq:
+            near += (tls_id,)
+    return near
+
+
+class TrajectoryStats:
+    """
+    Araç başına çevrimiçi istatistikler
+
+    update() runner.add_position_to_table'dan her kayıtta çağrılır.
+    tls_positions: {tls_id: (x, y)}, TLS çevresinde geçen süre için.
+    """
+
+    def __init__(self, tls_positions=None, tls_radius=TLS_RADIUS):
+        self.tls_radius = tls_radius
+        self.tls_positions = tls_positions
+        self.vehicles = {}
+
+    @property
+    def tls_radius(self):
+        return self._tls_radius
+
+    @tls_radius.setter
+    def tls_radius(self, radius):
+        self._tls_radius = radius
+        self._tls_radius_sq = radius * radius
+
+    @property
+    def tls_positions(self):
+        return self._tls_positions
+
+    @tls_positions.setter
+    def tls_positions(self, positions):
+        self._tls_positions = dict(positions or {})
+        # Sıcak yolda sözlük/tuple açma yerine düz demetler
+        self._tls_points = tuple((tls_id, tx, ty) for tls_id, (tx, ty) in self._tls_positions.items())
+
+    def update(self, vehicle_id, sim_time, x, y, filtered=False):
+        stats = self.vehicles.get(vehicle_id)
+        if stats is None:
+            stats = self.vehicles[vehicle_id] = VehicleStats(vehicle_id)
+        stats.update(sim_time, x, y, self._tls_points, self._tls_radius_sq, filtered)
+
+    def __len__(self):
+        return len(self.vehicles)
+
+    def summaries(self):
+        return [stats.summary() for stats in self.vehicles.values()]
+
+    def clear(self):
+        self.vehicles = {}
+
+    def __repr__(self):
+        return f"TrajectoryStats({len(self.vehicles)} araç, {len(self.tls_positions)} TLS)"
+
+
+def format_summary(summary):
+    """Tek aracın özetini rapor satırlarına çevir"""
+    lines = [f"📍 {summary['vehicle_id'].upper()}: {summary['fixes']} kayıt, "
+             f"{summary['duration']:.1f} s"]
+    if summary['start'] is not None:
+        lines.append(f"   🎯 Başlangıç: ({summary['start'][0]:.2f}, {summary['start'][1]:.2f})  "
+                     f"🏁 Bitiş: ({summary['end'][0]:.2f}, {summary['end'][1]:.2f})")
+    lines.append(f"   📏 Yol uzunluğu: {summary['path_length']:.2f} m "
+                 f"(başlangıç-bitiş düz mesafe: {summary['straight_line_distance']:.2f} m)")
+    speeds = ", ".join(f"p{int(p * 100)} {v * 3.6:.1f}" for p, v in summary['speed_percentiles'].items())
+    lines.append(f"   🚀 Hız (km/h): ortalama {summary['mean_speed'] * 3.6:.1f}, {speeds}, "
+                 f"max {summary['max_speed'] * 3.6:.1f}")
+    jerks = ", ".join(f"p{int(p * 100)} {v:.2f}" for p, v in summary['jerk_percentiles'].items())
+    lines.append(f"   〰️ Sarsıntı (m/s³): {jerks}")
+    lines.append(f"   ⏸️ Duruş: {summary['stop_count']} kez, toplam {summary['stopped_time']:.1f} s")
+    for tls_id, seconds in sorted(summary['tls_time'].items()):
+        lines.append(f"   🚦 TLS {tls_id} çevresinde: {seconds:.1f} s")
+    if summary['filtered_fixes']:
+        lines.append(f"   🔴 Noise filtresine takılan: {summary['filtered_fixes']}")
+    return lines
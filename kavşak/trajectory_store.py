@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yörünge Deposu - SUMO GPS Ambulans Projesi
+Bu modül çalıştırma çıktılarını (ambulance_positions_*.csv, .trjc sütunlu
+dosyalar, --trajectory-out akış dosyaları) tek bir SQLite veritabanında
+toplar ve çalıştırma, araç, zaman aralığı ve konum ile sorgulanmalarını
+sağlar.
+
+  - Dosyalar artımlı eklenir: yolu, boyutu ve değişiklik zamanı aynı olan
+    dosya tekrar okunmaz, değişmişse eski satırları silinip yeniden eklenir.
+  - (araç, zaman) ve (çalıştırma, zaman) indeksleri.
+  - Konum için iki indeks: R-tree (sadece alan sorguları) ve 50 m'lik ızgara
+    hücresi ile (araç, hücre, çalıştırma) indeksi (araç + alan sorguları).
+    SQLite rtree modülü yoksa alan sorguları da ızgarayı kullanır.
+
+Kullanım:
+    python trajectory_store.py --db runs.db --ingest ambulance_positions_*.csv
+    python trajectory_store.py --db runs.db --vehicle ambulance_gps_0 \\
+        --near-junction 0 --radius 100 --runs-since 2025-06-20
+    python trajectory_store.py --db runs.db --bbox 400,400,600,600 --time 100,500
+"""
+
+import datetime
+import glob
+import math
+import optparse
+import os
+import re
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+import trajectory_columnar
+
+DEFAULT_DB = "trajectories.db"
+DEFAULT_NET_FILE = os.path.join("data", "cross.net.xml")
+INSERT_BATCH_ROWS = 10000
+GRID_CELL_SIZE = 50.0   # metre
+MAX_GRID_CELLS = 400    # daha geniş alanlarda R-tree (veya tarama) kullanılır
+_GRID_OFFSET = 1 << 15
+
+StoredPosition = namedtuple('StoredPosition', ['run_id', 'vehicle_id', 'step', 'time', 'x', 'y',
+                                               'lat', 'lon', 'speed', 'filtered'])
+
+_EPOCH_IN_NAME = re.compile(r'_(\d{9,11})(?:\.\w+)?$')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY,
+    source      TEXT UNIQUE NOT NULL,
+    size        INTEGER,
+    mtime       REAL,
+    started_at  REAL,
+    ingested_at REAL,
+    rows        INTEGER
+);
+CREATE TABLE IF NOT EXISTS vehicles (
+    vehicle     INTEGER PRIMARY KEY,
+    vehicle_id  TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    id          INTEGER PRIMARY KEY,
+    run_id      INTEGER NOT NULL REFERENCES runs(run_id),
+    vehicle     INTEGER NOT NULL REFERENCES vehicles(vehicle),
+    step        INTEGER,
+    time        REAL,
+    x           REAL,
+    y           REAL,
+    lat         REAL,
+    lon         REAL,
+    speed       REAL,
+    filtered    INTEGER,
+    cell        INTEGER
+);
+CREATE INDEX IF NOT EXISTS positions_vehicle_time ON positions (vehicle, time);
+CREATE INDEX IF NOT EXISTS positions_vehicle_cell ON positions (vehicle, cell, run_id);
+CREATE INDEX IF NOT EXISTS positions_run_time ON positions (run_id, time);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at);
+"""
+
+
+def has_rtree(conn):
+    """SQLite derlemesinde rtree modülü var mı"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.rtree_probe USING rtree(id, a, b)")
+        conn.execute("DROP TABLE temp.rtree_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def run_started_at(path):
+    """Dosya adındaki epoch (ambulance_positions_<epoch>.csv) veya değişiklik zamanı"""
+    match = _EPOCH_IN_NAME.search(os.path.basename(path))
+    return float(match.group(1)) if match else os.path.getmtime(path)
+
+
+def junction_position(junction_id, net_file=DEFAULT_NET_FILE):
+    """SUMO ağ dosyasından kavşak koordinatını oku"""
+    for _, elem in ET.iterparse(net_file):
+        if elem.tag == 'junction' and elem.get('id') == junction_id:
+            return float(elem.get('x')), float(elem.get('y'))
+        elem.clear()
+    raise KeyError(f"Kavşak bulunamadı: {junction_id} ({net_file})")
+
+
+def _read_columns(path):
+    """Desteklenen çıktı dosyasını (sütunlar, araç kimlikleri) olarak oku"""
+    if path.lower().endswith(trajectory_columnar.COLUMNAR_EXTENSION):
+        with trajectory_columnar.ColumnarTrajectory(path) as table:
+            return table.read(), table.vehicle_ids
+    if path.lower().endswith('.csv'):
+        return trajectory_columnar.columns_from_csv(path)
+    return trajectory_columnar.columns_from_stream(path)
+
+
+def grid_cell(x, y):
+    """SUMO koordinatının ızgara hücresi numarası"""
+    return ((math.floor(x / GRID_CELL_SIZE) + _GRID_OFFSET) << 16) | (math.floor(y / GRID_CELL_SIZE) + _GRID_OFFSET)
+
+
+def grid_cells(min_x, min_y, max_x, max_y):
+    """Alanı kapsayan hücreler (MAX_GRID_CELLS'i aşarsa None)"""
+    x0, x1 = math.floor(min_x / GRID_CELL_SIZE), math.floor(max_x / GRID_CELL_SIZE)
+    y0, y1 = math.floor(min_y / GRID_CELL_SIZE), math.floor(max_y / GRID_CELL_SIZE)
+    if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_GRID_CELLS:
+        return None
+    return [((ix + _GRID_OFFSET) << 16) | (iy + _GRID_OFFSET)
+            for ix in range(x0, x1 + 1) for iy in range(y0, y1 + 1)]
+
+
+def _as_list(values):
+    return values.tolist() if hasattr(values, 'tolist') else list(values)
+
+
+class TrajectoryStore:
+    """SQLite üzerinde indeksli yörünge deposu"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.rtree = has_rtree(self.conn)
+        if self.rtree:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS positions_rtree "
+                              "USING rtree(id, min_x, max_x, min_y, max_y)")
+        else:
+            print("⚠️ SQLite rtree modülü yok, alan sorguları ızgara indeksini kullanacak")
+        self.conn.commit()
+        self._vehicle_index = dict(self.conn.execute("SELECT vehicle_id, vehicle FROM vehicles"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _intern_vehicle(self, vehicle_id):
+        vehicle = self._vehicle_index.get(vehicle_id)
+        if vehicle is None:
+            vehicle = self.conn.execute("INSERT INTO vehicles (vehicle_id) VALUES (?)",
+                                        (vehicle_id,)).lastrowid
+            self._vehicle_index[vehicle_id] = vehicle
+        return vehicle
+
+    def _delete_run(self, run_id):
+        if self.rtree:
+            self.conn.execute("DELETE FROM positions_rtree WHERE id IN "
+                              "(SELECT id FROM positions WHERE run_id = ?)", (run_id,))
+        self.conn.execute("DELETE FROM positions WHERE run_id = ?", (run_id,))
+        self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def ingest(self, path):
+        """
+        Bir çıktı dosyasını depoya ekle
+
+        Returns:
+            eklenen satır sayısı (dosya değişmemişse 0)
+        """
+        source = os.path.abspath(path)
+        stat = os.stat(source)
+        existing = self.conn.execute("SELECT run_id, size, mtime FROM runs WHERE source = ?",
+                                     (source,)).fetchone()
+        if existing is not None:
+            if existing[1] == stat.st_size and existing[2] == stat.st_mtime:
+                return 0
+            self._delete_run(existing[0])
+
+        columns, vehicle_ids = _read_columns(source)
+        rows = len(columns['vehicle'])
+        with self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (source, size, mtime, started_at, ingested_at, rows) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (source, stat.st_size, stat.st_mtime, run_started_at(source), time.time(), rows)
+            ).lastrowid
+            remap = [self._intern_vehicle(vehicle_id) for vehicle_id in vehicle_ids]
+            first_id = (self.conn.execute("SELECT MAX(id) FROM positions").fetchone()[0] or 0) + 1
+
+            values = [_as_list(columns[name]) for name in trajectory_columnar.COLUMN_NAMES]
+            values[0] = [remap[i] for i in values[0]]
+            # Eski CSV'lerde sim_time yok (NaN -> SQLite'ta NULL): gps_replay gibi adım kullanılır
+            values[2] = [float(step) if math.isnan(t) else t for step, t in zip(values[1], values[2])]
+            values.append(list(map(grid_cell, values[3], values[4])))
+            for start in range(0, rows, INSERT_BATCH_ROWS):
+                end = min(start + INSERT_BATCH_ROWS, rows)
+                self.conn.executemany(
+                    "INSERT INTO positions (id, run_id, vehicle, step, time, x, y, lat, lon, speed, filtered, cell) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((first_id + i, run_id, *row)
+                     for i, row in enumerate(zip(*(column[start:end] for column in values)), start)))
+            if self.rtree:
+                self.conn.execute("INSERT INTO positions_rtree SELECT id, x, x, y, y "
+                                  "FROM positions WHERE run_id = ?", (run_id,))
+        return rows
+
+    def runs(self, since=None):
+        """[(run_id, kaynak, başlangıç zamanı, satır), ...]"""
+        sql = "SELECT run_id, source, started_at, rows FROM runs"
+        params = []
+        if since is not None:
+            sql += " WHERE started_at >= ?"
+            params.append(since)
+        return self.conn.execute(sql + " ORDER BY started_at", params).fetchall()
+
+    def query(self, run_ids=None, vehicle_id=None, time_range=None, bbox=None, near=None,
+              runs_since=None, limit=None):
+        """
+        Pozisyonları filtrele
+
+        run_ids: çalıştırma kimlikleri; runs_since: bu zamandan (epoch) sonra başlayan çalıştırmalar
+        time_range: (t_başlangıç, t_bitiş) simülasyon zamanı
+        bbox: (min_x, min_y, max_x, max_y) SUMO koordinatları
+        near: (x, y, yarıçap) - bbox ile ön eleme, sonra kesin mesafe
+        Returns:
+            [StoredPosition, ...] (çalıştırma, araç, zaman sırasıyla)
+        """
+        where = []
+        params = []
+        join = ""
+        vehicle = None
+        if vehicle_id is not None:
+            vehicle = self._vehicle_index.get(vehicle_id)
+            if vehicle is None:
+                return []
+        if runs_since is not None:
+            recent = {run_id for run_id, _, _, _ in self.runs(runs_since)}
+            run_ids = recent if run_ids is None else recent.intersection(run_ids)
+        if run_ids is not None:
+            run_ids = sorted(set(run_ids))
+            if not run_ids:
+                return []
+        if near is not None:
+            x, y, radius = near
+            bbox = (x - radius, y - radius, x + radius, y + radius)
+            where.append("(p.x - ?) * (p.x - ?) + (p.y - ?) * (p.y - ?) <= ?")
+            params += [x, x, y, y, radius * radius]
+
+        # İndeks seçimi: araç + alan -> ızgara, sadece alan -> R-tree,
+        # diğerleri -> (araç, zaman) / (çalıştırma, zaman). Seçilmeyen
+        # indekslerin sütunları '+' ile yazılır ki SQLite onları kullanmasın.
+        cells = grid_cells(*bbox) if bbox is not None else None
+        use_grid = cells is not None and (vehicle is not None or not self.rtree)
+        use_rtree = bbox is not None and not use_grid and self.rtree
+        col = "+p." if (use_grid or use_rtree) else "p."
+
+        if bbox is not None:
+            min_x, min_y, max_x, max_y = bbox
+            if use_rtree:
+                # rtree koordinatları float32'ye dışa doğru yuvarlar: kesişim ile ön eleme,
+                # ardından gerçek x/y ile kesin kontrol
+                join = " JOIN positions_rtree r ON r.id = p.id"
+                where.append("r.max_x >= ? AND r.min_x <= ? AND r.max_y >= ? AND r.min_y <= ?")
+                params += [min_x, max_x, min_y, max_y]
+            if use_grid:
+                where.append(f"p.cell IN ({','.join('?' * len(cells))})")
+                params += cells
+            where.append(f"{col}x BETWEEN ? AND ? AND {col}y BETWEEN ? AND ?")
+            params += [min_x, max_x, min_y, max_y]
+        if vehicle is not None:
+            where.append("p.vehicle = ?" if use_grid else f"{col}vehicle = ?")
+            params.append(vehicle)
+        if run_ids is not None:
+            where.append(f"{'p.' if use_grid else col}run_id IN ({','.join('?' * len(run_ids))})")
+            params += run_ids
+        if time_range is not None:
+            where.append(f"{col}time BETWEEN ? AND ?")
+            params += list(time_range)
+
+        sql = ("SELECT p.run_id, v.vehicle_id, p.step, p.time, p.x, p.y, p.lat, p.lon, p.speed, p.filtered "
+               "FROM positions p JOIN vehicles v ON v.vehicle = p.vehicle" + join)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY p.run_id, p.vehicle, p.time, p.id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [StoredPosition(*row) for row in self.conn.execute(sql, params)]
+
+
+# ================================
+# KOMUT SATIRI
+# ================================
+
+def _parse_floats(text, count, name, parser):
+    try:
+        values = [float(v) for v in text.split(',')]
+    except ValueError:
+        values = []
+    if len(values) != count:
+        parser.error(f"{name}: expected {count} comma separated numbers")
+    return values
+
+
+def _parse_since(text, parser):
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.strptime(text, "%Y-%m-%d").timestamp()
+    except ValueError:
+        parser.error(f"--runs-since: expected an epoch or YYYY-MM-DD, got {text}")
+
+
+def get_options(args=None):
+    optParser = optparse.OptionParser(usage="%prog [options] [FILE...]")
+    optParser.add_option("--db", type="string", default=DEFAULT_DB,
+                         help="SQLite database file (default: %s)" % DEFAULT_DB)
+    optParser.add_option("--ingest", action="store_true", default=False,
+                         help="Add the given run outputs (.csv, .trjc, .trj) to the store")
+    optParser.add_option("--vehicle", type="string", default=None, help="Vehicle id")
+    optParser.add_option("--run", type="int", action="append", default=None, dest="runs",
+                         help="Run id (repeatable)")
+    optParser.add_option("--runs-since", type="string", default=None,
+                         help="Only runs started after this epoch or date (YYYY-MM-DD)")
+    optParser.add_option("--time", type="string", default=None, metavar="T0,T1",
+                         help="Simulation time window in seconds")
+    optParser.add_option("--bbox", type="string", default=None, metavar="X0,Y0,X1,Y1",
+                         help="SUMO coordinate bounding box")
+    optParser.add_option("--near-junction", type="string", default=None,
+                         help="Junction id from the network file, use with --radius")
+    optParser.add_option("--radius", type="float", default=100.0,
+                         help="Radius in meters for --near-junction (default: 100)")
+    optParser.add_option("--net-file", type="string", default=DEFAULT_NET_FILE,
+                         help="Network file for --near-junction (default: %s)" % DEFAULT_NET_FILE)
+    optParser.add_option("--limit", type="int", default=20,
+                         help="Rows to print (default: 20, 0 = all)")
+    options, paths = optParser.parse_args(args)
+
+    options.time_range = _parse_floats(options.time, 2, "--time", optParser) if options.time else None
+    options.bbox_values = _parse_floats(options.bbox, 4, "--bbox", optParser) if options.bbox else None
+    options.since = _parse_since(options.runs_since, optParser) if options.runs_since else None
+    if options.ingest and not paths:
+        optParser.error("--ingest needs files")
+    return options, paths
+
+
+def main(args=None):
+    options, patterns = get_options(args)
+
+    with TrajectoryStore(options.db) as store:
+        if options.ingest:
+            paths = []
+            for pattern in patterns:
+                paths.extend(sorted(glob.glob(pattern)) or [pattern])
+            total = 0
+            started = time.perf_counter()
+            for path in paths:
+                rows = store.ingest(path)
+                total += rows
+                print(f"{'✅' if rows else '⏭️'} {path}: {rows} satır")
+            print(f"📦 {len(paths)} dosya, {total} yeni satır ({time.perf_counter() - started:.2f} s)")
+            return 0
+
+        near = None
+        if options.near_junction is not None:
+            x, y = junction_position(options.near_junction, options.net_file)
+            near = (x, y, options.radius)
+        started = time.perf_counter()
+        positions = store.query(options.runs, options.vehicle, options.time_range,
+                                options.bbox_values, near, options.since)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        print(f"🔎 {len(positions)} pozisyon ({elapsed:.1f} ms)")
+        print(f"{'Run':<5} {'Araç':<18} {'Adım':<6} {'Zaman':<8} {'SUMO X':<10} {'SUMO Y':<10}")
+        for pos in positions[:options.limit or None]:
+            sim_time = f"{pos.time:<8.1f}" if pos.time is not None else f"{'-':<8}"
+            print(f"{pos.run_id:<5} {pos.vehicle_id:<18} {pos.step:<6} {sim_time} "
+                  f"{pos.x:<10.2f} {pos.y:<10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Akışlı Yörünge Yazıcısı - SUMO GPS Ambulans Projesi
+Bu modül TrajectoryRecorder'ın satır gruplarını (batch) simülasyon sürerken
+arka plandaki bir thread ile diske yazar. Böylece bellek uzun çalıştırmalarda
+sabit kalır ve SUMO çökse veya süreç öldürülse bile son grup dışındaki tüm
+kayıtlar dosyada kalır.
+
+Biçimler:
+  CSV    - export_position_table_to_csv ile aynı sütunlar, satır satır
+  ikili  - sütunlu bloklar (her blokta CRC32), kapanışta blok indeksi ve
+           bitiş kaydı (footer); footer yoksa bloklar baştan taranarak okunur
+
+İkili dosya düzeni (little-endian):
+  başlık : 'TRJB', sürüm, sütun sayısı, her sütun için (ad, array tip kodu)
+  blok   : 'BLK0', satır, yeni araç kimliği sayısı, veri uzunluğu, crc32
+           + yeni araç kimlikleri + sütunların ham değerleri (sütun sütun)
+  indeks : 'TIDX', blok sayısı, her blok için (ofset, satır, t_min, t_max)
+  bitiş  : indeks ofseti, toplam satır, 'TEND'
+"""
+
+import array
+import csv
+import io
+import math
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+from trajectory_recorder import COLUMNS, TrajectoryRow
+
+DEFAULT_FSYNC_INTERVAL = 5.0  # saniye
+DEFAULT_QUEUE_BATCHES = 64    # kuyruk doluysa simülasyon yazıcıyı bekler
+WRITE_BUFFER_SIZE = 1 << 20
+
+BINARY_MAGIC = b'TRJB'
+BINARY_VERSION = 1
+_FILE_HEADER = struct.Struct('<4sHH')
+_BLOCK_HEADER = struct.Struct('<4sIIII')
+_BLOCK_MAGIC = b'BLK0'
+_INDEX_HEADER = struct.Struct('<4sI')
+_INDEX_MAGIC = b'TIDX'
+_INDEX_ENTRY = struct.Struct('<QIdd')
+_TRAILER = struct.Struct('<QQ4s')
+_TRAILER_MAGIC = b'TEND'
+_VEHICLE_ID_LEN = struct.Struct('<H')
+
+CSV_FIELDS = ['vehicle_id', 'step', 'sumo_x', 'sumo_y', 'gps_lat', 'gps_lon',
+              'sim_time', 'speed', 'filtered']
+
+_TIME_COLUMN = [name for name, _, _ in COLUMNS].index('time')
+
+
+def csv_rows(vehicle_ids, columns):
+    """COLUMNS sırasındaki sütunlardan CSV_FIELDS sırasında satırlar üret"""
+    for index, step, sim_time, x, y, lat, lon, speed, flag in zip(*columns):
+        yield (vehicle_ids[index], step, round(x, 2), round(y, 2), round(lat, 6),
+               round(lon, 6), sim_time, '' if math.isnan(speed) else round(speed, 2), flag)
+
+
+def _little_endian(column):
+    """array.array'i little-endian baytlara çevir"""
+    if sys.byteorder == 'big':
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+class TrajectoryWriter:
+    """
+    Satır gruplarını arka plan thread'inde dosyaya yazan temel sınıf
+
+    write_batch() simülasyon thread'inden çağrılır ve sadece kuyruğa ekler.
+    Thread her grubu tamponlu dosyaya yazıp işletim sistemine aktarır (flush);
+    fsync en fazla fsync_interval saniyede bir yapılır. close() kuyruğu
+    boşaltır, biçimin kapanış kaydını yazar ve dosyayı fsync'ler.
+    """
+
+    def __init__(self, path, fsync_interval=DEFAULT_FSYNC_INTERVAL, max_batches=DEFAULT_QUEUE_BATCHES):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.rows_written = 0
+        self.batches_written = 0
+        self.error = None
+        self._file = open(path, 'wb', buffering=WRITE_BUFFER_SIZE)
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._last_fsync = time.monotonic()
+        self._closed = False
+        self.write_header()
+        self._thread = threading.Thread(target=self._worker, name="trajectory-writer", daemon=True)
+        self._thread.start()
+
+    def write_batch(self, vehicle_ids, columns):
+        """
+        Bir satır grubunu yazılmak üzere kuyruğa ekle
+
+        vehicle_ids: kaydedicinin güncel araç kimliği listesi (sadece eklenir)
+        columns: COLUMNS sırasıyla array.array kopyaları
+        """
+        if self._closed:
+            raise ValueError("TrajectoryWriter kapatıldı")
+        self._queue.put((vehicle_ids, columns))
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # hata sonrası kuyruğu boşalt, simülasyonu bloklama
+            try:
+                vehicle_ids, columns = item
+                self.write_rows(vehicle_ids, columns)
+                self._file.flush()
+                self.rows_written += len(columns[0])
+                self.batches_written += 1
+                now = time.monotonic()
+                if now - self._last_fsync >= self.fsync_interval:
+                    os.fsync(self._file.fileno())
+                    self._last_fsync = now
+            except Exception as e:
+                self.error = e
+                print(f"❌ Yörünge yazma hatası ({self.path}): {e}")
+
+    def close(self):
+        """Kuyruğu boşalt, kapanış kaydını yaz ve dosyayı kapat"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        try:
+            if self.error is None:
+                self.write_footer()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+
+    # Biçime özgü kısımlar
+    def write_header(self):
+        pass
+
+    def write_rows(self, vehicle_ids, columns):
+        raise NotImplementedError
+
+    def write_footer(self):
+        pass
+
+
+class CSVTrajectoryWriter(TrajectoryWriter):
+    """export_position_table_to_csv sütunlarıyla satır satır CSV"""
+
+    def write_header(self):
+        self._write_csv([CSV_FIELDS])
+
+    def _write_csv(self, rows):
+        text = io.StringIO()
+        csv.writer(text).writerows(rows)
+        self._file.write(text.getvalue().encode('utf-8'))
+
+    def write_rows(self, vehicle_ids, columns):
+        self._write_csv(csv_rows(vehicle_ids, columns))
+
+
+class BinaryTrajectoryWriter(TrajectoryWriter):
+    """Sütunlu, CRC'li bloklar + kapanışta blok indeksi"""
+
+    def write_header(self):
+        self._offset = 0
+        self._ids_written = 0
+        self._index = []
+        header = [_FILE_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(COLUMNS))]
+        for name, _, typecode in COLUMNS:
+            encoded = name.encode('ascii')
+            header.append(bytes([len(encoded)]) + encoded + typecode.encode('ascii'))
+        self._write(b''.join(header))
+
+    def _write(self, data):
+        self._file.write(data)
+        self._offset += len(data)
+
+    def write_rows(self, vehicle_ids, columns):
+        new_ids = vehicle_ids[self._ids_written:]
+        self._ids_written = len(vehicle_ids)
+        parts = []
+        for vehicle_id in new_ids:
+            encoded = vehicle_id.encode('utf-8')
+            parts.append(_VEHICLE_ID_LEN.pack(len(encoded)) + encoded)
+        parts.extend(_little_endian(column) for column in columns)
+        payload = b''.join(parts)
+
+        rows = len(columns[0])
+        times = columns[_TIME_COLUMN]
+        self._index.append((self._offset, rows, min(times), max(times)))
+        self._write(_BLOCK_HEADER.pack(_BLOCK_MAGIC, rows, len(new_ids), len(payload),
+                                       zlib.crc32(payload)))
+        self._write(payload)
+
+    def write_footer(self):
+        index_offset = self._offset
+        parts = [_INDEX_HEADER.pack(_INDEX_MAGIC, len(self._index))]
+        parts.extend(_INDEX_ENTRY.pack(*entry) for entry in self._index)
+        parts.append(_TRAILER.pack(index_offset, sum(entry[1] for entry in self._index),
+                                   _TRAILER_MAGIC))
+        self._write(b''.join(parts))
+
+
+def open_trajectory_writer(path, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+    """Uzantıya göre yazıcı seç: .csv -> CSV, diğerleri -> ikili"""
+    if path.lower().endswith('.csv'):
+        return CSVTrajectoryWriter(path, fsync_interval)
+    return BinaryTrajectoryWriter(path, fsync_interval)
+
+
+# ================================
+# İKİLİ DOSYA OKUMA
+# ================================
+
+def _read_file_header(data):
+    magic, version, ncols = _FILE_HEADER.unpack_from(data, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Geçersiz yörünge dosyası")
+    offset = _FILE_HEADER.size
+    columns = []
+    for _ in range(ncols):
+        length = data[offset]
+        name = data[offset + 1:offset + 1 + length].decode('ascii')
+        typecode = chr(data[offset + 1 + length])
+        columns.append((name, typecode))
+        offset += length + 2
+    return columns, offset
+
+
+def read_binary_index(path):
+    """
+    Kapanış indeksini oku
+
+    Returns:
+        [(ofset, satır, t_min, t_max), ...] veya dosya düzgün kapanmadıysa None
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size < _TRAILER.size:
+            return None
+        f.seek(size - _TRAILER.size)
+        index_offset, _, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+        if magic != _TRAILER_MAGIC or index_offset >= size:
+            return None
+        f.seek(index_offset)
+        data = f.read(size - _TRAILER.size - index_offset)
+    magic, count = _INDEX_HEADER.unpack_from(data, 0)
+    if magic != _INDEX_MAGIC:
+        return None
+    return [_INDEX_ENTRY.unpack_from(data, _INDEX_HEADER.size + i * _INDEX_ENTRY.size)
+            for i in range(count)]
+
+
+def read_binary_trajectory(path):
+    """
+    İkili yörünge dosyasındaki satırları TrajectoryRow olarak dolaş
+
+    Bloklar baştan sırayla okunur; kesik veya CRC'si tutmayan ilk blokta
+    (yarıda kalmış son grup) durulur, böylece kapanmamış dosyalar da okunur.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    columns, offset = _read_file_header(data)
+    vehicle_ids = []
+    while offset + _BLOCK_HEADER.size <= len(data):
+        magic, rows, new_ids, length, crc = _BLOCK_HEADER.unpack_from(data, offset)
+        start = offset + _BLOCK_HEADER.size
+        payload = data[start:start + length]
+        if magic != _BLOCK_MAGIC or len(payload) != length or zlib.crc32(payload) != crc:
+            break
+        offset = start + length
+
+        pos = 0
+        for _ in range(new_ids):
+            (id_len,) = _VEHICLE_ID_LEN.unpack_from(payload, pos)
+            vehicle_ids.append(payload[pos + 2:pos + 2 + id_len].decode('utf-8'))
+            pos += 2 + id_len
+        values = []
+        for _, typecode in columns:
+            column = array.array(typecode)
+            size = column.itemsize * rows
+            column.frombytes(payload[pos:pos + size])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            values.append(column)
+            pos += size
+        for index, *row, flag in zip(*values):
+            yield TrajectoryRow(vehicle_ids[index], *row, bool(flag))
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+u-blox UBX Binary Protokol Çözücü - SUMO GPS Ambulans Projesi
+Bu modül ESP32 serial hattından gelen ham UBX çerçevelerini çözer ve
+NAV-PVT mesajlarını hassas zaman, hız, yön ve doğruluk bilgisi içeren
+GPS fix kayıtlarına dönüştürür.
+"""
+
+import calendar
+import struct
+import time
+from collections import namedtuple
+from itertools import accumulate
+
+# UBX çerçeve sabitleri
+UBX_SYNC = b'\xb5\x62'
+UBX_HEADER_LEN = 6          # sync(2) + class(1) + id(1) + length(2)
+UBX_CHECKSUM_LEN = 2
+UBX_MAX_PAYLOAD = 1024      # Bundan büyük uzunluk alanı = yanlış sync
+
+UBX_CLASS_NAV = 0x01
+UBX_ID_NAV_PVT = 0x07
+NAV_PVT_PAYLOAD_LEN = 92
+
+# NAV-PVT payload düzeni (u-blox 8/M8 protokol spesifikasyonu, 92 byte)
+_NAV_PVT_STRUCT = struct.Struct('<IHBBBBBBIiBBBBiiiiIIiiiiiIIHB5xihH')
+
+# Tampon başında bu kadar tüketilmiş byte birikince sıkıştır
+_COMPACT_THRESHOLD = 4096
+
+UBXFix = namedtuple('UBXFix', [
+    'itow_ms',          # GPS haftası içindeki zaman (ms)
+    'utc_time',         # UTC epoch saniye (nano düzeltmeli), geçersizse None
+    'time_accuracy_ns', # Zaman doğruluğu tahmini (ns)
+    'fix_type',         # 0=yok, 2=2D, 3=3D, 4=GNSS+DR
+    'valid',            # gnssFixOK ve kullanılabilir fix tipi
+    'satellites',       # Kullanılan uydu sayısı
+    'latitude',         # derece
+    'longitude',        # derece
+    'height_msl',       # Deniz seviyesinden yükseklik (metre)
+    'h_acc',            # Yatay doğruluk tahmini (metre)
+    'v_acc',            # Dikey doğruluk tahmini (metre)
+    'ground_speed',     # Yer hızı (m/s)
+    'heading',          # Hareket yönü (derece)
+    'speed_acc',        # Hız doğruluk tahmini (m/s)
+    'heading_acc',      # Yön doğruluk tahmini (derece)
+    'pdop',             # Position DOP
+])
+
+
+def ubx_checksum(data, start=0, end=None):
+    """UBX Fletcher-8 checksum'ını hesapla (class byte'ından payload sonuna kadar)"""
+    view = memoryview(data)
+    try:
+        section = view[start:end]
+        ck_a = sum(section) & 0xFF
+        ck_b = sum(accumulate(section)) & 0xFF
+        section.release()
+    finally:
+        view.release()
+    return ck_a, ck_b
+
+
+def build_ubx_frame(msg_class, msg_id, payload):
+    """Verilen payload için checksum'lı tam UBX çerçevesi oluştur"""
+    body = struct.pack('<BBH', msg_class, msg_id, len(payload)) + bytes(payload)
+    ck_a, ck_b = ubx_checksum(body)
+    return UBX_SYNC + body + bytes((ck_a, ck_b))
+
+
+def encode_nav_pvt(latitude, longitude, utc_time=None, itow_ms=0, fix_type=3,
+                   satellites=8, height_msl=0.0, h_acc=2.5, v_acc=4.0,
+                   ground_speed=0.0, heading=0.0, speed_acc=0.3,
+                   heading_acc=5.0, pdop=1.5):
+    """
+    NAV-PVT çerçevesi üret (test, emülatör ve kayıt dosyaları için)
+
+    Args:
+        latitude, longitude (float): Derece cinsinden konum
+        utc_time (float): UTC epoch saniye, None ise tarih/saat geçersiz işaretlenir
+    """
+    if utc_time is not None:
+        seconds = int(utc_time // 1)
+        nano = int(round((utc_time - seconds) * 1e9))
+        tm = time.gmtime(seconds)
+        year, month, day = tm.tm_year, tm.tm_mon, tm.tm_mday
+        hour, minute, sec = tm.tm_hour, tm.tm_min, tm.tm_sec
+        valid_flags = 0x07  # validDate | validTime | fullyResolved
+    else:
+        year = month = day = hour = minute = sec = nano = 0
+        valid_flags = 0x00
+
+    gnss_fix_ok = 0x01 if fix_type in (2, 3, 4) else 0x00
+    payload = _NAV_PVT_STRUCT.pack(
+        itow_ms & 0xFFFFFFFF, year, month, day, hour, minute, sec, valid_flags,
+        50, nano, fix_type, gnss_fix_ok, 0, satellites,
+        int(round(longitude * 1e7)), int(round(latitude * 1e7)),
+        int(round(height_msl * 1000)), int(round(height_msl * 1000)),
+        int(round(h_acc * 1000)), int(round(v_acc * 1000)),
+        0, 0, 0,
+        int(round(ground_speed * 1000)), int(round(heading * 1e5)),
+        int(round(speed_acc * 1000)), int(round(heading_acc * 1e5)),
+        int(round(pdop * 100)), 0, 0, 0, 0,
+    )
+    return build_ubx_frame(UBX_CLASS_NAV, UBX_ID_NAV_PVT, payload)
+
+
+def decode_nav_pvt(buffer, offset=0):
+    """Tampon içindeki NAV-PVT payload'ını kopyalamadan çöz ve UBXFix döndür"""
+    (itow, year, month, day, hour, minute, sec, valid_flags, t_acc, nano,
+     fix_type, flags, _flags2, num_sv, lon, lat, _height, h_msl, h_acc, v_acc,
+     _vel_n, _vel_e, _vel_d, g_speed, head_mot, s_acc, head_acc, p_dop,
+     _flags3, _head_veh, _mag_dec, _mag_acc) = _NAV_PVT_STRUCT.unpack_from(buffer, offset)
+
+    utc_time = None
+    if valid_flags & 0x03 == 0x03:  # validDate ve validTime
+        try:
+            utc_time = calendar.timegm((year, month, day, hour, minute, sec)) + nano * 1e-9
+        except (ValueError, OverflowError):
+            utc_time = None
+
+    return UBXFix(
+        itow_ms=itow,
+        utc_time=utc_time,
+        time_accuracy_ns=t_acc,
+        fix_type=fix_type,
+        valid=bool(flags & 0x01) and fix_type in (2, 3, 4),
+        satellites=num_sv,
+        latitude=lat * 1e-7,
+        longitude=lon * 1e-7,
+        height_msl=h_msl / 1000.0,
+        h_acc=h_acc / 1000.0,
+        v_acc=v_acc / 1000.0,
+        ground_speed=g_speed / 1000.0,
+        heading=head_mot * 1e-5,
+        speed_acc=s_acc / 1000.0,
+        heading_acc=head_acc * 1e-5,
+        pdop=p_dop / 100.0,
+    )
+
+
+class UBXStreamParser:
+    """
+    Akış halindeki serial byte'larından UBX çerçevelerini ayıklayan çözücü
+
+    Gelen byte'lar tek bir bytearray tampona eklenir; sync arama, checksum
+    doğrulama ve NAV-PVT çözme işlemleri tampon üzerinde offset ile yapılır,
+    çerçeve başına kopya oluşturulmaz. Tüketilen baş kısım ancak eşik aşılınca
+    tek seferde silinir (amortize O(1)).
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0  # Tamponda henüz işlenmemiş ilk byte
+
+        # İstatistikler
+        self.frames_ok = 0
+        self.nav_pvt_count = 0
+        self.other_frames = 0
+        self.checksum_errors = 0
+        self.bytes_discarded = 0
+
+    def feed(self, data):
+        """Yeni byte'ları ekle ve tamamlanan NAV-PVT fix'lerini liste olarak döndür"""
+        if data:
+            self._buf += data
+        fixes = []
+        self._scan(fixes)
+        return fixes
+
+    def pending_bytes(self):
+        """Henüz tam çerçeve oluşturmayan bekleyen byte sayısı"""
+        return len(self._buf) - self._pos
+
+    def _scan(self, fixes):
+        buf = self._buf
+        pos = self._pos
+        end = len(buf)
+
+        while True:
+            sync = buf.find(UBX_SYNC, pos)
+            if sync < 0:
+                # Son byte yarım sync olabilir, onu sakla
+                keep = end - 1 if end > pos and buf[end - 1] == UBX_SYNC[0] else end
+                self.bytes_discarded += keep - pos
+                pos = keep
+                break
+
+            self.bytes_discarded += sync - pos
+            pos = sync
+
+            if end - pos < UBX_HEADER_LEN:
+                break
+
+            length = buf[pos + 4] | (buf[pos + 5] << 8)
+            if length > UBX_MAX_PAYLOAD:
+                # Payload içinde rastlantısal 0xB5 0x62 - bir byte ilerle
+                pos += 1
+                self.bytes_discarded += 1
+                continue
+
+            frame_end = pos + UBX_HEADER_LEN + length + UBX_CHECKSUM_LEN
+            if frame_end > end:
+                break  # Çerçevenin geri kalanını bekle
+
+            ck_a, ck_b = ubx_checksum(buf, pos + 2, frame_end - UBX_CHECKSUM_LEN)
+            if ck_a != buf[frame_end - 2] or ck_b != buf[frame_end - 1]:
+                self.checksum_errors += 1
+                pos += 1
+                self.bytes_discarded += 1
+                continue
+
+            self.frames_ok += 1
+            msg_class = buf[pos + 2]
+            msg_id = buf[pos + 3]
+            if (msg_class == UBX_CLASS_NAV and msg_id == UBX_ID_NAV_PVT
+                    and length == NAV_PVT_PAYLOAD_LEN):
+                self.nav_pvt_count += 1
+                fixes.append(decode_nav_pvt(buf, pos + UBX_HEADER_LEN))
+            else:
+                self.other_frames += 1
+            pos = frame_end
+
+        # Tüketilmiş baş kısmı eşik aşıldığında topluca sil
+        if pos >= _COMPACT_THRESHOLD or pos == end:
+            del buf[:pos]
+            pos = 0
+        self._pos = pos
+
+    def get_stats(self):
+        """Çözücü istatistiklerini sözlük olarak döndür"""
+        return {
+            'frames_ok': self.frames_ok,
+            'nav_pvt': self.nav_pvt_count,
+            'other_frames': self.other_frames,
+            'checksum_errors': self.checksum_errors,
+            'bytes_discarded': self.bytes_discarded,
+            'pending_bytes': self.pending_bytes(),
+        }